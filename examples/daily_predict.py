@@ -659,6 +659,9 @@ class DailyPredictionPipeline:
 
     def _build_dataset(self):
         print("\n[数据] 初始化Dataset实例...")
+        dataset = self._load_infer_dataset()
+        if dataset is not None:
+            return dataset
         history_candidates = []
         default_window = self.prediction_cfg.min_history_days
         if default_window is not None:
@@ -687,12 +690,30 @@ class DailyPredictionPipeline:
             return dataset
         raise MemoryError("数据集初始化失败：所有窗口长度均触发内存不足，可尝试进一步减小样本范围。")
 
+    def _load_infer_dataset(self):
+        """复用训练时保存的 Dataset（含已拟合的处理器状态），只计算预测日所需的最小历史窗口。"""
+        if self.recorder is None:
+            return None
+        try:
+            dataset = self.recorder.load_object("dataset")
+        except Exception as err:
+            print(f"   [警告] Recorder中没有可复用的dataset，改用配置重建: {err}")
+            return None
+        if not hasattr(dataset, "setup_infer_data"):
+            return None
+        dataset.setup_infer_data(self.prediction_cfg.prediction_date, segment=self.prediction_cfg.segment)
+        print(f"[成功] 复用Recorder中的数据集，仅计算预测日: {self.prediction_cfg.prediction_date}")
+        return dataset
+
     # ------------------------------------------------------------------ #
     # 预测与结果整理
     # ------------------------------------------------------------------ #
     def _generate_predictions(self) -> pd.DataFrame:
         print("\n[预测] 执行预测...")
-        signal_record = SignalRecord(model=self.model, dataset=self.dataset, recorder=self.recorder)
+        # 预测结果按月缓存在 Recorder 中，重复运行同一交易日时不再重新预测
+        signal_record = SignalRecord(
+            model=self.model, dataset=self.dataset, recorder=self.recorder, use_pred_cache=True
+        )
         signal_record.generate()
         predictions = signal_record.load("pred.pkl")
         if isinstance(predictions, pd.Series):
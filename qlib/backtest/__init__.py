@@ -3,11 +3,17 @@
 
 from __future__ import annotations
 
+import concurrent.futures
 import copy
+import multiprocessing
+import os
+import shutil
+import tempfile
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Generator, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Generator, List, Optional, Tuple, Union
 
 import pandas as pd
+from tqdm.auto import tqdm
 
 from .account import Account
 
@@ -22,6 +28,7 @@ from ..utils import init_instance_by_config
 from .backtest import INDICATOR_METRIC, PORT_METRIC, backtest_loop, collect_data_loop
 from .decision import Order
 from .exchange import Exchange
+from .profiler import BacktestProfiler
 from .utils import CommonInfrastructure
 
 # make import more user-friendly by adding `from qlib.backtest import STH`
@@ -223,7 +230,8 @@ def backtest(
     account: Union[float, int, dict] = 1e9,
     exchange_kwargs: dict = {},
     pos_type: str = "Position",
-) -> Tuple[PORT_METRIC, INDICATOR_METRIC]:
+    profile: bool = False,
+) -> Union[Tuple[PORT_METRIC, INDICATOR_METRIC], Tuple[PORT_METRIC, INDICATOR_METRIC, pd.DataFrame]]:
     """initialize the strategy and executor, then backtest function for the interaction of the outermost strategy and
     executor in the nested decision execution
 
@@ -253,6 +261,8 @@ def backtest(
         the kwargs for initializing Exchange
     pos_type : str
         the type of Position.
+    profile : bool
+        whether to profile the execution of each level; please refer to `qlib.backtest.profiler`
 
     Returns
     -------
@@ -261,6 +271,8 @@ def backtest(
     indicator_dict: INDICATOR_METRIC
         it computes the trading indicator
         It is organized in a dict format
+    profile_df: pd.DataFrame
+        the wall time and the calls of the phases of each level; it is returned only if `profile` is True
 
     """
     trade_strategy, trade_executor = get_strategy_executor(
@@ -273,7 +285,7 @@ def backtest(
         exchange_kwargs,
         pos_type=pos_type,
     )
-    return backtest_loop(start_time, end_time, trade_strategy, trade_executor)
+    return backtest_loop(start_time, end_time, trade_strategy, trade_executor, profile=profile)
 
 
 def collect_data(
@@ -286,10 +298,12 @@ def collect_data(
     exchange_kwargs: dict = {},
     pos_type: str = "Position",
     return_value: dict | None = None,
+    profiler: BacktestProfiler | None = None,
 ) -> Generator[object, None, None]:
     """initialize the strategy and executor, then collect the trade decision data for rl training
 
-    please refer to the docs of the backtest for the explanation of the parameters
+    please refer to the docs of the backtest for the explanation of the parameters; the report of `profiler` is set as
+    `profile_df` of `return_value`
 
     Yields
     -------
@@ -306,7 +320,144 @@ def collect_data(
         exchange_kwargs,
         pos_type=pos_type,
     )
-    yield from collect_data_loop(start_time, end_time, trade_strategy, trade_executor, return_value=return_value)
+    yield from collect_data_loop(
+        start_time, end_time, trade_strategy, trade_executor, return_value=return_value, profiler=profiler
+    )
+
+
+def analyze_portfolio(portfolio_dict: PORT_METRIC) -> pd.Series:
+    """
+    the risk metrics of the excess return of the outermost executor's portfolio, the same as the ones of
+    `PortAnaRecord`
+
+    Parameters
+    ----------
+    portfolio_dict : PORT_METRIC
+        the portfolio metrics returned by `backtest`
+
+    Returns
+    -------
+    pd.Series
+        the index is (<excess_return_without_cost | excess_return_with_cost>, <metric>)
+    """
+    from ..contrib.evaluate import risk_analysis  # pylint: disable=C0415
+
+    # the executors are ordered from the outermost to the innermost
+    freq = next(iter(portfolio_dict))
+    report_normal, _ = portfolio_dict[freq]
+    excess_return = report_normal["return"] - report_normal["bench"]
+    analysis = {
+        "excess_return_without_cost": risk_analysis(excess_return, freq=freq)["risk"],
+        "excess_return_with_cost": risk_analysis(excess_return - report_normal["cost"], freq=freq)["risk"],
+    }
+    return pd.concat(analysis)
+
+
+# the exchange of the worker of `backtest_sweep`, which is shared by all the backtests run by the worker
+_sweep_exchange: Optional[Exchange] = None
+
+
+def _init_sweep_worker(qlib_config: Any, quote_cache_path: str, exchange_kwargs: dict, n_threads: int) -> None:
+    global _sweep_exchange  # pylint: disable=W0603
+    if qlib_config.registered:
+        C.register_from_C(qlib_config)
+    C["quote_cache_path"] = quote_cache_path
+    os.environ.setdefault("OMP_NUM_THREADS", str(n_threads))
+    # the quote is memory-mapped from the cache saved by the main process
+    _sweep_exchange = get_exchange(**exchange_kwargs)
+
+
+def _run_sweep_task(strategy: Union[str, dict, object, Path], backtest_kwargs: dict) -> pd.Series:
+    portfolio_dict, _ = backtest(strategy=strategy, exchange_kwargs={"exchange": _sweep_exchange}, **backtest_kwargs)
+    return analyze_portfolio(portfolio_dict)
+
+
+def backtest_sweep(
+    strategy_configs: Union[List[Union[str, dict, object, Path]], Dict[str, Union[str, dict, object, Path]]],
+    executor_config: Union[str, dict, object, Path],
+    exchange_kwargs: dict,
+    n_jobs: int = -1,
+    *,
+    start_time: Union[pd.Timestamp, str],
+    end_time: Union[pd.Timestamp, str],
+    benchmark: str = "SH000300",
+    account: Union[float, int, dict] = 1e9,
+    pos_type: str = "Position",
+    shared_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """run the independent backtests of a list of strategies (e.g. a grid of `topk` and `n_drop`) in a process pool and
+    summarize the risk metrics of each backtest
+
+    The quote of the exchange is prepared only once in the main process and saved to `shared_dir` by `QuoteCache`.
+    Each worker attaches to the memory-mapped quote once and reuses the exchange for all of its backtests, so all the
+    workers share the same physical memory of the quote.
+
+    Parameters
+    ----------
+    strategy_configs : Union[List, Dict[str, Any]]
+        the outermost strategies to backtest; each one is acceptable by `init_instance_by_config`.
+        The keys of the dict (or the positions in the list) are used as the names of the backtests.
+    executor_config : Union[str, dict, object, Path]
+        for initializing the outermost executor of each backtest.
+    exchange_kwargs : dict
+        the kwargs for initializing Exchange, which are shared by all the backtests.
+    n_jobs : int
+        the number of the workers; -1 for the number of CPUs. The backtests run in the main process if it is 1.
+    start_time, end_time, benchmark, account, pos_type :
+        the same as the ones of `backtest`.
+    shared_dir : Optional[str]
+        the directory to save the shared quote; a temporary directory (removed at last) by default.
+
+    Returns
+    -------
+    pd.DataFrame
+        the risk metrics of the backtests; one row for each strategy and the columns are the same as the index of
+        `analyze_portfolio`.
+    """
+    if isinstance(strategy_configs, dict):
+        names, strategies = list(strategy_configs.keys()), list(strategy_configs.values())
+    else:
+        names, strategies = list(range(len(strategy_configs))), list(strategy_configs)
+    exchange_kwargs = {"start_time": start_time, "end_time": end_time, **exchange_kwargs, "quote_cache": True}
+    backtest_kwargs = {
+        "start_time": start_time,
+        "end_time": end_time,
+        "executor": executor_config,
+        "benchmark": benchmark,
+        "account": account,
+        "pos_type": pos_type,
+    }
+    n_workers = min((os.cpu_count() or 1) if n_jobs < 0 else n_jobs, len(strategies))
+
+    tmp_dir = None
+    if shared_dir is None:
+        shared_dir = tmp_dir = tempfile.mkdtemp(prefix="qlib_shared_quote_")
+    cache_path = C.get("quote_cache_path", None)
+    C["quote_cache_path"] = shared_dir
+    global _sweep_exchange  # pylint: disable=W0603
+    try:
+        # the quote is prepared and saved by the main process only once
+        _sweep_exchange = get_exchange(**exchange_kwargs)
+        if n_workers <= 1:
+            results = [_run_sweep_task(strategy, backtest_kwargs) for strategy in tqdm(strategies, desc="backtest")]
+        else:
+            n_threads = max((os.cpu_count() or 1) // n_workers, 1)
+            logger.info(f"Backtest {len(strategies)} strategies with {n_workers} workers.")
+            # the workers are spawned, so they never inherit the locks or the thread pools of the main process
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_sweep_worker,
+                initargs=(C, shared_dir, exchange_kwargs, n_threads),
+            ) as executor:
+                futures = [executor.submit(_run_sweep_task, strategy, backtest_kwargs) for strategy in strategies]
+                results = [future.result() for future in tqdm(futures, desc="backtest")]
+    finally:
+        _sweep_exchange = None
+        C["quote_cache_path"] = cache_path
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return pd.DataFrame(results, index=pd.Index(names, tupleize_cols=False, name="strategy"))
 
 
 def format_decisions(
@@ -346,4 +497,4 @@ def format_decisions(
     return res
 
 
-__all__ = ["Order", "backtest", "get_strategy_executor"]
+__all__ = ["BacktestProfiler", "Order", "backtest", "backtest_sweep", "get_strategy_executor"]
@@ -2,17 +2,18 @@
 # Licensed under the MIT License.
 from __future__ import annotations
 
-import copy
 from typing import Dict, List, Optional, Tuple, cast
 
+import numpy as np
 import pandas as pd
 
 from qlib.utils import init_instance_by_config
 
-from .decision import BaseTradeDecision, Order
+from .decision import BaseTradeDecision, Order, OrderBatch
 from .exchange import Exchange
 from .high_performance_ds import BaseOrderIndicator
 from .position import BasePosition
+from .profiler import BacktestProfiler, profile_phase
 from .report import Indicator, PortfolioMetrics
 
 """
@@ -222,6 +223,33 @@ class Account:
             self.current_position.update_order(order, trade_val, cost, trade_price)
             self._update_state_from_order(order, trade_val, cost, trade_price)
 
+    def update_order_batch(
+        self, order_batch: OrderBatch, trade_val: np.ndarray, cost: np.ndarray, trade_price: np.ndarray
+    ) -> None:
+        """
+        The batch version of `update_order`; the orders are updated one after another.
+        """
+        if self.current_position.skip_update():
+            return
+
+        port_metr_enabled = self.is_port_metr_enabled()
+        is_sell = order_batch.direction == Order.SELL
+        if port_metr_enabled:
+            # like `update_order`, the price of the sold stock is the one before updating the position, and the price
+            # of the bought stock is the one after updating the position
+            profit = np.zeros(len(order_batch))
+            trade_amount = trade_val / trade_price
+            price = [self.current_position.get_stock_price(code) for code in order_batch.stock_id[is_sell]]
+            profit[is_sell] = trade_val[is_sell] - np.array(price, dtype=float) * trade_amount[is_sell]
+        self.current_position.update_order_batch(order_batch, trade_val, cost, trade_price)
+        if port_metr_enabled:
+            price = [self.current_position.get_stock_price(code) for code in order_batch.stock_id[~is_sell]]
+            profit[~is_sell] = np.array(price, dtype=float) * trade_amount[~is_sell] - trade_val[~is_sell]
+            for _trade_val, _cost, _profit in zip(trade_val.tolist(), cost.tolist(), profit.tolist()):
+                self.accum_info.add_turnover(_trade_val)
+                self.accum_info.add_cost(_cost)
+                self.accum_info.add_return_value(_profit)  # note here do not consider cost
+
     def update_current_position(
         self,
         trade_start_time: pd.Timestamp,
@@ -279,7 +307,7 @@ class Account:
             trade_start_time=trade_start_time,
             trade_end_time=trade_end_time,
             account_value=now_account_value,
-            cash=self.current_position.position["cash"],
+            cash=self.current_position.get_cash(),
             return_rate=(now_earning + now_cost) / last_account_value,
             # here use earning to calculate return, position's view, earning consider cost, true return
             # in order to make same definition with original backtest in evaluate.py
@@ -294,11 +322,11 @@ class Account:
         """update history position"""
         now_account_value = self.current_position.calculate_value()
         # set now_account_value to position
-        self.current_position.position["now_account_value"] = now_account_value
+        self.current_position.update_account_value(now_account_value)
         self.current_position.update_weight_all()
         # update hist_positions
-        # note use deepcopy
-        self.hist_positions[trade_start_time] = copy.deepcopy(self.current_position)
+        # note use a snapshot, which will not be changed by the following trading
+        self.hist_positions[trade_start_time] = self.current_position.snapshot()
 
     def update_indicator(
         self,
@@ -346,6 +374,8 @@ class Account:
         inner_order_indicators: List[BaseOrderIndicator] = [],
         decision_list: List[Tuple[BaseTradeDecision, pd.Timestamp, pd.Timestamp]] = [],
         indicator_config: dict = {},
+        profiler: Optional[BacktestProfiler] = None,
+        level: int = 0,
     ) -> None:
         """update account at each trading bar step
 
@@ -376,6 +406,10 @@ class Account:
             The inner level
         indicator_config : dict, optional
             config of calculating indicators, by default {}
+        profiler : Optional[BacktestProfiler], optional
+            the profiler timing the settlement, the metrics and the indicator phases of the level, by default None
+        level : int, optional
+            the level of the executor, by default 0
         """
         if atomic is True and trade_info is None:
             raise ValueError("trade_info is necessary in atomic executor")
@@ -383,24 +417,27 @@ class Account:
             raise ValueError("inner_order_indicators is necessary in un-atomic executor")
 
         # update current position and hold bar count in each bar end
-        self.update_current_position(trade_start_time, trade_end_time, trade_exchange)
+        with profile_phase(profiler, level, "settlement"):
+            self.update_current_position(trade_start_time, trade_end_time, trade_exchange)
 
         if self.is_port_metr_enabled():
             # portfolio_metrics is portfolio related analysis
-            self.update_portfolio_metrics(trade_start_time, trade_end_time)
-            self.update_hist_positions(trade_start_time)
+            with profile_phase(profiler, level, "metrics"):
+                self.update_portfolio_metrics(trade_start_time, trade_end_time)
+                self.update_hist_positions(trade_start_time)
 
         # update indicator in each bar end
-        self.update_indicator(
-            trade_start_time=trade_start_time,
-            trade_exchange=trade_exchange,
-            atomic=atomic,
-            outer_trade_decision=outer_trade_decision,
-            trade_info=trade_info,
-            inner_order_indicators=inner_order_indicators,
-            decision_list=decision_list,
-            indicator_config=indicator_config,
-        )
+        with profile_phase(profiler, level, "indicator"):
+            self.update_indicator(
+                trade_start_time=trade_start_time,
+                trade_exchange=trade_exchange,
+                atomic=atomic,
+                outer_trade_decision=outer_trade_decision,
+                trade_info=trade_info,
+                inner_order_indicators=inner_order_indicators,
+                decision_list=decision_list,
+                indicator_config=indicator_config,
+            )
 
     def get_portfolio_metrics(self) -> Tuple[pd.DataFrame, dict]:
         """get the history portfolio_metrics and positions instance"""
@@ -8,6 +8,7 @@ from typing import Dict, TYPE_CHECKING, Generator, Optional, Tuple, Union, cast
 import pandas as pd
 
 from qlib.backtest.decision import BaseTradeDecision
+from qlib.backtest.profiler import BacktestProfiler, profile_phase, profile_quotes
 from qlib.backtest.report import Indicator
 
 if TYPE_CHECKING:
@@ -28,25 +29,38 @@ def backtest_loop(
     end_time: Union[pd.Timestamp, str],
     trade_strategy: BaseStrategy,
     trade_executor: BaseExecutor,
-) -> Tuple[PORT_METRIC, INDICATOR_METRIC]:
+    profile: bool = False,
+) -> Union[Tuple[PORT_METRIC, INDICATOR_METRIC], Tuple[PORT_METRIC, INDICATOR_METRIC, pd.DataFrame]]:
     """backtest function for the interaction of the outermost strategy and executor in the nested decision execution
 
     please refer to the docs of `collect_data_loop`
 
+    Parameters
+    ----------
+    profile : bool
+        whether to profile the execution of each level; please refer to `qlib.backtest.profiler`
+
     Returns
     -------
     portfolio_dict: PORT_METRIC
         it records the trading portfolio_metrics information
     indicator_dict: INDICATOR_METRIC
         it computes the trading indicator
+    profile_df: pd.DataFrame
+        the report of `BacktestProfiler`; it is returned only if `profile` is True
     """
     return_value: dict = {}
-    for _decision in collect_data_loop(start_time, end_time, trade_strategy, trade_executor, return_value):
+    profiler = BacktestProfiler() if profile else None
+    for _decision in collect_data_loop(
+        start_time, end_time, trade_strategy, trade_executor, return_value, profiler=profiler
+    ):
         pass
 
     portfolio_dict = cast(PORT_METRIC, return_value.get("portfolio_dict"))
     indicator_dict = cast(INDICATOR_METRIC, return_value.get("indicator_dict"))
 
+    if profile:
+        return portfolio_dict, indicator_dict, cast(pd.DataFrame, return_value.get("profile_df"))
     return portfolio_dict, indicator_dict
 
 
@@ -56,6 +70,7 @@ def collect_data_loop(
     trade_strategy: BaseStrategy,
     trade_executor: BaseExecutor,
     return_value: dict | None = None,
+    profiler: BacktestProfiler | None = None,
 ) -> Generator[BaseTradeDecision, Optional[BaseTradeDecision], None]:
     """Generator for collecting the trade decision data for rl training
 
@@ -74,6 +89,8 @@ def collect_data_loop(
         the outermost executor
     return_value : dict
         used for backtest_loop
+    profiler : BacktestProfiler
+        the profiler of the execution of all the levels; its report is set as `profile_df` of `return_value`
 
     Yields
     -------
@@ -83,28 +100,43 @@ def collect_data_loop(
     trade_executor.reset(start_time=start_time, end_time=end_time)
     trade_strategy.reset(level_infra=trade_executor.get_level_infra())
 
-    with tqdm(total=trade_executor.trade_calendar.get_trade_len(), desc="backtest loop") as bar:
+    all_executors = trade_executor.get_all_executors()
+    if profiler is not None:
+        profiler.reset(freqs=["{}{}".format(*Freq.parse(executor.time_per_step)) for executor in all_executors])
+    for executor in all_executors:
+        # the profiler of the last backtest is cleared if this one is not profiled
+        executor.common_infra.reset_infra(profiler=profiler)
+
+    # the quotes are counted only in the profiled backtest
+    quotes = [executor.trade_exchange.quote for executor in all_executors if executor.trade_exchange is not None]
+    with profile_quotes(profiler, quotes), tqdm(
+        total=trade_executor.trade_calendar.get_trade_len(), desc="backtest loop"
+    ) as bar:
         _execute_result = None
         while not trade_executor.finished():
-            _trade_decision: BaseTradeDecision = trade_strategy.generate_trade_decision(_execute_result)
+            with profile_phase(profiler, 0, "decision"):
+                _trade_decision: BaseTradeDecision = trade_strategy.generate_trade_decision(_execute_result)
             _execute_result = yield from trade_executor.collect_data(_trade_decision, level=0)
-            trade_strategy.post_exe_step(_execute_result)
+            with profile_phase(profiler, 0, "decision"):
+                trade_strategy.post_exe_step(_execute_result)
             bar.update(1)
         trade_strategy.post_upper_level_exe_step()
 
     if return_value is not None:
-        all_executors = trade_executor.get_all_executors()
-
         portfolio_dict: PORT_METRIC = {}
         indicator_dict: INDICATOR_METRIC = {}
 
-        for executor in all_executors:
+        for level, executor in enumerate(all_executors):
             key = "{}{}".format(*Freq.parse(executor.time_per_step))
             if executor.trade_account.is_port_metr_enabled():
-                portfolio_dict[key] = executor.trade_account.get_portfolio_metrics()
+                with profile_phase(profiler, level, "metrics"):
+                    portfolio_dict[key] = executor.trade_account.get_portfolio_metrics()
 
-            indicator_df = executor.trade_account.get_trade_indicator().generate_trade_indicators_dataframe()
+            with profile_phase(profiler, level, "indicator"):
+                indicator_df = executor.trade_account.get_trade_indicator().generate_trade_indicators_dataframe()
             indicator_obj = executor.trade_account.get_trade_indicator()
             indicator_dict[key] = (indicator_df, indicator_obj)
 
         return_value.update({"portfolio_dict": portfolio_dict, "indicator_dict": indicator_dict})
+        if profiler is not None:
+            return_value.update({"profile_df": profiler.report()})
@@ -8,7 +8,7 @@ from datetime import time
 from enum import IntEnum
 
 # try to fix circular imports when enabling type hints
-from typing import TYPE_CHECKING, Any, ClassVar, Generic, List, Optional, Tuple, TypeVar, Union, cast
+from typing import TYPE_CHECKING, Any, ClassVar, Generic, Iterator, List, Optional, Tuple, TypeVar, Union, cast
 
 from qlib.backtest.utils import TradeCalendarManager
 from qlib.data.data import Cal
@@ -151,6 +151,129 @@ class Order:
         return pd.Timestamp(self.start_time.replace(hour=0, minute=0, second=0))
 
 
+class OrderBatch:
+    """
+    The columnar representation of a batch of orders.
+
+    The i-th order is (`stock_id[i]`, `amount[i]`, `direction[i]`, `start_time[i]`, `end_time[i]`) with the same
+    meaning as the fields of `Order`. The batch is dealt by `Exchange.deal_order_batch` at once, so no `Order` is
+    created for each order on the hot path of the execution (e.g. the minute-level nested execution).
+
+    `deal_amount` and `factor` are the results set by the backtest system like the ones of `Order`; `factor` is NaN if
+    the order is not tradable.
+
+    NOTE: each stock should appear at most once in a batch, like the orders in a step of the strategies.
+    """
+
+    def __init__(
+        self,
+        stock_id: Union[List[str], np.ndarray],
+        amount: Union[List[float], np.ndarray],
+        direction: Union[List[OrderDir], np.ndarray],
+        start_time: Union[pd.Timestamp, List[pd.Timestamp], np.ndarray, None] = None,
+        end_time: Union[pd.Timestamp, List[pd.Timestamp], np.ndarray, None] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        stock_id, amount, direction :
+            the fields of the orders; `amount` is non-negative and adjusted.
+        start_time, end_time :
+            the interval of the orders; a single value for all the orders or one for each order.
+            The missing values (None or NaT) are set by `TradeDecisionWO` like `Order`.
+        """
+        self.stock_id = np.asarray(stock_id, dtype=object)
+        self.amount = np.asarray(amount, dtype=np.float64)
+        self.direction = np.asarray(direction, dtype=np.int8)
+        if not np.isin(self.direction, [OrderDir.SELL, OrderDir.BUY]).all():
+            raise NotImplementedError("direction not supported, `Order.SELL` for sell, `Order.BUY` for buy")
+        self.start_time = self._to_time_array(start_time)
+        self.end_time = self._to_time_array(end_time)
+        self.deal_amount = np.zeros(len(self))
+        self.factor = np.full(len(self), np.nan)
+
+    def _to_time_array(self, time: Union[pd.Timestamp, List[pd.Timestamp], np.ndarray, None]) -> np.ndarray:
+        if time is None or np.ndim(time) == 0:
+            return np.full(len(self), pd.Timestamp(time).to_datetime64(), dtype="datetime64[ns]")
+        return np.array(pd.DatetimeIndex(time).values, dtype="datetime64[ns]")
+
+    @classmethod
+    def from_orders(cls, orders: List[Order]) -> OrderBatch:
+        return cls(
+            stock_id=[order.stock_id for order in orders],
+            amount=[order.amount for order in orders],
+            direction=[order.direction for order in orders],
+            start_time=[order.start_time for order in orders],
+            end_time=[order.end_time for order in orders],
+        )
+
+    def to_orders(self) -> List[Order]:
+        """the orders of the batch, including the results"""
+        orders = []
+        for i in range(len(self)):
+            order = Order(
+                stock_id=self.stock_id[i],
+                amount=float(self.amount[i]),
+                direction=OrderDir(self.direction[i]),
+                start_time=pd.Timestamp(self.start_time[i]),
+                end_time=pd.Timestamp(self.end_time[i]),
+            )
+            order.deal_amount = float(self.deal_amount[i])
+            order.factor = None if np.isnan(self.factor[i]) else float(self.factor[i])
+            orders.append(order)
+        return orders
+
+    def __len__(self) -> int:
+        return len(self.stock_id)
+
+    def __getitem__(self, idx: Union[np.ndarray, slice]) -> OrderBatch:
+        """the sub-batch of the orders selected by `idx` (e.g. a mask or the indices)"""
+        batch = OrderBatch.__new__(OrderBatch)
+        for name in ("stock_id", "amount", "direction", "start_time", "end_time", "deal_amount", "factor"):
+            setattr(batch, name, getattr(self, name)[idx])
+        return batch
+
+    def fill_time(self, start_time: pd.Timestamp, end_time: pd.Timestamp) -> None:
+        """set the missing time of the orders"""
+        self.start_time[np.isnat(self.start_time)] = pd.Timestamp(start_time).to_datetime64()
+        self.end_time[np.isnat(self.end_time)] = pd.Timestamp(end_time).to_datetime64()
+
+    def groupby_time(self) -> Iterator[Tuple[pd.Timestamp, pd.Timestamp, np.ndarray]]:
+        """
+        Iterate the groups of the orders of the same interval.
+
+        Returns
+        -------
+        Iterator[Tuple[pd.Timestamp, pd.Timestamp, np.ndarray]]:
+            (start_time, end_time, the indices of the orders)
+        """
+        if len(self) == 0:
+            return
+        if (self.start_time == self.start_time[0]).all() and (self.end_time == self.end_time[0]).all():
+            # the orders in a step share the same interval in most cases
+            yield pd.Timestamp(self.start_time[0]), pd.Timestamp(self.end_time[0]), np.arange(len(self))
+            return
+        groups = pd.DataFrame({"start": self.start_time, "end": self.end_time}).groupby(["start", "end"]).indices
+        for (start_time, end_time), idx in groups.items():
+            yield pd.Timestamp(start_time), pd.Timestamp(end_time), idx
+
+    @property
+    def sign(self) -> np.ndarray:
+        """`+1` for buying and `-1` for selling, the same as `Order.sign`"""
+        return self.direction.astype(np.int64) * 2 - 1
+
+    @property
+    def amount_delta(self) -> np.ndarray:
+        return self.amount * self.sign
+
+    @property
+    def deal_amount_delta(self) -> np.ndarray:
+        return self.deal_amount * self.sign
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}[{len(self)}]"
+
+
 class OrderHelper:
     """
     Motivation
@@ -552,13 +675,26 @@ class TradeDecisionWO(BaseTradeDecision[Order]):
 
     def __init__(
         self,
-        order_list: List[Order],
+        order_list: Union[List[Order], OrderBatch],
         strategy: BaseStrategy,
         trade_range: Union[Tuple[int, int], TradeRange, None] = None,
     ) -> None:
+        """
+        Parameters
+        ----------
+        order_list : Union[List[Order], OrderBatch]
+            the orders of the decision. If an `OrderBatch` is given, the decision is executed by the batch at once
+            (please refer to `Exchange.deal_order_batch`) and `order_list` is generated from it only for reading.
+        """
         super().__init__(strategy, trade_range=trade_range)
-        self.order_list = cast(List[Order], order_list)
         start, end = strategy.trade_calendar.get_step_time()
+        self.order_batch: Optional[OrderBatch] = None
+        self._order_list: Optional[List[Order]] = None
+        if isinstance(order_list, OrderBatch):
+            self.order_batch = order_list
+            self.order_batch.fill_time(start, end)
+            return
+        self._order_list = cast(List[Order], order_list)
         for o in order_list:
             assert isinstance(o, Order)
             if o.start_time is None:
@@ -566,15 +702,33 @@ class TradeDecisionWO(BaseTradeDecision[Order]):
             if o.end_time is None:
                 o.end_time = end
 
+    @property
+    def order_list(self) -> List[Order]:
+        if self._order_list is None:
+            self._order_list = cast(OrderBatch, self.order_batch).to_orders()
+        return self._order_list
+
+    @order_list.setter
+    def order_list(self, order_list: List[Order]) -> None:
+        self._order_list = order_list
+        self.order_batch = None
+
     def get_decision(self) -> List[Order]:
         return self.order_list
 
+    def empty(self) -> bool:
+        if self.order_batch is not None:
+            # Zero amount order will be treated as empty
+            return not (self.order_batch.amount > 1e-6).any()
+        return super().empty()
+
     def __repr__(self) -> str:
+        n_orders = len(self.order_batch) if self.order_batch is not None else len(self.order_list)
         return (
             f"class: {self.__class__.__name__}; "
             f"strategy: {self.strategy}; "
             f"trade_range: {self.trade_range}; "
-            f"order_list[{len(self.order_list)}]"
+            f"order_list[{n_orders}]"
         )
 
 
@@ -586,7 +740,7 @@ class TradeDecisionWithDetails(TradeDecisionWO):
 
     def __init__(
         self,
-        order_list: List[Order],
+        order_list: Union[List[Order], OrderBatch],
         strategy: BaseStrategy,
         trade_range: Optional[Tuple[int, int]] = None,
         details: Optional[Any] = None,
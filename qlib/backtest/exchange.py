@@ -21,8 +21,9 @@ from ..config import C
 from ..constant import REG_CN, REG_TW
 from ..data.data import D
 from ..log import get_module_logger
-from .decision import Order, OrderDir, OrderHelper
-from .high_performance_ds import BaseQuote, NumpyQuote
+from .decision import Order, OrderBatch, OrderDir, OrderHelper
+from .high_performance_ds import BaseQuote, PanelQuote
+from .quote_cache import QuoteCache
 
 
 class Exchange:
@@ -33,7 +34,6 @@ class Exchange:
     #   - if $close is None, the stock on that day is regarded as suspended.
     # - $factor is for rounding to the trading unit;
     #   - if any $factor is missing when $close exists, trading unit rounding will be disabled
-    quote_df: pd.DataFrame
 
     def __init__(
         self,
@@ -50,7 +50,8 @@ class Exchange:
         min_cost: float = 5.0,
         impact_cost: float = 0.0,
         extra_quote: pd.DataFrame = None,
-        quote_cls: Type[BaseQuote] = NumpyQuote,
+        quote_cls: Type[BaseQuote] = PanelQuote,
+        quote_cache: bool = False,
         **kwargs: Any,
     ) -> None:
         """__init__
@@ -127,6 +128,9 @@ class Exchange:
                                                 limit_buy will be set to False by default (False indicates we can buy
                                                 this target on this day).
                                     index: MultipleIndex(instrument, pd.Datetime)
+        :param quote_cache:     whether to save the prepared quote to the quote cache (`C.quote_cache_path`) and
+                                attach to the saved one of the same instruments, fields, limit threshold, time range
+                                and frequency instead of preparing it again. It is ignored if `extra_quote` is given.
         """
         self.freq = freq
         self.start_time = start_time
@@ -192,16 +196,56 @@ class Exchange:
         self.limit_threshold: Union[Tuple[str, str], float, None] = limit_threshold
         self.volume_threshold = volume_threshold
         self.extra_quote = extra_quote
+        self.quote_cls = quote_cls
+        self.quote_cache = quote_cache and extra_quote is None
+        self._quote_df: Optional[pd.DataFrame] = None
+        self.quote: Optional[BaseQuote] = None
         self.get_quote_from_qlib()
 
         # init quote by quote_df
-        self.quote_cls = quote_cls
-        self.quote: BaseQuote = self.quote_cls(self.quote_df, freq)
+        if self.quote is None:
+            self.quote = self.quote_cls(self.quote_df, freq)
+
+    @property
+    def quote_df(self) -> pd.DataFrame:
+        if self._quote_df is None and isinstance(self.quote, PanelQuote):
+            # the quote is attached to the quote cache
+            self._quote_df = self.quote.to_frame()
+        return self._quote_df
+
+    @quote_df.setter
+    def quote_df(self, quote_df: pd.DataFrame) -> None:
+        self._quote_df = quote_df
+
+    def _get_quote_cache_key(self) -> str:
+        def to_str(time: Union[pd.Timestamp, str, None]) -> Optional[str]:
+            return None if time is None else str(pd.Timestamp(time))
+
+        return QuoteCache.fingerprint(
+            self.codes,
+            sorted(self.all_fields),
+            self.limit_threshold,
+            to_str(self.start_time),
+            to_str(self.end_time),
+            self.freq,
+        )
 
     def get_quote_from_qlib(self) -> None:
         # get stock data from qlib
         if len(self.codes) == 0:
             self.codes = D.instruments()
+        if self.quote_cache:
+            cache_key = self._get_quote_cache_key()
+            cached = QuoteCache().load(cache_key, freq=self.freq)
+            if cached is not None:
+                quote, info = cached
+                self.trade_w_adj_price = info["trade_w_adj_price"]
+                if self.quote_cls is PanelQuote:
+                    self.quote = quote
+                else:
+                    self.quote_df = quote.to_frame()
+                return
+
         self.quote_df = D.features(
             self.codes,
             self.all_fields,
@@ -233,6 +277,12 @@ class Exchange:
         # update limit
         self._update_limit(self.limit_threshold)
 
+        if self.quote_cache:
+            quote = PanelQuote(self.quote_df, self.freq)
+            QuoteCache().dump(cache_key, quote, info={"trade_w_adj_price": self.trade_w_adj_price})
+            if self.quote_cls is PanelQuote:
+                self.quote = quote
+
         # concat extra_quote
         if self.extra_quote is not None:
             # process extra_quote
@@ -468,6 +518,192 @@ class Exchange:
 
         return trade_val, trade_cost, trade_price
 
+    def _get_batch_quote(self, order_batch: OrderBatch, field: str, method: str) -> np.ndarray:
+        """the quote of the stocks of the orders in their intervals; NaN is returned instead of None"""
+        res = np.full(len(order_batch), np.nan)
+        for start_time, end_time, idx in order_batch.groupby_time():
+            stock_ids = order_batch.stock_id[idx]
+            if isinstance(self.quote, PanelQuote):
+                res[idx] = self.quote.get_batch_data(stock_ids, start_time, end_time, field=field, method=method)
+            else:
+                values = [
+                    self.quote.get_data(code, start_time, end_time, field=field, method=method) for code in stock_ids
+                ]
+                res[idx] = [np.nan if v is None else v for v in values]
+        return res
+
+    def _round_amount_array_by_trade_unit(self, deal_amount: np.ndarray, factor: np.ndarray) -> np.ndarray:
+        """the vectorized version of `round_amount_by_trade_unit`"""
+        if not self.trade_w_adj_price and self.trade_unit is not None:
+            return (deal_amount * factor + 0.1) // self.trade_unit * self.trade_unit / factor
+        return deal_amount
+
+    def deal_order_batch(
+        self,
+        order_batch: OrderBatch,
+        trade_account: Account | None = None,
+        position: BasePosition | None = None,
+        dealt_order_amount: Dict[str, float] = defaultdict(float),
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Deal a batch of orders; the results are the same as dealing the orders by `deal_order` one after another.
+
+        The tradability, the deal prices, the volume limits and the costs of all the orders are calculated at once.
+        The orders are also limited by the cash at once until the first one whose cash may be not enough, then the
+        rest are dealt one by one with the updated cash.
+
+        Parameters
+        ----------
+        order_batch : OrderBatch
+            the orders to deal; `deal_amount` and `factor` of it are set **inplace**.
+        trade_account : Account | None
+            the account to update; it conflicts with `position`.
+        position : BasePosition | None
+            the position to update; it conflicts with `trade_account`.
+        dealt_order_amount : Dict[str, float]
+            the dealt amount of the stocks in the day before the batch, with the format of {stock_id: float}.
+
+        Returns
+        -------
+        (trade_val, trade_cost, trade_price) : Tuple[np.ndarray, np.ndarray, np.ndarray]
+            the trade values, the trade costs and the trade prices (NaN if not tradable) of the orders.
+        """
+        if trade_account is not None and position is not None:
+            raise ValueError("trade_account and position can only choose one")
+        if trade_account is not None:
+            position = trade_account.current_position
+        is_buy = order_batch.direction == OrderDir.BUY
+
+        # the tradability like `check_order`
+        suspended = np.isnan(self._get_batch_quote(order_batch, "$close", "ts_data_last"))
+        limit = np.where(
+            is_buy,
+            self._get_batch_quote(order_batch, "limit_buy", "all"),
+            self._get_batch_quote(order_batch, "limit_sell", "all"),
+        )
+        tradable = ~suspended & (np.nan_to_num(limit) == 0)
+
+        # the deal prices like `get_deal_price`
+        trade_price = self._get_batch_quote(order_batch, self.buy_price, "ts_data_last")
+        if self.sell_price != self.buy_price:
+            trade_price = np.where(
+                is_buy, trade_price, self._get_batch_quote(order_batch, self.sell_price, "ts_data_last")
+            )
+        invalid_price = tradable & (np.isnan(trade_price) | (trade_price <= 1e-08))
+        if invalid_price.any():
+            self.logger.warning(f"{order_batch.stock_id[invalid_price]}: invalid deal price, setting it to close price")
+            close = self._get_batch_quote(order_batch, "$close", "ts_data_last")
+            trade_price = np.where(invalid_price, close, trade_price)
+        total_trade_val = self._get_batch_quote(order_batch, "$volume", "sum") * trade_price
+        factor = self._get_batch_quote(order_batch, "$factor", "ts_data_last")
+
+        # the volume limits like `_clip_amount_by_volume`
+        deal_amount = order_batch.amount.copy()
+        dealt_amount = np.array([dealt_order_amount.get(code, 0.0) for code in order_batch.stock_id], dtype=float)
+        for mask, vol_limit in ((is_buy, self.buy_vol_limit), (~is_buy, self.sell_vol_limit)):
+            if vol_limit is None or not mask.any():
+                continue
+            vol_limit_num = []
+            for limit_type, field in vol_limit:
+                if limit_type == "current":
+                    vol_limit_num.append(self._get_batch_quote(order_batch, field, "sum"))
+                elif limit_type == "cum":
+                    vol_limit_num.append(self._get_batch_quote(order_batch, field, "ts_data_last") - dealt_amount)
+                else:
+                    raise ValueError(f"{limit_type} is not supported")
+            clipped = np.maximum(np.minimum(np.minimum.reduce(vol_limit_num), deal_amount), 0)
+            deal_amount = np.where(mask, clipped, deal_amount)
+
+        trade_val = deal_amount * trade_price
+        with np.errstate(divide="ignore", invalid="ignore"):
+            adj_cost_ratio = np.where(
+                (total_trade_val == 0) | np.isnan(total_trade_val),
+                self.impact_cost,
+                self.impact_cost * (trade_val / total_trade_val) ** 2,
+            )
+        cost_ratio = np.where(is_buy, self.open_cost, self.close_cost) + adj_cost_ratio
+
+        if position is not None:
+            # the stocks can't be sold more than the position
+            current_amount = np.array(
+                [position.get_stock_amount(code) if position.check_stock(code) else 0 for code in order_batch.stock_id],
+                dtype=float,
+            )
+            sell_round = ~is_buy & ~np.isclose(deal_amount, current_amount)
+            deal_amount = np.where(
+                sell_round,
+                self._round_amount_array_by_trade_unit(np.minimum(current_amount, deal_amount), factor),
+                deal_amount,
+            )
+        # the bought amount is rounded if the cash is enough
+        full_amount = np.where(is_buy, self._round_amount_array_by_trade_unit(deal_amount, factor), deal_amount)
+        full_amount[~tradable] = 0.0
+
+        n_full = len(order_batch)
+        if position is not None:
+            # A lower bound of the cash before each order, regardless of the money from selling (which may be delayed
+            # by the settlement). The orders before the first one whose lower bound isn't enough are dealt fully.
+            trade_val = deal_amount * trade_price
+            min_cost = np.maximum(trade_val * cost_ratio, self.min_cost)
+            full_val = np.where(tradable, full_amount * trade_price, 0.0)
+            full_cost = np.where(full_val > 1e-5, np.maximum(full_val * cost_ratio, self.min_cost), 0.0)
+            spent = np.where(is_buy, full_val + full_cost, full_cost)
+            cash = position.get_cash() - np.concatenate([[0.0], np.cumsum(spent)[:-1]])
+            enough = np.where(is_buy, cash >= trade_val + min_cost, cash + trade_val >= min_cost) | ~tradable
+            n_full = len(enough) if enough.all() else int(np.argmin(enough))
+
+        trade_price[~tradable] = np.nan
+        order_batch.factor = np.where(tradable, factor, np.nan)
+        order_batch.deal_amount = full_amount
+        trade_val, trade_cost = self._get_trade_val_cost(full_amount, trade_price, cost_ratio, tradable)
+        self._update_batch(order_batch, np.arange(n_full), trade_val, trade_cost, trade_price, trade_account, position)
+
+        # the rest orders are dealt one by one with the latest cash
+        for i in range(n_full, len(order_batch)):
+            if not tradable[i]:
+                continue
+            order_batch.deal_amount[i] = self._clip_amount_by_cash(
+                OrderDir(order_batch.direction[i]),
+                deal_amount[i],
+                trade_price[i],
+                cost_ratio[i],
+                factor[i],
+                cast(BasePosition, position).get_cash(),
+            )
+            val, cost = self._get_trade_val_cost(
+                order_batch.deal_amount[i : i + 1], trade_price[i : i + 1], cost_ratio[i : i + 1], tradable[i : i + 1]
+            )
+            trade_val[i], trade_cost[i] = val[0], cost[0]
+            self._update_batch(order_batch, np.array([i]), trade_val, trade_cost, trade_price, trade_account, position)
+        return trade_val, trade_cost, trade_price
+
+    def _get_trade_val_cost(
+        self, deal_amount: np.ndarray, trade_price: np.ndarray, cost_ratio: np.ndarray, tradable: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        trade_val = np.where(tradable, deal_amount * trade_price, 0.0)
+        # no cost if nothing is dealt
+        trade_cost = np.where(trade_val > 1e-5, np.maximum(trade_val * cost_ratio, self.min_cost), 0.0)
+        return trade_val, trade_cost
+
+    @staticmethod
+    def _update_batch(
+        order_batch: OrderBatch,
+        idx: np.ndarray,
+        trade_val: np.ndarray,
+        trade_cost: np.ndarray,
+        trade_price: np.ndarray,
+        trade_account: Account | None,
+        position: BasePosition | None,
+    ) -> None:
+        """update the account or the position by the dealt orders in `idx`"""
+        idx = idx[trade_val[idx] > 1e-5]
+        if len(idx) == 0:
+            return
+        if trade_account:
+            trade_account.update_order_batch(order_batch[idx], trade_val[idx], trade_cost[idx], trade_price[idx])
+        elif position:
+            position.update_order_batch(order_batch[idx], trade_val[idx], trade_cost[idx], trade_price[idx])
+
     def get_quote_info(
         self,
         stock_id: str,
@@ -862,6 +1098,45 @@ class Exchange:
                 max_trade_amount = (cash - self.min_cost) / trade_price
         return max_trade_amount
 
+    def _clip_amount_by_cash(
+        self,
+        direction: OrderDir,
+        deal_amount: float,
+        trade_price: float,
+        cost_ratio: float,
+        factor: float | None,
+        cash: float,
+    ) -> float:
+        """return the deal amount of the order limited by the available cash; the bought amount is also rounded by
+        the trade unit.
+
+        Parameters
+        ----------
+        direction : OrderDir
+        deal_amount : float
+            the deal amount before the cash limit (i.e. after the volume limit and the position limit of selling)
+        trade_price : float
+        cost_ratio : float
+        factor : float | None
+        cash : float
+            the available cash before dealing the order
+        """
+        trade_val = deal_amount * trade_price
+        if direction == Order.SELL:
+            if cash + trade_val < max(trade_val * cost_ratio, self.min_cost):
+                self.logger.debug(f"Order clipped due to cash limitation: {deal_amount}, {cash}")
+                return 0
+            return deal_amount
+        if cash < max(trade_val * cost_ratio, self.min_cost):
+            # the cash can't even cover the cost
+            self.logger.debug(f"Order clipped due to cost higher than cash: {deal_amount}, {cash}")
+            return 0
+        elif cash < trade_val + max(trade_val * cost_ratio, self.min_cost):
+            max_buy_amount = self._get_buy_amount_by_cash_limit(trade_price, cash, cost_ratio)
+            self.logger.debug(f"Order clipped due to cash limitation: {deal_amount}, {cash}")
+            return self.round_amount_by_trade_unit(min(max_buy_amount, deal_amount), factor)
+        return self.round_amount_by_trade_unit(deal_amount, factor)
+
     def _calc_trade_info_by_order(
         self,
         order: Order,
@@ -918,33 +1193,17 @@ class Exchange:
                     )
 
                 # 校验卖出后现金是否足以覆盖成本
-                if position.get_cash() + order.deal_amount * trade_price < max(
-                    order.deal_amount * trade_price * cost_ratio,
-                    self.min_cost,
-                ):
-                    order.deal_amount = 0
-                    self.logger.debug(f"Order clipped due to cash limitation: {order}")
+                order.deal_amount = self._clip_amount_by_cash(
+                    order.direction, order.deal_amount, trade_price, cost_ratio, order.factor, position.get_cash()
+                )
 
         elif order.direction == Order.BUY:
             cost_ratio = self.open_cost + adj_cost_ratio
             if position is not None:
-                cash = position.get_cash()
-                trade_val = order.deal_amount * trade_price
-                if cash < max(trade_val * cost_ratio, self.min_cost):
-                    # 现金连成本都覆盖不了
-                    order.deal_amount = 0
-                    self.logger.debug(f"Order clipped due to cost higher than cash: {order}")
-                elif cash < trade_val + max(trade_val * cost_ratio, self.min_cost):
-                    # 现金不足以全额买入，按现金上限裁剪
-                    max_buy_amount = self._get_buy_amount_by_cash_limit(trade_price, cash, cost_ratio)
-                    order.deal_amount = self.round_amount_by_trade_unit(
-                        min(max_buy_amount, order.deal_amount),
-                        order.factor,
-                    )
-                    self.logger.debug(f"Order clipped due to cash limitation: {order}")
-                else:
-                    # 现金足够，按交易单位取整
-                    order.deal_amount = self.round_amount_by_trade_unit(order.deal_amount, order.factor)
+                # 按现金上限裁剪并按交易单位取整
+                order.deal_amount = self._clip_amount_by_cash(
+                    order.direction, order.deal_amount, trade_price, cost_ratio, order.factor, position.get_cash()
+                )
             else:
                 # 未知现金，上限不明，只按交易单位取整
                 order.deal_amount = self.round_amount_by_trade_unit(order.deal_amount, order.factor)
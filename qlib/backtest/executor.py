@@ -4,8 +4,9 @@ import copy
 from abc import abstractmethod
 from collections import defaultdict
 from types import GeneratorType
-from typing import Any, Dict, Generator, List, Tuple, Union, cast
+from typing import Any, Dict, Generator, List, Optional, Tuple, Union, cast
 
+import numpy as np
 import pandas as pd
 
 from qlib.backtest.account import Account
@@ -14,8 +15,9 @@ from qlib.log import get_module_logger
 
 from ..strategy.base import BaseStrategy
 from ..utils import init_instance_by_config
-from .decision import BaseTradeDecision, Order
+from .decision import BaseTradeDecision, Order, OrderBatch, TradeDecisionWO
 from .exchange import Exchange
+from .profiler import BacktestProfiler, profile_phase
 from .utils import CommonInfrastructure, LevelInfrastructure, TradeCalendarManager, get_start_end_idx
 
 
@@ -153,6 +155,11 @@ class BaseExecutor:
         """get trade exchange in a prioritized order"""
         return getattr(self, "_trade_exchange", None) or self.common_infra.get("trade_exchange")
 
+    @property
+    def profiler(self) -> Optional[BacktestProfiler]:
+        """the profiler shared by all the levels; None if the backtest is not profiled"""
+        return self.common_infra.get("profiler") if self.common_infra.has("profiler") else None
+
     @property
     def trade_calendar(self) -> TradeCalendarManager:
         """
@@ -252,6 +259,22 @@ class BaseExecutor:
             透传决策/子决策（供外部逐步执行）。
         """
 
+        with profile_phase(self.profiler, level, "total"):
+            res = yield from self._collect_data_with_profile(trade_decision, level)
+
+        if return_value is not None:
+            return_value.update({"execute_result": res})
+
+        return res
+
+    def _collect_data_with_profile(
+        self,
+        trade_decision: BaseTradeDecision,
+        level: int = 0,
+    ) -> Generator[Any, Any, List[object]]:
+        """the body of `collect_data`, whose phases are timed by `self.profiler`"""
+        profiler = self.profiler
+
         if self.track_data:
             yield trade_decision
 
@@ -262,10 +285,13 @@ class BaseExecutor:
             raise ValueError("atomic executor doesn't support specify `range_limit`")
 
         if self._settle_type != BasePosition.ST_NO:
-            self.trade_account.current_position.settle_start(self._settle_type)
+            with profile_phase(profiler, level, "settlement"):
+                self.trade_account.current_position.settle_start(self._settle_type)
 
         # 调用具体实现，可能返回元组或生成器
-        obj = self._collect_data(trade_decision=trade_decision, level=level)
+        # the time of the nested executors is counted by the phases of the inner levels
+        with profile_phase(profiler if atomic else None, level, "execution"):
+            obj = self._collect_data(trade_decision=trade_decision, level=level)
 
         if isinstance(obj, GeneratorType):
             yield_res = yield from obj
@@ -284,16 +310,16 @@ class BaseExecutor:
             atomic=atomic,
             outer_trade_decision=trade_decision,
             indicator_config=self.indicator_config,
+            profiler=profiler,
+            level=level,
             **kwargs,
         )
 
         self.trade_calendar.step()
 
         if self._settle_type != BasePosition.ST_NO:
-            self.trade_account.current_position.settle_commit()
-
-        if return_value is not None:
-            return_value.update({"execute_result": res})
+            with profile_phase(profiler, level, "settlement"):
+                self.trade_account.current_position.settle_commit()
 
         return res
 
@@ -428,7 +454,8 @@ class NestedExecutor(BaseExecutor):
             if not self._align_range_limit or start_idx <= sub_cal.get_trade_step() <= end_idx:
                 # if force align the range limit, skip the steps outside the decision range limit
 
-                res = self.inner_strategy.generate_trade_decision(_inner_execute_result)
+                with profile_phase(self.profiler, level + 1, "decision"):
+                    res = self.inner_strategy.generate_trade_decision(_inner_execute_result)
 
                 # NOTE: !!!!!
                 # the two lines below is for a special case in RL
@@ -462,7 +489,8 @@ class NestedExecutor(BaseExecutor):
                     level=level + 1,
                 )
                 assert isinstance(_inner_execute_result, list)
-                self.post_inner_exe_step(_inner_execute_result)
+                with profile_phase(self.profiler, level + 1, "decision"):
+                    self.post_inner_exe_step(_inner_execute_result)
                 execute_result.extend(_inner_execute_result)
 
                 inner_order_indicators.append(
@@ -582,7 +610,58 @@ class SimulatorExecutor(BaseExecutor):
             raise NotImplementedError(f"This type of input is not supported")
         return order_it
 
+    def _get_order_batch(self, order_batch: OrderBatch) -> OrderBatch:
+        """the batch version of `_get_order_iterator`"""
+        if self.trade_type == self.TT_SERIAL:
+            return order_batch
+        elif self.trade_type == self.TT_PARAL:
+            # the same as the stable sorting of the orders by `-order.direction`
+            return order_batch[np.argsort(-order_batch.direction.astype(int), kind="stable")]
+        else:
+            raise NotImplementedError(f"This type of input is not supported")
+
+    def _collect_batch_data(self, order_batch: OrderBatch) -> Tuple[List[object], dict]:
+        """
+        Deal the decision carrying an `OrderBatch` at once.
+        The execution result is `[(order_batch, trade_val, trade_cost, trade_price)]`, where the last three are arrays.
+        """
+        trade_start_time, _ = self.trade_calendar.get_step_time()
+        now_deal_day = trade_start_time.floor(freq="D")
+        if self.deal_day is None or now_deal_day > self.deal_day:
+            self.dealt_order_amount = defaultdict(float)
+            self.deal_day = now_deal_day
+
+        order_batch = self._get_order_batch(order_batch)
+        trade_val, trade_cost, trade_price = self.trade_exchange.deal_order_batch(
+            order_batch,
+            trade_account=self.trade_account,
+            dealt_order_amount=self.dealt_order_amount,
+        )
+        for stock_id, deal_amount in zip(order_batch.stock_id, order_batch.deal_amount.tolist()):
+            self.dealt_order_amount[stock_id] += deal_amount
+
+        if self.verbose:
+            for order, _trade_val, _trade_price in zip(order_batch.to_orders(), trade_val, trade_price):
+                print(
+                    "[I {:%Y-%m-%d %H:%M:%S}]: {} {}, price {:.2f}, amount {}, deal_amount {}, factor {}, "
+                    "value {:.2f}.".format(
+                        trade_start_time,
+                        "sell" if order.direction == Order.SELL else "buy",
+                        order.stock_id,
+                        _trade_price,
+                        order.amount,
+                        order.deal_amount,
+                        order.factor,
+                        _trade_val,
+                    ),
+                )
+        execute_result: List[object] = [(order_batch, trade_val, trade_cost, trade_price)]
+        return execute_result, {"trade_info": execute_result}
+
     def _collect_data(self, trade_decision: BaseTradeDecision, level: int = 0) -> Tuple[List[object], dict]:
+        if isinstance(trade_decision, TradeDecisionWO) and trade_decision.order_batch is not None:
+            return self._collect_batch_data(trade_decision.order_batch)
+
         trade_start_time, _ = self.trade_calendar.get_step_time()
         execute_result: list = []
 
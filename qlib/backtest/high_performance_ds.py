@@ -7,7 +7,7 @@ import inspect
 import logging
 from collections import OrderedDict
 from functools import lru_cache
-from typing import Any, Callable, Dict, Iterable, List, Optional, Text, Union, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Text, Tuple, Union, cast
 
 import numpy as np
 import pandas as pd
@@ -152,8 +152,11 @@ class NumpyQuote(BaseQuote):
     def get_all_stock(self):
         return self.data.keys()
 
-    @lru_cache(maxsize=512)
     def get_data(self, stock_id, start_time, end_time, field, method=None):
+        return self._get_data(stock_id, start_time, end_time, field, method)
+
+    @lru_cache(maxsize=512)
+    def _get_data(self, stock_id, start_time, end_time, field, method=None):
         # check stock id
         if stock_id not in self.get_all_stock():
             return None
@@ -204,6 +207,222 @@ class NumpyQuote(BaseQuote):
             raise ValueError(f"{method} is not supported")
 
 
+class PanelQuote(BaseQuote):
+    """
+    The quote backed by a single `[field x time x instrument]` array.
+
+    The instruments and the timestamps are mapped to integer ids, so a single value is looked up in O(1) without
+    caching, and the aggregation of a time range is vectorized over the instruments (please refer to `agg_data`).
+    The rows which don't exist in `quote_df` are tracked by a mask, so the results are the same as `NumpyQuote`.
+    """
+
+    AGG_METHODS = ("sum", "mean", "last", "all", "ts_data_last")
+
+    def __init__(self, quote_df: pd.DataFrame, freq: str, region: str = "cn") -> None:
+        """
+        Parameters
+        ----------
+        quote_df : pd.DataFrame
+            the init dataframe from qlib.
+        self.data : np.ndarray
+            the quote with the shape of [field x time x instrument]; NaN for the missing rows.
+        """
+        super().__init__(quote_df=quote_df, freq=freq)
+        inst_index = quote_df.index.get_level_values("instrument")
+        time_index = quote_df.index.get_level_values("datetime")
+        self.instruments, inst_ids = np.unique(inst_index.values, return_inverse=True)
+        self.times, time_ids = np.unique(time_index.values, return_inverse=True)
+        self.times = pd.DatetimeIndex(self.times)
+        self.fields = list(quote_df.columns)
+        self.inst_id = {inst: i for i, inst in enumerate(self.instruments)}
+        self.time_id = {t: i for i, t in enumerate(self.times)}
+        self.field_id = {field: i for i, field in enumerate(self.fields)}
+        self.bool_fields = [field for field, dtype in quote_df.dtypes.items() if pd.api.types.is_bool_dtype(dtype)]
+
+        # the values are stored in the float precision of the quote (float32 by qlib) to save memory, and returned as
+        # float64 like `NumpyQuote`; the boolean fields are stored as 0.0/1.0
+        float_dtypes = [dtype for dtype in quote_df.dtypes if pd.api.types.is_float_dtype(dtype)]
+        dtype = np.result_type(np.float32, *float_dtypes)
+        self.data = np.full((len(self.fields), len(self.times), len(self.instruments)), np.nan, dtype=dtype)
+        for i, field in enumerate(self.fields):
+            self.data[i, time_ids, inst_ids] = quote_df[field].values.astype(dtype)
+        self.valid = np.zeros((len(self.times), len(self.instruments)), dtype=bool)
+        self.valid[time_ids, inst_ids] = True
+        self._init_freq(freq, region)
+
+    def _init_freq(self, freq: str, region: str) -> None:
+        n, unit = Freq.parse(freq)
+        if unit in Freq.SUPPORT_CAL_LIST:
+            self.freq = Freq.get_timedelta(1, unit)
+        else:
+            raise ValueError(f"{freq} is not supported in PanelQuote")
+        self.region = region
+
+    @classmethod
+    def from_arrays(
+        cls,
+        data: np.ndarray,
+        valid: np.ndarray,
+        instruments: np.ndarray,
+        times: pd.DatetimeIndex,
+        fields: List[str],
+        bool_fields: List[str],
+        freq: str,
+        region: str = "cn",
+    ) -> PanelQuote:
+        """
+        Create the quote from the arrays of another `PanelQuote` (e.g. the memory-mapped arrays of the quote cache)
+        without copying them.
+        """
+        quote = cls.__new__(cls)
+        BaseQuote.__init__(quote, quote_df=None, freq=freq)
+        quote.data, quote.valid = data, valid
+        quote.instruments, quote.times, quote.fields = instruments, pd.DatetimeIndex(times), list(fields)
+        quote.bool_fields = list(bool_fields)
+        quote.inst_id = {inst: i for i, inst in enumerate(quote.instruments)}
+        quote.time_id = {t: i for i, t in enumerate(quote.times)}
+        quote.field_id = {field: i for i, field in enumerate(quote.fields)}
+        quote._init_freq(freq, region)
+        return quote
+
+    def to_frame(self) -> pd.DataFrame:
+        """the quote in the format of `quote_df`, i.e. indexed by <instrument, datetime>"""
+        inst_ids, time_ids = np.nonzero(self.valid.T)
+        index = pd.MultiIndex.from_arrays(
+            [self.instruments[inst_ids], self.times[time_ids]], names=["instrument", "datetime"]
+        )
+        df = pd.DataFrame({field: self.data[i, time_ids, inst_ids] for i, field in enumerate(self.fields)}, index=index)
+        for field in self.bool_fields:
+            df[field] = df[field].astype(bool)
+        return df
+
+    def get_all_stock(self):
+        return self.inst_id.keys()
+
+    def _get_time_range(self, start_time: pd.Timestamp, end_time: pd.Timestamp) -> Tuple[int, int]:
+        """the ids of the timestamps in [start_time, end_time], i.e. [start, end)"""
+        return self.times.searchsorted(start_time, side="left"), self.times.searchsorted(end_time, side="right")
+
+    def get_data(self, stock_id, start_time, end_time, field, method=None):
+        inst = self.inst_id.get(stock_id)
+        if inst is None:
+            return None
+        f = self.field_id[field]
+
+        if is_single_value(start_time, end_time, self.freq, self.region):
+            t = self.time_id.get(start_time)
+            if t is None or not self.valid[t, inst]:
+                return None
+            return np.float64(self.data[f, t, inst])
+
+        start, end = self._get_time_range(start_time, end_time)
+        valid = self.valid[start:end, inst]
+        if not valid.any():
+            return None
+        values = self.data[f, start:end, inst][valid].astype(np.float64)
+        if method is None:
+            return idd.SingleData(values, self.times[start:end][valid])
+        if method == "sum":
+            return np.nansum(values)
+        elif method == "mean":
+            return np.nanmean(values)
+        elif method == "last":
+            return values[-1]
+        elif method == "all":
+            return values.all()
+        elif method == "ts_data_last":
+            values = values[~np.isnan(values)]
+            return values[-1] if len(values) > 0 else None
+        else:
+            raise ValueError(f"{method} is not supported")
+
+    def agg_data(
+        self,
+        field: str,
+        start_idx: Union[np.ndarray, List[int]],
+        end_idx: Union[np.ndarray, List[int]],
+        method: str,
+        stock_ids: Optional[Iterable[str]] = None,
+    ) -> np.ndarray:
+        """
+        Aggregate the time ranges of the field for the instruments at once by `ufunc.reduceat`.
+
+        Parameters
+        ----------
+        field : str
+            the field to aggregate.
+        start_idx, end_idx : Union[np.ndarray, List[int]]
+            the time ranges `[start_idx[k], end_idx[k])` in the ids of `self.times`; they may overlap.
+        method : str
+            one of `AGG_METHODS`, the same as the `method` of `get_data`.
+        stock_ids : Optional[Iterable[str]]
+            the instruments; all the instruments in `self.instruments` by default. The unknown ones get NaN.
+
+        Returns
+        -------
+        np.ndarray
+            the aggregated values with the shape of [range x instrument]; NaN if `get_data` returns None.
+        """
+        if method not in self.AGG_METHODS:
+            raise ValueError(f"{method} is not supported")
+        values, valid = self.data[self.field_id[field]], self.valid
+        if stock_ids is not None:
+            inst = np.array([self.inst_id.get(stock_id, -1) for stock_id in stock_ids], dtype=int)
+            values, valid = values[:, inst], valid[:, inst] & (inst >= 0)
+        start_idx, end_idx = np.asarray(start_idx, dtype=int), np.asarray(end_idx, dtype=int)
+        # the pairs of (start, end) are reduced independently; the end of the last timestamp needs a padding row
+        indices = np.stack([start_idx, end_idx], axis=1).ravel()
+        n_inst = values.shape[1]
+
+        def reduceat(ufunc: np.ufunc, arr: np.ndarray, pad_value: Any) -> np.ndarray:
+            arr = np.concatenate([arr, np.full((1, n_inst), pad_value, dtype=arr.dtype)])
+            return ufunc.reduceat(arr, indices, axis=0)[::2]
+
+        empty = (reduceat(np.add, valid.astype(int), 0) == 0) | (end_idx <= start_idx)[:, None]
+        not_nan = ~np.isnan(values)
+        if method == "sum":
+            res = reduceat(np.add, np.where(not_nan, values, 0).astype(np.float64), 0)
+        elif method == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                res = reduceat(np.add, np.where(not_nan, values, 0).astype(np.float64), 0) / reduceat(
+                    np.add, not_nan.astype(int), 0
+                )
+        elif method == "all":
+            # the missing rows are ignored and NaN is regarded as True like `np.all`
+            res = reduceat(np.logical_and, (values != 0) | ~valid, True).astype(np.float64)
+        else:
+            # the last (non-NaN) row of each range
+            mask = valid if method == "last" else not_nan
+            last_idx = reduceat(np.maximum, np.where(mask, np.arange(len(values))[:, None], -1), -1)
+            empty |= last_idx < start_idx[:, None]
+            res = np.take_along_axis(np.concatenate([values, np.full((1, n_inst), np.nan)]), last_idx, axis=0)
+        res = res.astype(np.float64)
+        res[empty] = np.nan
+        return res
+
+    def get_batch_data(
+        self,
+        stock_ids: Iterable[str],
+        start_time: pd.Timestamp,
+        end_time: pd.Timestamp,
+        field: str,
+        method: str = "ts_data_last",
+    ) -> np.ndarray:
+        """
+        The batch version of `get_data` for many instruments; NaN is returned instead of None.
+        """
+        stock_ids = list(stock_ids)
+        if is_single_value(start_time, end_time, self.freq, self.region):
+            t = self.time_id.get(start_time)
+            if t is None:
+                return np.full(len(stock_ids), np.nan)
+            start, end = t, t + 1
+            method = "last"
+        else:
+            start, end = self._get_time_range(start_time, end_time)
+        return self.agg_data(field, [start], [end], method=method, stock_ids=stock_ids)[0]
+
+
 class BaseSingleMetric:
     """
     The data structure of the single metric.
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import copy
 from datetime import timedelta
 from typing import Any, Dict, List, Union
 
@@ -10,7 +11,7 @@ import numpy as np
 import pandas as pd
 
 from ..data.data import D
-from .decision import Order
+from .decision import Order, OrderBatch
 
 
 class BasePosition:
@@ -69,6 +70,22 @@ class BasePosition:
         """
         raise NotImplementedError(f"Please implement the `update_order` method")
 
+    def update_order_batch(
+        self, order_batch: OrderBatch, trade_val: np.ndarray, cost: np.ndarray, trade_price: np.ndarray
+    ) -> None:
+        """
+        The batch version of `update_order`; the orders are updated one after another.
+
+        Parameters
+        ----------
+        order_batch : OrderBatch
+            the dealt orders to update the position
+        trade_val, cost, trade_price : np.ndarray
+            the dealing results of the orders, the same as the ones of `update_order`
+        """
+        for order, _trade_val, _cost, _trade_price in zip(order_batch.to_orders(), trade_val, cost, trade_price):
+            self.update_order(order, _trade_val, _cost, _trade_price)
+
     def update_stock_price(self, stock_id: str, price: float) -> None:
         """
         Updating the latest price of the order
@@ -195,6 +212,24 @@ class BasePosition:
         """
         raise NotImplementedError(f"Please implement the `add_count_all` method")
 
+    def update_account_value(self, value: float) -> None:
+        """
+        record the value of the account at the end of each bar
+
+        Parameters
+        ----------
+        value : float
+            the value of the account
+        """
+        self.position["now_account_value"] = value
+
+    def snapshot(self) -> BasePosition:
+        """
+        Get a copy of the current position to be recorded in the history of the account.
+        The snapshot will not be changed by the following trading.
+        """
+        return copy.deepcopy(self)
+
     ST_CASH = "cash"
     ST_NO = "None"  # String is more typehint friendly than None
 
@@ -228,7 +263,8 @@ class BasePosition:
         return self.__dict__.__repr__()
 
 
-class Position(BasePosition):
+# the public methods are the interface of `BasePosition` used by the account and the executors
+class Position(BasePosition):  # pylint: disable=too-many-public-methods
     """Position
 
     current state of position
@@ -299,24 +335,7 @@ class Position(BasePosition):
         if len(stock_list) == 0:
             return
 
-        start_time = pd.Timestamp(start_time)
-        # note that start time is 2020-01-01 00:00:00 if raw start time is "2020-01-01"
-        price_end_time = start_time
-        price_start_time = start_time - timedelta(days=last_days)
-        price_df = D.features(
-            stock_list,
-            ["$close"],
-            price_start_time,
-            price_end_time,
-            freq=freq,
-            disk_cache=True,
-        ).dropna()
-        price_dict = price_df.groupby(["instrument"], group_keys=False).tail(1)["$close"].to_dict()
-
-        if len(price_dict) < len(stock_list):
-            lack_stock = set(stock_list) - set(price_dict)
-            raise ValueError(f"{lack_stock} doesn't have close price in qlib in the latest {last_days} days")
-
+        price_dict = _get_latest_close(stock_list, start_time, freq, last_days)
         for stock in stock_list:
             self.position[stock]["price"] = price_dict[stock]
         self.position["now_account_value"] = self.calculate_value()
@@ -398,6 +417,18 @@ class Position(BasePosition):
         else:
             raise NotImplementedError("do not support order direction {}".format(order.direction))
 
+    def update_order_batch(
+        self, order_batch: OrderBatch, trade_val: np.ndarray, cost: np.ndarray, trade_price: np.ndarray
+    ) -> None:
+        # the orders are updated without creating `Order`
+        for stock_id, direction, _trade_val, _cost, _trade_price in zip(
+            order_batch.stock_id, order_batch.direction, trade_val.tolist(), cost.tolist(), trade_price.tolist()
+        ):
+            if direction == Order.BUY:
+                self._buy_stock(stock_id, _trade_val, _cost, _trade_price)
+            else:
+                self._sell_stock(stock_id, _trade_val, _cost, _trade_price)
+
     def update_stock_price(self, stock_id: str, price: float) -> None:
         self.position[stock_id]["price"] = price
 
@@ -500,6 +531,282 @@ class Position(BasePosition):
             self._settle_type = self.ST_NO
 
 
+# the public methods are the interface of `BasePosition` used by the account and the executors
+class ArrayPosition(BasePosition):  # pylint: disable=too-many-public-methods
+    """
+    Position whose holdings are stored in parallel NumPy arrays.
+
+    Each stock gets a stable slot in the arrays (i.e. `inst_id`) when it enters the position for the first time, and
+    the slot is kept after the stock is sold out. So the valuation and the updating of the weights and the counts of
+    all the stocks are vectorized instead of iterating the nested dicts of `Position`.
+
+    The history of the account records the compact snapshots of the arrays (only the held stocks) instead of the
+    deep-copied dicts. `position` generates the dict in the format of `Position` from the arrays, which is only for
+    reading.
+    """
+
+    INIT_CAPACITY = 64
+
+    def __init__(self, cash: float = 0, position_dict: Dict[str, Union[Dict[str, float], float]] = {}) -> None:
+        """Init position by cash and position_dict.
+
+        Parameters
+        ----------
+        cash : float, optional
+            initial cash in account, by default 0
+        position_dict : Dict[stock_id, Union[int, dict]]
+            the same as the one of `Position`.
+        """
+        self._settle_type = self.ST_NO
+        self.init_cash = cash
+        self.cash = cash
+        self.cash_delay = 0.0
+        self.now_account_value = None
+
+        self.instruments: List[str] = []
+        self.inst_id: Dict[str, int] = {}
+        self._amount = np.zeros(self.INIT_CAPACITY)
+        # the price of the slots not held is 0, so the valuation doesn't need masking
+        self._price = np.zeros(self.INIT_CAPACITY)
+        self._weight = np.zeros(self.INIT_CAPACITY)
+        self._held = np.zeros(self.INIT_CAPACITY, dtype=bool)
+        self._count: Dict[str, np.ndarray] = {}
+
+        for stock, value in position_dict.items():
+            if stock in ("cash", "cash_delay", "now_account_value"):
+                continue
+            if not isinstance(value, dict):
+                value = {"amount": value}
+            price = value.get("price", None)
+            self._init_stock(stock, value["amount"], price)
+            idx = self.inst_id[stock]
+            self._weight[idx] = value.get("weight", 0)
+            for key, count in value.items():
+                if key.startswith("count_"):
+                    self.update_stock_count(stock, key[len("count_") :], count)
+
+        # If the stock price information is missing, the account value will not be calculated temporarily
+        if not np.isnan(self._price[self._used_slots]).any():
+            self.now_account_value = self.calculate_value()
+
+    @property
+    def _used_slots(self) -> slice:
+        return slice(0, len(self.instruments))
+
+    def _get_id(self, stock_id: str) -> int:
+        idx = self.inst_id.get(stock_id)
+        if idx is None or not self._held[idx]:
+            raise KeyError("{} not in current position".format(stock_id))
+        return idx
+
+    def _get_new_id(self, stock_id: str) -> int:
+        idx = self.inst_id.get(stock_id)
+        if idx is not None:
+            return idx
+        idx = len(self.instruments)
+        if idx == len(self._amount):
+            # double the capacity of the arrays
+            capacity = 2 * max(idx, 1)
+            for name in ("_amount", "_price", "_weight", "_held"):
+                arr = getattr(self, name)
+                setattr(self, name, np.concatenate([arr, np.zeros(capacity - len(arr), dtype=arr.dtype)]))
+            for bar, arr in self._count.items():
+                self._count[bar] = np.concatenate([arr, np.zeros(capacity - len(arr))])
+        self.instruments.append(stock_id)
+        self.inst_id[stock_id] = idx
+        return idx
+
+    def fill_stock_value(self, start_time: Union[str, pd.Timestamp], freq: str, last_days: int = 30) -> None:
+        """fill the stock value by the close price of latest last_days from qlib; the same as `Position`"""
+        lack_price = np.isnan(self._price[self._used_slots])
+        if not lack_price.any():
+            return
+        stock_list = [self.instruments[i] for i in np.flatnonzero(lack_price)]
+        price_dict = _get_latest_close(stock_list, start_time, freq, last_days)
+        for stock in stock_list:
+            self._price[self.inst_id[stock]] = price_dict[stock]
+        self.now_account_value = self.calculate_value()
+
+    def _init_stock(self, stock_id: str, amount: float, price: float | None = None) -> None:
+        idx = self._get_new_id(stock_id)
+        self._held[idx] = True
+        self._amount[idx] = amount
+        self._price[idx] = np.nan if price is None else price
+        self._weight[idx] = 0  # update the weight in the end of the trade date
+        for arr in self._count.values():
+            arr[idx] = 0
+
+    def _buy_stock(self, stock_id: str, trade_val: float, cost: float, trade_price: float) -> None:
+        trade_amount = trade_val / trade_price
+        if not self.check_stock(stock_id):
+            self._init_stock(stock_id=stock_id, amount=trade_amount, price=trade_price)
+        else:
+            # exist, add amount
+            self._amount[self.inst_id[stock_id]] += trade_amount
+
+        self.cash -= trade_val + cost
+
+    def _sell_stock(self, stock_id: str, trade_val: float, cost: float, trade_price: float) -> None:
+        trade_amount = trade_val / trade_price
+        idx = self._get_id(stock_id)
+        if np.isclose(self._amount[idx], trade_amount):
+            # Selling all the stocks
+            self._del_stock(stock_id)
+        else:
+            # decrease the amount of stock
+            self._amount[idx] -= trade_amount
+            # check if to delete
+            if self._amount[idx] < -1e-5:
+                raise ValueError(
+                    "only have {} {}, require {}".format(self._amount[idx] + trade_amount, stock_id, trade_amount),
+                )
+
+        new_cash = trade_val - cost
+        if self._settle_type == self.ST_CASH:
+            self.cash_delay += new_cash
+        elif self._settle_type == self.ST_NO:
+            self.cash += new_cash
+        else:
+            raise NotImplementedError(f"This type of input is not supported")
+
+    def _del_stock(self, stock_id: str) -> None:
+        idx = self._get_id(stock_id)
+        self._held[idx] = False
+        self._amount[idx] = self._price[idx] = self._weight[idx] = 0
+        for arr in self._count.values():
+            arr[idx] = 0
+
+    def check_stock(self, stock_id: str) -> bool:
+        idx = self.inst_id.get(stock_id)
+        return idx is not None and bool(self._held[idx])
+
+    def update_order(self, order: Order, trade_val: float, cost: float, trade_price: float) -> None:
+        if order.direction == Order.BUY:
+            self._buy_stock(order.stock_id, trade_val, cost, trade_price)
+        elif order.direction == Order.SELL:
+            self._sell_stock(order.stock_id, trade_val, cost, trade_price)
+        else:
+            raise NotImplementedError("do not support order direction {}".format(order.direction))
+
+    def update_order_batch(
+        self, order_batch: OrderBatch, trade_val: np.ndarray, cost: np.ndarray, trade_price: np.ndarray
+    ) -> None:
+        # the orders are updated without creating `Order`
+        for stock_id, direction, _trade_val, _cost, _trade_price in zip(
+            order_batch.stock_id, order_batch.direction, trade_val.tolist(), cost.tolist(), trade_price.tolist()
+        ):
+            if direction == Order.BUY:
+                self._buy_stock(stock_id, _trade_val, _cost, _trade_price)
+            else:
+                self._sell_stock(stock_id, _trade_val, _cost, _trade_price)
+
+    def update_stock_price(self, stock_id: str, price: float) -> None:
+        self._price[self._get_id(stock_id)] = price
+
+    def update_stock_count(self, stock_id: str, bar: str, count: float) -> None:
+        idx = self._get_id(stock_id)
+        if bar not in self._count:
+            self._count[bar] = np.zeros(len(self._amount))
+        self._count[bar][idx] = count
+
+    def update_stock_weight(self, stock_id: str, weight: float) -> None:
+        self._weight[self._get_id(stock_id)] = weight
+
+    def calculate_stock_value(self) -> float:
+        return float(self._amount[self._used_slots] @ self._price[self._used_slots])
+
+    def calculate_value(self) -> float:
+        return self.calculate_stock_value() + self.cash + self.cash_delay
+
+    def get_stock_list(self) -> List[str]:
+        return [self.instruments[i] for i in np.flatnonzero(self._held[self._used_slots])]
+
+    def get_stock_price(self, code: str) -> float:
+        return self._price[self._get_id(code)]
+
+    def get_stock_amount(self, code: str) -> float:
+        return self._amount[self.inst_id[code]] if self.check_stock(code) else 0
+
+    def get_stock_count(self, code: str, bar: str) -> float:
+        """the days the account has been hold, it may be used in some special strategies"""
+        idx = self._get_id(code)
+        return self._count[bar][idx] if bar in self._count else 0
+
+    def get_stock_weight(self, code: str) -> float:
+        return self._weight[self._get_id(code)]
+
+    def get_cash(self, include_settle: bool = False) -> float:
+        return self.cash + self.cash_delay if include_settle else self.cash
+
+    def get_stock_amount_dict(self) -> dict:
+        """generate stock amount dict {stock_id : amount of stock}"""
+        idx = np.flatnonzero(self._held[self._used_slots])
+        return dict(zip([self.instruments[i] for i in idx], self._amount[idx].tolist()))
+
+    def _get_stock_weight(self, only_stock: bool = False) -> np.ndarray:
+        value = self.calculate_stock_value() if only_stock else self.calculate_value()
+        return self._amount[self._used_slots] * self._price[self._used_slots] / value
+
+    def get_stock_weight_dict(self, only_stock: bool = False) -> dict:
+        """generate stock weight dict {stock_id : value weight of stock in the position}; the same as `Position`"""
+        idx = np.flatnonzero(self._held[self._used_slots])
+        return dict(zip([self.instruments[i] for i in idx], self._get_stock_weight(only_stock)[idx].tolist()))
+
+    def add_count_all(self, bar: str) -> None:
+        if bar not in self._count:
+            self._count[bar] = np.zeros(len(self._amount))
+        self._count[bar][self._held] += 1
+
+    def update_weight_all(self) -> None:
+        self._weight[self._used_slots] = self._get_stock_weight()
+
+    def update_account_value(self, value: float) -> None:
+        self.now_account_value = value
+
+    def settle_start(self, settle_type: str) -> None:
+        assert self._settle_type == self.ST_NO, "Currently, settlement can't be nested!!!!!"
+        self._settle_type = settle_type
+
+    def settle_commit(self) -> None:
+        if self._settle_type != self.ST_NO:
+            if self._settle_type == self.ST_CASH:
+                self.cash += self.cash_delay
+                self.cash_delay = 0.0
+            else:
+                raise NotImplementedError(f"This type of input is not supported")
+            self._settle_type = self.ST_NO
+
+    def snapshot(self) -> ArrayPosition:
+        """the copy of the arrays of the held stocks only"""
+        idx = np.flatnonzero(self._held[self._used_slots])
+        pos = copy.copy(self)
+        pos.instruments = [self.instruments[i] for i in idx]
+        pos.inst_id = {stock: i for i, stock in enumerate(pos.instruments)}
+        pos._amount, pos._price, pos._weight = self._amount[idx], self._price[idx], self._weight[idx]
+        pos._held = np.ones(len(idx), dtype=bool)
+        pos._count = {bar: arr[idx] for bar, arr in self._count.items()}
+        return pos
+
+    @property
+    def position(self) -> dict:
+        """the position in the format of `Position`, which is generated from the arrays and only for reading"""
+        position: dict = {}
+        for i in np.flatnonzero(self._held[self._used_slots]):
+            price = self._price[i]
+            position[self.instruments[i]] = {
+                "amount": self._amount[i],
+                "price": None if np.isnan(price) else price,
+                "weight": self._weight[i],
+                **{f"count_{bar}": arr[i] for bar, arr in self._count.items() if arr[i] != 0},
+            }
+        position["cash"] = self.cash
+        if self._settle_type == self.ST_CASH:
+            position["cash_delay"] = self.cash_delay
+        if self.now_account_value is not None:
+            position["now_account_value"] = self.now_account_value
+        return position
+
+
 class InfPosition(BasePosition):
     """
     Position with infinite cash and amount.
@@ -563,3 +870,27 @@ class InfPosition(BasePosition):
 
     def settle_commit(self) -> None:
         pass
+
+
+def _get_latest_close(
+    stock_list: List[str], start_time: Union[str, pd.Timestamp], freq: str, last_days: int
+) -> Dict[str, float]:
+    """the close prices of the stocks at the latest bar before `start_time` within `last_days` days"""
+    start_time = pd.Timestamp(start_time)
+    # note that start time is 2020-01-01 00:00:00 if raw start time is "2020-01-01"
+    price_end_time = start_time
+    price_start_time = start_time - timedelta(days=last_days)
+    price_df = D.features(
+        stock_list,
+        ["$close"],
+        price_start_time,
+        price_end_time,
+        freq=freq,
+        disk_cache=True,
+    ).dropna()
+    price_dict = price_df.groupby(["instrument"], group_keys=False).tail(1)["$close"].to_dict()
+
+    if len(price_dict) < len(stock_list):
+        lack_stock = set(stock_list) - set(price_dict)
+        raise ValueError(f"{lack_stock} doesn't have close price in qlib in the latest {last_days} days")
+    return price_dict
@@ -0,0 +1,138 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+Profiler of the execution of the nested backtest.
+
+The wall time and the calls are accumulated by the level of the executor (0 for the outermost one) and the phase:
+
+- total: `BaseExecutor.collect_data`, including the inner levels (and the consumer of the yielded decisions, e.g. the
+  RL environment)
+- decision: `generate_trade_decision` and `post_exe_step` of the strategy giving the decisions to the level, so it is
+  called twice a step
+- execution: dealing the orders with the exchange (the atomic executors only)
+- settlement: the position settlement and `Account.update_current_position`
+- indicator: `Account.update_indicator` (e.g. `Indicator._agg_order_trade_info`) and the final indicator dataframe
+- metrics: the portfolio metrics and the history positions, and the final portfolio metrics dataframe
+
+The phases except `total` don't overlap each other. The calls of the quotes being profiled (`BaseQuote.get_data` and
+`BaseQuote.get_batch_data`) and the values looked up by them in each phase are counted too, so the batched lookups
+could be told from the lookups one by one. The hits and the misses of the lookup cache of `NumpyQuote` are counted as
+well; the cache is shared by all the `NumpyQuote`, so the lookups of other backtests running at the same time in the
+process are counted too.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .high_performance_ds import BaseQuote, NumpyQuote
+
+
+class BacktestProfiler:
+    PHASES = ("total", "decision", "execution", "settlement", "indicator", "metrics")
+    COLUMNS = ["calls", "wall_time", "quote_calls", "quote_lookups", "cache_hits", "cache_misses"]
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self, freqs: List[str] = []) -> None:
+        """
+        Parameters
+        ----------
+        freqs : List[str]
+            the frequencies of the executors from the outermost level to the innermost level
+        """
+        self.freqs = list(freqs)
+        self._stats: Dict[Tuple[int, str], List[float]] = defaultdict(lambda: [0, 0.0, 0, 0, 0, 0])
+        # the calls of the quotes being profiled and the values looked up by them
+        self.quote_calls, self.quote_lookups = 0, 0
+
+    def _quote_stats(self) -> Tuple[int, int, int, int]:
+        cache_info = NumpyQuote._get_data.cache_info()  # pylint: disable=E1120,W0212
+        return self.quote_calls, self.quote_lookups, cache_info.hits, cache_info.misses
+
+    @contextmanager
+    def timeit(self, level: int, phase: str) -> Iterator[None]:
+        """accumulate the wall time, the calls and the quote lookups of the block into <level, phase>"""
+        if phase not in self.PHASES:
+            raise ValueError(f"phase {phase} is not supported")
+        quote_stats = self._quote_stats()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            stats = self._stats[level, phase]
+            stats[0] += 1
+            stats[1] += wall_time
+            for i, (end_value, value) in enumerate(zip(self._quote_stats(), quote_stats)):
+                stats[2 + i] += end_value - value
+
+    def _count_get_data(self, get_data: Callable) -> Callable:
+        @functools.wraps(get_data)
+        def wrapper(*args, **kwargs):
+            self.quote_calls += 1
+            self.quote_lookups += 1
+            return get_data(*args, **kwargs)
+
+        return wrapper
+
+    def _count_get_batch_data(self, get_batch_data: Callable) -> Callable:
+        @functools.wraps(get_batch_data)
+        def wrapper(stock_ids, *args, **kwargs):
+            stock_ids = list(stock_ids)
+            self.quote_calls += 1
+            self.quote_lookups += len(stock_ids)
+            return get_batch_data(stock_ids, *args, **kwargs)
+
+        return wrapper
+
+    @contextmanager
+    def count_quotes(self, quotes: Iterable[BaseQuote]) -> Iterator[None]:
+        """
+        Count the calls of the quotes in the block. The methods of the quotes are wrapped only in the block, so the
+        quotes out of profiling are not slowed down.
+        """
+        quotes = list({id(quote): quote for quote in quotes}.values())
+        for quote in quotes:
+            # the wrappers shadow the methods of the class, so the quotes are still the instances of their classes
+            quote.get_data = self._count_get_data(quote.get_data)
+            if hasattr(quote, "get_batch_data"):
+                quote.get_batch_data = self._count_get_batch_data(quote.get_batch_data)
+        try:
+            yield
+        finally:
+            for quote in quotes:
+                quote.__dict__.pop("get_data", None)
+                quote.__dict__.pop("get_batch_data", None)
+
+    def report(self) -> pd.DataFrame:
+        """
+        Returns
+        -------
+        pd.DataFrame
+            indexed by <level, freq, phase> in the order of the levels and `PHASES`, with the columns of `COLUMNS`
+        """
+        keys = sorted(self._stats, key=lambda k: (k[0], self.PHASES.index(k[1])))
+        index = pd.MultiIndex.from_tuples(
+            [(level, self.freqs[level] if level < len(self.freqs) else None, phase) for level, phase in keys],
+            names=["level", "freq", "phase"],
+        )
+        df = pd.DataFrame([self._stats[k] for k in keys], index=index, columns=self.COLUMNS)
+        return df.astype({col: int for col in self.COLUMNS if col != "wall_time"})
+
+
+def profile_phase(profiler: Optional[BacktestProfiler], level: int, phase: str) -> ContextManager:
+    """`profiler.timeit(level, phase)`, or doing nothing if the profiler is None"""
+    return nullcontext() if profiler is None else profiler.timeit(level, phase)
+
+
+def profile_quotes(profiler: Optional[BacktestProfiler], quotes: Iterable[BaseQuote]) -> ContextManager:
+    """`profiler.count_quotes(quotes)`, or doing nothing if the profiler is None"""
+    return nullcontext() if profiler is None else profiler.count_quotes(quotes)
@@ -0,0 +1,131 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+Persistent cache of the quotes of `Exchange`.
+
+The quote prepared by `Exchange` (i.e. the features from qlib and the limit flags) only depends on the instruments, the
+fields, the limit threshold, the time range, the frequency and the version of the qlib data. So it is saved as the
+arrays of `PanelQuote` by the fingerprint of them, and the exchanges of the same settings (e.g. the backtests of a
+parameter sweep, or `MultiPassPortAnaRecord`) attach to the memory-mapped arrays instead of preparing the quote again.
+
+.. code-block:: text
+
+    <cache_dir>/<fingerprint>/
+        meta.pkl        # the instruments, the timestamps and the fields of the quote, other information
+        data.npy        # [field x time x instrument]
+        valid.npy       # [time x instrument], whether the row exists in the quote
+"""
+
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from ..config import C
+from ..data.dataset.cache import get_data_version
+from ..log import get_module_logger
+from ..utils import hash_args
+from .high_performance_ds import PanelQuote
+
+
+class QuoteCache:
+    """
+    Save and load the quotes by fingerprint.
+
+    The entry is written into a temporary directory and renamed at last, so the readers only see complete entries.
+    The arrays are memory-mapped in read-only mode, so the processes reading the same entry share the memory.
+    """
+
+    META_NAME = "meta.pkl"
+
+    def __init__(self, cache_dir: Union[str, Path] = None):
+        """
+        Parameters
+        ----------
+        cache_dir : Union[str, Path]
+            the directory of the cache; `C.quote_cache_path` or "~/.cache/qlib_quote_cache" by default.
+        """
+        if cache_dir is None:
+            cache_dir = C.get("quote_cache_path", None) or "~/.cache/qlib_quote_cache"
+        self.cache_dir = Path(cache_dir).expanduser().resolve()
+        self.logger = get_module_logger(self.__class__.__name__)
+
+    @staticmethod
+    def fingerprint(*args) -> str:
+        """the fingerprint of the settings of the quote and the version of the qlib data"""
+        return hash_args(get_data_version(), *args)
+
+    def get_path(self, key: str) -> Path:
+        return self.cache_dir.joinpath(key)
+
+    def exists(self, key: str) -> bool:
+        return self.get_path(key).joinpath(self.META_NAME).exists()
+
+    def dump(self, key: str, quote: PanelQuote, info: dict = None) -> None:
+        """
+        Save the quote of an entry.
+
+        Parameters
+        ----------
+        key : str
+            the fingerprint of the quote.
+        quote : PanelQuote
+            the quote to save.
+        info : dict
+            other information to be saved with the quote (e.g. `trade_w_adj_price` of the exchange).
+        """
+        path = self.get_path(key)
+        if path.exists():
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=f".{key}."))
+        try:
+            np.save(tmp_path.joinpath("data.npy"), quote.data, allow_pickle=False)
+            np.save(tmp_path.joinpath("valid.npy"), quote.valid, allow_pickle=False)
+            meta = {
+                "instruments": quote.instruments,
+                "times": quote.times,
+                "fields": quote.fields,
+                "bool_fields": quote.bool_fields,
+                "info": info,
+            }
+            with tmp_path.joinpath(self.META_NAME).open("wb") as f:
+                pickle.dump(meta, f, protocol=C.dump_protocol_version)
+            # the directory is renamed at last, so the entry is either complete or nonexistent
+            tmp_path.rename(path)
+        except OSError as e:
+            # another process may have saved the same entry
+            self.logger.warning(f"Failed to save the quote cache {path}: {e}")
+        finally:
+            if tmp_path.exists():
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def load(self, key: str, freq: str, region: str = "cn") -> Optional[Tuple[PanelQuote, dict]]:
+        """
+        Load the quote of an entry; the arrays are memory-mapped.
+
+        Returns
+        -------
+        Optional[Tuple[PanelQuote, dict]]:
+            (quote, info) or None if the entry doesn't exist.
+        """
+        path = self.get_path(key)
+        try:
+            with path.joinpath(self.META_NAME).open("rb") as f:
+                meta = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        quote = PanelQuote.from_arrays(
+            data=np.load(path.joinpath("data.npy"), mmap_mode="r"),
+            valid=np.load(path.joinpath("valid.npy"), mmap_mode="r"),
+            instruments=meta["instruments"],
+            times=meta["times"],
+            fields=meta["fields"],
+            bool_fields=meta["bool_fields"],
+            freq=freq,
+            region=region,
+        )
+        return quote, meta["info"]
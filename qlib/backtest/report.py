@@ -11,7 +11,7 @@ import numpy as np
 import pandas as pd
 
 import qlib.utils.index_data as idd
-from qlib.backtest.decision import BaseTradeDecision, Order, OrderDir
+from qlib.backtest.decision import BaseTradeDecision, Order, OrderBatch, OrderDir, TradeDecisionWO
 from qlib.backtest.exchange import Exchange
 
 from ..tests.config import CSI300_BENCH
@@ -305,17 +305,38 @@ class Indicator:
         trade_value = dict()
         trade_cost = dict()
         trade_dir = dict()
-        pa = dict()
 
         for order, _trade_val, _trade_cost, _trade_price in trade_info:
+            if isinstance(order, OrderBatch):
+                # the results of `Exchange.deal_order_batch` are consumed by the arrays directly
+                stock_ids = order.stock_id.tolist()
+                amount.update(zip(stock_ids, order.amount_delta.tolist()))
+                deal_amount.update(zip(stock_ids, order.deal_amount_delta.tolist()))
+                trade_price.update(zip(stock_ids, _trade_price.tolist()))
+                trade_value.update(zip(stock_ids, (_trade_val * order.sign).tolist()))
+                trade_cost.update(zip(stock_ids, _trade_cost.tolist()))
+                trade_dir.update(zip(stock_ids, order.direction.tolist()))
+                continue
             amount[order.stock_id] = order.amount_delta
             deal_amount[order.stock_id] = order.deal_amount_delta
             trade_price[order.stock_id] = _trade_price
             trade_value[order.stock_id] = _trade_val * order.sign
             trade_cost[order.stock_id] = _trade_cost
             trade_dir[order.stock_id] = order.direction
-            # The PA in the innermost layer is meanless
-            pa[order.stock_id] = 0
+
+        self._assign_order_trade_info(amount, deal_amount, trade_price, trade_value, trade_cost, trade_dir)
+
+    def _assign_order_trade_info(
+        self,
+        amount: dict,
+        deal_amount: dict,
+        trade_price: dict,
+        trade_value: dict,
+        trade_cost: dict,
+        trade_dir: dict,
+    ) -> None:
+        # The PA in the innermost layer is meanless
+        pa = {stock_id: 0 for stock_id in amount}
 
         self.order_indicator.assign("amount", amount)
         self.order_indicator.assign("inner_amount", amount)
@@ -340,6 +361,23 @@ class Indicator:
         self._update_order_trade_info(trade_info=trade_info)
         self._update_order_fulfill_rate()
 
+    def update_order_indicators_by_dict(
+        self,
+        amount: dict,
+        deal_amount: dict,
+        trade_price: dict,
+        trade_value: dict,
+        trade_cost: dict,
+        trade_dir: dict,
+    ) -> None:
+        """
+        The same as `update_order_indicators`, but the trade information is given by the dicts of
+        {stock_id: value} instead of the orders (e.g. by the vectorized backtest).
+        The amounts and the trade values are signed, i.e. negative for selling.
+        """
+        self._assign_order_trade_info(amount, deal_amount, trade_price, trade_value, trade_cost, trade_dir)
+        self._update_order_fulfill_rate()
+
     def _agg_order_trade_info(self, inner_order_indicators: List[BaseOrderIndicator]) -> None:
         # calculate total trade amount with each inner order indicator.
         def trade_amount_func(deal_amount, trade_price):
@@ -371,6 +409,12 @@ class Indicator:
 
     def _update_trade_amount(self, outer_trade_decision: BaseTradeDecision) -> None:
         # NOTE: these indicator is designed for order execution, so the
+        if isinstance(outer_trade_decision, TradeDecisionWO) and outer_trade_decision.order_batch is not None:
+            order_batch = outer_trade_decision.order_batch
+            self.order_indicator.assign(
+                "amount", dict(zip(order_batch.stock_id.tolist(), order_batch.amount_delta.tolist()))
+            )
+            return
         decision: List[Order] = cast(List[Order], outer_trade_decision.get_decision())
         if len(decision) == 0:
             self.order_indicator.assign("amount", {})
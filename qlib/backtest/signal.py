@@ -1,7 +1,7 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import abc
-from typing import Dict, List, Text, Tuple, Union
+from typing import Dict, List, Optional, Text, Tuple, Union
 
 import pandas as pd
 
@@ -10,6 +10,7 @@ from qlib.utils import init_instance_by_config
 from ..data.dataset import Dataset
 from ..data.dataset.utils import convert_index_format
 from ..model.base import BaseModel
+from ..model.pred_cache import PredCache
 from ..utils.resam import resam_ts_data
 
 
@@ -66,10 +67,19 @@ class SignalWCache(Signal):
 
 
 class ModelSignal(SignalWCache):
-    def __init__(self, model: BaseModel, dataset: Dataset) -> None:
+    def __init__(self, model: BaseModel, dataset: Dataset, pred_cache: Optional[PredCache] = None) -> None:
+        """
+        Parameters
+        ----------
+        pred_cache : Optional[PredCache]
+            if given, the predictions are loaded from the cache and only the dates which are not cached are predicted
+        """
         self.model = model
         self.dataset = dataset
-        pred_scores = self.model.predict(dataset)
+        if pred_cache is not None:
+            pred_scores = pred_cache.predict(model, dataset)
+        else:
+            pred_scores = self.model.predict(dataset)
         if isinstance(pred_scores, pd.DataFrame):
             pred_scores = pred_scores.iloc[:, 0]
         super().__init__(pred_scores)
@@ -222,7 +222,7 @@ class BaseInfrastructure:
 
 class CommonInfrastructure(BaseInfrastructure):
     def get_support_infra(self) -> Set[str]:
-        return {"trade_account", "trade_exchange"}
+        return {"trade_account", "trade_exchange", "profiler"}
 
 
 class LevelInfrastructure(BaseInfrastructure):
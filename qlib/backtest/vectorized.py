@@ -0,0 +1,837 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+The vectorized fast path of the daily backtest for the signal strategies.
+
+`qlib.backtest.backtest` walks the strategy, the executor and `Exchange.deal_order` order by order, which is flexible
+but slow for the daily backtests of the signal strategies over a large universe. The vectorized backtest keeps the
+quote, the signal and the position as [date x instrument] matrices and simulates each day by NumPy operations over the
+instruments, with the same cost, trade unit and limit semantics as `Exchange`. It returns the `portfolio_dict` and the
+`indicator_dict` in the same format as `backtest`.
+
+.. code-block:: python
+
+    exchange = MatrixExchange.from_exchange(get_exchange(start_time=..., end_time=..., limit_threshold=0.095))
+    policy = TopkDropoutPolicy(signal=pred_score, topk=50, n_drop=5)
+    portfolio_dict, indicator_dict = backtest_vectorized(policy, exchange, start_time=..., end_time=...)
+
+The policies correspond to the strategies in `qlib.contrib.strategy` run by a daily `SimulatorExecutor` (serial
+trading without the delayed settlement) and an account with only cash:
+
+- `TopkDropoutPolicy`: `TopkDropoutStrategy`
+- `WeightPolicy`: `WeightStrategyBase` with the target weights as the signal
+- `SoftTopkPolicy`: `SoftTopkStrategy`
+
+The NaN values of the signal are regarded as missing. The positions of the stocks in the same step are visited in the
+order of the instruments instead of the order of a set, so the results may differ from `backtest` by the float
+rounding errors.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..config import C
+from ..data.data import D
+from ..utils.time import Freq, epsilon_change
+from .backtest import INDICATOR_METRIC, PORT_METRIC
+from .decision import Order
+from .exchange import Exchange
+from .position import Position
+from .report import Indicator, PortfolioMetrics
+
+# the orders of a step: (the indices of the instruments, the directions, the amounts)
+MATRIX_ORDERS = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _get_empty_orders() -> MATRIX_ORDERS:
+    return np.array([], dtype=int), np.array([], dtype=int), np.array([], dtype=float)
+
+
+def _argsort_desc(score: np.ndarray) -> np.ndarray:
+    """sort by the score descendingly with the NaN at last; the ties keep their order"""
+    return np.argsort(np.where(np.isnan(score), np.inf, -score), kind="stable")
+
+
+def _to_matrix(signal: Union[pd.Series, pd.DataFrame]) -> pd.DataFrame:
+    """
+    convert the signal to a [datetime x instrument] matrix; the signal indexed by <instrument, datetime> or
+    <datetime, instrument> uses its first column like the signal strategies
+    """
+    if isinstance(signal.index, pd.MultiIndex):
+        if isinstance(signal, pd.DataFrame):
+            signal = signal.iloc[:, 0]
+        return signal.unstack(level="instrument")
+    return signal
+
+
+class MatrixExchange:
+    """
+    The [date x instrument] matrices of the quote for the vectorized backtest, with the same trading semantics as
+    `Exchange`.
+
+    - the stock is suspended if its close price is NaN (e.g. the date is out of the quote).
+    - the deal price which is NaN or not positive falls back to the close price.
+    - the trade unit rounding is disabled if any factor is NaN when the close price exists.
+    """
+
+    def __init__(
+        self,
+        close: pd.DataFrame,
+        buy_price: Optional[pd.DataFrame] = None,
+        sell_price: Optional[pd.DataFrame] = None,
+        factor: Optional[pd.DataFrame] = None,
+        volume: Optional[pd.DataFrame] = None,
+        limit_buy: Optional[pd.DataFrame] = None,
+        limit_sell: Optional[pd.DataFrame] = None,
+        buy_vol_limit: Optional[pd.DataFrame] = None,
+        sell_vol_limit: Optional[pd.DataFrame] = None,
+        open_cost: float = 0.0015,
+        close_cost: float = 0.0025,
+        min_cost: float = 5.0,
+        impact_cost: float = 0.0,
+        **kwargs,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        close : pd.DataFrame
+            the close prices; its index (the trading dates, including the date before the backtest for the signal of
+            the first step) and columns (the instruments) define those of the other matrices.
+        buy_price : Optional[pd.DataFrame]
+            the deal prices of buying; the close prices by default.
+        sell_price : Optional[pd.DataFrame]
+            the deal prices of selling; the close prices by default.
+        factor : Optional[pd.DataFrame]
+            the adjusted factors for rounding to the trade unit.
+        volume : Optional[pd.DataFrame]
+            the volumes for the impact cost.
+        limit_buy : Optional[pd.DataFrame]
+            True if the stock can't be bought. The suspended stocks are always limited.
+        limit_sell : Optional[pd.DataFrame]
+            True if the stock can't be sold.
+        buy_vol_limit : Optional[pd.DataFrame]
+            the max amounts to buy in a step; please refer to the `volume_threshold` of `Exchange`.
+        sell_vol_limit : Optional[pd.DataFrame]
+            the max amounts to sell in a step.
+        open_cost, close_cost, min_cost, impact_cost : float
+            please refer to `Exchange`.
+        trade_unit : Optional[float]
+            trade unit, None for disabling the trade unit; `C.trade_unit` by default.
+        """
+        self.trade_unit = kwargs.pop("trade_unit", C.trade_unit)
+        if len(kwargs) > 0:
+            raise ValueError(f"Get Unexpected arguments {kwargs}")
+
+        self.dates = pd.DatetimeIndex(close.index)
+        self.instruments = pd.Index(close.columns)
+        self.open_cost = open_cost
+        self.close_cost = close_cost
+        self.min_cost = min_cost
+        self.impact_cost = impact_cost
+
+        self.close = self._align(close)
+        self.suspended = np.isnan(self.close)
+        self.buy_price = self._get_deal_price(close if buy_price is None else buy_price)
+        self.sell_price = self._get_deal_price(close if sell_price is None else sell_price)
+        self.factor = self._align(factor)
+        self.volume = self._align(volume)
+        self.limit_buy = self._align(limit_buy, dtype=bool) | self.suspended
+        self.limit_sell = self._align(limit_sell, dtype=bool) | self.suspended
+        # no limit by default
+        self.buy_vol_limit = self._align(buy_vol_limit, fill_value=np.inf)
+        self.sell_vol_limit = self._align(sell_vol_limit, fill_value=np.inf)
+        self.trade_w_adj_price = bool((np.isnan(self.factor) & ~self.suspended).any())
+
+    def _align(self, df: Optional[pd.DataFrame], dtype: type = float, fill_value=None) -> np.ndarray:
+        if fill_value is None:
+            fill_value = False if dtype is bool else np.nan
+        if df is None:
+            return np.full((len(self.dates), len(self.instruments)), fill_value, dtype=dtype)
+        df = df.reindex(index=self.dates, columns=self.instruments, fill_value=fill_value)
+        # the NaN of the limit flags (e.g. by the expressions) means limited
+        return np.asarray(df.values, dtype=dtype)
+
+    def _get_deal_price(self, price: pd.DataFrame) -> np.ndarray:
+        price = self._align(price)
+        with np.errstate(invalid="ignore"):
+            return np.where(np.isnan(price) | (price <= 1e-08), self.close, price)
+
+    @classmethod
+    def from_exchange(cls, exchange: Exchange) -> MatrixExchange:
+        """
+        Build the matrices from the quote of `exchange`; the date before its start time is included (without the
+        quote) for the signal of the first step.
+        """
+        quote_df = exchange.quote_df
+        quote_dates = quote_df.index.get_level_values("datetime")
+        start_time = quote_dates.min() if exchange.start_time is None else pd.Timestamp(exchange.start_time)
+        end_time = quote_dates.max() if exchange.end_time is None else pd.Timestamp(exchange.end_time)
+        calendar = pd.DatetimeIndex(D.calendar(freq=exchange.freq))
+        dates = calendar[max(calendar.searchsorted(start_time) - 1, 0) : calendar.searchsorted(end_time, side="right")]
+
+        def get_matrix(field: str, fill_value=np.nan) -> pd.DataFrame:
+            return quote_df[field].unstack(level="instrument", fill_value=fill_value).reindex(dates)
+
+        def get_vol_limit(vol_limit: Optional[list]) -> Optional[pd.DataFrame]:
+            # the "cum" limits are not deducted as each stock is traded at most once in a daily step
+            res = None
+            for _, field in vol_limit or []:
+                res = get_matrix(field) if res is None else np.minimum(res, get_matrix(field))
+            return res
+
+        return cls(
+            close=get_matrix("$close"),
+            buy_price=get_matrix(exchange.buy_price),
+            sell_price=get_matrix(exchange.sell_price),
+            factor=get_matrix("$factor"),
+            volume=get_matrix("$volume"),
+            limit_buy=get_matrix("limit_buy", fill_value=True),
+            limit_sell=get_matrix("limit_sell", fill_value=True),
+            buy_vol_limit=get_vol_limit(exchange.buy_vol_limit),
+            sell_vol_limit=get_vol_limit(exchange.sell_vol_limit),
+            open_cost=exchange.open_cost,
+            close_cost=exchange.close_cost,
+            min_cost=exchange.min_cost,
+            impact_cost=exchange.impact_cost,
+            trade_unit=exchange.trade_unit,
+        )
+
+    def reindex(self, instruments: pd.Index) -> MatrixExchange:
+        """the exchange with the given instruments; the instruments without the quote are suspended"""
+        res = MatrixExchange.__new__(MatrixExchange)
+        res.__dict__.update(self.__dict__)
+        res.instruments = pd.Index(instruments)
+        indexer = self.instruments.get_indexer(res.instruments)
+        for name, fill_value in [
+            ("close", np.nan),
+            ("suspended", True),
+            ("buy_price", np.nan),
+            ("sell_price", np.nan),
+            ("factor", np.nan),
+            ("volume", np.nan),
+            ("limit_buy", True),
+            ("limit_sell", True),
+            ("buy_vol_limit", np.inf),
+            ("sell_vol_limit", np.inf),
+        ]:
+            mat = getattr(self, name)
+            setattr(res, name, np.where(indexer >= 0, mat[:, indexer], fill_value))
+        return res
+
+    def is_tradable(self, t: int) -> np.ndarray:
+        """the stocks tradable in both directions at the `t`-th date, i.e. `Exchange.is_stock_tradable`"""
+        return ~(self.limit_buy[t] | self.limit_sell[t])
+
+    def round_amount_by_trade_unit(self, deal_amount: np.ndarray, factor: np.ndarray) -> np.ndarray:
+        if not self.trade_w_adj_price and self.trade_unit is not None:
+            # the minimal amount is 1. Add 0.1 for solving precision problem.
+            return (deal_amount * factor + 0.1) // self.trade_unit * self.trade_unit / factor
+        return deal_amount
+
+    def _get_buy_amount_by_cash_limit(self, trade_price: float, cash: float, cost_ratio: float) -> float:
+        max_trade_amount = 0.0
+        if cash >= self.min_cost:
+            # critical_price means the stock transaction price when the service fee is equal to min_cost.
+            critical_price = self.min_cost / cost_ratio + self.min_cost
+            if cash >= critical_price:
+                max_trade_amount = cash / (1 + cost_ratio) / trade_price
+            else:
+                max_trade_amount = (cash - self.min_cost) / trade_price
+        return max_trade_amount
+
+    def deal_orders(
+        self,
+        t: int,
+        orders: MATRIX_ORDERS,
+        cash: float,
+        position_amount: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
+        """
+        Deal the orders at the `t`-th date one after another like `Exchange.deal_order`. The orders are dealt together
+        until the first one limited by the cash, then the rest are dealt one by one.
+
+        Parameters
+        ----------
+        t : int
+            the index of the date.
+        orders : MATRIX_ORDERS
+            the orders in the trading order; each stock is traded at most once.
+        cash : float
+            the cash before dealing the orders.
+        position_amount : np.ndarray
+            the amounts of all the instruments in the position.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
+            the deal amounts, the trade prices (NaN if not tradable), the trade values, the trade costs of the orders
+            and the cash after dealing them.
+        """
+        stock_idx, direction, amount = orders
+        is_buy = direction == Order.BUY
+        tradable = ~np.where(is_buy, self.limit_buy[t, stock_idx], self.limit_sell[t, stock_idx])
+        trade_price = np.where(is_buy, self.buy_price[t, stock_idx], self.sell_price[t, stock_idx])
+        factor = self.factor[t, stock_idx]
+
+        # clip by the volume limits
+        vol_limit = np.where(is_buy, self.buy_vol_limit[t, stock_idx], self.sell_vol_limit[t, stock_idx])
+        deal_amount = np.maximum(np.minimum(vol_limit, amount), 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            total_trade_val = self.volume[t, stock_idx] * trade_price
+            no_volume = (total_trade_val == 0) | np.isnan(total_trade_val)
+            adj_cost_ratio = np.where(
+                no_volume, self.impact_cost, self.impact_cost * (deal_amount * trade_price / total_trade_val) ** 2
+            )
+        cost_ratio = np.where(is_buy, self.open_cost, self.close_cost) + adj_cost_ratio
+
+        # the stocks can't be sold more than the position
+        current_amount = position_amount[stock_idx]
+        sell_round = ~is_buy & ~np.isclose(deal_amount, current_amount)
+        deal_amount = np.where(
+            sell_round,
+            self.round_amount_by_trade_unit(np.minimum(current_amount, deal_amount), factor),
+            deal_amount,
+        )
+        deal_amount[~tradable] = 0.0
+
+        # assume that the cash is enough for all the orders
+        trade_val = deal_amount * trade_price
+        min_cost = np.maximum(trade_val * cost_ratio, self.min_cost)
+        full_amount = np.where(is_buy, self.round_amount_by_trade_unit(deal_amount, factor), deal_amount)
+        full_amount[~tradable] = 0.0
+        full_val = full_amount * trade_price
+        dealt = full_val > 1e-5
+        full_cost = np.where(dealt, np.maximum(full_val * cost_ratio, self.min_cost), 0.0)
+        cash_delta = np.where(dealt, np.where(is_buy, -(full_val + full_cost), full_val - full_cost), 0.0)
+        cash_before = cash + np.concatenate([[0.0], np.cumsum(cash_delta)[:-1]])
+        enough = np.where(is_buy, cash_before >= trade_val + min_cost, cash_before + trade_val >= min_cost)
+        enough |= ~tradable
+        n_enough = len(enough) if enough.all() else int(np.argmin(enough))
+
+        deal_amount = np.where(np.arange(len(deal_amount)) < n_enough, full_amount, deal_amount)
+        cash = cash + cash_delta[:n_enough].sum()
+        for i in range(n_enough, len(deal_amount)):
+            if not tradable[i]:
+                continue
+            price, ratio, amt, val = trade_price[i], cost_ratio[i], deal_amount[i], trade_val[i]
+            if is_buy[i]:
+                if cash < max(val * ratio, self.min_cost):
+                    amt = 0.0
+                elif cash < val + max(val * ratio, self.min_cost):
+                    max_buy_amount = self._get_buy_amount_by_cash_limit(price, cash, ratio)
+                    amt = self.round_amount_by_trade_unit(min(max_buy_amount, amt), factor[i])
+                else:
+                    amt = self.round_amount_by_trade_unit(amt, factor[i])
+            elif cash + val < max(val * ratio, self.min_cost):
+                amt = 0.0
+            deal_amount[i] = amt
+            val = amt * price
+            if val > 1e-5:
+                cost = max(val * ratio, self.min_cost)
+                cash += -(val + cost) if is_buy[i] else val - cost
+
+        trade_val = deal_amount * trade_price
+        trade_cost = np.where(trade_val > 1e-5, np.maximum(trade_val * cost_ratio, self.min_cost), 0.0)
+        trade_price = np.where(tradable, trade_price, np.nan)
+        trade_val[~tradable] = 0.0
+        return deal_amount, trade_price, trade_val, trade_cost, float(cash)
+
+
+class MatrixAccount:
+    """
+    The account of the vectorized backtest with the position kept by arrays over the instruments. It records the
+    portfolio metrics, the history positions and the trade indicators like `Account`.
+    """
+
+    def __init__(
+        self,
+        instruments: pd.Index,
+        init_cash: float = 1e9,
+        freq: str = "day",
+        benchmark_config: dict = {},
+    ) -> None:
+        self.instruments = instruments
+        self.init_cash = init_cash
+        self.freq = freq
+        self.cash = float(init_cash)
+        n_stock = len(instruments)
+        self.held = np.zeros(n_stock, dtype=bool)
+        self.amount = np.zeros(n_stock)
+        self.price = np.full(n_stock, np.nan)
+        self.count = np.zeros(n_stock, dtype=int)
+        self.total_turnover = 0.0
+        self.total_cost = 0.0
+
+        self.portfolio_metrics = PortfolioMetrics(freq, benchmark_config)
+        self.hist_positions = {}
+        self.indicator = Indicator()
+
+    def calculate_stock_value(self) -> float:
+        return float(np.sum(self.amount[self.held] * self.price[self.held]))
+
+    def calculate_value(self) -> float:
+        return self.calculate_stock_value() + self.cash
+
+    def update_orders(
+        self, orders: MATRIX_ORDERS, trade_val: np.ndarray, trade_cost: np.ndarray, trade_price: np.ndarray
+    ) -> None:
+        """update the position by the dealt orders like `Position.update_order`"""
+        stock_idx, direction, _ = orders
+        dealt = trade_val > 1e-5
+        stock_idx, is_buy = stock_idx[dealt], direction[dealt] == Order.BUY
+        trade_val, trade_cost, trade_price = trade_val[dealt], trade_cost[dealt], trade_price[dealt]
+        trade_amount = trade_val / trade_price
+
+        sell_idx = stock_idx[~is_buy]
+        sold_out = np.isclose(self.amount[sell_idx], trade_amount[~is_buy])
+        self.amount[sell_idx] -= trade_amount[~is_buy]
+        sold_out_idx = sell_idx[sold_out]
+        self.held[sold_out_idx] = False
+        self.amount[sold_out_idx] = 0.0
+        self.price[sold_out_idx] = np.nan
+        self.count[sold_out_idx] = 0
+
+        buy_idx = stock_idx[is_buy]
+        new_idx = ~self.held[buy_idx]
+        self.price[buy_idx[new_idx]] = trade_price[is_buy][new_idx]
+        self.held[buy_idx] = True
+        self.amount[buy_idx] += trade_amount[is_buy]
+
+        self.cash += (trade_val[~is_buy] - trade_cost[~is_buy]).sum() - (trade_val[is_buy] + trade_cost[is_buy]).sum()
+        self.total_turnover += trade_val.sum()
+        self.total_cost += trade_cost.sum()
+
+    def get_position(self) -> Position:
+        """the position in the format of `Position`"""
+        value = self.calculate_value()
+        position_dict = {}
+        for i in np.flatnonzero(self.held):
+            position_dict[self.instruments[i]] = {
+                "amount": float(self.amount[i]),
+                "price": float(self.price[i]),
+                "weight": float(self.amount[i] * self.price[i] / value),
+                f"count_{self.freq}": int(self.count[i]),
+            }
+        position = Position(cash=self.cash, position_dict=position_dict)
+        position.init_cash = self.init_cash
+        return position
+
+    def update_bar_end(
+        self,
+        t: int,
+        trade_start_time: pd.Timestamp,
+        trade_end_time: pd.Timestamp,
+        trade_exchange: MatrixExchange,
+        orders: MATRIX_ORDERS,
+        trade_info: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+        indicator_config: dict = {},
+    ) -> None:
+        """update the prices and the holding counts at the end of the step and record the metrics like `Account`"""
+        update = self.held & ~trade_exchange.suspended[t]
+        self.price[update] = trade_exchange.close[t, update]
+        self.count[self.held] += 1
+
+        pm = self.portfolio_metrics
+        if pm.is_empty():
+            last_account_value, last_total_cost, last_total_turnover = self.init_cash, 0, 0
+        else:
+            last_account_value = pm.get_latest_account_value()
+            last_total_cost = pm.get_latest_total_cost()
+            last_total_turnover = pm.get_latest_total_turnover()
+        now_stock_value = self.calculate_stock_value()
+        now_account_value = now_stock_value + self.cash
+        now_cost = self.total_cost - last_total_cost
+        pm.update_portfolio_metrics_record(
+            trade_start_time=trade_start_time,
+            trade_end_time=trade_end_time,
+            account_value=now_account_value,
+            cash=self.cash,
+            return_rate=(now_account_value - last_account_value + now_cost) / last_account_value,
+            total_turnover=self.total_turnover,
+            turnover_rate=(self.total_turnover - last_total_turnover) / last_account_value,
+            total_cost=self.total_cost,
+            cost_rate=now_cost / last_account_value,
+            stock_value=now_stock_value,
+        )
+        self.hist_positions[trade_start_time] = self.get_position()
+
+        stock_idx, direction, amount = orders
+        deal_amount, trade_price, trade_val, trade_cost = trade_info
+        stock_ids = self.instruments[stock_idx]
+        sign = direction * 2 - 1
+        self.indicator.reset()
+        self.indicator.update_order_indicators_by_dict(
+            amount=dict(zip(stock_ids, (amount * sign).tolist())),
+            deal_amount=dict(zip(stock_ids, (deal_amount * sign).tolist())),
+            trade_price=dict(zip(stock_ids, trade_price.tolist())),
+            trade_value=dict(zip(stock_ids, (trade_val * sign).tolist())),
+            trade_cost=dict(zip(stock_ids, trade_cost.tolist())),
+            trade_dir=dict(zip(stock_ids, map(Order.parse_dir, direction.tolist()))),
+        )
+        self.indicator.cal_trade_indicators(trade_start_time, self.freq, indicator_config)
+        self.indicator.record(trade_start_time)
+
+
+class BasePolicy:
+    """
+    The vectorized counterpart of the signal strategies. The orders of a date are generated from the signal of the
+    previous date, i.e. the `shift=1` of the signal strategies.
+    """
+
+    def __init__(self, signal: Union[pd.Series, pd.DataFrame], risk_degree: float = 0.95) -> None:
+        """
+        Parameters
+        ----------
+        signal : Union[pd.Series, pd.DataFrame]
+            the signal indexed by <datetime, instrument> like the signal of the strategies, or a [datetime x
+            instrument] matrix.
+        risk_degree : float
+            position percentage of total value.
+        """
+        self.signal = _to_matrix(signal)
+        self.risk_degree = risk_degree
+
+    def get_instruments(self) -> pd.Index:
+        return pd.Index(self.signal.columns)
+
+    def reset(self, exchange: MatrixExchange) -> None:
+        self.exchange = exchange
+        self._signal = self.signal.reindex(index=exchange.dates, columns=exchange.instruments).values.astype(float)
+
+    def get_signal(self, t: int) -> Optional[np.ndarray]:
+        """the signal for trading at the `t`-th date; None if there is no signal"""
+        if t == 0:
+            return None
+        signal = self._signal[t - 1]
+        return None if np.isnan(signal).all() else signal
+
+    def generate_orders(self, t: int, account: MatrixAccount) -> MATRIX_ORDERS:
+        """generate the orders of the `t`-th date in the trading order"""
+        raise NotImplementedError(f"Please implement the `generate_orders` method")
+
+
+class TopkDropoutPolicy(BasePolicy):
+    """The vectorized `TopkDropoutStrategy`; please refer to it for the parameters"""
+
+    def __init__(
+        self,
+        signal: Union[pd.Series, pd.DataFrame],
+        topk: int,
+        n_drop: int,
+        method_sell: str = "bottom",
+        method_buy: str = "top",
+        hold_thresh: int = 1,
+        only_tradable: bool = False,
+        forbid_all_trade_at_limit: bool = True,
+        risk_degree: float = 0.95,
+    ) -> None:
+        super().__init__(signal, risk_degree=risk_degree)
+        self.topk = topk
+        self.n_drop = n_drop
+        self.method_sell = method_sell
+        self.method_buy = method_buy
+        self.hold_thresh = hold_thresh
+        self.only_tradable = only_tradable
+        self.forbid_all_trade_at_limit = forbid_all_trade_at_limit
+
+    def _get_first_n(self, li: np.ndarray, n: int, tradable: np.ndarray) -> np.ndarray:
+        if not self.only_tradable:
+            return li[:n]
+        # at least one tradable stock is picked, the same as the strategy
+        return li[tradable[li]][: max(n, 1)]
+
+    def _get_last_n(self, li: np.ndarray, n: int, tradable: np.ndarray) -> np.ndarray:
+        if not self.only_tradable:
+            return li[-n:]
+        return li[tradable[li]][-max(n, 1) :]
+
+    def generate_orders(self, t: int, account: MatrixAccount) -> MATRIX_ORDERS:
+        score = self.get_signal(t)
+        if score is None:
+            return _get_empty_orders()
+        exchange = self.exchange
+        tradable = exchange.is_tradable(t)
+
+        held = np.flatnonzero(account.held)
+        last = held[_argsort_desc(score[held])]
+        if self.method_buy == "top":
+            candi = np.flatnonzero(~account.held & ~np.isnan(score))
+            candi = candi[_argsort_desc(score[candi])]
+            today = self._get_first_n(candi, self.n_drop + self.topk - len(last), tradable)
+        elif self.method_buy == "random":
+            candi = np.flatnonzero(~np.isnan(score))
+            topk_candi = self._get_first_n(candi[_argsort_desc(score[candi])], self.topk, tradable)
+            candi = topk_candi[~account.held[topk_candi]]
+            try:
+                today = np.random.choice(candi, self.n_drop + self.topk - len(last), replace=False)
+            except ValueError:
+                today = candi
+        else:
+            raise NotImplementedError(f"This type of input is not supported")
+        comb = np.union1d(last, today)
+        comb = comb[_argsort_desc(score[comb])]
+
+        if self.method_sell == "bottom":
+            sell = last[np.isin(last, self._get_last_n(comb, self.n_drop, tradable))]
+        elif self.method_sell == "random":
+            candi = last[tradable[last]] if self.only_tradable else last
+            try:
+                sell = np.random.choice(candi, self.n_drop, replace=False) if len(last) else np.array([], dtype=int)
+            except ValueError:  # No enough candidates
+                sell = candi
+        else:
+            raise NotImplementedError(f"This type of input is not supported")
+        buy = today[: len(sell) + self.topk - len(last)]
+
+        sell_tradable = tradable if self.forbid_all_trade_at_limit else ~exchange.limit_sell[t]
+        buy_tradable = tradable if self.forbid_all_trade_at_limit else ~exchange.limit_buy[t]
+        sell_idx = held[sell_tradable[held] & np.isin(held, sell) & (account.count[held] >= self.hold_thresh)]
+        sell_orders = (sell_idx, np.full(len(sell_idx), Order.SELL, dtype=int), account.amount[sell_idx])
+        # the cash after selling
+        *_, cash = exchange.deal_orders(t, sell_orders, account.cash, account.amount)
+
+        value = cash * self.risk_degree / len(buy) if len(buy) > 0 else 0
+        buy_idx = buy[buy_tradable[buy]]
+        buy_amount = exchange.round_amount_by_trade_unit(
+            value / exchange.buy_price[t, buy_idx], exchange.factor[t, buy_idx]
+        )
+        return (
+            np.concatenate([sell_idx, buy_idx]),
+            np.concatenate([sell_orders[1], np.full(len(buy_idx), Order.BUY, dtype=int)]),
+            np.concatenate([sell_orders[2], buy_amount]),
+        )
+
+
+class WeightPolicy(BasePolicy):
+    """
+    The vectorized `WeightStrategyBase` whose target weights are given by the signal; the stocks with NaN weights are
+    not in the target position.
+    """
+
+    def __init__(
+        self,
+        signal: Union[pd.Series, pd.DataFrame],
+        risk_degree: float = 0.95,
+        interact: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        interact : bool
+            generate the orders like `OrderGenWInteract` if True, else `OrderGenWOInteract`.
+        """
+        super().__init__(signal, risk_degree=risk_degree)
+        self.interact = interact
+
+    def generate_target_weight(self, signal: np.ndarray, account: MatrixAccount) -> np.ndarray:
+        """the target weights of the instruments; NaN for the stocks not in the target position"""
+        return signal
+
+    def _get_target_amount_wo_interact(self, t: int, weight: np.ndarray, account: MatrixAccount) -> np.ndarray:
+        exchange = self.exchange
+        risk_total_value = self.risk_degree * account.calculate_value()
+        in_target = ~np.isnan(weight)
+        # the amounts are estimated by the close prices of the prediction date
+        pred_tradable = exchange.is_tradable(t - 1) & exchange.is_tradable(t) & in_target
+        held = in_target & ~pred_tradable & account.held
+        amount = np.full(len(weight), np.nan)
+        amount[pred_tradable] = risk_total_value * weight[pred_tradable] / exchange.close[t - 1, pred_tradable]
+        amount[held] = risk_total_value * weight[held] / account.price[held]
+        return amount
+
+    def _get_target_amount_w_interact(self, t: int, weight: np.ndarray, account: MatrixAccount) -> np.ndarray:
+        exchange = self.exchange
+        tradable = exchange.is_tradable(t)
+        held = account.held
+        held_value = exchange.sell_price[t, held] * account.amount[held]
+        current_total_value = np.sum(held_value)
+        current_tradable_value = np.sum(held_value[tradable[held]]) + account.cash
+        reserved_cash = (1.0 - self.risk_degree) * (current_total_value + account.cash)
+        current_tradable_value -= reserved_cash
+
+        amount = np.full(len(weight), np.nan)
+        if current_tradable_value < 0:
+            # sell all the tradable stocks
+            keep = held & ~tradable
+            amount[keep] = account.amount[keep]
+            return amount
+        current_tradable_value /= 1 + max(exchange.close_cost, exchange.open_cost)
+        in_target = ~np.isnan(weight) & tradable
+        if ((weight[in_target] < 0) | (weight[in_target] > 1)).any():
+            raise ValueError("weight_position is not in the range of (0, 1).")
+        tradable_weight = weight[in_target].sum()
+        if tradable_weight - 1.0 >= 1e-5:
+            raise ValueError("tradable_weight is {}, can not greater than 1.".format(tradable_weight))
+        in_target &= weight > 0
+        amount[in_target] = (
+            current_tradable_value * weight[in_target] / tradable_weight // exchange.buy_price[t, in_target]
+        )
+        return amount
+
+    def _generate_order_for_target_amount(self, t: int, target: np.ndarray, account: MatrixAccount) -> MATRIX_ORDERS:
+        """the same as `Exchange.generate_order_for_target_amount_position`"""
+        exchange = self.exchange
+        in_target = ~np.isnan(target)
+        stock_idx = np.flatnonzero(account.held | in_target)
+        stock_idx = stock_idx[np.argsort(exchange.instruments.values[stock_idx].astype(str), kind="stable")].tolist()
+        # the same random order of the stocks as `Exchange`
+        random.Random(0).shuffle(stock_idx)
+        stock_idx = np.array(stock_idx, dtype=int)
+        stock_idx = stock_idx[exchange.is_tradable(t)[stock_idx]]
+
+        target_amount = np.where(in_target[stock_idx], target[stock_idx], 0.0)
+        current_amount = account.amount[stock_idx]
+        factor = exchange.factor[t, stock_idx]
+        with np.errstate(invalid="ignore"):
+            deal_amount = np.where(
+                current_amount == target_amount,
+                0.0,
+                np.where(
+                    current_amount < target_amount,
+                    exchange.round_amount_by_trade_unit(target_amount - current_amount, factor),
+                    np.where(
+                        target_amount == 0,
+                        -current_amount,
+                        -exchange.round_amount_by_trade_unit(current_amount - target_amount, factor),
+                    ),
+                ),
+            )
+        is_buy = deal_amount > 0
+        is_sell = (deal_amount != 0) & ~is_buy
+        return (
+            np.concatenate([stock_idx[is_sell], stock_idx[is_buy]]),
+            np.concatenate(
+                [np.full(is_sell.sum(), Order.SELL, dtype=int), np.full(is_buy.sum(), Order.BUY, dtype=int)]
+            ),
+            np.abs(np.concatenate([deal_amount[is_sell], deal_amount[is_buy]])),
+        )
+
+    def generate_orders(self, t: int, account: MatrixAccount) -> MATRIX_ORDERS:
+        signal = self.get_signal(t)
+        if signal is None:
+            return _get_empty_orders()
+        weight = self.generate_target_weight(signal, account)
+        if self.interact:
+            target = self._get_target_amount_w_interact(t, weight, account)
+        else:
+            target = self._get_target_amount_wo_interact(t, weight, account)
+        return self._generate_order_for_target_amount(t, target, account)
+
+
+class SoftTopkPolicy(WeightPolicy):
+    """
+    The vectorized `SoftTopkStrategy`; please refer to it for the parameters. The weights of "first_fill" are filled in
+    the descending order of the scores.
+    """
+
+    def __init__(
+        self,
+        signal: Union[pd.Series, pd.DataFrame],
+        topk: int,
+        max_sold_weight: float = 1.0,
+        risk_degree: float = 0.95,
+        buy_method: str = "first_fill",
+        interact: bool = True,
+    ) -> None:
+        super().__init__(signal, risk_degree=risk_degree, interact=interact)
+        self.topk = topk
+        self.max_sold_weight = max_sold_weight
+        self.buy_method = buy_method
+
+    def generate_target_weight(self, signal: np.ndarray, account: MatrixAccount) -> np.ndarray:
+        candi = np.flatnonzero(~np.isnan(signal))
+        buy_signal = candi[_argsort_desc(signal[candi])][: self.topk]
+        weight = np.full(len(signal), np.nan)
+        held = np.flatnonzero(account.held)
+        if len(held) == 0:
+            weight[buy_signal] = 1 / self.topk
+            return weight
+
+        held_value = account.amount[held] * account.price[held]
+        weight[held] = held_value / held_value.sum()
+        sold = held[~np.isin(held, buy_signal)]
+        sold_weight = np.minimum(self.max_sold_weight, weight[sold])
+        weight[sold] -= sold_weight
+        sold_stock_weight = sold_weight.sum()
+        current_weight = np.nan_to_num(weight[buy_signal])
+        if self.buy_method == "first_fill":
+            need_weight = np.maximum(1 / self.topk - current_weight, 0.0)
+            left_weight = np.maximum(sold_stock_weight - np.concatenate([[0.0], np.cumsum(need_weight)[:-1]]), 0.0)
+            weight[buy_signal] = current_weight + np.minimum(need_weight, left_weight)
+        elif self.buy_method == "average_fill":
+            weight[buy_signal] = current_weight + sold_stock_weight / len(buy_signal)
+        else:
+            raise ValueError("Buy method not found")
+        return weight
+
+
+def backtest_vectorized(
+    policy: BasePolicy,
+    exchange: MatrixExchange,
+    start_time: Union[pd.Timestamp, str],
+    end_time: Union[pd.Timestamp, str],
+    account: float = 1e9,
+    benchmark: Union[str, list, pd.Series, None] = "SH000300",
+    indicator_config: dict = {},
+) -> Tuple[PORT_METRIC, INDICATOR_METRIC]:
+    """
+    The vectorized daily backtest of the policy.
+
+    Parameters
+    ----------
+    policy : BasePolicy
+        the policy to generate the orders.
+    exchange : MatrixExchange
+        the quote and the trading rules.
+    start_time : Union[pd.Timestamp, str]
+        closed start time for backtest.
+    end_time : Union[pd.Timestamp, str]
+        closed end time for backtest.
+    account : float
+        the initial cash.
+    benchmark : Union[str, list, pd.Series, None]
+        the benchmark for reporting; please refer to `PortfolioMetrics`. None for no benchmark.
+    indicator_config : dict
+        the config for calculating the trade indicators; please refer to `BaseExecutor`.
+
+    Returns
+    -------
+    portfolio_dict: PORT_METRIC
+        it records the trading portfolio_metrics information
+    indicator_dict: INDICATOR_METRIC
+        it computes the trading indicator
+    """
+    # the stocks of the signal out of the exchange are not tradable
+    instruments = policy.get_instruments()
+    if not instruments.isin(exchange.instruments).all():
+        exchange = exchange.reindex(exchange.instruments.append(instruments[~instruments.isin(exchange.instruments)]))
+    policy.reset(exchange)
+
+    freq = "day"
+    dates = exchange.dates
+    start_idx = dates.searchsorted(pd.Timestamp(start_time))
+    end_idx = dates.searchsorted(pd.Timestamp(end_time), side="right")
+    benchmark_config = {"benchmark": benchmark, "start_time": start_time, "end_time": end_time}
+    trade_account = MatrixAccount(exchange.instruments, init_cash=account, freq=freq, benchmark_config=benchmark_config)
+    for t in range(start_idx, end_idx):
+        orders = policy.generate_orders(t, trade_account)
+        *trade_info, _ = exchange.deal_orders(t, orders, trade_account.cash, trade_account.amount)
+        trade_account.update_orders(orders, *trade_info[2:], trade_info[1])
+        next_date = dates[t + 1] if t + 1 < len(dates) else dates[t] + pd.Timedelta(days=1)
+        trade_account.update_bar_end(
+            t, dates[t], epsilon_change(next_date), exchange, orders, trade_info, indicator_config=indicator_config
+        )
+
+    key = "{}{}".format(*Freq.parse(freq))
+    portfolio_dict = {
+        key: (trade_account.portfolio_metrics.generate_portfolio_metrics_dataframe(), trade_account.hist_positions)
+    }
+    indicator = trade_account.indicator
+    indicator_dict = {key: (indicator.generate_trade_indicators_dataframe(), indicator)}
+    return portfolio_dict, indicator_dict
@@ -0,0 +1,301 @@
+#  Copyright (c) Microsoft Corporation.
+#  Licensed under the MIT License.
+"""
+Manage the disk caches (``features_cache`` and ``dataset_cache``) of a qlib data directory.
+
+.. code-block:: bash
+
+    # show the size and visiting statistics of the caches
+    python -m qlib.cli.cache --provider_uri ~/.qlib/qlib_data/cn_data stats
+
+    # evict the least recently used entries until each cache directory is within 10GB
+    python -m qlib.cli.cache --provider_uri ~/.qlib/qlib_data/cn_data gc --size_limit 10737418240
+
+    # compute the expressions of a handler into the caches before market open
+    python -m qlib.cli.cache warm --handler Alpha158 --market csi300 --start_time 2010-01-01 --incremental
+    python -m qlib.cli.cache warm --config_path examples/benchmarks/LightGBM/workflow_config_lightgbm_Alpha158.yaml
+"""
+
+import time
+from pathlib import Path
+from typing import List, Union
+
+import fire
+import pandas as pd
+from joblib import delayed
+
+import qlib
+from qlib.config import C
+from qlib.data import D
+from qlib.data.cache import DiskCacheManager
+from qlib.data.data import DatasetD, ExpressionD, LocalDatasetProvider
+from qlib.data.dataset.handler import DataHandler
+from qlib.data.dataset.loader import DataLoader, DataLoaderDH, NestedDataLoader, QlibDataLoader
+from qlib.log import get_module_logger
+from qlib.utils import can_use_cache, get_redis_connection, init_instance_by_config
+from qlib.utils.paral import ParallelExt
+
+logger = get_module_logger("cache_cli")
+
+
+def _iter_loader_groups(data_loader: DataLoader):
+    """Iterate the expressions to be loaded by a data loader.
+
+    Yields
+    ------
+    (group name, expressions, freq, inst_processors, filter_pipe)
+    """
+    if isinstance(data_loader, QlibDataLoader):
+        fields = data_loader.fields if data_loader.is_group else {None: data_loader.fields}
+        for gp_name, (exprs, _) in fields.items():
+            freq = data_loader.freq[gp_name] if isinstance(data_loader.freq, dict) else data_loader.freq
+            inst_processors = (
+                data_loader.inst_processors
+                if isinstance(data_loader.inst_processors, list)
+                else data_loader.inst_processors.get(gp_name, [])
+            )
+            yield gp_name, list(exprs), freq, inst_processors, data_loader.filter_pipe
+    elif isinstance(data_loader, NestedDataLoader):
+        for dl in data_loader.data_loader_l:
+            yield from _iter_loader_groups(dl)
+    elif isinstance(data_loader, DataLoaderDH):
+        # the handlers of DataLoaderDH have loaded their data when the loader is created
+        logger.info("The data of DataLoaderDH has been loaded when it is initialized")
+    else:
+        logger.warning(f"Skip {type(data_loader).__name__}, only the expressions of QlibDataLoader can be cached")
+
+
+def _top_up_expression_cache(inst, fields, freq):
+    """Append the newly added days to the existing expression caches of an instrument."""
+    updated = 0
+    sid = str(inst).lower()
+    for field in fields:
+        cache_uri = ExpressionD._uri(inst, field, None, None, freq)  # pylint: disable=W0212
+        cache_path = ExpressionD.get_cache_dir(freq).joinpath(sid, cache_uri)
+        if cache_path.with_suffix(".meta").exists() and ExpressionD.update(sid, cache_uri, freq) == 0:
+            updated += 1
+    return updated
+
+
+def _stage_entries(kind: str, instruments, fields, start_time, end_time, freq) -> List[Path]:
+    """The cache entries written by a warm-up stage, so its bytes are measured without scanning the whole cache."""
+    if kind == "expression":
+        cache_dir = ExpressionD.get_cache_dir(freq)
+        get_uri = ExpressionD._uri  # pylint: disable=W0212
+        inst_l = D.list_instruments(instruments, start_time, end_time, freq=freq, as_list=True)
+        return [
+            cache_dir.joinpath(str(inst).lower(), get_uri(inst, field, None, None, freq))
+            for inst in inst_l
+            for field in fields
+        ]
+    cache_uri = DatasetD._uri(instruments, fields, None, None, freq, disk_cache=1)  # pylint: disable=W0212
+    return [DatasetD.get_cache_dir(freq).joinpath(cache_uri)]
+
+
+def _entries_size(entries: List[Path]) -> int:
+    return sum(DiskCacheManager._entry_size(cache_path) for cache_path in entries)  # pylint: disable=W0212
+
+
+class CacheCLI:
+    CACHE_KINDS = ("expression", "dataset")
+
+    def __init__(self, provider_uri: str = None, region: str = None, qlib_init: dict = None):
+        """
+        Parameters
+        ----------
+        provider_uri : str
+            the data directory whose caches will be managed; "~/.qlib/qlib_data/cn_data" by default.
+        region : str
+            the region of the data; "cn" by default.
+        qlib_init : dict
+            other arguments of `qlib.init`, e.g. {"redis_host": "127.0.0.1", "features_cache_size_limit": 1e10}.
+        """
+        self.qlib_init = dict(qlib_init or {})
+        if provider_uri is not None:
+            self.qlib_init["provider_uri"] = provider_uri
+        if region is not None:
+            self.qlib_init["region"] = region
+
+    def _init(self, default: dict = None):
+        """initialize qlib; the arguments of the command line overwrite `default`"""
+        init_kwargs = {"provider_uri": "~/.qlib/qlib_data/cn_data", "region": "cn"}
+        init_kwargs.update(default or {})
+        init_kwargs.update(self.qlib_init)
+        qlib.init(**init_kwargs)
+
+    def _get_managers(self, kind: str = None, freq: str = "day", size_limit: int = None, policy: str = None):
+        kinds = self.CACHE_KINDS if kind is None else [kind]
+        # The disk caches depend on redis. If redis is not available, no process can be using the caches.
+        # So the entries can be removed without locking.
+        redis_t = get_redis_connection() if can_use_cache() else None
+        for _kind in kinds:
+            yield _kind, DiskCacheManager.from_config(
+                _kind, freq, redis_t=redis_t, size_limit=size_limit, policy=policy
+            )
+
+    def stats(self, kind: str = None, freq: str = "day"):
+        """Show the statistics of the disk caches.
+
+        Parameters
+        ----------
+        kind : str
+            "expression" or "dataset"; all caches by default.
+        freq : str
+            the frequency of the data.
+        """
+        self._init()
+        return {_kind: manager.stats() for _kind, manager in self._get_managers(kind, freq)}
+
+    def gc(self, size_limit: int = None, policy: str = None, kind: str = None, freq: str = "day", dry_run=False):
+        """Evict entries from the disk caches until they are within the size budget.
+
+        Parameters
+        ----------
+        size_limit : int
+            the budget in bytes of each cache directory; the configured `*_cache_size_limit` by default.
+        policy : str
+            "lru" or "lfu"; `C.disk_cache_evict_policy` by default.
+        kind : str
+            "expression" or "dataset"; all caches by default.
+        freq : str
+            the frequency of the data.
+        dry_run : bool
+            only list the entries to be evicted.
+        """
+        self._init()
+        res = {}
+        for _kind, manager in self._get_managers(kind, freq, size_limit=size_limit, policy=policy):
+            if not manager.limited:
+                logger.warning(f"No size limit for the {_kind} cache, please set size_limit")
+                continue
+            evicted = manager.evict(dry_run=dry_run)
+            res[_kind] = {"evicted": len(evicted), "total_size": manager.total_size}
+            if dry_run:
+                res[_kind]["to_evict"] = [str(p) for p in evicted]
+        return res
+
+    def warm(
+        self,
+        config_path: str = None,
+        handler: Union[str, dict] = None,
+        market: str = None,
+        start_time: str = None,
+        end_time: str = None,
+        incremental: bool = False,
+        dataset_cache: bool = True,
+    ):
+        """Compute the expressions of a handler into the expression cache and dataset cache.
+
+        Parameters
+        ----------
+        config_path : str
+            a workflow config; the handler of `task.dataset` is used.
+        handler : Union[str, dict]
+            the handler config or the class name of a handler in `qlib.contrib.data.handler` (e.g. Alpha158).
+            It is used when `config_path` is not given.
+        market : str
+            overwrite the instruments of the handler.
+        start_time : str
+            overwrite the start time of the handler.
+        end_time : str
+            overwrite the end time of the handler.
+        incremental : bool
+            append the newly added days of the data to the existing caches before warming.
+        dataset_cache : bool
+            whether to generate the dataset cache besides the expression cache.
+
+        Returns
+        -------
+        list
+            the time and the bytes written of each stage.
+        """
+        # warming the disk caches requires the server-side cache mechanisms
+        default_init = {"expression_cache": "DiskExpressionCache", "dataset_cache": "DiskDatasetCache"}
+        if config_path is not None:
+            from qlib.cli.run import load_config  # pylint: disable=C0415
+
+            config = load_config(config_path)
+            default_init.update(config.get("qlib_init", {}))
+            handler = config["task"]["dataset"]["kwargs"]["handler"]
+        elif handler is None:
+            raise ValueError("Please specify `config_path` or `handler`")
+        elif isinstance(handler, str):
+            # processors are not required to warm the cache
+            handler = {
+                "class": handler,
+                "module_path": "qlib.contrib.data.handler",
+                "kwargs": {"infer_processors": [], "learn_processors": []},
+            }
+        self._init(default_init)
+        if C.expression_cache is None and C.dataset_cache is None:
+            raise ValueError("No disk cache is available, please make sure redis is available")
+
+        handler = dict(handler, kwargs=dict(handler.get("kwargs", {})))
+        for k, v in (("instruments", market), ("start_time", start_time), ("end_time", end_time)):
+            if v is not None:
+                handler["kwargs"][k] = v
+        # only the data loader is required
+        handler["kwargs"]["init_data"] = False
+        handler: DataHandler = init_instance_by_config(handler, accept_types=DataHandler)
+
+        report = []
+        for gp_name, exprs, freq, inst_processors, filter_pipe in _iter_loader_groups(handler.data_loader):
+            instruments = handler.instruments
+            if instruments is None:
+                instruments = "all"
+            if isinstance(instruments, str):
+                instruments = D.instruments(instruments, filter_pipe=filter_pipe)
+            stages = []
+            if C.expression_cache is not None:
+                if incremental:
+                    stages.append(("expression_top_up", "expression", self._top_up_expression, {}))
+                stages.append(("expression", "expression", LocalDatasetProvider.multi_cache_walker, {}))
+            if dataset_cache and C.dataset_cache is not None:
+                if inst_processors:
+                    logger.warning(f"Skip the dataset cache of group {gp_name} because of the inst_processors")
+                else:
+                    if incremental:
+                        stages.append(("dataset_top_up", "dataset", self._top_up_dataset, {}))
+                    stages.append(("dataset", "dataset", D.features, {"disk_cache": 1}))
+            entries = {}
+            for stage, kind, func, kwargs in stages:
+                if kind not in entries:
+                    entries[kind] = _stage_entries(kind, instruments, exprs, handler.start_time, handler.end_time, freq)
+                size = _entries_size(entries[kind])
+                start = time.time()
+                func(instruments, exprs, handler.start_time, handler.end_time, freq, **kwargs)
+                cost = time.time() - start
+                written = _entries_size(entries[kind]) - size
+                report.append(
+                    {
+                        "group": gp_name,
+                        "freq": freq,
+                        "stage": stage,
+                        "fields": len(exprs),
+                        "seconds": round(cost, 3),
+                        "bytes": written,
+                    }
+                )
+                logger.info(f"warm {stage} of group {gp_name}: {cost:.3f}s, {written} bytes")
+        if report:
+            logger.info(f"warm report:\n{pd.DataFrame(report).to_string(index=False)}")
+        return report
+
+    @staticmethod
+    def _top_up_expression(instruments, fields, start_time, end_time, freq):
+        inst_l = D.list_instruments(instruments, start_time, end_time, freq=freq, as_list=True)
+        workers = max(min(C.get_kernels(freq), len(inst_l)), 1)
+        updated = ParallelExt(n_jobs=workers, backend=C.joblib_backend, maxtasksperchild=C.maxtasksperchild)(
+            delayed(_top_up_expression_cache)(inst, fields, freq) for inst in inst_l
+        )
+        logger.info(f"{sum(updated)} expression caches are updated")
+
+    @staticmethod
+    def _top_up_dataset(instruments, fields, start_time, end_time, freq):
+        cache_uri = DatasetD._uri(instruments, fields, None, None, freq, disk_cache=1)  # pylint: disable=W0212
+        if DatasetD.check_cache_exists(DatasetD.get_cache_dir(freq).joinpath(cache_uri)):
+            DatasetD.update(cache_uri, freq)
+
+
+if __name__ == "__main__":
+    fire.Fire(CacheCLI)
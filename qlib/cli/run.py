@@ -82,25 +82,19 @@ def render_template(config_path: str) -> str:
     return rendered_content
 
 
-# workflow handler function
-def workflow(config_path, experiment_name="workflow", uri_folder="mlruns"):
+def load_config(config_path) -> dict:
     """
-    This is a Qlib CLI entrance.
-    User can run the whole Quant research workflow defined by a configure file
-    - the code is located here ``qlib/cli/run.py`
-
-    User can specify a base_config file in your workflow.yml file by adding "BASE_CONFIG_PATH".
-    Qlib will load the configuration in BASE_CONFIG_PATH first, and the user only needs to update the custom fields
-    in their own workflow.yml file.
-
-    For examples:
+    Load the workflow configuration, the `BASE_CONFIG_PATH` is merged into it.
 
-        qlib_init:
-            provider_uri: "~/.qlib/qlib_data/cn_data"
-            region: cn
-        BASE_CONFIG_PATH: "workflow_config_lightgbm_Alpha158_csi500.yaml"
-        market: csi300
+    Parameters
+    ----------
+    config_path : str
+        configuration path
 
+    Returns
+    -------
+    dict
+        the workflow configuration
     """
     # Render the template
     rendered_yaml = render_template(config_path)
@@ -131,6 +125,30 @@ def workflow(config_path, experiment_name="workflow", uri_folder="mlruns"):
             base_config = yaml.load(fp)
         logger.info(f"Load BASE_CONFIG_PATH succeed: {path.resolve()}")
         config = update_config(base_config, config)
+    return config
+
+
+# workflow handler function
+def workflow(config_path, experiment_name="workflow", uri_folder="mlruns"):
+    """
+    This is a Qlib CLI entrance.
+    User can run the whole Quant research workflow defined by a configure file
+    - the code is located here ``qlib/cli/run.py`
+
+    User can specify a base_config file in your workflow.yml file by adding "BASE_CONFIG_PATH".
+    Qlib will load the configuration in BASE_CONFIG_PATH first, and the user only needs to update the custom fields
+    in their own workflow.yml file.
+
+    For examples:
+
+        qlib_init:
+            provider_uri: "~/.qlib/qlib_data/cn_data"
+            region: cn
+        BASE_CONFIG_PATH: "workflow_config_lightgbm_Alpha158_csi500.yaml"
+        market: csi300
+
+    """
+    config = load_config(config_path)
 
     # config the `sys` section
     sys_config(config, config_path)
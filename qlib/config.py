@@ -174,6 +174,24 @@ _default_config = {
     # cache dir name
     "dataset_cache_dir_name": "dataset_cache",
     "features_cache_dir_name": "features_cache",
+    # size budget (in bytes) of each disk cache directory, None or 0 means no limit
+    # the least valuable entries will be evicted when the budget is exceeded
+    "dataset_cache_size_limit": None,
+    "features_cache_size_limit": None,
+    # eviction policy of the disk caches: "lru"(least recently used) or "lfu"(least frequently used)
+    "disk_cache_evict_policy": "lru",
+    # name of the `SharedExpressionCache` shared by the worker processes, None means disabled
+    # it is set by `with SharedExpressionCache(...)` in the main process
+    "shared_expression_cache": None,
+    # directory of the processed data cache of handlers (`DataHandlerLP(enable_cache=True)`)
+    # None means "~/.cache/qlib_handler_cache"
+    "handler_cache_path": None,
+    # directory of the prediction cache of models (`qlib.model.pred_cache.PredCache`)
+    # None means "~/.cache/qlib_pred_cache"
+    "pred_cache_path": None,
+    # directory of the quote cache of exchanges (`Exchange(quote_cache=True)`)
+    # None means "~/.cache/qlib_quote_cache"
+    "quote_cache_path": None,
     # redis
     # in order to use cache
     "redis_host": "127.0.0.1",
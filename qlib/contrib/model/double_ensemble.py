@@ -1,6 +1,10 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import lightgbm as lgb
 import numpy as np
 import pandas as pd
@@ -31,8 +35,18 @@ class DEnsembleModel(Model, FeatureInt):
         sub_weights=None,
         epochs=100,
         early_stopping_rounds=None,
+        n_workers=1,
         **kwargs,
     ):
+        """
+        Parameters
+        ----------
+        n_workers : int
+            the number of the threads to run the independent prediction passes (i.e. the shuffled features of the
+            feature selection and the sub-models of the prediction) in parallel; -1 means the number of CPUs.
+            LightGBM releases the GIL while predicting, and each pass uses a share of the CPUs. Each thread copies
+            the training features of the feature selection.
+        """
         self.base_model = base_model  # "gbm" or "mlp", specifically, we use lgbm for "gbm"
         self.num_models = num_models  # the number of sub-models
         self.enable_sr = enable_sr
@@ -61,6 +75,7 @@ class DEnsembleModel(Model, FeatureInt):
         self.params.update(kwargs)
         self.loss = loss
         self.early_stopping_rounds = early_stopping_rounds
+        self.n_workers = (os.cpu_count() or 1) if n_workers == -1 else n_workers
 
     def fit(self, dataset: DatasetH):
         df_train, df_valid = dataset.prepare(
@@ -149,28 +164,24 @@ class DEnsembleModel(Model, FeatureInt):
         :return: weights
         the weights for all the samples.
         """
-        # normalize loss_curve and loss_values with ranking
-        loss_curve_norm = loss_curve.rank(axis=0, pct=True)
-        loss_values_norm = (-loss_values).rank(pct=True)
-
-        # calculate l_start and l_end from loss_curve
+        # calculate l_start and l_end from loss_curve normalized with ranking
+        # only the first and the last `part` iterations are used, so the other iterations are not ranked
         N, T = loss_curve.shape
         part = np.maximum(int(T * 0.1), 1)
-        l_start = loss_curve_norm.iloc[:, :part].mean(axis=1)
-        l_end = loss_curve_norm.iloc[:, -part:].mean(axis=1)
+        l_start = loss_curve.iloc[:, :part].rank(axis=0, pct=True).mean(axis=1)
+        l_end = loss_curve.iloc[:, -part:].rank(axis=0, pct=True).mean(axis=1)
 
         # calculate h-value for each sample
-        h1 = loss_values_norm
+        h1 = (-loss_values).rank(pct=True)
         h2 = (l_end / l_start).rank(pct=True)
-        h = pd.DataFrame({"h_value": self.alpha1 * h1 + self.alpha2 * h2})
+        h_value = (self.alpha1 * h1 + self.alpha2 * h2).values
 
-        # calculate weights
-        h["bins"] = pd.cut(h["h_value"], self.bins_sr)
-        h_avg = h.groupby("bins", group_keys=False, observed=False)["h_value"].mean()
-        weights = pd.Series(np.zeros(N, dtype=float))
-        for b in h_avg.index:
-            weights[h["bins"] == b] = 1.0 / (self.decay**k_th * h_avg[b] + 0.1)
-        return weights
+        # calculate weights by the average h-value of the bin of each sample
+        bins = pd.cut(h_value, self.bins_sr, labels=False)
+        h_avg = np.bincount(bins, weights=h_value, minlength=self.bins_sr) / np.maximum(
+            np.bincount(bins, minlength=self.bins_sr), 1
+        )
+        return pd.Series(1.0 / (self.decay**k_th * h_avg[bins] + 0.1))
 
     def feature_selection(self, df_train, loss_values):
         """
@@ -186,25 +197,48 @@ class DEnsembleModel(Model, FeatureInt):
         N, F = x_train.shape
         g = pd.DataFrame({"g_value": np.zeros(F, dtype=float)})
         M = len(self.ensemble)
+        label = y_train.values.squeeze()
+        loss_values = np.asarray(loss_values)
 
-        # shuffle specific columns and calculate g-value for each feature
-        x_train_tmp = x_train.copy()
-        for i_f, feat in enumerate(features):
-            x_train_tmp.loc[:, feat] = np.random.permutation(x_train_tmp.loc[:, feat].values)
-            pred = pd.Series(np.zeros(N), index=x_train_tmp.index)
+        x = x_train.values
+        # the columns of the features of each sub-model and the features used by its splits
+        # shuffling a feature only changes the predictions of the sub-models splitting on it
+        cols_sub = [features.get_indexer(feat_sub) for feat_sub in self.sub_features]
+        used_sub = [
+            set(feat_sub[submodel.feature_importance("split") > 0])
+            for submodel, feat_sub in zip(self.ensemble, self.sub_features)
+        ]
+        pred_sub = self._map(
+            lambda i_s: self.ensemble[i_s].predict(x[:, cols_sub[i_s]], **self._get_pred_kwargs()), range(M)
+        )
+        local = threading.local()
+
+        def get_g_value(args):
+            i_f, perm = args
+            # each thread shuffles the columns of its own copy of the features
+            if not hasattr(local, "x"):
+                local.x = x.copy()
+            local.x[:, i_f] = x[perm, i_f]
+            pred = np.zeros(N)
             for i_s, submodel in enumerate(self.ensemble):
-                pred += (
-                    pd.Series(
-                        submodel.predict(x_train_tmp.loc[:, self.sub_features[i_s]].values), index=x_train_tmp.index
-                    )
-                    / M
-                )
-            loss_feat = self.get_loss(y_train.values.squeeze(), pred.values)
-            g.loc[i_f, "g_value"] = np.mean(loss_feat - loss_values) / (np.std(loss_feat - loss_values) + 1e-7)
-            x_train_tmp.loc[:, feat] = x_train.loc[:, feat].copy()
+                if features[i_f] in used_sub[i_s]:
+                    pred += submodel.predict(local.x[:, cols_sub[i_s]], **self._get_pred_kwargs()) / M
+                else:
+                    pred += pred_sub[i_s] / M
+            local.x[:, i_f] = x[:, i_f]
+            loss_feat = self.get_loss(label, pred)
+            return np.mean(loss_feat - loss_values) / (np.std(loss_feat - loss_values) + 1e-7)
+
+        # shuffle specific columns and calculate g-value for each feature
+        # the permutations are drawn in the order of the features, so the result doesn't depend on `n_workers`
+        with self._get_executor() as executor:
+            batch_size = max(self.n_workers, 1) * 4
+            for start in range(0, F, batch_size):
+                batch = [(i_f, np.random.permutation(N)) for i_f in range(start, min(start + batch_size, F))]
+                g.iloc[start : start + len(batch), 0] = list(executor.map(get_g_value, batch))
 
         # one column in train features is all-nan # if g['g_value'].isna().any()
-        g["g_value"].replace(np.nan, 0, inplace=True)
+        g["g_value"] = g["g_value"].fillna(0)
 
         # divide features into bins_fs bins
         g["bins"] = pd.cut(g["g_value"], self.bins_fs)
@@ -234,12 +268,15 @@ class DEnsembleModel(Model, FeatureInt):
             else:
                 raise ValueError("LightGBM doesn't support multi-label training")
 
-            N = x_train.shape[0]
-            loss_curve = pd.DataFrame(np.zeros((N, num_trees)))
-            pred_tree = np.zeros(N, dtype=float)
+            # the prediction of each tree is the output of the leaf of each sample, so all the trees are predicted by
+            # one pass of the leaf indices instead of predicting the trees one by one
+            leaf = model.predict(x_train.values, num_iteration=num_trees, pred_leaf=True).reshape(-1, num_trees)
+            leaf_output = np.zeros((num_trees, leaf.max() + 1))
             for i_tree in range(num_trees):
-                pred_tree += model.predict(x_train.values, start_iteration=i_tree, num_iteration=1)
-                loss_curve.iloc[:, i_tree] = self.get_loss(y_train, pred_tree)
+                for i_leaf in range(leaf[:, i_tree].max() + 1):
+                    leaf_output[i_tree, i_leaf] = model.get_leaf_output(i_tree, i_leaf)
+            pred_tree = np.cumsum(leaf_output[np.arange(num_trees), leaf], axis=1)
+            loss_curve = pd.DataFrame(self.get_loss(y_train[:, None], pred_tree))
         else:
             raise ValueError("not implemented yet")
         return loss_curve
@@ -248,16 +285,35 @@ class DEnsembleModel(Model, FeatureInt):
         if self.ensemble is None:
             raise ValueError("model is not fitted yet!")
         x_test = dataset.prepare(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
+        # the sub-models are predicted in parallel and summed in order
+        pred_l = self._map(
+            lambda i_sub: self.ensemble[i_sub].predict(
+                x_test.loc[:, self.sub_features[i_sub]].values, **self._get_pred_kwargs()
+            ),
+            range(len(self.ensemble)),
+        )
         pred = pd.Series(np.zeros(x_test.shape[0]), index=x_test.index)
-        for i_sub, submodel in enumerate(self.ensemble):
-            feat_sub = self.sub_features[i_sub]
-            pred += (
-                pd.Series(submodel.predict(x_test.loc[:, feat_sub].values), index=x_test.index)
-                * self.sub_weights[i_sub]
-            )
+        for i_sub, pred_sub in enumerate(pred_l):
+            pred += pd.Series(pred_sub, index=x_test.index) * self.sub_weights[i_sub]
         pred = pred / np.sum(self.sub_weights)
         return pred
 
+    def _get_pred_kwargs(self) -> dict:
+        """the parameters of the prediction, which share the CPUs among the parallel passes"""
+        if self.n_workers <= 1:
+            return {}
+        return {"num_threads": max((os.cpu_count() or 1) // self.n_workers, 1)}
+
+    def _get_executor(self):
+        """the thread pool of `n_workers`; LightGBM releases the GIL while predicting"""
+        return ThreadPoolExecutor(max_workers=max(self.n_workers, 1))
+
+    def _map(self, func, iterable) -> list:
+        if self.n_workers <= 1:
+            return list(map(func, iterable))
+        with self._get_executor() as executor:
+            return list(executor.map(func, iterable))
+
     def predict_sub(self, submodel, df_data, features):
         x_data = df_data["feature"].loc[:, features]
         pred_sub = pd.Series(submodel.predict(x_data.values), index=x_data.index)
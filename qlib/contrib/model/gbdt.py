@@ -1,59 +1,242 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import hashlib
+import os
+import uuid
+from pathlib import Path
 import numpy as np
 import pandas as pd
 import lightgbm as lgb
 from typing import List, Text, Tuple, Union
+from ...log import get_module_logger
 from ...model.base import ModelFT
+from ...utils import hash_args
 from ...data.dataset import DatasetH
 from ...data.dataset.handler import DataHandlerLP
+from ...data.dataset.utils import ChunkedArray
 from ...model.interpret.base import LightGBMFInt
 from ...data.dataset.weight import Reweighter
 from qlib.workflow import R
 
 
+class _ChunkSequence(lgb.Sequence):
+    """A chunk of the out-of-core data, so LightGBM constructs the dataset batch by batch without loading all data"""
+
+    def __init__(self, values: np.ndarray, batch_size: int = 4096):
+        self.values = values
+        self.batch_size = batch_size
+
+    def __getitem__(self, idx):
+        # LightGBM samples the data in float64
+        return np.asarray(self.values[idx], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _fingerprint_arrays(arrays: List[Union[np.ndarray, List[np.ndarray], None]], *args) -> str:
+    """
+    The fingerprint of the content of the arrays and the extra arguments.
+    An array could be given as its row chunks, whose fingerprint is the same as the concatenated array.
+    """
+    md5 = hashlib.md5(hash_args(*args).encode())
+    for arr in arrays:
+        if arr is None:
+            md5.update(b"None")
+            continue
+        chunks = arr if isinstance(arr, list) else [arr]
+        shape = (sum(len(c) for c in chunks),) + chunks[0].shape[1:]
+        md5.update(f"{chunks[0].dtype.str}{shape}".encode())
+        for c in chunks:
+            md5.update(np.ascontiguousarray(c))
+    return md5.hexdigest()
+
+
+def _get_float_values(df: pd.DataFrame) -> np.ndarray:
+    """
+    The values of the features as a C-contiguous float array, which LightGBM reads without converting the data type.
+    float32 data is kept as float32 instead of being converted to float64.
+    """
+    values = df.values
+    dtype = values.dtype if values.dtype in (np.float32, np.float64) else np.float32
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
 class LGBModel(ModelFT, LightGBMFInt):
     """LightGBM Model"""
 
-    def __init__(self, loss="mse", early_stopping_rounds=50, num_boost_round=1000, **kwargs):
+    # the parameters determining the sampling of the data to construct the bins
+    SEED_PARAMS = ("seed", "random_seed", "random_state", "data_random_seed")
+
+    def __init__(
+        self,
+        loss="mse",
+        early_stopping_rounds=50,
+        num_boost_round=1000,
+        dataset_cache_dir=None,
+        bin_reference=None,
+        **kwargs,
+    ):
+        """
+        Parameters
+        ----------
+        dataset_cache_dir : str
+            The directory to cache the binary files (`lgb.Dataset.save_binary`) of the constructed datasets, keyed by
+            the fingerprint of their data and the parameters of LightGBM. The datasets with the same data (e.g. the
+            same training data of the rolling tasks or of the tuning trials) are loaded without binning again.
+        bin_reference : Union[str, tuple]
+            The segment (or the `(start_time, end_time)`) of the data to construct the bins of the features. If it is
+            given, the bins are constructed once from the reference data and reused by all the datasets, so the
+            datasets only bin their rows. Otherwise, the bins are constructed from the training data of each fitting.
+        """
         if loss not in {"mse", "binary"}:
             raise NotImplementedError
         self.params = {"objective": loss, "verbosity": -1}
         self.params.update(kwargs)
         self.early_stopping_rounds = early_stopping_rounds
         self.num_boost_round = num_boost_round
+        self.dataset_cache_dir = dataset_cache_dir
+        self.bin_reference = bin_reference
         self.model = None
+        self._bin_ref = None  # (fingerprint, the reference dataset)
 
-    def _prepare_data(self, dataset: DatasetH, reweighter=None) -> List[Tuple[lgb.Dataset, str]]:
+    def _prepare_data(self, dataset: DatasetH, reweighter=None, use_cache=True) -> List[Tuple[lgb.Dataset, str]]:
         """
         The motivation of current version is to make validation optional
         - train segment is necessary;
+
+        If `dataset_cache_dir` or `bin_reference` is given and `use_cache` is True, the datasets are constructed
+        eagerly to reuse the bins and the binary files. `use_cache=False` keeps the datasets lazy with their raw data
+        (e.g. finetuning needs the raw data to compute the init scores).
         """
         ds_l = []
         assert "train" in dataset.segments
+        use_cache = use_cache and (self.dataset_cache_dir is not None or self.bin_reference is not None)
+        reference, ref_key = None, None
+        if use_cache and self.bin_reference is not None:
+            reference, ref_key = self._get_bin_reference(dataset)
         for key in ["train", "valid"]:
             if key in dataset.segments:
-                df = dataset.prepare(key, col_set=["feature", "label"], data_key=DataHandlerLP.DK_L)
-                if df.empty:
-                    raise ValueError("Empty data from dataset, please check your dataset config.")
-                x, y = df["feature"], df["label"]
-
-                # Lightgbm need 1D array as its label
-                if y.values.ndim == 2 and y.values.shape[1] == 1:
-                    y = np.squeeze(y.values)
-                else:
-                    raise ValueError("LightGBM doesn't support multi-label training")
-
-                if reweighter is None:
-                    w = None
-                elif isinstance(reweighter, Reweighter):
-                    w = reweighter.reweight(df)
-                else:
-                    raise ValueError("Unsupported reweighter type.")
-                ds_l.append((lgb.Dataset(x.values, label=y, weight=w), key))
+                chunks = dataset.prepare_chunks(key, col_set=["feature", "label"], data_key=DataHandlerLP.DK_L)
+                x, y, w = self._get_arrays(chunks, reweighter)
+                if not use_cache:
+                    ds_l.append((lgb.Dataset(x, label=y, weight=w), key))
+                    continue
+                # the valid dataset is binned with the bins of the training dataset
+                x_chunks = [x] if isinstance(x, np.ndarray) else [df["feature"].values for df in chunks]
+                ds, ds_key = self._get_dataset(x, y, w, x_chunks, reference=reference, ref_key=ref_key)
+                if reference is None:
+                    reference, ref_key = ds, ds_key
+                ds_l.append((ds, key))
         return ds_l
 
+    def _get_arrays(self, chunks: List[pd.DataFrame], reweighter=None) -> tuple:
+        """
+        Get the features, the labels and the weights of a segment for LightGBM.
+
+        The in-memory data is given as a float array. The out-of-core data is not concatenated and LightGBM reads the
+        features from the memory-mapped chunks batch by batch.
+        """
+        if len(chunks) == 1 and chunks[0].empty:
+            raise ValueError("Empty data from dataset, please check your dataset config.")
+        # Lightgbm need 1D array as its label
+        if chunks[0]["label"].shape[1] != 1:
+            raise ValueError("LightGBM doesn't support multi-label training")
+        y = np.concatenate([df["label"].values[:, 0] for df in chunks])
+        if reweighter is None:
+            w = None
+        elif isinstance(reweighter, Reweighter):
+            w = np.concatenate([reweighter.reweight(df) for df in chunks])
+        else:
+            raise ValueError("Unsupported reweighter type.")
+        if len(chunks) == 1:
+            x = _get_float_values(chunks[0]["feature"])
+        else:
+            x = [_ChunkSequence(df["feature"].values) for df in chunks]
+        return x, y, w
+
+    def _get_dataset_params(self) -> dict:
+        """The parameters of LightGBM which determine the constructed datasets"""
+        params = lgb.Dataset(None, params=self.params).get_params()
+        params.update({k: v for k, v in self.params.items() if k in self.SEED_PARAMS})
+        return params
+
+    def _get_dataset_key(self, x_chunks: List[np.ndarray], y, w, ref_key: str = None) -> str:
+        """The fingerprint of a dataset"""
+        return _fingerprint_arrays([x_chunks, y, w], self._get_dataset_params(), ref_key)
+
+    def _get_dataset(
+        self, x, y, w, x_chunks: List[np.ndarray], reference: lgb.Dataset = None, ref_key: str = None
+    ) -> Tuple[lgb.Dataset, str]:
+        """
+        Get the constructed dataset from the cached binary file, or construct and cache it.
+
+        Parameters
+        ----------
+        x, y, w :
+            the data of the dataset
+        x_chunks : List[np.ndarray]
+            the row chunks of the features to fingerprint the data
+        reference : lgb.Dataset
+            the dataset providing the bins
+        ref_key : str
+            the fingerprint of the reference
+
+        Returns
+        -------
+        Tuple[lgb.Dataset, str]:
+            the dataset and its fingerprint
+        """
+        key = self._get_dataset_key(x_chunks, y, w, ref_key)
+        path = None
+        if self.dataset_cache_dir is not None:
+            path = Path(self.dataset_cache_dir).expanduser() / f"{key}.bin"
+            if path.exists():
+                get_module_logger("LGBModel").info(f"Load the binary dataset from {path}")
+                return lgb.Dataset(str(path), params=self.params), key
+        ds = lgb.Dataset(x, label=y, weight=w, params=self.params, reference=reference).construct()
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # dump to a temporary file first, so the concurrent tasks never read a partially written file.
+            # NOTE: LightGBM doesn't overwrite an existing file, so the temporary file must not be created in advance
+            tmp_path = str(path.parent / f"{key}.{uuid.uuid4().hex}.tmp")
+            try:
+                ds.save_binary(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return ds, key
+
+    def _get_bin_reference(self, dataset: DatasetH) -> Tuple[lgb.Dataset, str]:
+        """
+        Get the reference dataset providing the bins of the features.
+
+        Like LightGBM, the bins are constructed from at most `bin_construct_sample_cnt` rows sampled from the
+        reference data, so only the sampled rows are loaded into memory and cached.
+        """
+        seg = self.bin_reference
+        if isinstance(seg, (tuple, list)):
+            seg = slice(*seg)
+        chunks = dataset.prepare_chunks(seg, col_set=["feature", "label"], data_key=DataHandlerLP.DK_L)
+        if len(chunks) == 1 and chunks[0].empty:
+            raise ValueError(f"Empty data of the bin reference {self.bin_reference}, please check your config.")
+        x = ChunkedArray([df["feature"].values for df in chunks])
+        y = ChunkedArray([df["label"].values[:, :1] for df in chunks])
+        n_samples = self.params.get("bin_construct_sample_cnt", 200000)
+        if len(x) > n_samples:
+            seed = next((self.params[k] for k in self.SEED_PARAMS if k in self.params), 0)
+            idx = np.sort(np.random.default_rng(seed).choice(len(x), n_samples, replace=False))
+        else:
+            idx = np.arange(len(x))
+        x, y = np.ascontiguousarray(x[idx]), y[idx][:, 0]
+        if self._bin_ref is not None and self._bin_ref[0] == self._get_dataset_key([x], y, None):
+            return self._bin_ref[1], self._bin_ref[0]
+        ds, ref_key = self._get_dataset(x, y, None, [x])
+        self._bin_ref = ref_key, ds
+        return ds, ref_key
+
     def fit(
         self,
         dataset: DatasetH,
@@ -74,13 +257,15 @@ class LGBModel(ModelFT, LightGBMFInt):
         # NOTE: if you encounter error here. Please upgrade your lightgbm
         verbose_eval_callback = lgb.log_evaluation(period=verbose_eval)
         evals_result_callback = lgb.record_evaluation(evals_result)
+        # the extra callbacks (e.g. pruning the trials of tuning)
+        callbacks = list(kwargs.pop("callbacks", None) or [])
         self.model = lgb.train(
             self.params,
             ds[0],  # training dataset
             num_boost_round=self.num_boost_round if num_boost_round is None else num_boost_round,
             valid_sets=ds,
             valid_names=names,
-            callbacks=[early_stopping_callback, verbose_eval_callback, evals_result_callback],
+            callbacks=[early_stopping_callback, verbose_eval_callback, evals_result_callback] + callbacks,
             **kwargs,
         )
         for k in names:
@@ -92,8 +277,10 @@ class LGBModel(ModelFT, LightGBMFInt):
     def predict(self, dataset: DatasetH, segment: Union[Text, slice] = "test"):
         if self.model is None:
             raise ValueError("model is not fitted yet!")
-        x_test = dataset.prepare(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
-        return pd.Series(self.model.predict(x_test.values), index=x_test.index)
+        # the out-of-core data is predicted chunk by chunk
+        x_chunks = dataset.prepare_chunks(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
+        pred_l = [pd.Series(self.model.predict(x_test.values), index=x_test.index) for x_test in x_chunks]
+        return pred_l[0] if len(pred_l) == 1 else pd.concat(pred_l)
 
     def finetune(self, dataset: DatasetH, num_boost_round=10, verbose_eval=20, reweighter=None):
         """
@@ -109,7 +296,7 @@ class LGBModel(ModelFT, LightGBMFInt):
             verbose level
         """
         # Based on existing model and finetune by train more rounds
-        dtrain, _ = self._prepare_data(dataset, reweighter)  # pylint: disable=W0632
+        dtrain, _ = self._prepare_data(dataset, reweighter, use_cache=False)  # pylint: disable=W0632
         if dtrain.empty:
             raise ValueError("Empty data from dataset, please check your dataset config.")
         verbose_eval_callback = lgb.log_evaluation(period=verbose_eval)
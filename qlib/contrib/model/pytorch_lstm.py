@@ -19,6 +19,7 @@ import torch.optim as optim
 from ...model.base import Model
 from ...data.dataset import DatasetH
 from ...data.dataset.handler import DataHandlerLP
+from .pytorch_utils import get_data_loader, get_fit_data_loaders
 
 
 class LSTM(Model):
@@ -32,6 +33,8 @@ class LSTM(Model):
         the evaluation metric used in early stop
     optimizer : str
         optimizer name
+    num_workers : int
+        the number of the workers gathering the batches of data in the background
     GPU : str
         the GPU ID(s) used for training
     """
@@ -49,6 +52,7 @@ class LSTM(Model):
         early_stop=20,
         loss="mse",
         optimizer="adam",
+        num_workers=0,
         GPU=0,
         seed=None,
         **kwargs,
@@ -71,6 +75,7 @@ class LSTM(Model):
         self.loss = loss
         self.device = torch.device("cuda:%d" % (GPU) if torch.cuda.is_available() and GPU >= 0 else "cpu")
         self.seed = seed
+        self.num_workers = num_workers
 
         self.logger.info(
             "LSTM parameters setting:"
@@ -149,21 +154,12 @@ class LSTM(Model):
 
         raise ValueError("unknown metric `%s`" % self.metric)
 
-    def train_epoch(self, x_train, y_train):
-        x_train_values = x_train.values
-        y_train_values = np.squeeze(y_train.values)
-
+    def train_epoch(self, data_loader):
         self.lstm_model.train()
 
-        indices = np.arange(len(x_train_values))
-        np.random.shuffle(indices)
-
-        for i in range(len(indices))[:: self.batch_size]:
-            if len(indices) - i < self.batch_size:
-                break
-
-            feature = torch.from_numpy(x_train_values[indices[i : i + self.batch_size]]).float().to(self.device)
-            label = torch.from_numpy(y_train_values[indices[i : i + self.batch_size]]).float().to(self.device)
+        for feature, label in data_loader:
+            feature = feature.to(self.device, non_blocking=True)
+            label = label.to(self.device, non_blocking=True)
 
             pred = self.lstm_model(feature)
             loss = self.loss_fn(pred, label)
@@ -173,24 +169,15 @@ class LSTM(Model):
             torch.nn.utils.clip_grad_value_(self.lstm_model.parameters(), 3.0)
             self.train_optimizer.step()
 
-    def test_epoch(self, data_x, data_y):
-        # prepare training data
-        x_values = data_x.values
-        y_values = np.squeeze(data_y.values)
-
+    def test_epoch(self, data_loader):
         self.lstm_model.eval()
 
         scores = []
         losses = []
 
-        indices = np.arange(len(x_values))
-
-        for i in range(len(indices))[:: self.batch_size]:
-            if len(indices) - i < self.batch_size:
-                break
-
-            feature = torch.from_numpy(x_values[indices[i : i + self.batch_size]]).float().to(self.device)
-            label = torch.from_numpy(y_values[indices[i : i + self.batch_size]]).float().to(self.device)
+        for feature, label in data_loader:
+            feature = feature.to(self.device, non_blocking=True)
+            label = label.to(self.device, non_blocking=True)
 
             pred = self.lstm_model(feature)
             loss = self.loss_fn(pred, label)
@@ -218,6 +205,10 @@ class LSTM(Model):
         x_train, y_train = df_train["feature"], df_train["label"]
         x_valid, y_valid = df_valid["feature"], df_valid["label"]
 
+        train_loader, train_eval_loader, valid_loader = get_fit_data_loaders(
+            x_train, y_train, x_valid, y_valid, self.batch_size, num_workers=self.num_workers, pin_memory=self.use_gpu
+        )
+
         save_path = get_or_create_path(save_path)
         stop_steps = 0
         train_loss = 0
@@ -233,10 +224,10 @@ class LSTM(Model):
         for step in range(self.n_epochs):
             self.logger.info("Epoch%d:", step)
             self.logger.info("training...")
-            self.train_epoch(x_train, y_train)
+            self.train_epoch(train_loader)
             self.logger.info("evaluating...")
-            train_loss, train_score = self.test_epoch(x_train, y_train)
-            val_loss, val_score = self.test_epoch(x_valid, y_valid)
+            train_loss, train_score = self.test_epoch(train_eval_loader)
+            val_loss, val_score = self.test_epoch(valid_loader)
             self.logger.info("train %.6f, valid %.6f" % (train_score, val_score))
             evals_result["train"].append(train_score)
             evals_result["valid"].append(val_score)
@@ -266,16 +257,11 @@ class LSTM(Model):
         x_test = dataset.prepare(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
         index = x_test.index
         self.lstm_model.eval()
-        x_values = x_test.values
-        sample_num = x_values.shape[0]
         preds = []
 
-        for begin in range(sample_num)[:: self.batch_size]:
-            if sample_num - begin < self.batch_size:
-                end = sample_num
-            else:
-                end = begin + self.batch_size
-            x_batch = torch.from_numpy(x_values[begin:end]).float().to(self.device)
+        # the batches are the views of the store in order, so they are not gathered by the workers
+        for x_batch in get_data_loader(x_test.values, self.batch_size, pin_memory=self.use_gpu):
+            x_batch = x_batch.to(self.device, non_blocking=True)
             with torch.no_grad():
                 pred = self.lstm_model(x_batch).detach().cpu().numpy()
             preds.append(pred)
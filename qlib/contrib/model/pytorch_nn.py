@@ -21,6 +21,7 @@ from .pytorch_utils import count_parameters
 from ...model.base import Model
 from ...data.dataset import DatasetH
 from ...data.dataset.handler import DataHandlerLP
+from ...data.dataset.utils import ChunkedArray
 from ...data.dataset.weight import Reweighter
 from ...utils import (
     auto_filter_kwargs,
@@ -202,20 +203,30 @@ class DNNModelPytorch(Model):
         for seg in segments:
             if seg in dataset.segments:
                 # df_train df_valid
-                df = dataset.prepare(
+                chunks = dataset.prepare_chunks(
                     seg, col_set=["feature", "label"], data_key=self.valid_key if seg == "valid" else DataHandlerLP.DK_L
                 )
-                all_df["x"][seg] = df["feature"]
+                if len(chunks) > 1:
+                    # out-of-core data: the features are kept in the memory-mapped chunks and gathered batch by batch
+                    all_df["x"][seg] = ChunkedArray([chunk["feature"].values for chunk in chunks])
+                    df = pd.concat([chunk[["label"]] for chunk in chunks])
+                else:
+                    df = chunks[0]
+                    all_df["x"][seg] = df["feature"]
                 all_df["y"][seg] = df["label"].copy()  # We have to use copy to remove the reference to release mem
                 if reweighter is None:
                     all_df["w"][seg] = pd.DataFrame(np.ones_like(all_df["y"][seg].values), index=df.index)
                 elif isinstance(reweighter, Reweighter):
-                    all_df["w"][seg] = pd.DataFrame(reweighter.reweight(df))
+                    w_l = [reweighter.reweight(chunk) for chunk in chunks]
+                    all_df["w"][seg] = pd.DataFrame(w_l[0] if len(w_l) == 1 else np.concatenate(w_l))
                 else:
                     raise ValueError("Unsupported reweighter type.")
 
                 # get tensors
                 for v in vars:
+                    if isinstance(all_df[v][seg], ChunkedArray):
+                        all_t[v][seg] = all_df[v][seg]
+                        continue
                     all_t[v][seg] = torch.from_numpy(all_df[v][seg].values).float()
                     # if seg == "valid": # accelerate the eval of validation
                     all_t[v][seg] = all_t[v][seg].to(self.device)  # This will consume a lot of memory !!!!
@@ -246,7 +257,7 @@ class DNNModelPytorch(Model):
             self.dnn_model.train()
             self.train_optimizer.zero_grad()
             choice = np.random.choice(train_num, self.batch_size)
-            x_batch_auto = all_t["x"]["train"][choice].to(self.device)
+            x_batch_auto = self._get_batch(all_t["x"]["train"], choice).to(self.device)
             y_batch_auto = all_t["y"]["train"][choice].to(self.device)
             w_batch_auto = all_t["w"]["train"][choice].to(self.device)
 
@@ -354,12 +365,23 @@ class DNNModelPytorch(Model):
         # NOTE: the order of the index must follow <datetime, instrument> sorted order
         return -ICLoss()(pred, target, index)  # pylint: disable=E1130
 
+    @staticmethod
+    def _get_batch(data, choice):
+        if isinstance(data, ChunkedArray):
+            # only the rows of the batch are loaded from the out-of-core data
+            return torch.from_numpy(data[choice]).float()
+        return data[choice]
+
     def _nn_predict(self, data, return_cpu=True):
         """Reusing predicting NN.
         Scenarios
         1) test inference (data may come from CPU and expect the output data is on CPU)
         2) evaluation on training (data may come from GPU)
+        3) out-of-core data (`ChunkedArray`), which is predicted chunk by chunk
         """
+        if isinstance(data, ChunkedArray):
+            preds = [self._nn_predict(chunk, return_cpu=return_cpu) for chunk in data.chunks]
+            return np.concatenate(preds) if return_cpu else torch.cat(preds, axis=0)
         if not isinstance(data, torch.Tensor):
             if isinstance(data, pd.DataFrame):
                 data = data.values
@@ -381,9 +403,10 @@ class DNNModelPytorch(Model):
     def predict(self, dataset: DatasetH, segment: Union[Text, slice] = "test"):
         if not self.fitted:
             raise ValueError("model is not fitted yet!")
-        x_test_pd = dataset.prepare(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
-        preds = self._nn_predict(x_test_pd)
-        return pd.Series(preds.reshape(-1), index=x_test_pd.index)
+        # the out-of-core data is predicted chunk by chunk
+        x_chunks = dataset.prepare_chunks(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
+        pred_l = [pd.Series(self._nn_predict(x_test_pd).reshape(-1), index=x_test_pd.index) for x_test_pd in x_chunks]
+        return pred_l[0] if len(pred_l) == 1 else pd.concat(pred_l)
 
     def save(self, filename, **kwargs):
         with save_multiple_parts_file(filename) as model_dir:
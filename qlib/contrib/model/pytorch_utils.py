@@ -1,7 +1,13 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import torch
 import torch.nn as nn
+from torch.utils.data import DataLoader, Dataset, Sampler
 
 
 def count_parameters(models_or_parameters, unit="m"):
@@ -35,3 +41,137 @@ def count_parameters(models_or_parameters, unit="m"):
     elif unit is not None:
         raise ValueError("Unknown unit: {:}".format(unit))
     return counts
+
+
+class TensorStore(Dataset):
+    """
+    The samples stored as float32 tensors, which are converted from the arrays only once.
+
+    A batch of samples is gathered by a batch of indices (e.g. from `IndexBatchSampler`) with `index_select` in a
+    single call instead of fancy indexing and casting per batch. The tensors can be moved to the shared memory, so the
+    workers of `DataLoader` read them without copying.
+    """
+
+    def __init__(self, *arrays: np.ndarray, share_memory: bool = False):
+        self.tensors = [torch.from_numpy(np.ascontiguousarray(arr, dtype=np.float32)) for arr in arrays]
+        if len({len(t) for t in self.tensors}) != 1:
+            raise ValueError("The arrays should have the same number of samples")
+        if share_memory:
+            for t in self.tensors:
+                t.share_memory_()
+
+    def __len__(self):
+        return len(self.tensors[0])
+
+    def __getitem__(self, index: Union[slice, np.ndarray]):
+        """
+        Get a batch of samples. The consecutive samples (i.e. a `slice`) are returned as views without copying.
+
+        Returns
+        -------
+        the batch of each tensor (the batch itself if there is only one tensor)
+        """
+        if isinstance(index, slice):
+            batch = [t[index] for t in self.tensors]
+        else:
+            index = torch.as_tensor(index, dtype=torch.long)
+            batch = [t.index_select(0, index) for t in self.tensors]
+        return batch[0] if len(batch) == 1 else tuple(batch)
+
+
+class IndexBatchSampler(Sampler):
+    """
+    Sample the batches of indices of `TensorStore`.
+
+    The indices are shuffled by `np.random.shuffle`, so the batches are the same as the models which shuffle the
+    indices in NumPy given the same seed. The batches are yielded as slices if not shuffled.
+    """
+
+    def __init__(self, n_samples: int, batch_size: int, shuffle: bool = False, drop_last: bool = False):
+        self.n_samples = n_samples
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+
+    def __iter__(self):
+        indices = None
+        if self.shuffle:
+            indices = np.arange(self.n_samples)
+            np.random.shuffle(indices)
+        for i in range(0, self.n_samples, self.batch_size):
+            if self.drop_last and self.n_samples - i < self.batch_size:
+                break
+            yield slice(i, i + self.batch_size) if indices is None else indices[i : i + self.batch_size]
+
+    def __len__(self):
+        if self.drop_last:
+            return self.n_samples // self.batch_size
+        return (self.n_samples + self.batch_size - 1) // self.batch_size
+
+
+def get_data_loader(
+    data: Union[TensorStore, np.ndarray, Sequence[np.ndarray]],
+    batch_size: int,
+    shuffle: bool = False,
+    drop_last: bool = False,
+    num_workers: int = 0,
+    pin_memory: bool = False,
+    prefetch_factor: int = 2,
+) -> DataLoader:
+    """
+    Get the `DataLoader` which yields the batches of `TensorStore`.
+
+    Parameters
+    ----------
+    data : Union[TensorStore, np.ndarray, Sequence[np.ndarray]]
+        the store of the samples, or the arrays to create the store (in the shared memory if `num_workers > 0`).
+        A store can be shared by multiple loaders (e.g. for training and evaluating).
+    batch_size, shuffle, drop_last :
+        please refer to `IndexBatchSampler`
+    num_workers : int
+        the number of the workers gathering the batches in the background; the batches are gathered in the main
+        process if it is 0.
+    pin_memory : bool
+        gather the batches into the page-locked memory, so they could be copied to GPU asynchronously
+        (i.e. `.to(device, non_blocking=True)`).
+    prefetch_factor : int
+        the number of batches prefetched by each worker.
+    """
+    if not isinstance(data, TensorStore):
+        data = TensorStore(*([data] if isinstance(data, np.ndarray) else data), share_memory=num_workers > 0)
+    kwargs = {"prefetch_factor": prefetch_factor, "persistent_workers": True} if num_workers > 0 else {}
+    return DataLoader(
+        data,
+        # the sampler yields the batches of indices and the store gathers a batch at a time
+        sampler=IndexBatchSampler(len(data), batch_size, shuffle=shuffle, drop_last=drop_last),
+        batch_size=None,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        **kwargs,
+    )
+
+
+def get_fit_data_loaders(
+    x_train: pd.DataFrame,
+    y_train: pd.DataFrame,
+    x_valid: Optional[pd.DataFrame],
+    y_valid: Optional[pd.DataFrame],
+    batch_size: int,
+    num_workers: int = 0,
+    pin_memory: bool = False,
+) -> Tuple[DataLoader, DataLoader, Optional[DataLoader]]:
+    """
+    Get the loaders of the batches for training, evaluating on the training data and evaluating on the validation
+    data (None if there is no validation data). The incomplete last batches are dropped.
+
+    The training data is converted only once and shared by the first two loaders.
+    """
+    kwargs = {"num_workers": num_workers, "pin_memory": pin_memory}
+    train_data = TensorStore(x_train.values, np.squeeze(y_train.values), share_memory=num_workers > 0)
+    train_loader = get_data_loader(train_data, batch_size, shuffle=True, drop_last=True, **kwargs)
+    train_eval_loader = get_data_loader(train_data, batch_size, drop_last=True, **kwargs)
+    valid_loader = None
+    if x_valid is not None:
+        valid_data = [x_valid.values, np.squeeze(y_valid.values)]
+        valid_loader = get_data_loader(valid_data, batch_size, drop_last=True, **kwargs)
+    return train_loader, train_eval_loader, valid_loader
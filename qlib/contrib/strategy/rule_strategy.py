@@ -4,7 +4,7 @@ from pathlib import Path
 import warnings
 import numpy as np
 import pandas as pd
-from typing import IO, List, Tuple, Union
+from typing import IO, Iterator, List, Tuple, Union
 from qlib.data.dataset.utils import convert_index_format
 
 from qlib.utils import lazy_sort_index
@@ -12,14 +12,48 @@ from qlib.utils import lazy_sort_index
 from ...utils.resam import resam_ts_data, ts_data_last
 from ...data.data import D
 from ...strategy.base import BaseStrategy
-from ...backtest.decision import BaseTradeDecision, Order, TradeDecisionWO, TradeRange
+from ...backtest.decision import BaseTradeDecision, Order, OrderBatch, OrderDir, TradeDecisionWO, TradeRange
 from ...backtest.exchange import Exchange, OrderHelper
 from ...backtest.utils import CommonInfrastructure, LevelInfrastructure
 from qlib.utils.file import get_io_object
 from qlib.backtest.utils import get_start_end_idx
 
 
-class TWAPStrategy(BaseStrategy):
+def _iter_deal_amount(execute_result: list) -> Iterator[Tuple[str, float]]:
+    """iterate the stock and the dealt amount of each order in the execution result of the orders or `OrderBatch`"""
+    for order, _, _, _ in execute_result:
+        if isinstance(order, OrderBatch):
+            yield from zip(order.stock_id, order.deal_amount)
+        else:
+            yield order.stock_id, order.deal_amount
+
+
+class _OrderBatchMixin:
+    """give the orders of the decisions by `OrderBatch` if `order_batch` is set"""
+
+    order_batch: bool
+
+    def _get_trade_decision(
+        self, orders: List[Tuple[str, float, OrderDir]], start_time: pd.Timestamp, end_time: pd.Timestamp
+    ) -> TradeDecisionWO:
+        """
+        Parameters
+        ----------
+        orders : List[Tuple[str, float, OrderDir]]
+            the stock, the amount and the direction of each order in [start_time, end_time]; no `Order` is created for
+            them if `order_batch` is set.
+        """
+        stock_ids, amounts, directions = map(list, zip(*orders)) if orders else ([], [], [])
+        if self.order_batch:
+            return TradeDecisionWO(OrderBatch(stock_ids, amounts, directions, start_time, end_time), self)
+        order_list = [
+            Order(stock_id=stock_id, amount=amount, start_time=start_time, end_time=end_time, direction=direction)
+            for stock_id, amount, direction in zip(stock_ids, amounts, directions)
+        ]
+        return TradeDecisionWO(order_list, self)
+
+
+class TWAPStrategy(_OrderBatchMixin, BaseStrategy):
     """TWAP Strategy for trading
 
     NOTE:
@@ -27,6 +61,26 @@ class TWAPStrategy(BaseStrategy):
           earlier when the total trade unit of amount is less than the trading step
     """
 
+    def __init__(
+        self,
+        outer_trade_decision: BaseTradeDecision = None,
+        level_infra: LevelInfrastructure = None,
+        common_infra: CommonInfrastructure = None,
+        trade_exchange: Exchange = None,
+        order_batch: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        order_batch : bool
+            give the orders by `OrderBatch`, so the orders of a step are dealt at once by the executor (please refer
+            to `Exchange.deal_order_batch`)
+        """
+        self.order_batch = order_batch
+        super(TWAPStrategy, self).__init__(
+            outer_trade_decision, level_infra, common_infra, trade_exchange=trade_exchange
+        )
+
     def reset(self, outer_trade_decision: BaseTradeDecision = None, **kwargs):
         """
         Parameters
@@ -64,8 +118,8 @@ class TWAPStrategy(BaseStrategy):
 
         # update the order amount
         if execute_result is not None:
-            for order, _, _, _ in execute_result:
-                self.trade_amount_remain[order.stock_id] -= order.deal_amount
+            for stock_id, deal_amount in _iter_deal_amount(execute_result):
+                self.trade_amount_remain[stock_id] -= deal_amount
 
         trade_start_time, trade_end_time = self.trade_calendar.get_step_time(trade_step)
         order_list = []
@@ -111,18 +165,11 @@ class TWAPStrategy(BaseStrategy):
                 amount_delta_target = amount_remain
 
             if amount_delta_target > 1e-5:
-                _order = Order(
-                    stock_id=order.stock_id,
-                    amount=amount_delta_target,
-                    start_time=trade_start_time,
-                    end_time=trade_end_time,
-                    direction=order.direction,  # 1 for buy
-                )
-                order_list.append(_order)
-        return TradeDecisionWO(order_list=order_list, strategy=self)
+                order_list.append((order.stock_id, amount_delta_target, order.direction))
+        return self._get_trade_decision(order_list, trade_start_time, trade_end_time)
 
 
-class SBBStrategyBase(BaseStrategy):
+class SBBStrategyBase(_OrderBatchMixin, BaseStrategy):
     """
     (S)elect the (B)etter one among every two adjacent trading (B)ars to sell or buy.
     """
@@ -136,6 +183,26 @@ class SBBStrategyBase(BaseStrategy):
     # 2. Supporting alter_outer_trade_decision
     # 3. Supporting checking the availability of trade decision
 
+    def __init__(
+        self,
+        outer_trade_decision: BaseTradeDecision = None,
+        level_infra: LevelInfrastructure = None,
+        common_infra: CommonInfrastructure = None,
+        trade_exchange: Exchange = None,
+        order_batch: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        order_batch : bool
+            give the orders by `OrderBatch`, so the orders of a step are dealt at once by the executor (please refer
+            to `Exchange.deal_order_batch`)
+        """
+        self.order_batch = order_batch
+        super(SBBStrategyBase, self).__init__(
+            outer_trade_decision, level_infra, common_infra, trade_exchange=trade_exchange
+        )
+
     def reset(self, outer_trade_decision: BaseTradeDecision = None, **kwargs):
         """
         Parameters
@@ -162,8 +229,8 @@ class SBBStrategyBase(BaseStrategy):
 
         # update the order amount
         if execute_result is not None:
-            for order, _, _, _ in execute_result:
-                self.trade_amount[order.stock_id] -= order.deal_amount
+            for stock_id, deal_amount in _iter_deal_amount(execute_result):
+                self.trade_amount[stock_id] -= deal_amount
 
         trade_start_time, trade_end_time = self.trade_calendar.get_step_time(trade_step)
         pred_start_time, pred_end_time = self.trade_calendar.get_step_time(trade_step, shift=1)
@@ -214,14 +281,7 @@ class SBBStrategyBase(BaseStrategy):
                 _order_amount = min(_order_amount, self.trade_amount[order.stock_id])
 
                 if _order_amount > 1e-5:
-                    _order = Order(
-                        stock_id=order.stock_id,
-                        amount=_order_amount,
-                        start_time=trade_start_time,
-                        end_time=trade_end_time,
-                        direction=order.direction,
-                    )
-                    order_list.append(_order)
+                    order_list.append((order.stock_id, _order_amount, order.direction))
 
             else:
                 _order_amount = None
@@ -260,14 +320,7 @@ class SBBStrategyBase(BaseStrategy):
                             or _pred_trend == self.TREND_LONG
                             and order.direction == order.BUY
                         ):
-                            _order = Order(
-                                stock_id=order.stock_id,
-                                amount=_order_amount,
-                                start_time=trade_start_time,
-                                end_time=trade_end_time,
-                                direction=order.direction,  # 1 for buy
-                            )
-                            order_list.append(_order)
+                            order_list.append((order.stock_id, _order_amount, order.direction))
                     else:
                         # in the second one of two adjacent bars
                         # if look short on the price, buy the stock more
@@ -278,20 +331,13 @@ class SBBStrategyBase(BaseStrategy):
                             or _pred_trend == self.TREND_LONG
                             and order.direction == order.SELL
                         ):
-                            _order = Order(
-                                stock_id=order.stock_id,
-                                amount=_order_amount,
-                                start_time=trade_start_time,
-                                end_time=trade_end_time,
-                                direction=order.direction,  # 1 for buy
-                            )
-                            order_list.append(_order)
+                            order_list.append((order.stock_id, _order_amount, order.direction))
 
             if trade_step % 2 == 0:
                 # in the first one of two adjacent bars, store the trend for the second one to use
                 self.trade_trend[order.stock_id] = _pred_trend
 
-        return TradeDecisionWO(order_list, self)
+        return self._get_trade_decision(order_list, trade_start_time, trade_end_time)
 
 
 class SBBStrategyEMA(SBBStrategyBase):
@@ -466,8 +512,8 @@ class ACStrategy(BaseStrategy):
 
         # update the order amount
         if execute_result is not None:
-            for order, _, _, _ in execute_result:
-                self.trade_amount[order.stock_id] -= order.deal_amount
+            for stock_id, deal_amount in _iter_deal_amount(execute_result):
+                self.trade_amount[stock_id] -= deal_amount
 
         trade_start_time, trade_end_time = self.trade_calendar.get_step_time(trade_step)
         pred_start_time, pred_end_time = self.trade_calendar.get_step_time(trade_step, shift=1)
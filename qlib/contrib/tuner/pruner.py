@@ -0,0 +1,120 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+Prune the bad trials of tuning by their intermediate validation losses, so the computation is spent on the
+promising hyperparameters.
+"""
+
+from typing import List, Optional, Sequence
+
+import lightgbm as lgb
+import numpy as np
+
+
+class MedianPruner:
+    """
+    Prune a trial if its best validation loss so far is worse than the median of the best losses of the finished trials
+    at the same step (e.g. the boosting round or the epoch).
+    """
+
+    def __init__(self, n_startup_trials: int = 5, n_warmup_steps: int = 10, interval_steps: int = 1):
+        """
+        Parameters
+        ----------
+        n_startup_trials : int
+            no trial is pruned until the number of the finished trials reaches it.
+        n_warmup_steps : int
+            a trial is not pruned in its first `n_warmup_steps` steps.
+        interval_steps : int
+            the interval of the steps to check the trial.
+        """
+        self.n_startup_trials = n_startup_trials
+        self.n_warmup_steps = n_warmup_steps
+        self.interval_steps = interval_steps
+        # the cumulative minimum of the losses of each finished trial
+        self._best_curves = []
+
+    def add_curve(self, curve: Sequence[float]):
+        """Add the intermediate losses of a finished trial"""
+        curve = np.asarray(curve, dtype=float)
+        curve = curve[~np.isnan(curve)]
+        if len(curve) > 0:
+            self._best_curves.append(np.minimum.accumulate(curve))
+
+    def __len__(self):
+        return len(self._best_curves)
+
+    def should_prune(self, step: int, best_loss: float) -> bool:
+        """
+        Parameters
+        ----------
+        step : int
+            the step of the trial, starting from 0.
+        best_loss : float
+            the best loss of the trial until `step`.
+        """
+        if len(self._best_curves) < self.n_startup_trials or step < self.n_warmup_steps:
+            return False
+        if (step - self.n_warmup_steps) % self.interval_steps != 0:
+            return False
+        # the trials stopped before `step` (e.g. by early stopping) keep their final best losses
+        median = np.median([curve[min(step, len(curve) - 1)] for curve in self._best_curves])
+        return best_loss > median
+
+
+class LGBPruningCallback:
+    """
+    The LightGBM callback to stop the training when the trial is pruned.
+
+    The first metric of the validation data is checked; the metrics to be maximized are negated as losses. Whether the
+    metric is to be maximized is recorded in `higher_is_better` (None before the first evaluation), so the recorded
+    `evals_result` could be turned into the losses in the same way. Without `pruner`, only the direction is recorded.
+    """
+
+    # run after the evaluation results are recorded and the early stopping is checked
+    order = 40
+
+    def __init__(self, pruner: Optional[MedianPruner] = None, valid_name: str = "valid"):
+        self.pruner = pruner
+        self.valid_name = valid_name
+        self.best_loss = np.inf
+        self.pruned = False
+        self.higher_is_better: Optional[bool] = None
+
+    def __call__(self, env):
+        loss = None
+        for item in env.evaluation_result_list:
+            if item[0] == self.valid_name:
+                self.higher_is_better = bool(item[3])
+                loss = -item[2] if item[3] else item[2]
+                break
+        if loss is None or self.pruner is None:
+            return
+        self.best_loss = min(self.best_loss, loss)
+        if self.pruner.should_prune(env.iteration - env.begin_iteration, self.best_loss):
+            self.pruned = True
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list)
+
+
+def get_valid_curve(evals_result: dict, higher_is_better: bool = False, valid_name: str = "valid") -> List[float]:
+    """
+    Get the intermediate validation losses from the `evals_result` filled by `Model.fit`.
+
+    Parameters
+    ----------
+    evals_result : dict
+        `{valid_name: {metric: [...]}}` (e.g. `LGBModel`; the first metric is used) or `{valid_name: [...]}` (e.g.
+        `XGBModel` and the PyTorch models).
+    higher_is_better : bool
+        whether the recorded values are scores to be maximized, e.g. the PyTorch models record the negative losses.
+    """
+    curve = evals_result.get(valid_name, [])
+    if isinstance(curve, dict):
+        curve = next(iter(curve.values()), [])
+    curve = [float(v) for v in curve]
+    return [-v for v in curve] if higher_is_better else curve
+
+
+def get_best_loss(curve: List[float]) -> Optional[float]:
+    values = [v for v in curve if not np.isnan(v)]
+    return min(values) if len(values) > 0 else None
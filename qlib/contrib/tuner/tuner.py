@@ -10,16 +10,29 @@ import json
 import copy
 import pickle
 import logging
+import shutil
+import tempfile
 import importlib
 import subprocess
+import multiprocessing
+import concurrent.futures
 import pandas as pd
 import numpy as np
 
 from abc import abstractmethod
 
+from ...config import C
 from ...log import get_module_logger, TimeInspector
-from hyperopt import fmin, tpe
+from ...data.dataset import Dataset
+from ...data.dataset.handler import DataHandlerLP
+from ...model.base import Model
+from ...utils import flatten_dict, get_callable_kwargs, init_instance_by_config
+from ...workflow import R
+from ..model.gbdt import LGBModel
+from .pruner import MedianPruner, LGBPruningCallback, get_valid_curve, get_best_loss
+from hyperopt import fmin, tpe, space_eval, base
 from hyperopt import STATUS_OK, STATUS_FAIL
+from hyperopt.utils import coarse_utcnow
 
 
 class Tuner:
@@ -213,3 +226,275 @@ class QLibTuner(Tuner):
         TimeInspector.log_cost_time(
             "Finished saving local best tuner parameters to: {} .".format(local_best_params_path)
         )
+
+
+# the context of the trials in a worker process of `ParallelTuner`
+_TRIAL_CONTEXT = {}
+
+
+def _init_trial_worker(qlib_config, handler_cache_path, n_threads, context):
+    if qlib_config.registered:
+        C.register_from_C(qlib_config)
+    C["handler_cache_path"] = handler_cache_path
+    # avoid the oversubscription of the threads of the models in the workers
+    os.environ.setdefault("OMP_NUM_THREADS", str(n_threads))
+    _TRIAL_CONTEXT.update(context)
+    # the dataset is loaded (memory-mapped from the shared handler cache) once and reused by all the trials
+    _TRIAL_CONTEXT["dataset"] = init_instance_by_config(context["dataset"], accept_types=Dataset)
+
+
+def _run_trial(tid, params, pruner):
+    return _evaluate_trial(_TRIAL_CONTEXT, tid, params, pruner)
+
+
+def _get_trial_curve(evals_result, callback, higher_is_better):
+    """the validation losses of a trial, in the direction reported by LightGBM if the callback has recorded it"""
+    if callback is not None and callback.higher_is_better is not None:
+        higher_is_better = callback.higher_is_better
+    return get_valid_curve(evals_result, higher_is_better)
+
+
+def _evaluate_trial(context, tid, params, pruner):
+    """
+    Fit the model with the hyperparameters and return its best validation loss.
+    The trial of `LGBModel` is stopped early when it is pruned by `pruner`.
+    """
+    model_config = copy.deepcopy(context["model"])
+    model_config["kwargs"] = {**model_config.get("kwargs", {}), **params}
+    fit_kwargs = dict(context["fit_kwargs"])
+    evals_result = {}
+    callback = None
+    try:
+        model = init_instance_by_config(model_config, accept_types=Model)
+        if isinstance(model, LGBModel):
+            # LightGBM reports whether its metric is to be maximized, which is recorded by the callback
+            callback = LGBPruningCallback(pruner)
+            fit_kwargs["callbacks"] = [callback]
+        if context["experiment_name"] is None:
+            model.fit(context["dataset"], evals_result=evals_result, **fit_kwargs)
+        else:
+            with R.start(experiment_name=context["experiment_name"], recorder_name=f"trial_{tid}"):
+                R.log_params(**flatten_dict(params))
+                model.fit(context["dataset"], evals_result=evals_result, **fit_kwargs)
+                loss = get_best_loss(_get_trial_curve(evals_result, callback, context["higher_is_better"]))
+                if loss is not None:
+                    R.log_metrics(loss=loss)
+    except Exception as e:
+        get_module_logger("ParallelTuner").warning(f"Trial {tid} failed with params {params}: {e}")
+        return {"status": STATUS_FAIL, "curve": [], "pruned": False}
+    curve = _get_trial_curve(evals_result, callback, context["higher_is_better"])
+    loss = get_best_loss(curve)
+    if loss is None:
+        return {"status": STATUS_FAIL, "curve": curve, "pruned": False}
+    return {"status": STATUS_OK, "loss": loss, "curve": curve, "pruned": callback is not None and callback.pruned}
+
+
+class _SerialExecutor(concurrent.futures.Executor):
+    """Run the trials in current process"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class ParallelTuner:
+    """
+    Tune the hyperparameters of the model of a task in a process pool.
+
+    Unlike `QLibTuner`, which runs an estimator subprocess reloading the data for every trial, the dataset is
+    prepared only once:
+
+    - The handler (a `DataHandlerLP`) of the dataset is loaded and processed in current process and saved to a shared
+      directory by `HandlerCache`.
+    - Each worker memory-maps the processed data once and reuses the dataset for all its trials, so all the workers
+      share the physical memory of the data.
+
+    The trials are suggested by hyperopt asynchronously: a new trial is suggested as soon as a worker is free, based on
+    all the finished trials. With a `MedianPruner`, the bad trials of `LGBModel` are stopped early by their
+    intermediate validation losses.
+
+    .. code-block:: python
+
+        from hyperopt import hp
+
+        space = {
+            "learning_rate": hp.loguniform("learning_rate", np.log(0.01), np.log(0.3)),
+            "num_leaves": hp.choice("num_leaves", [64, 128, 256]),
+        }
+        tuner = ParallelTuner(task, space, max_evals=100, n_jobs=8, pruner=MedianPruner())
+        best_params = tuner.tune()
+    """
+
+    def __init__(
+        self,
+        task: dict,
+        space: dict,
+        max_evals: int = 10,
+        n_jobs: int = -1,
+        pruner: MedianPruner = None,
+        higher_is_better: bool = False,
+        experiment_name: str = None,
+        fit_kwargs: dict = None,
+        algo=tpe.suggest,
+        seed: int = 0,
+        shared_dir: str = None,
+    ):
+        """
+        Parameters
+        ----------
+        task : dict
+            the task with the configs of `model` and `dataset` (which has the `train` and `valid` segments).
+        space : dict
+            the hyperopt search space of the kwargs of the model.
+        max_evals : int
+            the number of the trials.
+        n_jobs : int
+            the number of the worker processes; -1 for the number of CPUs; 1 to run the trials in current process.
+        pruner : MedianPruner
+            prune the bad trials if given.
+        higher_is_better : bool
+            whether the validation values recorded in `evals_result` by the model are scores to be maximized (e.g. the
+            PyTorch models). It is ignored by `LGBModel`, whose direction is reported by LightGBM for its metric.
+        experiment_name : str
+            the trials are recorded in the experiment if given.
+        fit_kwargs : dict
+            the extra kwargs of `model.fit`.
+        algo :
+            the hyperopt suggestion algorithm.
+        seed : int
+            the random seed of the suggestion.
+        shared_dir : str
+            the directory of the shared handler; a temporary directory removed after tuning by default.
+        """
+        self.logger = get_module_logger("ParallelTuner")
+        self.task = task
+        self.space = space
+        self.max_evals = max_evals
+        self.n_jobs = n_jobs
+        self.pruner = pruner
+        self.higher_is_better = higher_is_better
+        self.experiment_name = experiment_name
+        self.fit_kwargs = fit_kwargs or {}
+        self.algo = algo
+        self.seed = seed
+        self.shared_dir = shared_dir
+
+        self.trials = None
+        self.best_params = None
+        self.best_res = None
+
+    def _prepare_dataset(self, shared_dir):
+        """Prepare the dataset once, and the config for the workers to load it from the shared handler cache"""
+        dataset_config = copy.deepcopy(self.task["dataset"])
+        h_conf = dataset_config.get("kwargs", {}).get("handler")
+        if isinstance(h_conf, dict):
+            h_cls, _ = get_callable_kwargs(h_conf)
+            if isinstance(h_cls, type) and issubclass(h_cls, DataHandlerLP):
+                h_conf["kwargs"] = {**h_conf.get("kwargs", {}), "enable_cache": True}
+        cache_path = C.get("handler_cache_path", None)
+        C["handler_cache_path"] = shared_dir
+        try:
+            with TimeInspector.logt("Prepare the dataset"):
+                dataset = init_instance_by_config(dataset_config, accept_types=Dataset)
+        finally:
+            C["handler_cache_path"] = cache_path
+        return dataset_config, dataset
+
+    def _get_n_workers(self):
+        n_workers = (os.cpu_count() or 1) if self.n_jobs < 0 else self.n_jobs
+        return max(min(n_workers, self.max_evals), 1)
+
+    def _suggest(self, domain, trials, rstate):
+        new_ids = trials.new_trial_ids(1)
+        trials.refresh()
+        return self.algo(new_ids, domain, trials, int(rstate.integers(2**31 - 1)))[0]
+
+    def _tell(self, trials, doc, params, res):
+        result = {"status": res["status"]}
+        if res["status"] == STATUS_OK:
+            result["loss"] = res["loss"]
+            if self.best_res is None or self.best_res > res["loss"]:
+                self.best_res = res["loss"]
+                self.best_params = params
+            if self.pruner is not None and not res["pruned"]:
+                self.pruner.add_curve(res["curve"])
+        doc["state"] = base.JOB_STATE_DONE
+        doc["result"] = result
+        doc["refresh_time"] = coarse_utcnow()
+        trials.insert_trial_docs([doc])
+        trials.refresh()
+        self.logger.info(
+            "Trial {} {}: params {}, loss {}".format(
+                doc["tid"], "pruned" if res.get("pruned", False) else res["status"], params, res.get("loss")
+            )
+        )
+
+    def tune(self):
+        """
+        Returns
+        -------
+        dict:
+            the best hyperparameters.
+        """
+        TimeInspector.set_time_mark()
+        # hyperopt only suggests the hyperparameters, the trials are evaluated by the workers
+        domain = base.Domain(lambda params: None, self.space)
+        self.trials = trials = base.Trials()
+        rstate = np.random.default_rng(self.seed)
+        shared_dir = self.shared_dir
+        if shared_dir is None:
+            shared_dir = tempfile.mkdtemp(prefix="qlib_tuner_")
+        os.makedirs(shared_dir, exist_ok=True)
+        context = {
+            "model": self.task["model"],
+            "fit_kwargs": self.fit_kwargs,
+            "higher_is_better": self.higher_is_better,
+            "experiment_name": self.experiment_name,
+        }
+        try:
+            dataset_config, dataset = self._prepare_dataset(shared_dir)
+            n_workers = self._get_n_workers()
+            if n_workers == 1:
+                executor = _SerialExecutor()
+                trial_func, context = _evaluate_trial, {**context, "dataset": dataset}
+            else:
+                del dataset
+                # the workers are spawned, so they never inherit the locks or the thread pools of current process
+                executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=n_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_trial_worker,
+                    initargs=(
+                        C,
+                        shared_dir,
+                        max((os.cpu_count() or 1) // n_workers, 1),
+                        {**context, "dataset": dataset_config},
+                    ),
+                )
+                trial_func = _run_trial
+            with executor:
+                running = {}
+                n_suggested = 0
+                while n_suggested < self.max_evals or len(running) > 0:
+                    while n_suggested < self.max_evals and len(running) < n_workers:
+                        doc = self._suggest(domain, trials, rstate)
+                        params = space_eval(self.space, base.spec_from_misc(doc["misc"]))
+                        args = (doc["tid"], params, self.pruner)
+                        if trial_func is _evaluate_trial:
+                            args = (context,) + args
+                        running[executor.submit(trial_func, *args)] = doc, params
+                        n_suggested += 1
+                    done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        doc, params = running.pop(future)
+                        self._tell(trials, doc, params, future.result())
+        finally:
+            if self.shared_dir is None:
+                shutil.rmtree(shared_dir, ignore_errors=True)
+        self.logger.info("Best params: {}, best loss: {}".format(self.best_params, self.best_res))
+        TimeInspector.log_cost_time("Finished tuning {} trials.".format(self.max_evals))
+        return self.best_params
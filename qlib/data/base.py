@@ -6,6 +6,8 @@ from __future__ import division
 from __future__ import print_function
 
 import abc
+from numbers import Integral
+
 import pandas as pd
 from ..log import get_module_logger
 
@@ -253,8 +255,20 @@ class Feature(Expression):
     def _load_internal(self, instrument, start_index, end_index, freq):
         # load
         from .data import FeatureD  # pylint: disable=C0415
-
-        return FeatureD.feature(instrument, str(self), start_index, end_index, freq)
+        from .cache import get_shared_expression_cache  # pylint: disable=C0415
+
+        shared_cache = get_shared_expression_cache()
+        if shared_cache is None or not (isinstance(start_index, Integral) and isinstance(end_index, Integral)):
+            return FeatureD.feature(instrument, str(self), start_index, end_index, freq)
+        # the raw feature is shared by the worker processes
+        from ..config import C  # pylint: disable=C0415
+
+        return shared_cache.fetch(
+            (str(C.dpm.get_data_uri(freq)), freq, instrument, str(self)),
+            start_index,
+            end_index,
+            lambda _start, _end: FeatureD.feature(instrument, str(self), _start, _end, freq),
+        )
 
     def get_longest_back_rolling(self):
         return 0
@@ -10,14 +10,19 @@ import sys
 import stat
 import time
 import pickle
+import hashlib
+import tempfile
+import threading
 import traceback
 import redis_lock
 import contextlib
 import abc
 from pathlib import Path
+from multiprocessing import shared_memory
 import numpy as np
 import pandas as pd
-from typing import Union, Iterable
+from filelock import FileLock
+from typing import Callable, Union, Iterable
 from collections import OrderedDict
 
 from ..config import C
@@ -206,6 +211,367 @@ class MemCacheExpire:
         return value, expire
 
 
+def _untrack_shm(shm: shared_memory.SharedMemory):
+    """Stop the resource tracker of current process from unlinking the segment when the process exits.
+
+    The segments of `SharedExpressionCache` outlive the worker which creates them; they are unlinked by the cache.
+    """
+    try:
+        from multiprocessing import resource_tracker  # pylint: disable=C0415
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # pylint: disable=W0212
+    except Exception:  # pylint: disable=W0703
+        pass
+
+
+class SharedExpressionCache:
+    """Expression cache shared by processes on the same machine.
+
+    The raw feature series (e.g. `$close`, `$volume`) of the same instrument are loaded again and again by the
+    workers spawned by `ParallelExt`, because `H["f"]` is private to each process. This cache is a tier between
+    `H["f"]` and the feature storage:
+
+    - Each series is stored as a float32 block in its own `multiprocessing.shared_memory` segment, so workers can
+      look it up zero-copy.
+    - A small control segment contains an open-addressing hash index of the blocks and the LRU clock. The total
+      size of the blocks is limited by `size_limit`.
+    - The index is protected by a file lock, so any process knowing the `name` can attach to the cache.
+
+    A block of key `k` covers a requested range `[req_start, req_end]` of calendar index. If a query is not covered
+    by the block, the union of both ranges is loaded and the block is replaced. So the blocks converge to the
+    ranges required by all the expressions quickly.
+
+    The process creating the cache owns it and must `unlink` it. Using it as a context manager is recommended.
+
+    .. code-block:: python
+
+        with SharedExpressionCache(size_limit=8 * 1024**3):
+            # the workers of D.features will share the loaded features
+            df = D.features(instruments, fields, start_time, end_time)
+    """
+
+    EMPTY = 0
+    TOMBSTONE = 1
+    # header: n_slots, clock, used bytes, occupied slots, tombstones, removed blocks
+    HEADER_DTYPE = np.dtype(
+        [
+            ("n_slots", "<i8"),
+            ("clock", "<u8"),
+            ("used", "<i8"),
+            ("n_used", "<i8"),
+            ("n_dead", "<i8"),
+            ("n_removed", "<u8"),
+        ]
+    )
+    SLOT_DTYPE = np.dtype(
+        [
+            ("key", "<u8"),
+            ("req_start", "<i8"),
+            ("req_end", "<i8"),
+            ("data_start", "<i8"),
+            ("length", "<i8"),
+            ("gen", "<u8"),
+            ("last_access", "<u8"),
+        ]
+    )
+    # rehash the index when the occupied and dead slots exceed the ratio
+    MAX_LOAD = 0.75
+
+    def __init__(self, size_limit: int = None, n_slots: int = 1 << 16, name: str = None):
+        """
+        Parameters
+        ----------
+        size_limit : int
+            the max total bytes of the blocks; None means no limit other than the number of slots.
+        n_slots : int
+            the capacity of the hash index; it is ignored when attaching to an existing cache.
+        name : str
+            attach to an existing cache if given; otherwise a new cache is created.
+        """
+        self.logger = get_module_logger(self.__class__.__name__)
+        self.owner = name is None
+        if self.owner:
+            name = f"qsc{os.getpid():x}{int(time.time() * 1e6) & 0xFFFFFFFF:x}"
+            size = self.HEADER_DTYPE.itemsize + self.SLOT_DTYPE.itemsize * n_slots + 8
+            self._ctrl = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._ctrl = shared_memory.SharedMemory(name=name)
+        _untrack_shm(self._ctrl)
+        self.name = name
+        self._header = np.ndarray((1,), dtype=self.HEADER_DTYPE, buffer=self._ctrl.buf)
+        self._size_limit = np.ndarray((1,), dtype="<i8", buffer=self._ctrl.buf, offset=self.HEADER_DTYPE.itemsize)
+        if self.owner:
+            self._header[0] = (n_slots, 0, 0, 0, 0, 0)
+            self._size_limit[0] = size_limit or 0
+        n_slots = int(self._header[0]["n_slots"])
+        self._slots = np.ndarray(
+            (n_slots,), dtype=self.SLOT_DTYPE, buffer=self._ctrl.buf, offset=self.HEADER_DTYPE.itemsize + 8
+        )
+        if self.owner:
+            self._slots[:] = np.zeros(n_slots, dtype=self.SLOT_DTYPE)
+        self._lock = FileLock(str(Path(tempfile.gettempdir()).joinpath(f"{name}.lock")))
+        # the segments attached by current process, by the generation of the block
+        self._blocks = {}
+        # the segments which are removed but still referenced by some series of current process
+        self._stale_blocks = []
+        # `n_removed` of the header when the attached segments are checked last time
+        self._n_removed = 0
+
+    def __enter__(self):
+        C["shared_expression_cache"] = self.name
+        return self
+
+    def __exit__(self, *args):
+        C["shared_expression_cache"] = None
+        self.unlink()
+
+    @property
+    def size_limit(self):
+        return int(self._size_limit[0])
+
+    @property
+    def total_size(self):
+        return int(self._header[0]["used"])
+
+    def __len__(self):
+        return int(self._header[0]["n_used"])
+
+    @staticmethod
+    def hash_key(*args) -> int:
+        k = int.from_bytes(hashlib.blake2b(repr(args).encode(), digest_size=8).digest(), "little")
+        # 0 and 1 are reserved for empty and dead slots
+        return max(k, SharedExpressionCache.TOMBSTONE + 1)
+
+    def _block_name(self, gen: int) -> str:
+        # the generation is unique in the cache, so a replaced block never shares the name with the old one
+        return f"{self.name}_{gen:x}"
+
+    def _find(self, key: int):
+        """return the slot of `key` and the slot to insert `key` if it doesn't exist"""
+        keys = self._slots["key"]
+        n_slots = len(keys)
+        idx = key % n_slots
+        insert_idx = None
+        for _ in range(n_slots):
+            k = keys[idx]
+            if k == key:
+                return idx, idx
+            if k == self.EMPTY:
+                return None, idx if insert_idx is None else insert_idx
+            if k == self.TOMBSTONE and insert_idx is None:
+                insert_idx = idx
+            idx = (idx + 1) % n_slots
+        return None, insert_idx
+
+    def _tick(self) -> int:
+        self._header["clock"] += 1
+        return int(self._header[0]["clock"])
+
+    def _release(self, gen: int):
+        """detach current process from the segment of block `gen`, so its memory is freed after it is unlinked"""
+        shm = self._blocks.pop(gen, None)
+        if shm is None:
+            return
+        try:
+            shm.close()
+        except BufferError:
+            # the block is still referenced by some series; close it later
+            self._stale_blocks.append(shm)
+
+    def _release_removed(self):
+        """detach current process from the blocks removed by any process; the lock must be held"""
+        n_removed = int(self._header[0]["n_removed"])
+        if n_removed == self._n_removed:
+            return
+        self._n_removed = n_removed
+        live_gens = self._slots["gen"][self._slots["key"] > self.TOMBSTONE]
+        for gen in np.setdiff1d(np.fromiter(self._blocks, dtype="<u8", count=len(self._blocks)), live_gens):
+            self._release(int(gen))
+        stale_blocks, self._stale_blocks = self._stale_blocks, []
+        for shm in stale_blocks:
+            try:
+                shm.close()
+            except BufferError:
+                self._stale_blocks.append(shm)
+
+    def _remove(self, idx: int):
+        """remove the block in slot `idx`; the lock must be held"""
+        slot = self._slots[idx]
+        gen = int(slot["gen"])
+        try:
+            shm = shared_memory.SharedMemory(name=self._block_name(gen))
+            _untrack_shm(shm)
+            shm.unlink()
+            shm.close()
+        except FileNotFoundError:
+            pass
+        self._release(gen)
+        self._header["used"] -= slot["length"] * 4
+        self._header["n_used"] -= 1
+        self._header["n_dead"] += 1
+        self._header["n_removed"] += 1
+        self._slots[idx]["key"] = self.TOMBSTONE
+
+    def _rehash(self):
+        """drop the dead slots; the lock must be held"""
+        occupied = self._slots[self._slots["key"] > self.TOMBSTONE].copy()
+        self._slots[:] = np.zeros(len(self._slots), dtype=self.SLOT_DTYPE)
+        self._header["n_dead"] = 0
+        for slot in occupied:
+            _, idx = self._find(int(slot["key"]))
+            self._slots[idx] = slot
+
+    def _evict(self, nbytes: int):
+        """evict the least recently used blocks to make room for a block of `nbytes`; the lock must be held"""
+        n_slots = len(self._slots)
+        while True:
+            header = self._header[0]
+            over_size = 0 < self.size_limit < header["used"] + nbytes
+            # keep at least one free slot for the open addressing
+            over_slots = header["n_used"] + 1 >= n_slots * self.MAX_LOAD
+            if not (over_size or over_slots) or header["n_used"] == 0:
+                break
+            access = np.where(self._slots["key"] > self.TOMBSTONE, self._slots["last_access"], np.iinfo(np.uint64).max)
+            self._remove(int(np.argmin(access)))
+        if self._header[0]["n_used"] + self._header[0]["n_dead"] + 1 >= n_slots * self.MAX_LOAD:
+            self._rehash()
+
+    def _attach(self, slot) -> np.ndarray:
+        gen = int(slot["gen"])
+        shm = self._blocks.get(gen)
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=self._block_name(gen))
+            _untrack_shm(shm)
+            self._blocks[gen] = shm
+        arr = np.ndarray((int(slot["length"]),), dtype="<f", buffer=shm.buf)
+        arr.setflags(write=False)
+        return arr
+
+    def _to_series(self, arr: np.ndarray, data_start: int, start_index: int, end_index: int) -> pd.Series:
+        si = max(start_index, data_start)
+        ei = min(end_index, data_start + len(arr) - 1)
+        if si > ei:
+            return pd.Series(dtype=np.float32)
+        return pd.Series(arr[si - data_start : ei - data_start + 1], index=pd.RangeIndex(si, ei + 1), copy=False)
+
+    def get(self, key: int, start_index: int, end_index: int) -> Union[pd.Series, None]:
+        """Look up the series of `key` in `[start_index, end_index]`; return None if the range is not covered."""
+        with self._lock:
+            self._release_removed()
+            idx, _ = self._find(key)
+            if idx is None:
+                return None
+            slot = self._slots[idx].copy()
+            if not (slot["req_start"] <= start_index and end_index <= slot["req_end"]):
+                return None
+            self._slots[idx]["last_access"] = self._tick()
+        try:
+            arr = self._attach(slot)
+        except FileNotFoundError:
+            # the block is evicted by other process just now
+            return None
+        return self._to_series(arr, int(slot["data_start"]), start_index, end_index)
+
+    def put(self, key: int, req_start: int, req_end: int, series: pd.Series) -> bool:
+        """Publish the series loaded for the requested range `[req_start, req_end]`.
+
+        Only the float series indexed by a contiguous integer range can be published.
+        """
+        if not series.empty and not (isinstance(series.index, pd.RangeIndex) and series.index.step == 1):
+            return False
+        data = np.ascontiguousarray(series.values, dtype="<f")
+        data_start = int(series.index[0]) if len(data) > 0 else req_start
+        if 0 < self.size_limit < data.nbytes:
+            return False
+        with self._lock:
+            idx, _ = self._find(key)
+            if idx is not None:
+                self._remove(idx)
+            self._evict(data.nbytes)
+            _, insert_idx = self._find(key)
+            gen = self._tick()
+            shm = shared_memory.SharedMemory(name=self._block_name(gen), create=True, size=max(data.nbytes, 1))
+            _untrack_shm(shm)
+            np.ndarray(data.shape, dtype="<f", buffer=shm.buf)[:] = data
+            self._blocks[gen] = shm
+            if self._slots[insert_idx]["key"] == self.TOMBSTONE:
+                self._header["n_dead"] -= 1
+            self._slots[insert_idx] = (key, req_start, req_end, data_start, len(data), gen, gen)
+            self._header["used"] += data.nbytes
+            self._header["n_used"] += 1
+        return True
+
+    def fetch(self, key_args: tuple, start_index: int, end_index: int, loader: Callable[[int, int], pd.Series]):
+        """Get the series of `key_args` in `[start_index, end_index]` from the cache or `loader`.
+
+        Parameters
+        ----------
+        key_args : tuple
+            the identity of the series, e.g. (data uri, freq, instrument, field).
+        loader : Callable[[int, int], pd.Series]
+            load the series of the given calendar index range (both ends included).
+        """
+        key = self.hash_key(*key_args)
+        series = self.get(key, start_index, end_index)
+        if series is not None:
+            return series
+        # extend the range to cover the existing block, so that the block serves all the queries
+        req_start, req_end = start_index, end_index
+        with self._lock:
+            idx, _ = self._find(key)
+            if idx is not None:
+                req_start = min(req_start, int(self._slots[idx]["req_start"]))
+                req_end = max(req_end, int(self._slots[idx]["req_end"]))
+        series = loader(req_start, req_end)
+        if self.put(key, req_start, req_end, series) and (req_start, req_end) != (start_index, end_index):
+            series = series.loc[start_index:end_index]
+        return series
+
+    def close(self):
+        """Detach current process from the cache."""
+        for shm in [*self._blocks.values(), *self._stale_blocks]:
+            try:
+                shm.close()
+            except BufferError:
+                # the block is still referenced by some series
+                pass
+        self._blocks.clear()
+        self._stale_blocks.clear()
+        del self._header, self._size_limit, self._slots
+        self._ctrl.close()
+
+    def unlink(self):
+        """Remove all the blocks and the cache itself. It should be called by the owner."""
+        with self._lock:
+            for idx in np.nonzero(self._slots["key"] > self.TOMBSTONE)[0]:
+                self._remove(int(idx))
+        self.close()
+        self._ctrl.unlink()
+        try:
+            os.remove(self._lock.lock_file)
+        except OSError:
+            pass
+
+
+_shared_expression_cache = {}
+
+
+def get_shared_expression_cache() -> Union[SharedExpressionCache, None]:
+    """Get the shared expression cache configured by `C.shared_expression_cache` in current process."""
+    name = C.shared_expression_cache
+    if name is None:
+        return None
+    # the instance inherited by forking is not reused because of the file lock
+    key = name, os.getpid()
+    if key not in _shared_expression_cache:
+        try:
+            _shared_expression_cache[key] = SharedExpressionCache(name=name)
+        except FileNotFoundError:
+            get_module_logger("SharedExpressionCache").warning(f"shared expression cache {name} does not exist")
+            _shared_expression_cache[key] = None
+    return _shared_expression_cache[key]
+
+
 class CacheUtils:
     LOCK_ID = "QLIB"
 
@@ -290,6 +656,284 @@ class CacheUtils:
         finally:
             current_cache_wlock.release()
 
+    @staticmethod
+    @contextlib.contextmanager
+    def try_writer_lock(redis_t, lock_name):
+        """Non-blocking version of `writer_lock`.
+
+        It yields whether the lock is acquired. The lock can't be acquired when the cache is being read or written.
+        """
+        current_cache_wlock = redis_lock.Lock(redis_t, f"{lock_name}-wlock", id=CacheUtils.LOCK_ID)
+        try:
+            acquired = current_cache_wlock.acquire(blocking=False)
+        except redis_lock.AlreadyAcquired:
+            # the writers share the same lock id, so the lock held by another writer is reported in this way
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                current_cache_wlock.release()
+
+
+class DiskCacheManager:
+    """Size-budgeted manager of a disk cache directory.
+
+    Every entry of the disk caches records `last_visit` and `visits` in its `.meta` file. The manager keeps an
+    in-memory index of the entries (the directory is scanned only once) and evicts the least valuable entries when
+    the total size of the directory exceeds the budget.
+
+    - lru: evict the least recently visited entries first
+    - lfu: evict the least frequently visited entries first
+
+    .. note:: The index is maintained per process. Entries removed by other processes are dropped from the index
+        when they are found missing during eviction.
+    """
+
+    POLICY_LRU = "lru"
+    POLICY_LFU = "lfu"
+    # the files belong to a cache entry besides the data file itself
+    SUFFIX_LIST = (".meta", ".index", ".data")
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        lock_prefix: str,
+        size_limit: int = None,
+        policy: str = POLICY_LRU,
+        redis_t=None,
+    ):
+        """
+        Parameters
+        ----------
+        cache_dir : Union[str, Path]
+            the cache directory to manage.
+        lock_prefix : str
+            the lock name of an entry is `lock_prefix + <cache uri>`; it must be consistent with the cache mechanism.
+        size_limit : int
+            size budget in bytes; None or 0 means no limit.
+        policy : str
+            "lru" or "lfu".
+        redis_t :
+            redis connection for the cache locks. If it is None, entries are removed without locking; this is only
+            safe when no process is using the cache.
+        """
+        if policy not in (self.POLICY_LRU, self.POLICY_LFU):
+            raise ValueError(f"policy must be {self.POLICY_LRU} or {self.POLICY_LFU}, your policy is {policy}")
+        self.cache_dir = Path(cache_dir)
+        self.lock_prefix = lock_prefix
+        self.size_limit = size_limit or 0
+        self.policy = policy
+        self.r = redis_t
+        # cache path -> {"size": int, "last_visit": float, "visits": int}
+        self._entries = None
+        self._size = 0
+        self._lock = threading.RLock()
+        self.logger = get_module_logger(self.__class__.__name__)
+
+    @classmethod
+    def from_config(
+        cls, kind: str, freq: str = None, redis_t=None, size_limit: int = None, policy: str = None
+    ) -> "DiskCacheManager":
+        """Create the manager of the disk cache directory according to qlib config.
+
+        Parameters
+        ----------
+        kind : str
+            "expression"(DiskExpressionCache) or "dataset"(DiskDatasetCache).
+        size_limit : int
+            overwrite the configured size limit.
+        policy : str
+            overwrite `C.disk_cache_evict_policy`.
+        """
+        if kind == "expression":
+            dir_name, default_limit = C.features_cache_dir_name, C.features_cache_size_limit
+        elif kind == "dataset":
+            dir_name, default_limit = C.dataset_cache_dir_name, C.dataset_cache_size_limit
+        else:
+            raise ValueError(f"kind must be expression or dataset, your kind is {kind}")
+        if size_limit is None:
+            size_limit = default_limit
+        return cls(
+            BaseProviderCache.get_cache_dir(dir_name, freq),
+            lock_prefix=f"{str(C.dpm.get_data_uri(freq))}:{kind}-",
+            size_limit=size_limit,
+            policy=C.disk_cache_evict_policy if policy is None else policy,
+            redis_t=redis_t,
+        )
+
+    @property
+    def limited(self):
+        """whether the disk cache is limited"""
+        return self.size_limit > 0
+
+    @property
+    def total_size(self):
+        self._ensure_index()
+        return self._size
+
+    def __len__(self):
+        self._ensure_index()
+        return len(self._entries)
+
+    def _ensure_index(self):
+        if self._entries is None:
+            self.scan()
+
+    def scan(self):
+        """(Re)build the in-memory index by scanning the cache directory."""
+        entries = {}
+        for meta_path in self.cache_dir.rglob("*.meta"):
+            cache_path = meta_path.with_suffix("")
+            entry = self._read_entry(cache_path)
+            if entry is not None:
+                entries[cache_path] = entry
+        with self._lock:
+            self._entries = entries
+            self._size = sum(e["size"] for e in entries.values())
+
+    @classmethod
+    def _entry_size(cls, cache_path: Path) -> int:
+        size = 0
+        for p in [cache_path] + [cache_path.with_suffix(_s) for _s in cls.SUFFIX_LIST]:
+            try:
+                size += p.stat().st_size
+            except FileNotFoundError:
+                pass
+        return size
+
+    def _read_entry(self, cache_path: Path):
+        meta_path = cache_path.with_suffix(".meta")
+        try:
+            with meta_path.open("rb") as f:
+                meta = pickle.load(f)["meta"]
+            # `last_visit` is saved as str by `CacheUtils.visit`
+            last_visit, visits = float(meta["last_visit"]), int(meta["visits"])
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # the meta may be being written by another process
+            try:
+                last_visit, visits = meta_path.stat().st_mtime, 0
+            except FileNotFoundError:
+                return None
+        return {"size": self._entry_size(cache_path), "last_visit": last_visit, "visits": visits}
+
+    def _pop_entry(self, cache_path: Path):
+        with self._lock:
+            entry = self._entries.pop(cache_path, None)
+            if entry is not None:
+                self._size -= entry["size"]
+
+    def record(self, cache_path: Union[str, Path]):
+        """Add (or refresh) an entry after it is generated or updated."""
+        if not self.limited:
+            return
+        self._ensure_index()
+        cache_path = Path(cache_path)
+        entry = self._read_entry(cache_path)
+        with self._lock:
+            self._pop_entry(cache_path)
+            if entry is not None:
+                self._entries[cache_path] = entry
+                self._size += entry["size"]
+
+    def touch(self, cache_path: Union[str, Path]):
+        """Update the visiting statistics of an entry in the index; the meta file is updated by `CacheUtils.visit`"""
+        if not self.limited:
+            return
+        self._ensure_index()
+        cache_path = Path(cache_path)
+        with self._lock:
+            entry = self._entries.get(cache_path)
+            if entry is not None:
+                entry["last_visit"] = time.time()
+                entry["visits"] += 1
+                return
+        self.record(cache_path)
+
+    def _sort_key(self, entry):
+        if self.policy == self.POLICY_LFU:
+            return entry["visits"], entry["last_visit"]
+        return entry["last_visit"], entry["visits"]
+
+    def _remove(self, cache_path: Path):
+        for p in [cache_path] + [cache_path.with_suffix(_s) for _s in self.SUFFIX_LIST]:
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def evict(self, size_limit: int = None, protect: Iterable = (), dry_run: bool = False) -> list:
+        """Evict entries until the total size is within the budget.
+
+        Entries that are being read or written (i.e. the writer lock can't be acquired) are skipped.
+
+        Parameters
+        ----------
+        size_limit : int
+            the budget in bytes; `self.size_limit` is used by default. 0 means no limit.
+        protect : Iterable
+            the cache paths that should not be evicted (e.g. the entry just generated).
+        dry_run : bool
+            only return the entries to be evicted.
+
+        Returns
+        -------
+        list
+            the evicted cache paths.
+        """
+        size_limit = self.size_limit if size_limit is None else size_limit
+        self._ensure_index()
+        protect = {Path(p) for p in protect}
+        evicted = []
+        with self._lock:
+            if size_limit <= 0 or self._size <= size_limit:
+                return evicted
+            candidates = sorted(self._entries.items(), key=lambda kv: self._sort_key(kv[1]))
+        remain = self._size
+        for cache_path, entry in candidates:
+            if remain <= size_limit:
+                break
+            if cache_path in protect:
+                continue
+            if dry_run:
+                evicted.append(cache_path)
+                remain -= entry["size"]
+                continue
+            if self.r is None:
+                lock = contextlib.nullcontext(True)
+            else:
+                lock = CacheUtils.try_writer_lock(self.r, f"{self.lock_prefix}{cache_path.name}")
+            with lock as acquired:
+                if not acquired:
+                    self.logger.debug(f"{cache_path} is in use, skip evicting it")
+                    continue
+                if cache_path.with_suffix(".meta").exists():
+                    self._remove(cache_path)
+                    evicted.append(cache_path)
+                self._pop_entry(cache_path)
+            remain = self._size
+        if evicted:
+            self.logger.info(f"{len(evicted)} entries are evicted from {self.cache_dir}, {remain} bytes remain")
+        return evicted
+
+    def stats(self) -> dict:
+        """Summary of the cache directory"""
+        self._ensure_index()
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "cache_dir": str(self.cache_dir),
+            "entries": len(entries),
+            "total_size": self._size,
+            "size_limit": self.size_limit if self.limited else None,
+            "policy": self.policy,
+            "visits": sum(e["visits"] for e in entries),
+            "oldest_visit": min((e["last_visit"] for e in entries), default=None),
+            "latest_visit": max((e["last_visit"] for e in entries), default=None),
+        }
+
 
 class BaseProviderCache:
     """Provider cache base class"""
@@ -494,10 +1138,17 @@ class DiskExpressionCache(ExpressionCache):
         self.r = get_redis_connection()
         # remote==True means client is using this module, writing behaviour will not be allowed.
         self.remote = kwargs.get("remote", False)
+        self._cache_managers = {}
 
     def get_cache_dir(self, freq: str = None) -> Path:
         return super(DiskExpressionCache, self).get_cache_dir(C.features_cache_dir_name, freq)
 
+    def get_cache_manager(self, freq: str = None) -> DiskCacheManager:
+        """The manager keeping the size of the cache directory of `freq` within `C.features_cache_size_limit`"""
+        if freq not in self._cache_managers:
+            self._cache_managers[freq] = DiskCacheManager.from_config("expression", freq, redis_t=self.r)
+        return self._cache_managers[freq]
+
     def _uri(self, instrument, field, start_time, end_time, freq):
         field = remove_fields_space(field)
         instrument = str(instrument).lower()
@@ -528,6 +1179,7 @@ class DiskExpressionCache(ExpressionCache):
                 # FIXME: Multiple readers may result in error visit number
                 if not self.remote:
                     CacheUtils.visit(cache_path)
+                    self.get_cache_manager(freq).touch(cache_path)
                 series = read_bin(cache_path, start_index, end_index)
                 return series
             except Exception:
@@ -555,6 +1207,9 @@ class DiskExpressionCache(ExpressionCache):
                             freq=freq,
                             last_update=str(_calendar[-1]),
                         )
+                    manager = self.get_cache_manager(freq)
+                    manager.record(cache_path)
+                    manager.evict(protect=[cache_path])
                     return series.loc[start_index:end_index]
                 else:
                     return series
@@ -640,6 +1295,7 @@ class DiskExpressionCache(ExpressionCache):
                 d["info"]["last_update"] = str(new_calendar[-1])
                 with meta_path.open("wb") as f:
                     pickle.dump(d, f, protocol=C.dump_protocol_version)
+        self.get_cache_manager(freq).record(cp_cache_uri)
         return 0
 
 
@@ -650,6 +1306,7 @@ class DiskDatasetCache(DatasetCache):
         super(DiskDatasetCache, self).__init__(provider)
         self.r = get_redis_connection()
         self.remote = kwargs.get("remote", False)
+        self._cache_managers = {}
 
     @staticmethod
     def _uri(instruments, fields, start_time, end_time, freq, disk_cache=1, inst_processors=[], **kwargs):
@@ -658,6 +1315,20 @@ class DiskDatasetCache(DatasetCache):
     def get_cache_dir(self, freq: str = None) -> Path:
         return super(DiskDatasetCache, self).get_cache_dir(C.dataset_cache_dir_name, freq)
 
+    def get_cache_manager(self, freq: str = None) -> DiskCacheManager:
+        """The manager keeping the size of the cache directory of `freq` within `C.dataset_cache_size_limit`"""
+        if freq not in self._cache_managers:
+            self._cache_managers[freq] = DiskCacheManager.from_config("dataset", freq, redis_t=self.r)
+        return self._cache_managers[freq]
+
+    def _evict(self, cache_path: Path, freq: str):
+        """Record the newly generated cache and keep the cache directory within the budget"""
+        if self.remote:
+            return
+        manager = self.get_cache_manager(freq)
+        manager.record(cache_path)
+        manager.evict(protect=[cache_path])
+
     @classmethod
     def read_data_from_cache(cls, cache_path: Union[str, Path], start_time, end_time, fields):
         """read_cache_from
@@ -727,6 +1398,7 @@ class DiskDatasetCache(DatasetCache):
                 with CacheUtils.reader_lock(self.r, f"{str(C.dpm.get_data_uri(freq))}:dataset-{_cache_uri}"):
                     CacheUtils.visit(cache_path)
                     features = self.read_data_from_cache(cache_path, start_time, end_time, fields)
+                self.get_cache_manager(freq).touch(cache_path)
             elif disk_cache == 2:
                 gen_flag = True
         else:
@@ -742,6 +1414,7 @@ class DiskDatasetCache(DatasetCache):
                     freq=freq,
                     inst_processors=inst_processors,
                 )
+            self._evict(cache_path, freq)
             if not features.empty:
                 features = features.sort_index().loc(axis=0)[:, start_time:end_time]
         return features
@@ -777,6 +1450,7 @@ class DiskDatasetCache(DatasetCache):
             self.logger.debug(f"The cache dataset has already existed {cache_path}. Return the uri directly")
             with CacheUtils.reader_lock(self.r, f"{str(C.dpm.get_data_uri(freq))}:dataset-{_cache_uri}"):
                 CacheUtils.visit(cache_path)
+            self.get_cache_manager(freq).touch(cache_path)
             return _cache_uri
         else:
             # cache unavailable, generate the cache
@@ -788,6 +1462,7 @@ class DiskDatasetCache(DatasetCache):
                     freq=freq,
                     inst_processors=inst_processors,
                 )
+            self._evict(cache_path, freq)
             return _cache_uri
 
     class IndexManager:
@@ -1057,7 +1732,8 @@ class DiskDatasetCache(DatasetCache):
                 d["info"]["last_update"] = str(new_calendar[-1])
                 with meta_path.open("wb") as f:
                     pickle.dump(d, f, protocol=C.dump_protocol_version)
-                return 0
+        self.get_cache_manager(freq).record(cp_cache_uri)
+        return 0
 
 
 class SimpleDatasetCache(DatasetCache):
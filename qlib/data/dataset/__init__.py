@@ -163,6 +163,27 @@ class DatasetH(Dataset):
         if handler_kwargs is not None:
             self.handler.setup_data(**handler_kwargs)
 
+    def setup_infer_data(self, start_time, end_time=None, segment: Text = "test", **kwargs):
+        """
+        Set up the data for inference on the target dates only, and point `segment` to them; so
+        `model.predict(dataset, segment)` predicts the target dates with the fitted processors of the handler
+        (e.g. the dataset saved with the model in the recorder).
+
+        Parameters
+        ----------
+        start_time :
+            the first target date
+        end_time :
+            the last target date; it is `start_time` by default
+        segment : Text
+            the segment of the target dates
+        kwargs :
+            the arguments of `DataHandlerLP.setup_infer_data`
+        """
+        end_time = start_time if end_time is None else end_time
+        self.handler.setup_infer_data(start_time, end_time, **kwargs)
+        self.segments[segment] = (start_time, end_time)
+
     def __repr__(self):
         return "{name}(handler={handler}, segments={segments})".format(
             name=self.__class__.__name__, handler=self.handler, segments=self.segments
@@ -246,6 +267,48 @@ class DatasetH(Dataset):
         # 2) Use pass it directly to prepare a single seg
         return self._prepare_seg(segments, **seg_kwargs)
 
+    def _prepare_seg_chunks(self, slc, **kwargs) -> List[pd.DataFrame]:
+        """
+        Give a query, retrieve the according data as chunks
+
+        Parameters
+        ----------
+        slc : please refer to the docs of `_prepare_seg`
+        """
+        if isinstance(self.handler, DataHandlerLP) and not getattr(self, "fetch_kwargs", None):
+            return self.handler.fetch_chunks(slc, **kwargs)
+        # the extra arguments to fetch the data are only supported by `fetch`
+        return [self._prepare_seg(slc, **kwargs)]
+
+    def prepare_chunks(
+        self,
+        segments: Union[List[Text], Tuple[Text], Text, slice, pd.Index],
+        col_set=DataHandler.CS_ALL,
+        data_key=DataHandlerLP.DK_I,
+    ) -> Union[List[List[pd.DataFrame]], List[pd.DataFrame]]:
+        """
+        Prepare the data as a list of chunks in time order, so the larger-than-memory data could be consumed chunk by
+        chunk.
+
+        If the handler stores the data out of core (e.g. processed by `DiskBlockFormat`), each chunk is a lazy view
+        of the memory-mapped data. Otherwise, the data is prepared as a single chunk.
+
+        Parameters
+        ----------
+        please refer to the docs of `prepare`
+
+        Returns
+        -------
+        Union[List[List[pd.DataFrame]], List[pd.DataFrame]]:
+            the chunks of a segment (or a list of the chunks of each segment)
+        """
+        seg_kwargs = {"col_set": col_set, "data_key": data_key}
+        if isinstance(segments, str) and segments in self.segments:
+            return self._prepare_seg_chunks(self.segments[segments], **seg_kwargs)
+        if isinstance(segments, (list, tuple)) and all(seg in self.segments for seg in segments):
+            return [self._prepare_seg_chunks(self.segments[seg], **seg_kwargs) for seg in segments]
+        return self._prepare_seg_chunks(segments, **seg_kwargs)
+
     # helper functions
     @staticmethod
     def get_min_time(segments):
@@ -594,6 +657,65 @@ class TSDataSampler:
             raise NotImplementedError(f"This type of input is not supported")
         return i, j
 
+    def _get_batch_indices(self, idx: np.ndarray) -> np.ndarray:
+        """
+        The vectorized version of `_get_indices(*_get_row_col(i))` for a batch of int indices.
+
+        Parameters
+        ----------
+        idx : np.ndarray
+            1D int array of the sample indices
+
+        Returns
+        -------
+        np.ndarray:
+            [N x step_len] indices of the data (nan for the missing data)
+        """
+        if len(idx) > 0 and (idx.min() < 0 or idx.max() >= len(self.idx_map)):
+            raise KeyError(f"{idx[(idx < 0) | (idx >= len(self.idx_map))][0]} is out of [0, {len(self.idx_map)})")
+        row, col = self.idx_map[idx, 0], self.idx_map[idx, 1]
+        rows = row[:, None] + np.arange(-self.step_len + 1, 1)
+        valid = rows >= 0
+        indices = self.idx_arr[np.where(valid, rows, 0), col[:, None]]
+        indices[~valid] = np.nan
+
+        def ffill(arr):
+            pos = np.where(np.isnan(arr), 0, np.arange(arr.shape[1]))
+            np.maximum.accumulate(pos, axis=1, out=pos)
+            return np.take_along_axis(arr, pos, axis=1)
+
+        if self.fillna_type == "ffill":
+            indices = ffill(indices)
+        elif self.fillna_type == "ffill+bfill":
+            indices = ffill(ffill(indices)[:, ::-1])[:, ::-1]
+        else:
+            assert self.fillna_type == "none"
+        return indices
+
+    def get_batch(self, idx: Union[List[int], np.ndarray], out: np.ndarray = None) -> np.ndarray:
+        """
+        Get the time-series of a batch of samples with a few vectorized operations.
+
+        Parameters
+        ----------
+        idx : Union[List[int], np.ndarray]
+            the int indices of the samples
+        out : np.ndarray
+            the preallocated buffer with shape <sample_idx, step_idx, feature_idx> and the same dtype as the data.
+            Reusing the buffer across batches avoids allocating memory, but the data of the previous batch will be
+            overwritten.
+
+        Returns
+        -------
+        np.ndarray:
+            the data with shape <sample_idx, step_idx, feature_idx>
+        """
+        idx = np.asarray(idx)
+        indices = self._get_batch_indices(idx)
+        # the last line of `data_arr` is all NaN for padding
+        indices = np.nan_to_num(indices, nan=self.nan_idx).astype(np.intp)
+        return np.take(self.data_arr, indices, axis=0, out=out)
+
     def __getitem__(self, idx: Union[int, Tuple[object, str], List[int]]):
         """
         # We have two method to get the time-series of a sample
@@ -608,13 +730,19 @@ class TSDataSampler:
         # The return value will be similar to the data retrieved by following code
         df.loc(axis=0)['2015-01-01':'2016-12-31', "SZ300315"].iloc[-30:]
 
+        # 3) sample a batch by a list of int indices, please refer to `get_batch`
+        tsds[[0, 1, 2]]
+
         Parameters
         ----------
-        idx : Union[int, Tuple[object, str]]
+        idx : Union[int, Tuple[object, str], List[int]]
         """
         # Multi-index type
         mtit = (list, np.ndarray)
         if isinstance(idx, mtit):
+            if np.asarray(idx).dtype.kind in "iu":
+                # vectorized batch for int indices
+                return self.get_batch(idx)
             indices = [self._get_indices(*self._get_row_col(i)) for i in idx]
             indices = np.concatenate(indices)
         else:
@@ -676,6 +804,14 @@ class TSDatasetH(DatasetH):
         cal = self.handler.fetch(col_set=self.handler.CS_RAW).index.get_level_values("datetime").unique()
         self.cal = sorted(cal)
 
+    def setup_infer_data(self, start_time, end_time=None, segment: Text = "test", history: int = 0, **kwargs):
+        # the time-series samples of the target dates need `step_len - 1` periods before them
+        super().setup_infer_data(
+            start_time, end_time, segment=segment, history=max(history, self.step_len - 1), **kwargs
+        )
+        cal = self.handler.fetch(col_set=self.handler.CS_RAW).index.get_level_values("datetime").unique()
+        self.cal = sorted(cal)
+
     @staticmethod
     def _extend_slice(slc: slice, cal: list, step_len: int) -> slice:
         # Dataset decide how to slice data(Get more data for timeseries).
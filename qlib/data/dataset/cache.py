@@ -0,0 +1,215 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+Content-addressed cache of the processed data of handlers.
+
+The processed data (e.g. `_infer` and `_learn` of `DataHandlerLP`) of an entry is saved in a directory named by the
+fingerprint of everything that determines it. Each DataFrame with a single numeric dtype is saved as a column-major
+`.npy` file, so it can be loaded back memory-mapped without copying.
+
+.. code-block:: text
+
+    <cache_dir>/<fingerprint>/
+        meta.pkl        # index & columns of each data, the fitted processors
+        _infer.npy
+        _learn.npy
+"""
+
+import hashlib
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ...config import C
+from ...log import get_module_logger
+from ...utils import hash_args
+from .loader import DataLoader, NestedDataLoader, StaticDataLoader
+
+
+def fingerprint_obj(obj) -> Optional[str]:
+    """
+    The fingerprint of the pickled object.
+    `Serializable` objects (e.g. processors) only pickle the attributes that determine their behaviors.
+
+    Returns
+    -------
+    Optional[str]:
+        None if the object can't be pickled.
+    """
+    try:
+        return hashlib.md5(pickle.dumps(obj, protocol=C.dump_protocol_version)).hexdigest()
+    except Exception as e:
+        get_module_logger("HandlerCache").debug(f"Can't pickle {type(obj)}: {e}")
+        return None
+
+
+def _static_data_version(config):
+    """the version of the config of StaticDataLoader"""
+    if isinstance(config, dict):
+        return {k: _static_data_version(v) for k, v in config.items()}
+    if isinstance(config, pd.DataFrame):
+        return (
+            hashlib.md5(pd.util.hash_pandas_object(config, index=True).values.tobytes()).hexdigest(),
+            fingerprint_obj(config.columns),
+        )
+    stat = Path(config).stat()
+    return str(config), stat.st_mtime_ns, stat.st_size
+
+
+def fingerprint_loader(data_loader: DataLoader) -> Optional[str]:
+    """
+    The fingerprint of the data loaded by a data loader (except the version of the qlib data).
+
+    Returns
+    -------
+    Optional[str]:
+        None if the data loader can't be fingerprinted.
+    """
+    if isinstance(data_loader, StaticDataLoader):
+        # the data of StaticDataLoader is not pickled
+        try:
+            version = _static_data_version(data_loader._config)  # pylint: disable=W0212
+        except (OSError, TypeError) as e:
+            get_module_logger("HandlerCache").debug(f"Can't get the version of the data of StaticDataLoader: {e}")
+            return None
+        return hash_args(type(data_loader).__name__, data_loader.join, version)
+    if isinstance(data_loader, NestedDataLoader):
+        fp_l = [fingerprint_loader(dl) for dl in data_loader.data_loader_l]
+        return None if None in fp_l else hash_args(type(data_loader).__name__, data_loader.join, fp_l)
+    return fingerprint_obj(data_loader)
+
+
+def get_data_version() -> Optional[dict]:
+    """
+    The version of the underlying qlib data.
+    The calendar files are rewritten whenever the data is updated, so their modified time is used as the version.
+    """
+    if not C.registered:
+        return None
+    version = {}
+    for freq, uri in C.dpm.provider_uri.items():
+        cal_path = C.dpm.get_data_uri(freq).joinpath("calendars", f"{freq}.txt")
+        try:
+            stat = cal_path.stat()
+            version[freq] = (str(uri), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version[freq] = (str(uri), None, None)
+    return version
+
+
+class HandlerCache:
+    """
+    Save and load the processed data of handlers by fingerprint.
+
+    The data loaded from the cache is memory-mapped in copy-on-write mode. So modifying the data in place will not
+    change the cache and the memory is only allocated for the modified pages.
+    """
+
+    META_NAME = "meta.pkl"
+
+    def __init__(self, cache_dir: Union[str, Path] = None):
+        """
+        Parameters
+        ----------
+        cache_dir : Union[str, Path]
+            the directory of the cache; `C.handler_cache_path` or "~/.cache/qlib_handler_cache" by default.
+        """
+        if cache_dir is None:
+            cache_dir = C.get("handler_cache_path", None) or "~/.cache/qlib_handler_cache"
+        self.cache_dir = Path(cache_dir).expanduser().resolve()
+        self.logger = get_module_logger(self.__class__.__name__)
+
+    @staticmethod
+    def fingerprint(*args) -> str:
+        return hash_args(*args)
+
+    def get_path(self, key: str) -> Path:
+        return self.cache_dir.joinpath(key)
+
+    def exists(self, key: str) -> bool:
+        return self.get_path(key).joinpath(self.META_NAME).exists()
+
+    @staticmethod
+    def _is_mmappable(df: pd.DataFrame) -> bool:
+        dtypes = set(df.dtypes)
+        return len(dtypes) == 1 and np.issubdtype(dtypes.pop(), np.number)
+
+    def dump(self, key: str, data: Dict[str, pd.DataFrame], info: dict = None):
+        """
+        Save the data of an entry.
+
+        Parameters
+        ----------
+        key : str
+            the fingerprint of the data.
+        data : Dict[str, pd.DataFrame]
+            name -> DataFrame (or data storage). The same DataFrame object shared by several names is saved only once.
+        info : dict
+            other information to be saved with the data (e.g. the fitted processors).
+        """
+        path = self.get_path(key)
+        if path.exists():
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=f".{key}."))
+        try:
+            meta = {"data": {}, "info": info}
+            saved = {}  # id of DataFrame -> name
+            for name, df in data.items():
+                if id(df) in saved:
+                    meta["data"][name] = {"alias": saved[id(df)]}
+                    continue
+                saved[id(df)] = name
+                if isinstance(df, pd.DataFrame) and self._is_mmappable(df):
+                    # `to_numpy` of a single-block DataFrame is column-major, it is saved without copying
+                    np.save(tmp_path.joinpath(f"{name}.npy"), df.to_numpy(), allow_pickle=False)
+                    meta["data"][name] = {"index": df.index, "columns": df.columns}
+                else:
+                    # other data (e.g. data storages) are pickled
+                    with tmp_path.joinpath(f"{name}.pkl").open("wb") as f:
+                        pickle.dump(df, f, protocol=C.dump_protocol_version)
+                    meta["data"][name] = {"pickle": True}
+            with tmp_path.joinpath(self.META_NAME).open("wb") as f:
+                pickle.dump(meta, f, protocol=C.dump_protocol_version)
+            # the directory is renamed at last, so the entry is either complete or nonexistent
+            tmp_path.rename(path)
+        except (OSError, TypeError) as e:
+            # another process may have saved the same entry or the data can't be pickled
+            self.logger.warning(f"Failed to save the handler cache {path}: {e}")
+        finally:
+            if tmp_path.exists():
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def load(self, key: str) -> Optional[tuple]:
+        """
+        Load the data of an entry.
+
+        Returns
+        -------
+        Optional[tuple]:
+            (data, info) or None if the entry doesn't exist.
+        """
+        path = self.get_path(key)
+        try:
+            with path.joinpath(self.META_NAME).open("rb") as f:
+                meta = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        data = {}
+        for name, d_meta in meta["data"].items():
+            if "alias" in d_meta:
+                continue
+            if d_meta.get("pickle", False):
+                data[name] = pd.read_pickle(path.joinpath(f"{name}.pkl"))
+            else:
+                values = np.load(path.joinpath(f"{name}.npy"), mmap_mode="c")
+                data[name] = pd.DataFrame(values, index=d_meta["index"], columns=d_meta["columns"], copy=False)
+        for name, d_meta in meta["data"].items():
+            if "alias" in d_meta:
+                data[name] = data[d_meta["alias"]]
+        return data, meta["info"]
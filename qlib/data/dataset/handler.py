@@ -6,6 +6,7 @@ from abc import abstractmethod
 import warnings
 from typing import Callable, Union, Tuple, List, Iterator, Optional
 
+import numpy as np
 import pandas as pd
 
 from qlib.typehint import Literal
@@ -15,6 +16,7 @@ from ...utils.serial import Serializable
 from .utils import fetch_df_by_index, fetch_df_by_col
 from ...utils import lazy_sort_index
 from .loader import DataLoader
+from .cache import HandlerCache, fingerprint_obj, fingerprint_loader, get_data_version
 
 from . import processor as processor_module
 from . import loader as data_loader_module
@@ -445,6 +447,8 @@ class DataHandlerLP(DataHandler):
         shared_processors: List = [],
         process_type=PTYPE_A,
         drop_raw=False,
+        enable_cache=False,
+        load_chunk: Optional[str] = None,
         **kwargs,
     ):
         """
@@ -488,6 +492,15 @@ class DataHandlerLP(DataHandler):
               - (e.g. self._infer processed by learn_processors )
         drop_raw: bool
             Whether to drop the raw data
+        enable_cache: bool
+            Whether to load the processed data from the handler cache when setting up the data.
+            Please refer to the doc of `setup_data`.
+        load_chunk: Optional[str]
+            The time span of the chunks (e.g. "1Y") to load and process the data chunk by chunk, which bounds the peak
+            memory and overlaps loading with processing. Please refer to `DataLoader.load_iter`.
+            The processors to be fitted are fitted on the streamed chunks first (please refer to
+            `Processor.fit_chunks`); the processed data of the chunks are concatenated (or the partitions are merged if
+            the processors end with `DiskBlockFormat`).
         """
 
         # Setup preprocessor
@@ -506,6 +519,8 @@ class DataHandlerLP(DataHandler):
 
         self.process_type = process_type
         self.drop_raw = drop_raw
+        self.enable_cache = enable_cache
+        self.load_chunk = load_chunk
         super().__init__(instruments, start_time, end_time, data_loader, **kwargs)
 
     def get_all_processors(self):
@@ -527,17 +542,98 @@ class DataHandlerLP(DataHandler):
         """
         self.process_data(with_fit=True)
 
+    # max number of elements of the rows processed by the fused kernels at a time, so the rows stay in cache
+    FUSE_CHUNK_SIZE = 2**20
+
     @staticmethod
+    def _get_inplace_values(df) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+        """
+        Get the writable 2D ndarray which shares the memory with the data.
+        It is available only if all the columns have the same float dtype. The data stored in multiple blocks is
+        consolidated into a new DataFrame (`df` will be modified by the processor inplace, so it is replaceable).
+
+        Returns
+        -------
+        Tuple[pd.DataFrame, Optional[np.ndarray]]:
+            the data and its ndarray
+        """
+        if not isinstance(df, pd.DataFrame) or df.shape[0] == 0 or df.shape[1] == 0:
+            return df, None
+        dtypes = set(df.dtypes)
+        if len(dtypes) != 1 or not np.issubdtype(dtypes.pop(), np.floating):
+            return df, None
+        values = df.values
+        if not np.may_share_memory(values, df.iloc[:1, :1].values):
+            # `values` is a consolidated copy of multiple blocks
+            df = pd.DataFrame(values, index=df.index, columns=df.columns, copy=False)
+        if not values.flags.writeable:
+            return df, None
+        return df, values
+
+    @classmethod
+    def _apply_kernels(cls, values: np.ndarray, kernels: List[Callable]):
+        """apply the kernels of consecutive processors in one pass over the rows"""
+        step = max(1, cls.FUSE_CHUNK_SIZE // values.shape[1])
+        for i in range(0, values.shape[0], step):
+            chunk = values[i : i + step]
+            for kernel in kernels:
+                kernel(chunk)
+
+    @classmethod
     def _run_proc_l(
-        df: pd.DataFrame, proc_l: List[processor_module.Processor], with_fit: bool, check_for_infer: bool
+        cls,
+        df: pd.DataFrame,
+        proc_l: List[processor_module.Processor],
+        with_fit: bool,
+        check_for_infer: bool,
+        copy: bool = False,
     ) -> pd.DataFrame:
+        """
+        Run the processors one by one.
+
+        The element-wise processors (with `Processor.get_kernel`) work inplace on the underlying ndarray of `df`.
+        Consecutive ones are fused into one pass when no processor has to be fitted between them.
+
+        Parameters
+        ----------
+        copy : bool
+            copy `df` before it is modified by the first processor which is not readonly.
+        """
+        values = None
+        kernels, kernel_names = [], []
+
+        def flush():
+            if kernels:
+                with TimeInspector.logt(f"{'+'.join(kernel_names)}"):
+                    cls._apply_kernels(values, kernels)
+                kernels.clear()
+                kernel_names.clear()
+
         for proc in proc_l:
             if check_for_infer and not proc.is_for_infer():
                 raise TypeError("Only processors usable for inference can be used in `infer_processors` ")
-            with TimeInspector.logt(f"{proc.__class__.__name__}"):
-                if with_fit:
+            if copy and not proc.readonly():
+                # the copy is consolidated into a single block, so it is usually available for the kernels
+                df = df.copy()
+                copy = False
+            if with_fit and type(proc).fit is not processor_module.Processor.fit:
+                # fitting relies on the output of the previous processors
+                flush()
+                with TimeInspector.logt(f"{proc.__class__.__name__}.fit"):
                     proc.fit(df)
+            kernel = proc.get_kernel(df.columns) if isinstance(df, pd.DataFrame) else None
+            if kernel is not None and values is None:
+                df, values = cls._get_inplace_values(df)
+            if kernel is not None and values is not None:
+                kernels.append(kernel)
+                kernel_names.append(proc.__class__.__name__)
+                continue
+            flush()
+            with TimeInspector.logt(f"{proc.__class__.__name__}"):
                 df = proc(df)
+            # the processor may change the storage of the data
+            values = None
+        flush()
         return df
 
     @staticmethod
@@ -570,42 +666,49 @@ class DataHandlerLP(DataHandler):
 
             (self._data)-[shared_processors]-(_shared_df)-[infer_processors]-(_infer_df)-[learn_processors]-(_learn_df)
 
+        The data is copied only where the flow branches (i.e. the input of a list of processors is still needed
+        afterwards), and the copy is delayed until the first processor which is not readonly.
+
         Parameters
         ----------
         with_fit : bool
             The input of the `fit` will be the output of the previous processor
         """
         # shared data processors
-        # 1) assign
-        _shared_df = self._data
-        if not self._is_proc_readonly(self.shared_processors):  # avoid modifying the original data
-            _shared_df = _shared_df.copy()
-        # 2) process
-        _shared_df = self._run_proc_l(_shared_df, self.shared_processors, with_fit=with_fit, check_for_infer=True)
+        # `self._data` is always kept (it is deleted after processing when `drop_raw`, but it may be shared with the
+        # data loader)
+        _shared_df = self._run_proc_l(
+            self._data, self.shared_processors, with_fit=with_fit, check_for_infer=True, copy=True
+        )
+        # `_shared_df` is a private copy only if it has been copied
+        shared_owned = not self._is_proc_readonly(self.shared_processors)
 
         # data for inference
-        # 1) assign
-        _infer_df = _shared_df
-        if not self._is_proc_readonly(self.infer_processors):  # avoid modifying the original data
-            _infer_df = _infer_df.copy()
-        # 2) process
-        _infer_df = self._run_proc_l(_infer_df, self.infer_processors, with_fit=with_fit, check_for_infer=True)
+        if self.process_type == DataHandlerLP.PTYPE_I:
+            # `_shared_df` is still needed by the learning flow
+            infer_copy = True
+        elif self.process_type == DataHandlerLP.PTYPE_A:
+            infer_copy = not shared_owned
+        else:
+            raise NotImplementedError(f"This type of input is not supported")
+        _infer_df = self._run_proc_l(
+            _shared_df, self.infer_processors, with_fit=with_fit, check_for_infer=True, copy=infer_copy
+        )
 
         self._infer = _infer_df
 
         # data for learning
-        # 1) assign
         if self.process_type == DataHandlerLP.PTYPE_I:
             _learn_df = _shared_df
-        elif self.process_type == DataHandlerLP.PTYPE_A:
+            # `_shared_df` can be modified if it is a private copy and `_infer_df` doesn't share the data with it
+            learn_copy = not (shared_owned and not self._is_proc_readonly(self.infer_processors))
+        else:
             # based on `infer_df` and append the processor
             _learn_df = _infer_df
-        else:
-            raise NotImplementedError(f"This type of input is not supported")
-        if not self._is_proc_readonly(self.learn_processors):  # avoid modifying the original  data
-            _learn_df = _learn_df.copy()
-        # 2) process
-        _learn_df = self._run_proc_l(_learn_df, self.learn_processors, with_fit=with_fit, check_for_infer=False)
+            learn_copy = True
+        _learn_df = self._run_proc_l(
+            _learn_df, self.learn_processors, with_fit=with_fit, check_for_infer=False, copy=learn_copy
+        )
 
         self._learn = _learn_df
 
@@ -631,7 +734,7 @@ class DataHandlerLP(DataHandler):
     IT_FIT_IND = "fit_ind"  # the input of `fit` will be the original df
     IT_LS = "load_state"  # The state of the object has been load by pickle
 
-    def setup_data(self, init_type: str = IT_FIT_SEQ, **kwargs):
+    def setup_data(self, init_type: str = IT_FIT_SEQ, enable_cache: Optional[bool] = None, **kwargs):
         """
         Set up the data in case of running initialization for multiple time
 
@@ -640,13 +743,36 @@ class DataHandlerLP(DataHandler):
         init_type : str
             The type `IT_*` listed above.
         enable_cache : bool
-            default value is false:
+            `self.enable_cache` by default:
 
             - if `enable_cache` == True:
 
                 the processed data will be saved on disk, and handler will load the cached data from the disk directly
-                when we call `init` next time
+                when we call `init` next time.
+                The cache is keyed by the fingerprint of the data loader, the version of the data, the instruments,
+                the time range and the processors (including their fitted parameters); so the data will be
+                processed again when any of them changes.
         """
+        if enable_cache is None:
+            enable_cache = getattr(self, "enable_cache", False)
+        cache, cache_key = None, None
+        if enable_cache:
+            cache = HandlerCache()
+            cache_key = self._get_cache_key(init_type)
+            if cache_key is not None and self._load_cache(cache, cache_key):
+                return
+
+        if self._is_chunkable(init_type):
+            if init_type != DataHandlerLP.IT_LS:
+                with TimeInspector.logt("fit data by chunk"):
+                    self._fit_by_chunk(init_type)
+            with TimeInspector.logt("load & process data by chunk"):
+                self._setup_data_by_chunk()
+            if cache_key is not None:
+                with TimeInspector.logt("Dump handler cache"):
+                    cache.dump(cache_key, self._get_cache_data(), info=self._get_cache_processors())
+            return
+
         # init raw data
         super().setup_data(**kwargs)
 
@@ -661,7 +787,193 @@ class DataHandlerLP(DataHandler):
             else:
                 raise NotImplementedError(f"This type of input is not supported")
 
-        # TODO: Be able to cache handler data. Save the memory for data processing
+        if cache_key is not None:
+            with TimeInspector.logt("Dump handler cache"):
+                cache.dump(cache_key, self._get_cache_data(), info=self._get_cache_processors())
+
+    def _is_chunkable(self, init_type: str) -> bool:
+        """Can the data be loaded and processed chunk by chunk"""
+        if getattr(self, "load_chunk", None) is None:
+            return False
+        if init_type not in (DataHandlerLP.IT_LS, DataHandlerLP.IT_FIT_SEQ, DataHandlerLP.IT_FIT_IND):
+            raise NotImplementedError(f"This type of input is not supported")
+        return True
+
+    def _fit_by_chunk(self, init_type: str):
+        """
+        fit the processors on the data streamed chunk by chunk.
+
+        The input of each processor is reproduced by running the processors before it (which have been fitted) on
+        each chunk, in the fitting time range of the processor if it has one.
+        """
+        if self.process_type == DataHandlerLP.PTYPE_I:
+            learn_prefix = self.shared_processors
+        elif self.process_type == DataHandlerLP.PTYPE_A:
+            learn_prefix = self.shared_processors + self.infer_processors
+        else:
+            raise NotImplementedError(f"This type of input is not supported")
+        for prefix, proc_l in [
+            ([], self.shared_processors),
+            (self.shared_processors, self.infer_processors),
+            (learn_prefix, self.learn_processors),
+        ]:
+            for i, proc in enumerate(proc_l):
+                if type(proc).fit is processor_module.Processor.fit:
+                    continue
+                proc_prefix = [] if init_type == DataHandlerLP.IT_FIT_IND else prefix + proc_l[:i]
+                with TimeInspector.logt(f"{proc.__class__.__name__}.fit_chunks"):
+                    proc.fit_chunks(_ProcessedChunks(self, proc_prefix, *self._get_fit_time_range(proc)))
+
+    def _get_fit_time_range(self, proc: processor_module.Processor) -> Tuple:
+        """the intersection of the time range of the handler and the fitting time range of the processor"""
+        start_time, end_time = self.start_time, self.end_time
+        fit_start_time, fit_end_time = getattr(proc, "fit_start_time", None), getattr(proc, "fit_end_time", None)
+        if fit_start_time is not None:
+            start_time = max(pd.Timestamp(t) for t in (start_time, fit_start_time) if t is not None)
+        if fit_end_time is not None:
+            end_time = min(pd.Timestamp(t) for t in (end_time, fit_end_time) if t is not None)
+        if start_time is not None and end_time is not None and start_time > end_time:
+            # no data in the fitting time range; the processor will find no data in the chunks of the handler either
+            return self.start_time, self.end_time
+        return start_time, end_time
+
+    def _setup_data_by_chunk(self):
+        """load and process the data chunk by chunk"""
+        chunks = {attr: [] for attr in self.ATTR_MAP.values()}
+        for df in self.data_loader.load_iter(self.instruments, self.start_time, self.end_time, chunk=self.load_chunk):
+            self._data = lazy_sort_index(df)
+            self.process_data()
+            for attr, chunk_l in chunks.items():
+                if hasattr(self, attr):
+                    chunk_l.append(getattr(self, attr))
+        # the chunks of different data may be the same objects, they are concatenated only once
+        concatenated = []
+        for attr, chunk_l in chunks.items():
+            if len(chunk_l) == 0:
+                continue
+            for prev_l, data in concatenated:
+                if all(c is p for c, p in zip(chunk_l, prev_l)):
+                    break
+            else:
+                data = self._concat_chunks(chunk_l)
+                concatenated.append((chunk_l, data))
+            setattr(self, attr, data)
+
+    @staticmethod
+    def _concat_chunks(chunk_l: list):
+        """concatenate the processed data of the chunks in time order"""
+        from .storage import DiskBlockStorage  # pylint: disable=C0415
+
+        if all(isinstance(chunk, DiskBlockStorage) for chunk in chunk_l):
+            storage = chunk_l[0]
+            for chunk in chunk_l[1:]:
+                storage.extend(chunk)
+            return storage
+        if all(isinstance(chunk, pd.DataFrame) for chunk in chunk_l):
+            return chunk_l[0] if len(chunk_l) == 1 else lazy_sort_index(pd.concat(chunk_l))
+        raise TypeError(f"The processed data of the chunks can't be concatenated: {type(chunk_l[0])}")
+
+    def setup_infer_data(self, start_time, end_time=None, history: int = 0):
+        """
+        Set up the data for inference on the target dates only (e.g. the latest date of the daily prediction) with
+        the fitted processors (e.g. the handler saved with the model in the recorder), instead of loading and
+        processing the whole time range of the handler.
+
+        Only the minimal history is loaded:
+
+        - the expressions of the data loader are calculated with their extended windows
+          (`Expression.get_extended_window_size`) by the data provider, so they need no padding.
+        - the shared and infer processors need `Processor.get_lookback` periods before the target dates.
+        - the samples may need `history` periods before the target dates (e.g. the time-series samples).
+
+        The learn processors are not run, so only the raw data (`DK_R`, unless `drop_raw`) and the data for
+        inference (`DK_I`) are available.
+
+        Parameters
+        ----------
+        start_time :
+            the first target date
+        end_time :
+            the last target date; it is `start_time` by default
+        history : int
+            the number of the periods before the target dates which are kept in the data
+        """
+        end_time = start_time if end_time is None else end_time
+        proc_l = self.shared_processors + self.infer_processors
+        lookback = max((proc.get_lookback() for proc in proc_l), default=0)
+        data_start = self._shift_time(start_time, history)
+        load_start = self._shift_time(start_time, history + lookback)
+
+        with TimeInspector.logt("Loading data"):
+            self._data = lazy_sort_index(self.data_loader.load(self.instruments, load_start, end_time))
+        with TimeInspector.logt("process infer data"):
+            _infer_df = self._run_proc_l(self._data, proc_l, with_fit=False, check_for_infer=True, copy=True)
+        if lookback > 0:
+            # the lookback of the processors is not a part of the data
+            self._data = fetch_df_by_index(self._data, slice(data_start, None), level="datetime")
+            if isinstance(_infer_df, pd.DataFrame):
+                _infer_df = fetch_df_by_index(_infer_df, slice(data_start, None), level="datetime")
+        self._infer = _infer_df
+        # the data for learning is not available
+        self.__dict__.pop("_learn", None)
+        self.start_time, self.end_time = data_start, end_time
+        if self.drop_raw:
+            del self._data
+
+    def _shift_time(self, time, periods: int):
+        """get the time `periods` periods of the data before `time`"""
+        if periods <= 0:
+            return time
+        cal = self.data_loader.get_calendar(end_time=time)
+        cal = cal[cal < pd.Timestamp(time)]
+        return cal[max(len(cal) - periods, 0)] if len(cal) > 0 else time
+
+    def _get_cache_key(self, init_type: str) -> Optional[str]:
+        """
+        The fingerprint of the processed data. None will be returned if any part of the handler can't be pickled
+        """
+        loader_fp = fingerprint_loader(self.data_loader)
+        proc_fp = {
+            pname: [fingerprint_obj(proc) for proc in proc_l] for pname, proc_l in self._get_cache_processors().items()
+        }
+        if loader_fp is None or any(None in fp_l for fp_l in proc_fp.values()):
+            get_module_logger("DataHandlerLP").warning("The handler can't be fingerprinted, the cache is skipped")
+            return None
+        return HandlerCache.fingerprint(
+            f"{type(self).__module__}.{type(self).__qualname__}",
+            get_data_version(),
+            self.instruments,
+            self.start_time,
+            self.end_time,
+            self.process_type,
+            self.drop_raw,
+            init_type,
+            loader_fp,
+            proc_fp,
+        )
+
+    def _get_cache_data(self) -> dict:
+        attrs = [self.ATTR_MAP[self.DK_I], self.ATTR_MAP[self.DK_L]]
+        if not self.drop_raw:
+            attrs.append(self.ATTR_MAP[self.DK_R])
+        return {attr: getattr(self, attr) for attr in attrs}
+
+    def _get_cache_processors(self) -> dict:
+        return {pname: getattr(self, pname) for pname in ("shared_processors", "infer_processors", "learn_processors")}
+
+    def _load_cache(self, cache, cache_key: str) -> bool:
+        with TimeInspector.logt("Load handler cache"):
+            res = cache.load(cache_key)
+        if res is None:
+            return False
+        data, processors = res
+        for attr, df in data.items():
+            setattr(self, attr, df)
+        # the fitted processors
+        for pname, proc_l in processors.items():
+            setattr(self, pname, proc_l)
+        get_module_logger("DataHandlerLP").info(f"The processed data is loaded from the handler cache {cache_key}")
+        return True
 
     def _get_df_by_key(self, data_key: DATA_KEY_TYPE = DataHandlerABC.DK_I) -> pd.DataFrame:
         if data_key == self.DK_R and self.drop_raw:
@@ -710,6 +1022,33 @@ class DataHandlerLP(DataHandler):
             proc_func=proc_func,
         )
 
+    def fetch_chunks(
+        self,
+        selector: Union[pd.Timestamp, slice, str] = slice(None, None),
+        level: Union[str, int] = "datetime",
+        col_set=DataHandler.CS_ALL,
+        data_key: DATA_KEY_TYPE = DataHandler.DK_I,
+    ) -> List[pd.DataFrame]:
+        """
+        fetch data as a list of chunks in time order.
+
+        If the data is stored out of core (e.g. processed by `DiskBlockFormat`), each chunk is a lazy view of the
+        memory-mapped data, so the data larger than memory could be consumed chunk by chunk.
+        Otherwise, the data is fetched as a single chunk.
+
+        Please refer to the docs of `fetch` for the parameters.
+
+        Returns
+        -------
+        List[pd.DataFrame]:
+        """
+        from .storage import DiskBlockStorage  # pylint: disable=C0415
+
+        data_storage = self._get_df_by_key(data_key)
+        if isinstance(data_storage, DiskBlockStorage):
+            return data_storage.fetch_chunks(selector=selector, level=level, col_set=col_set)
+        return [self.fetch(selector=selector, level=level, col_set=col_set, data_key=data_key)]
+
     def get_cols(self, col_set=DataHandler.CS_ALL, data_key: DATA_KEY_TYPE = DataHandlerABC.DK_I) -> list:
         """
         get the column names
@@ -784,3 +1123,25 @@ class DataHandlerLP(DataHandler):
         """
         loader = data_loader_module.StaticDataLoader(df)
         return cls(data_loader=loader)
+
+
+class _ProcessedChunks:
+    """
+    The chunks of the data loaded by the handler and processed by the processors which have been fitted.
+    It is re-iterable, and the data is loaded again for each pass, so only a chunk is kept in memory at a time.
+    """
+
+    def __init__(self, handler: DataHandlerLP, proc_l: List[processor_module.Processor], start_time, end_time):
+        self.handler = handler
+        self.proc_l = proc_l
+        self.start_time = start_time
+        self.end_time = end_time
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        handler = self.handler
+        for df in handler.data_loader.load_iter(
+            handler.instruments, self.start_time, self.end_time, chunk=handler.load_chunk
+        ):
+            yield handler._run_proc_l(
+                lazy_sort_index(df), self.proc_l, with_fit=False, check_for_infer=False, copy=True
+            )
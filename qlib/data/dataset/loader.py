@@ -3,11 +3,12 @@
 
 import abc
 import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import warnings
 import pandas as pd
 
-from typing import Tuple, Union, List, Dict
+from typing import Iterator, Tuple, Union, List, Dict
 
 from qlib.data import D
 from qlib.utils import load_dataset, init_instance_by_config, time_to_slc_point
@@ -58,6 +59,80 @@ class DataLoader(abc.ABC):
             if the instruments filter is not supported, raise KeyError
         """
 
+    def load_iter(
+        self, instruments=None, start_time=None, end_time=None, chunk: str = "1Y", prefetch: bool = True
+    ) -> Iterator[pd.DataFrame]:
+        """
+        load the data chunk by chunk in time order, so the data could be processed with bounded memory.
+
+        Each chunk is loaded by `load` on a time range (the expressions are calculated with their extended windows
+        before the chunk by the data provider), so the chunks are aligned with the data loaded at once.
+
+        Parameters
+        ----------
+        instruments, start_time, end_time :
+            please refer to `load`. The data is loaded at once if the time range is not bounded.
+        chunk : str
+            the time span of each chunk (e.g. "1Y", "6M", "1Q"); please refer to `pd.Period`.
+        prefetch : bool
+            load the next chunk in the background while the current chunk is being consumed.
+
+        Returns
+        -------
+        Iterator[pd.DataFrame]:
+            the data of each chunk. At least one chunk (maybe empty) is yielded.
+        """
+        if start_time is None or end_time is None:
+            yield self.load(instruments, start_time, end_time)
+            return
+        ranges = get_chunk_ranges(start_time, end_time, chunk)
+        if not prefetch or len(ranges) <= 1:
+            yield from _iter_non_empty(self.load(instruments, *rng) for rng in ranges)
+            return
+        with ThreadPoolExecutor(max_workers=1) as executor:
+
+            def _iter_loaded():
+                future = executor.submit(self.load, instruments, *ranges[0])
+                for rng in ranges[1:]:
+                    df = future.result()
+                    future = executor.submit(self.load, instruments, *rng)
+                    yield df
+                yield future.result()
+
+            yield from _iter_non_empty(_iter_loaded())
+
+    def get_calendar(self, start_time=None, end_time=None) -> pd.DatetimeIndex:
+        """
+        get the sorted timestamps of the data in the time range, which are used to count the periods of the history
+        needed before some dates (e.g. by `DataHandlerLP.setup_infer_data`).
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} doesn't provide the calendar of the data")
+
+
+def get_chunk_ranges(
+    start_time: Union[str, pd.Timestamp], end_time: Union[str, pd.Timestamp], chunk: str
+) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    split the time range [start_time, end_time] into the chunks aligned to the periods of `chunk` (e.g. "1Y")
+    """
+    start_time, end_time = pd.Timestamp(start_time), pd.Timestamp(end_time)
+    return [
+        (max(start_time, period.start_time), min(end_time, period.end_time))
+        for period in pd.period_range(start_time, end_time, freq=chunk)
+    ]
+
+
+def _iter_non_empty(df_iter: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """skip the empty chunks, but the last one is yielded if all the chunks are empty"""
+    df = None
+    yielded = False
+    for df in df_iter:
+        if not df.empty:
+            yielded = True
+            yield df
+    if not yielded and df is not None:
+        yield df
+
 
 class DLWParser(DataLoader):
     """
@@ -226,6 +301,25 @@ class QlibDataLoader(DLWParser):
             df = df.swaplevel().sort_index()  # NOTE: if swaplevel, return <datetime, instrument>
         return df
 
+    def load_iter(
+        self, instruments=None, start_time=None, end_time=None, chunk: str = "1Y", prefetch: bool = True
+    ) -> Iterator[pd.DataFrame]:
+        if start_time is None or end_time is None:
+            # the unbounded time range is bounded by the calendars
+            cal = self.get_calendar(start_time, end_time)
+            if len(cal) > 0:
+                start_time = cal[0] if start_time is None else start_time
+                end_time = cal[-1] if end_time is None else end_time
+        yield from super().load_iter(instruments, start_time, end_time, chunk=chunk, prefetch=prefetch)
+
+    def get_calendar(self, start_time=None, end_time=None) -> pd.DatetimeIndex:
+        # the union of the calendars of all the frequencies
+        freq_l = set(self.freq.values()) if isinstance(self.freq, dict) else {self.freq}
+        cal = set()
+        for freq in freq_l:
+            cal.update(D.calendar(start_time, end_time, freq=freq))
+        return pd.DatetimeIndex(sorted(cal))
+
 
 class StaticDataLoader(DataLoader, Serializable):
     """
@@ -268,6 +362,11 @@ class StaticDataLoader(DataLoader, Serializable):
         end_time = time_to_slc_point(end_time)
         return df.loc[start_time:end_time]
 
+    def get_calendar(self, start_time=None, end_time=None) -> pd.DatetimeIndex:
+        self._maybe_load_raw_data()
+        cal = self._data.index.get_level_values("datetime").unique().sort_values()
+        return cal[cal.slice_indexer(time_to_slc_point(start_time), time_to_slc_point(end_time))]
+
     def _maybe_load_raw_data(self):
         if self._data is not None:
             return
@@ -346,6 +445,12 @@ class NestedDataLoader(DataLoader):
                 df_full = pd.merge(df_full, df_current, left_index=True, right_index=True, how=self.join)
         return df_full.sort_index(axis=1)
 
+    def get_calendar(self, start_time=None, end_time=None) -> pd.DatetimeIndex:
+        cal = self.data_loader_l[0].get_calendar(start_time, end_time)
+        for dl in self.data_loader_l[1:]:
+            cal = cal.union(dl.get_calendar(start_time, end_time))
+        return cal
+
 
 class DataLoaderDH(DataLoader):
     """DataLoaderDH
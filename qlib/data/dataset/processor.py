@@ -2,13 +2,24 @@
 # Licensed under the MIT License.
 
 import abc
-from typing import Union, Text, Optional
+from numbers import Number
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Tuple, Union, Text, Optional
 import numpy as np
 import pandas as pd
 
-from qlib.utils.data import robust_zscore, zscore
+from qlib.utils.data import (
+    robust_zscore,
+    zscore,
+    cs_fillna_mean,
+    cs_rank_pct,
+    cs_robust_zscore,
+    cs_zscore,
+    RunningStats,
+    QuantileSketch,
+)
 from ...constant import EPS
-from .utils import fetch_df_by_index
+from .utils import fetch_df_by_index, get_level_segments
 from ...utils.serial import Serializable
 from ...utils.paral import datetime_groupby_apply
 from qlib.data.inst_processor import InstProcessor
@@ -32,6 +43,34 @@ def get_group_columns(df: pd.DataFrame, group: Union[Text, None]):
         return df.columns[df.columns.get_loc(group)]
 
 
+def get_col_indexer(columns: pd.Index, cols: Union[Text, None, pd.Index], is_group=True):
+    """
+    get the positions of a group of columns (or some columns) in `columns`
+
+    Returns
+    -------
+    Union[slice, np.ndarray, None]:
+        the positions to index the columns of a 2D ndarray; None if some columns are not found.
+    """
+    if is_group:
+        if cols is None:
+            return slice(None)
+        if not isinstance(cols, str):
+            return None
+        try:
+            loc = columns.get_loc(cols)
+        except KeyError:
+            return None
+        return slice(loc, loc + 1) if isinstance(loc, int) else loc
+    indexer = columns.get_indexer(cols)
+    if (indexer < 0).any():
+        return None
+    # a slice makes the kernels work on a view of the data
+    if len(indexer) > 0 and (np.diff(indexer) == 1).all():
+        return slice(indexer[0], indexer[-1] + 1)
+    return indexer
+
+
 class Processor(Serializable):
     def fit(self, df: pd.DataFrame = None):
         """
@@ -45,6 +84,21 @@ class Processor(Serializable):
 
         """
 
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame]):
+        """
+        learn data processing parameters from the data streamed by chunks in time order (e.g. the data loaded and
+        processed chunk by chunk by the handler), so the whole data doesn't have to be in memory.
+
+        The default implementation concatenates the chunks and calls `fit`. The processors which can fit the
+        parameters from the streaming statistics override it.
+
+        Parameters
+        ----------
+        chunks : Iterable[pd.DataFrame]
+            The chunks of the output of the previous processor. It can be iterated multiple times.
+        """
+        self.fit(pd.concat(list(chunks)))
+
     @abc.abstractmethod
     def __call__(self, df: pd.DataFrame):
         """
@@ -79,6 +133,33 @@ class Processor(Serializable):
         """
         return False
 
+    def get_lookback(self) -> int:
+        """
+        The number of the periods before a date which are needed to process the data of the date.
+
+        It is 0 for the processors which process each date independently (e.g. the cross-sectional or element-wise
+        ones). It is used to load the minimal history when processing the data of some dates only (e.g.
+        `DataHandlerLP.setup_infer_data`).
+        """
+        return 0
+
+    def get_kernel(self, columns: pd.Index) -> Optional[Callable[[np.ndarray], None]]:
+        """
+        Get the element-wise kernel of the processor.
+
+        The kernel processes a chunk of rows of the 2D ndarray of the data **inplace**, `columns` are the columns of
+        the data. It must give the same result as `__call__`, and the result of an element can only depend on the
+        element itself and the fitted parameters of its column.
+        The handler fuses consecutive processors with kernels into one pass over the data and avoids the copies of
+        assigning the columns of the DataFrame.
+
+        Returns
+        -------
+        Optional[Callable[[np.ndarray], None]]:
+            None if the processor is not element-wise (it will be called by `__call__`).
+        """
+        return None
+
     def config(self, **kwargs):
         attr_list = {"fit_start_time", "fit_end_time"}
         for k, v in kwargs.items():
@@ -157,6 +238,14 @@ class TanhProcess(Processor):
 
         return tanh_denoise(df)
 
+    def get_kernel(self, columns):
+        idx = ~columns.get_level_values(1).str.contains("LABEL")
+
+        def kernel(x):
+            x[:, idx] = np.tanh(x[:, idx] - 1)
+
+        return kernel
+
 
 class ProcessInf(Processor):
     """Process infinity"""
@@ -192,6 +281,38 @@ class Fillna(Processor):
             df[self.fields_group] = df[self.fields_group].fillna(self.fill_value)
         return df
 
+    def get_kernel(self, columns):
+        idx = get_col_indexer(columns, self.fields_group)
+        if idx is None or not isinstance(self.fill_value, Number):
+            return None
+
+        def kernel(x):
+            sub = x[:, idx]
+            sub[np.isnan(sub)] = self.fill_value
+            if not isinstance(idx, slice):
+                x[:, idx] = sub
+
+        return kernel
+
+
+def _iter_fit_values(
+    chunks: Iterable[pd.DataFrame], fit_start_time, fit_end_time, fields_group
+) -> Iterator[Tuple[pd.Index, np.ndarray]]:
+    """iterate the columns to be fitted and their values in the fitting time range of each chunk"""
+    n_rows = 0
+    for df in chunks:
+        df = fetch_df_by_index(df, slice(fit_start_time, fit_end_time), level="datetime")
+        cols = get_group_columns(df, fields_group)
+        n_rows += len(df)
+        yield cols, df[cols].values
+    if n_rows == 0:
+        raise ValueError(f"There is no data to fit between {fit_start_time} and {fit_end_time}")
+
+
+def _get_fit_dtype(X: np.ndarray):
+    """the dtype of the parameters fitted on `X` (the same as the results of `np.nanmean` etc.)"""
+    return X.dtype if np.issubdtype(X.dtype, np.floating) else np.float64
+
 
 class MinMaxNorm(Processor):
     def __init__(self, fit_start_time, fit_end_time, fields_group=None):
@@ -204,8 +325,19 @@ class MinMaxNorm(Processor):
     def fit(self, df: pd.DataFrame = None):
         df = fetch_df_by_index(df, slice(self.fit_start_time, self.fit_end_time), level="datetime")
         cols = get_group_columns(df, self.fields_group)
-        self.min_val = np.nanmin(df[cols].values, axis=0)
-        self.max_val = np.nanmax(df[cols].values, axis=0)
+        self._set_params(np.nanmin(df[cols].values, axis=0), np.nanmax(df[cols].values, axis=0), cols)
+
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame]):
+        cols, dtype, stats = None, None, None
+        for chunk_cols, X in _iter_fit_values(chunks, self.fit_start_time, self.fit_end_time, self.fields_group):
+            if stats is None:
+                cols, dtype, stats = chunk_cols, _get_fit_dtype(X), RunningStats(X.shape[1])
+            stats.update(X)
+        self._set_params(stats.min.astype(dtype), stats.max.astype(dtype), cols)
+
+    def _set_params(self, min_val: np.ndarray, max_val: np.ndarray, cols: pd.Index):
+        self.min_val = min_val
+        self.max_val = max_val
         self.ignore = self.min_val == self.max_val
         # To improve the speed, we set the value of `min_val` to `0` for the columns that do not need to be processed,
         # and the value of `max_val` to `1`, when using `(x - min_val) / (max_val - min_val)` for uniform calculation,
@@ -224,6 +356,16 @@ class MinMaxNorm(Processor):
         df.loc(axis=1)[self.cols] = normalize(df[self.cols].values)
         return df
 
+    def get_kernel(self, columns):
+        idx = get_col_indexer(columns, self.cols, is_group=False)
+        if idx is None:
+            return None
+
+        def kernel(x):
+            x[:, idx] = (x[:, idx] - self.min_val) / (self.max_val - self.min_val)
+
+        return kernel
+
 
 class ZScoreNorm(Processor):
     """ZScore Normalization"""
@@ -238,8 +380,20 @@ class ZScoreNorm(Processor):
     def fit(self, df: pd.DataFrame = None):
         df = fetch_df_by_index(df, slice(self.fit_start_time, self.fit_end_time), level="datetime")
         cols = get_group_columns(df, self.fields_group)
-        self.mean_train = np.nanmean(df[cols].values, axis=0)
-        self.std_train = np.nanstd(df[cols].values, axis=0)
+        self._set_params(np.nanmean(df[cols].values, axis=0), np.nanstd(df[cols].values, axis=0), cols)
+
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame]):
+        # the mean and std are merged exactly from the chunks
+        cols, dtype, stats = None, None, None
+        for chunk_cols, X in _iter_fit_values(chunks, self.fit_start_time, self.fit_end_time, self.fields_group):
+            if stats is None:
+                cols, dtype, stats = chunk_cols, _get_fit_dtype(X), RunningStats(X.shape[1])
+            stats.update(X)
+        self._set_params(stats.mean.astype(dtype), stats.std.astype(dtype), cols)
+
+    def _set_params(self, mean_train: np.ndarray, std_train: np.ndarray, cols: pd.Index):
+        self.mean_train = mean_train
+        self.std_train = std_train
         self.ignore = self.std_train == 0
         # To improve the speed, we set the value of `std_train` to `1` for the columns that do not need to be processed,
         # and the value of `mean_train` to `0`, when using `(x - mean_train) / std_train` for uniform calculation,
@@ -258,6 +412,16 @@ class ZScoreNorm(Processor):
         df.loc(axis=1)[self.cols] = normalize(df[self.cols].values)
         return df
 
+    def get_kernel(self, columns):
+        idx = get_col_indexer(columns, self.cols, is_group=False)
+        if idx is None:
+            return None
+
+        def kernel(x):
+            x[:, idx] = (x[:, idx] - self.mean_train) / self.std_train
+
+        return kernel
+
 
 class RobustZScoreNorm(Processor):
     """Robust ZScore Normalization
@@ -268,8 +432,14 @@ class RobustZScoreNorm(Processor):
 
     Reference:
         https://en.wikipedia.org/wiki/Median_absolute_deviation.
+
+    When it is fitted on the chunks of data (`fit_chunks`), the median and MAD are estimated by `QuantileSketch` in two
+    passes over the chunks; the error of both is bounded by `SKETCH_REL_ERR * (|median(x)| + MAD(x))`.
     """
 
+    # the relative error of the quantile sketches used by `fit_chunks`
+    SKETCH_REL_ERR = 0.005
+
     def __init__(self, fit_start_time, fit_end_time, fields_group=None, clip_outlier=True):
         # NOTE: correctly set the `fit_start_time` and `fit_end_time` is very important !!!
         # `fit_end_time` **must not** include any information from the test data!!!
@@ -283,7 +453,25 @@ class RobustZScoreNorm(Processor):
         self.cols = get_group_columns(df, self.fields_group)
         X = df[self.cols].values
         self.mean_train = np.nanmedian(X, axis=0)
-        self.std_train = np.nanmedian(np.abs(X - self.mean_train), axis=0)
+        self._set_std(np.nanmedian(np.abs(X - self.mean_train), axis=0))
+
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame]):
+        cols, dtype, sketch = None, None, None
+        for chunk_cols, X in _iter_fit_values(chunks, self.fit_start_time, self.fit_end_time, self.fields_group):
+            if sketch is None:
+                cols, dtype = chunk_cols, _get_fit_dtype(X)
+                sketch = QuantileSketch(X.shape[1], rel_err=self.SKETCH_REL_ERR)
+            sketch.update(X)
+        self.cols = cols
+        self.mean_train = sketch.quantile(0.5).astype(dtype)
+        # the deviations from the estimated median are sketched in the second pass
+        sketch = QuantileSketch(len(self.cols), rel_err=self.SKETCH_REL_ERR)
+        for _, X in _iter_fit_values(chunks, self.fit_start_time, self.fit_end_time, self.fields_group):
+            sketch.update(np.abs(X - self.mean_train))
+        self._set_std(sketch.quantile(0.5).astype(dtype))
+
+    def _set_std(self, mad: np.ndarray):
+        self.std_train = mad
         self.std_train += EPS
         self.std_train *= 1.4826
 
@@ -296,6 +484,20 @@ class RobustZScoreNorm(Processor):
         df[self.cols] = X
         return df
 
+    def get_kernel(self, columns):
+        idx = get_col_indexer(columns, self.cols, is_group=False)
+        if idx is None:
+            return None
+
+        def kernel(x):
+            X = x[:, idx] - self.mean_train
+            X /= self.std_train
+            if self.clip_outlier:
+                X = np.clip(X, -3, 3)
+            x[:, idx] = X
+
+        return kernel
+
 
 class CSZScoreNorm(Processor):
     """Cross Sectional ZScore Normalization"""
@@ -313,13 +515,19 @@ class CSZScoreNorm(Processor):
         # try not modify original dataframe
         if not isinstance(self.fields_group, list):
             self.fields_group = [self.fields_group]
+        seg_starts = get_level_segments(df.index, "datetime")
+        cs_func = {zscore: cs_zscore, robust_zscore: cs_robust_zscore}.get(self.zscore_func)
         # depress warning by references:
         # https://stackoverflow.com/questions/20625582/how-to-deal-with-settingwithcopywarning-in-pandas
         # https://pandas.pydata.org/pandas-docs/stable/user_guide/options.html#getting-and-setting-options
         with pd.option_context("mode.chained_assignment", None):
             for g in self.fields_group:
                 cols = get_group_columns(df, g)
-                df[cols] = df[cols].groupby("datetime", group_keys=False).apply(self.zscore_func)
+                if seg_starts is not None and cs_func is not None:
+                    # vectorized on the datetime segments
+                    df[cols] = cs_func(df[cols].values, seg_starts)
+                else:
+                    df[cols] = df[cols].groupby("datetime", group_keys=False).apply(self.zscore_func)
         return df
 
 
@@ -352,7 +560,12 @@ class CSRankNorm(Processor):
     def __call__(self, df):
         # try not modify original dataframe
         cols = get_group_columns(df, self.fields_group)
-        t = df[cols].groupby("datetime", group_keys=False).rank(pct=True)
+        seg_starts = get_level_segments(df.index, "datetime")
+        if seg_starts is not None:
+            # vectorized on the datetime segments
+            t = cs_rank_pct(df[cols].values, seg_starts)
+        else:
+            t = df[cols].groupby("datetime", group_keys=False).rank(pct=True)
         t -= 0.5
         t *= 3.46  # NOTE: towards unit std
         df[cols] = t
@@ -367,7 +580,12 @@ class CSZFillna(Processor):
 
     def __call__(self, df):
         cols = get_group_columns(df, self.fields_group)
-        df[cols] = df[cols].groupby("datetime", group_keys=False).apply(lambda x: x.fillna(x.mean()))
+        seg_starts = get_level_segments(df.index, "datetime")
+        if seg_starts is not None:
+            # vectorized on the datetime segments
+            df[cols] = cs_fillna_mean(df[cols].values, seg_starts)
+        else:
+            df[cols] = df[cols].groupby("datetime", group_keys=False).apply(lambda x: x.fillna(x.mean()))
         return df
 
 
@@ -380,6 +598,51 @@ class HashStockFormat(Processor):
         return HashingStockStorage.from_df(df)
 
 
+class DatetimeBlockFormat(Processor):
+    """Process the storage of from df into datetime-sorted block format, which makes slicing by time zero-copy"""
+
+    def __call__(self, df: pd.DataFrame):
+        from .storage import DatetimeBlockStorage  # pylint: disable=C0415
+
+        return DatetimeBlockStorage.from_df(df)
+
+    def readonly(self) -> bool:
+        # the data is copied into the block
+        return True
+
+
+class DiskBlockFormat(Processor):
+    """
+    Process the storage of df into time-partitioned blocks memory-mapped from disk (please refer to
+    `DiskBlockStorage`). So larger-than-memory data could be consumed chunk by chunk by `DatasetH.prepare_chunks`.
+
+    It should be the last processor of both `infer_processors` and `learn_processors` with `process_type=PTYPE_I`.
+    Please set `drop_raw=True` to release the raw data in memory.
+    """
+
+    def __init__(self, root_dir: Union[str, Path] = None, freq: str = "Y"):
+        """
+        Parameters
+        ----------
+        root_dir : Union[str, Path]
+            the directory to save the data (the system temporary directory by default). The data is removed when the
+            storage is garbage collected.
+        freq : str
+            the frequency of the partitions (e.g. "Y", "M").
+        """
+        self.root_dir = root_dir
+        self.freq = freq
+
+    def __call__(self, df: pd.DataFrame):
+        from .storage import DiskBlockStorage  # pylint: disable=C0415
+
+        return DiskBlockStorage.from_df(df, freq=self.freq, root_dir=self.root_dir)
+
+    def readonly(self) -> bool:
+        # the data is copied into the blocks
+        return True
+
+
 class TimeRangeFlt(InstProcessor):
     """
     This is a filter to filter stock.
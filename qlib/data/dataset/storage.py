@@ -1,12 +1,19 @@
 from abc import abstractmethod
+import pickle
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
 import pandas as pd
 import numpy as np
 
 from .handler import DataHandler
-from typing import Union, List
+from typing import Union, List, Tuple
+from qlib.config import C
 from qlib.log import get_module_logger
+from qlib.utils import lazy_sort_index, time_to_slc_point
 
-from .utils import get_level_index, fetch_df_by_index, fetch_df_by_col
+from .utils import get_level_index, get_level_segments, fetch_df_by_index, fetch_df_by_col
 
 
 class BaseHandlerStorage:
@@ -189,3 +196,372 @@ class HashingStockStorage(BaseHandlerStorage):
             return fetch_stock_df_list[0]
         else:
             return pd.concat(fetch_stock_df_list, sort=False, copy=~fetch_orig)
+
+
+class DatetimeBlockStorage(BaseHandlerStorage):
+    """Integer-indexed block storage for datahandler
+    - Slicing a large MultiIndex DataFrame by time costs much time and copies the data.
+    - DatetimeBlockStorage keeps all the data in a single 2D column-major block (float32 by default) whose rows are
+      sorted by <datetime, instrument>, and the columns of each group(e.g. feature, label) are contiguous.
+    - The row offsets of each datetime are precomputed. So fetching a time range (or a date) only needs a binary search
+      and returns a DataFrame built on a view of the block without copying. The DataFrame (including the index) is
+      only materialized on demand.
+    - The index of the fetched data is always <datetime, instrument>.
+    - Other selectors (e.g. selecting instruments) fall back to the slicing of the DataFrame of the whole data.
+    """
+
+    def __init__(self, df: pd.DataFrame, dtype=np.float32):
+        """
+        Parameters
+        ----------
+        df : pd.DataFrame
+            the data with index <datetime, instrument> or <instrument, datetime>.
+        dtype :
+            the dtype of the block.
+        """
+        if get_level_index(df, "datetime") == 1:
+            df = df.swaplevel()
+        df = lazy_sort_index(df)
+        self.index_names = list(df.index.names)
+
+        # the columns of a group are put together
+        # column-major block, so the DataFrame can be built on a view of the rows without copying
+        self.block = np.empty(df.shape, dtype=dtype, order="F")
+        if isinstance(df.columns, pd.MultiIndex):
+            grp_values = df.columns.get_level_values(0)
+            self.group_slc, col_order = {}, []
+            for g in dict.fromkeys(grp_values):
+                pos = np.flatnonzero(grp_values == g)
+                self.group_slc[g] = slice(len(col_order), len(col_order) + len(pos))
+                self.block[:, self.group_slc[g]] = df.iloc[:, pos].values
+                col_order.extend(pos)
+            self.columns = df.columns[col_order]
+        else:
+            self.group_slc = None
+            self.block[:] = df.values
+            self.columns = df.columns
+
+        # datetime -> row offsets
+        seg_starts = get_level_segments(df.index, "datetime")
+        if seg_starts is None:
+            seg_starts = np.array([], dtype=np.int64)
+        dt_values = df.index.get_level_values(0)
+        self.dates = pd.DatetimeIndex(dt_values[seg_starts])
+        self.offsets = np.append(seg_starts, len(df)).astype(np.int64)
+        self.date_codes = np.repeat(np.arange(len(seg_starts), dtype=np.int32), np.diff(self.offsets))
+        inst_codes, self.instruments = pd.factorize(df.index.get_level_values(1), sort=True)
+        self.inst_codes = inst_codes.astype(np.int32)
+
+    @staticmethod
+    def from_df(df):
+        return DatetimeBlockStorage(df)
+
+    ARRAY_ATTRS = ("block", "date_codes", "inst_codes")
+    META_NAME = "meta.pkl"
+
+    def dump(self, path: Union[str, Path]):
+        """save the storage into the directory `path`, the arrays are saved as `.npy` so they could be memory-mapped"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in self.ARRAY_ATTRS:
+            np.save(path.joinpath(f"{name}.npy"), getattr(self, name), allow_pickle=False)
+        meta = {k: v for k, v in self.__dict__.items() if k not in self.ARRAY_ATTRS}
+        with path.joinpath(self.META_NAME).open("wb") as f:
+            pickle.dump(meta, f, protocol=C.dump_protocol_version)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap_mode: str = "c") -> "DatetimeBlockStorage":
+        """
+        load the storage saved by `dump`
+
+        Parameters
+        ----------
+        mmap_mode : str
+            the arrays are memory-mapped in copy-on-write mode by default; please refer to `np.load`
+        """
+        path = Path(path)
+        obj = cls.__new__(cls)
+        with path.joinpath(cls.META_NAME).open("rb") as f:
+            obj.__dict__.update(pickle.load(f))
+        for name in cls.ARRAY_ATTRS:
+            setattr(obj, name, np.load(path.joinpath(f"{name}.npy"), mmap_mode=mmap_mode))
+        return obj
+
+    def __len__(self):
+        return self.block.shape[0]
+
+    def get_row_slice(self, start_time=None, end_time=None) -> slice:
+        """
+        Get the rows of the data in the time range [start_time, end_time].
+        It is O(log(number of datetimes)) and the rows are contiguous.
+        A string covers its whole period like the partial string indexing of pandas (e.g. "2020" is the year 2020).
+        """
+        start_time, end_time = self._str_to_slc_point(start_time, "start"), self._str_to_slc_point(end_time, "end")
+        start = 0 if start_time is None else self.dates.searchsorted(start_time, side="left")
+        end = len(self.dates) if end_time is None else self.dates.searchsorted(end_time, side="right")
+        end = max(start, end)
+        return slice(self.offsets[start], self.offsets[end])
+
+    @staticmethod
+    def _str_to_slc_point(t: Union[None, str, pd.Timestamp], side: str) -> Union[None, pd.Timestamp]:
+        """the start or the end of the period represented by a string, e.g. "2020" ends at 2020-12-31 23:59:59..."""
+        if isinstance(t, str):
+            try:
+                period = pd.Period(t)
+            except ValueError:
+                return pd.Timestamp(t)
+            return period.start_time if side == "start" else period.end_time
+        return time_to_slc_point(t)
+
+    def _get_col_slc(self, col_set: Union[str, List[str]]) -> Tuple[Union[slice, np.ndarray], pd.Index]:
+        """the positions and the names of the columns to fetch"""
+        if self.group_slc is None or col_set == DataHandler.CS_RAW:
+            return slice(None), self.columns
+        if col_set == DataHandler.CS_ALL:
+            return slice(None), self.columns.get_level_values(-1)
+        if isinstance(col_set, str):
+            slc = self.group_slc[col_set]
+            return slc, self.columns[slc].get_level_values(-1)
+        pos = np.concatenate([np.arange(len(self.columns))[self.group_slc[g]] for g in col_set])
+        if len(pos) > 0 and (np.diff(pos) == 1).all():
+            # the groups are adjacent, a slice makes the fetched data a view of the block
+            return slice(pos[0], pos[-1] + 1), self.columns[pos]
+        return pos, self.columns[pos]
+
+    def get_index(self, rows: slice = slice(None)) -> pd.MultiIndex:
+        """materialize the index of the rows"""
+        return pd.MultiIndex(
+            levels=[self.dates, self.instruments],
+            codes=[self.date_codes[rows], self.inst_codes[rows]],
+            names=self.index_names,
+            verify_integrity=False,
+        )
+
+    def to_df(self, rows: slice = slice(None), col_set: Union[str, List[str]] = DataHandler.CS_RAW) -> pd.DataFrame:
+        """
+        Materialize the DataFrame of the rows.
+        The data is a view of the block if the columns are contiguous (e.g. a single group or all the columns).
+        """
+        col_slc, columns = self._get_col_slc(col_set)
+        return pd.DataFrame(self.block[rows, col_slc], index=self.get_index(rows), columns=columns, copy=False)
+
+    def fetch(
+        self,
+        selector: Union[pd.Timestamp, slice, str, pd.Index] = slice(None, None),
+        level: Union[str, int] = "datetime",
+        col_set: Union[str, List[str]] = DataHandler.CS_ALL,
+        fetch_orig: bool = True,
+    ) -> pd.DataFrame:
+        if isinstance(selector, (tuple, list)) and level is not None:
+            try:
+                selector = slice(*selector)
+            except ValueError:
+                get_module_logger("DataHandlerLP").info(f"Fail to converting to query to slice. It will used directly")
+
+        if level in ("datetime", 0) and isinstance(selector, slice) and selector.step is None:
+            rows = self.get_row_slice(selector.start, selector.stop)
+        elif level in ("datetime", 0) and isinstance(selector, (str, pd.Timestamp)):
+            rows = self.get_row_slice(selector, selector)
+            if rows.start == rows.stop:
+                raise KeyError(selector)
+        else:
+            # fall back to the slicing of DataFrame
+            return fetch_df_by_index(self.to_df(col_set=col_set), selector, level, fetch_orig=fetch_orig)
+        data_df = self.to_df(rows, col_set)
+        return data_df if fetch_orig else data_df.copy()
+
+
+class DiskBlockStorage(BaseHandlerStorage):
+    """Out-of-core data storage for datahandler
+    - The data is split by time into partitions (e.g. a partition per year). Each partition is a
+      `DatetimeBlockStorage` saved on disk and memory-mapped, so only the pages being accessed are loaded into memory.
+    - Fetching a time range within a partition is zero-copy. Fetching a time range across partitions concatenates the
+      selected rows. `fetch_chunks` returns the data as a list of views of the partitions instead, which is suitable
+      for consuming larger-than-memory data chunk by chunk.
+    - The partitions must be appended in time order, so the data could be written chunk by chunk.
+    """
+
+    PART_PREFIX = "part_"
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        freq: str = "Y",
+        dtype=np.float32,
+        mmap_mode: str = "c",
+        cleanup: bool = False,
+    ):
+        """
+        Parameters
+        ----------
+        path : Union[str, Path]
+            the directory of the data; the existing partitions in it will be loaded.
+        freq : str
+            the frequency to split the appended data into partitions (e.g. "Y", "M"); please refer to `pd.Period`.
+        dtype :
+            the dtype of the data.
+        mmap_mode : str
+            the mode to memory-map the partitions; copy-on-write by default, so modifying the fetched data will not
+            change the data on disk.
+        cleanup : bool
+            remove the directory when the storage is garbage collected.
+        """
+        self.path = Path(path).expanduser().resolve()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.freq = freq
+        self.dtype = dtype
+        self.mmap_mode = mmap_mode
+        self.cleanup = cleanup
+        if cleanup:
+            weakref.finalize(self, shutil.rmtree, str(self.path), ignore_errors=True)
+        self.parts: List[DatetimeBlockStorage] = [
+            DatetimeBlockStorage.load(p, mmap_mode=mmap_mode) for p in sorted(self.path.glob(f"{self.PART_PREFIX}*"))
+        ]
+        # the columns of the empty data appended before any partition
+        self._empty_columns = pd.Index([])
+
+    @staticmethod
+    def from_df(df: pd.DataFrame, path: Union[str, Path] = None, freq: str = "Y", root_dir: Union[str, Path] = None):
+        """
+        Parameters
+        ----------
+        path : Union[str, Path]
+            the directory to save the data. If it is None, a temporary directory under `root_dir` is created and it
+            will be removed when the storage is garbage collected.
+        """
+        if path is None:
+            if root_dir is not None:
+                Path(root_dir).mkdir(parents=True, exist_ok=True)
+            storage = DiskBlockStorage(tempfile.mkdtemp(prefix="qlib_disk_block_", dir=root_dir), freq, cleanup=True)
+        else:
+            storage = DiskBlockStorage(path, freq)
+        storage.append(df)
+        return storage
+
+    def append(self, df: pd.DataFrame):
+        """
+        Append the data to the storage; the data must be later than the data in the storage.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            the data with index <datetime, instrument> or <instrument, datetime>.
+        """
+        if get_level_index(df, "datetime") == 1:
+            df = df.swaplevel()
+        df = lazy_sort_index(df)
+        if df.empty:
+            if len(self.parts) == 0:
+                self._empty_columns = df.columns
+            return
+        periods = pd.DatetimeIndex(df.index.get_level_values(0)).to_period(self.freq).asi8
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(periods)) + 1, [len(df)]])
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            part = DatetimeBlockStorage(df.iloc[start:end], dtype=self.dtype)
+            self._check_part(part)
+            part_path = self._get_part_path(len(self.parts))
+            part.dump(part_path)
+            del part
+            self.parts.append(DatetimeBlockStorage.load(part_path, mmap_mode=self.mmap_mode))
+
+    def extend(self, other: "DiskBlockStorage"):
+        """
+        Move the partitions of `other` into the storage without copying the data; the data of `other` must be later
+        than the data in the storage. `other` will be empty afterwards.
+        """
+        for i, part in enumerate(other.parts):
+            self._check_part(part)
+            part_path = self._get_part_path(len(self.parts))
+            shutil.move(str(other._get_part_path(i)), str(part_path))  # pylint: disable=W0212
+            self.parts.append(DatetimeBlockStorage.load(part_path, mmap_mode=self.mmap_mode))
+        other.parts = []
+
+    def _get_part_path(self, i: int) -> Path:
+        return self.path.joinpath(f"{self.PART_PREFIX}{i:06d}")
+
+    def _check_part(self, part: DatetimeBlockStorage):
+        if len(self.parts) == 0:
+            return
+        if part.dates[0] <= self.parts[-1].dates[-1]:
+            raise ValueError(
+                f"The data should be appended in time order: {part.dates[0]} <= {self.parts[-1].dates[-1]}"
+            )
+        if not part.columns.equals(self.parts[0].columns):
+            raise ValueError("The columns of the appended data are different from the storage")
+
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.parts[0].columns if len(self.parts) > 0 else self._empty_columns
+
+    def __getstate__(self):
+        if self.cleanup:
+            raise TypeError(f"The temporary data in {self.path} can't be pickled, please specify the path of the data")
+        return {"path": self.path, "freq": self.freq, "dtype": self.dtype, "mmap_mode": self.mmap_mode}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def fetch_chunks(
+        self,
+        selector: Union[pd.Timestamp, slice, str, pd.Index] = slice(None, None),
+        level: Union[str, int] = "datetime",
+        col_set: Union[str, List[str]] = DataHandler.CS_ALL,
+    ) -> List[pd.DataFrame]:
+        """
+        Fetch the data as a list of chunks in time order (a chunk for each partition).
+        The chunks of a datetime selector are views of the memory-mapped data; so they don't take memory until the
+        data is accessed.
+        """
+        if isinstance(selector, (tuple, list)) and level is not None:
+            try:
+                selector = slice(*selector)
+            except ValueError:
+                get_module_logger("DataHandlerLP").info(f"Fail to converting to query to slice. It will used directly")
+
+        if level in ("datetime", 0) and isinstance(selector, slice) and selector.step is None:
+            start, end = selector.start, selector.stop
+        elif level in ("datetime", 0) and isinstance(selector, (str, pd.Timestamp)):
+            start, end = selector, selector
+        else:
+            # other selectors are applied to each partition
+            chunks = []
+            for part in self.parts:
+                try:
+                    chunk = fetch_df_by_index(part.to_df(col_set=col_set), selector, level)
+                except KeyError:
+                    continue
+                if len(chunk) > 0:
+                    chunks.append(chunk)
+            return chunks
+        chunks = []
+        for part in self.parts:
+            rows = part.get_row_slice(start, end)
+            if rows.stop > rows.start:
+                chunks.append(part.to_df(rows, col_set))
+        return chunks
+
+    def fetch(
+        self,
+        selector: Union[pd.Timestamp, slice, str, pd.Index] = slice(None, None),
+        level: Union[str, int] = "datetime",
+        col_set: Union[str, List[str]] = DataHandler.CS_ALL,
+        fetch_orig: bool = True,
+    ) -> pd.DataFrame:
+        chunks = self.fetch_chunks(selector, level=level, col_set=col_set)
+        if len(chunks) == 0:
+            if level in ("datetime", 0) and isinstance(selector, (str, pd.Timestamp)):
+                raise KeyError(selector)
+            if len(self.parts) == 0:
+                empty_df = pd.DataFrame(
+                    index=pd.MultiIndex.from_arrays([[], []], names=["datetime", "instrument"]),
+                    columns=self.columns,
+                    dtype=self.dtype,
+                )
+                return fetch_df_by_col(empty_df, col_set)
+            return self.parts[0].to_df(slice(0, 0), col_set)
+        if len(chunks) == 1:
+            return chunks[0] if fetch_orig else chunks[0].copy()
+        return pd.concat(chunks)
@@ -1,8 +1,9 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 from __future__ import annotations
+import numpy as np
 import pandas as pd
-from typing import Union, List, TYPE_CHECKING
+from typing import Optional, Union, List, TYPE_CHECKING
 from qlib.utils import init_instance_by_config
 
 if TYPE_CHECKING:
@@ -38,6 +39,35 @@ def get_level_index(df: pd.DataFrame, level: Union[str, int]) -> int:
         raise NotImplementedError(f"This type of input is not supported")
 
 
+def get_level_segments(index: pd.Index, level: Union[str, int] = "datetime") -> Optional[np.ndarray]:
+    """
+    Get the start positions of the segments with the same value of `level`.
+    It is helpful to replace `groupby(level)` with vectorized operations on the segments.
+
+    Parameters
+    ----------
+    index : pd.Index
+        the index of the data.
+    level : Union[str, int]
+        index level
+
+    Returns
+    -------
+    Optional[np.ndarray]:
+        the start positions of the segments. None if the index is empty or not sorted by `level`.
+    """
+    if len(index) == 0:
+        return None
+    if isinstance(index, pd.MultiIndex):
+        values = index.get_level_values(level)
+    else:
+        values = index
+    if values.hasnans or not values.is_monotonic_increasing:
+        return None
+    values = values.values
+    return np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+
+
 def fetch_df_by_index(
     df: pd.DataFrame,
     selector: Union[pd.Timestamp, slice, str, list, pd.Index],
@@ -89,6 +119,37 @@ def fetch_df_by_col(df: pd.DataFrame, col_set: Union[str, List[str]]) -> pd.Data
         return df.loc(axis=1)[col_set]
 
 
+class ChunkedArray:
+    """
+    An array made of the row chunks (e.g. the memory-mapped chunks of `DiskBlockStorage`) without concatenating them.
+    Indexing rows by an array of positions only gathers the selected rows into memory.
+    """
+
+    def __init__(self, chunks: List[np.ndarray]):
+        self.chunks = chunks
+        self.offsets = np.cumsum([0] + [len(c) for c in chunks])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self),) + self.chunks[0].shape[1:]
+
+    @property
+    def dtype(self):
+        return self.chunks[0].dtype
+
+    def __getitem__(self, idx: Union[List[int], np.ndarray]) -> np.ndarray:
+        idx = np.asarray(idx)
+        out = np.empty((len(idx),) + self.shape[1:], dtype=self.dtype)
+        chunk_ids = np.searchsorted(self.offsets, idx, side="right") - 1
+        for i in np.unique(chunk_ids):
+            mask = chunk_ids == i
+            out[mask] = self.chunks[i][idx[mask] - self.offsets[i]]
+        return out
+
+
 def convert_index_format(df: Union[pd.DataFrame, pd.Series], level: str = "datetime") -> Union[pd.DataFrame, pd.Series]:
     """
     Convert the format of df.MultiIndex according to the following rules:
@@ -0,0 +1,223 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+"""
+Cache of the predictions of models.
+
+The predictions are keyed by the fingerprints of the model and of the features of the dataset, and saved per date
+block. So a request only predicts the dates which are not cached yet (e.g. re-running the record templates, the
+backtests or the daily prediction of the same model).
+
+.. code-block:: text
+
+    <cache_dir or the artifacts of the recorder>/pred_cache/<fingerprint>/
+        2020-01.pkl     # {"dates": the predicted dates of the block, "pred": the predictions of the dates}
+        2020-02.pkl
+"""
+
+import os
+import pickle
+import uuid
+from pathlib import Path
+from typing import List, Optional, Text, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..config import C
+from ..data.dataset import Dataset
+from ..data.dataset.cache import fingerprint_loader, fingerprint_obj, get_data_version
+from ..data.dataset.handler import DataHandlerLP
+from ..log import get_module_logger
+from ..utils import hash_args
+from ..utils.exceptions import LoadObjectError
+from .base import BaseModel
+
+
+class PredCache:
+    """
+    Save and load the predictions of models per date block.
+
+    The fingerprint of the dataset covers everything that determines its features at a date except the time range,
+    i.e. the data loader, the fitted processors, the instruments and the version of the qlib data. So the datasets of
+    different time ranges share the cached predictions. The datasets which can't be fingerprinted (e.g. the handlers
+    other than `DataHandlerLP`, or the data loaders without the calendar) are predicted without the cache.
+    """
+
+    ARTIFACT_DIR = "pred_cache"
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = None,
+        recorder=None,
+        freq: str = "M",
+        check_data_version: bool = True,
+    ):
+        """
+        Parameters
+        ----------
+        cache_dir : Union[str, Path]
+            the directory of the cache; `C.pred_cache_path` or "~/.cache/qlib_pred_cache" by default.
+        recorder : Recorder
+            if given, the predictions are cached as the artifacts of the recorder (e.g. the recorder of the model), so
+            re-analysing the experiment never predicts the cached dates again. `cache_dir` is ignored.
+        freq : str
+            the frequency of the date blocks, e.g. "M" for monthly and "Y" for yearly.
+        check_data_version : bool
+            whether the cache is invalidated when the qlib data is updated. Appending the new data usually doesn't
+            change the features of the past dates, so it could be disabled for the online updating.
+        """
+        self.recorder = recorder
+        if cache_dir is None:
+            cache_dir = C.get("pred_cache_path", None) or "~/.cache/qlib_pred_cache"
+        self.cache_dir = Path(cache_dir).expanduser().resolve()
+        self.freq = freq
+        self.check_data_version = check_data_version
+        self.logger = get_module_logger(self.__class__.__name__)
+
+    def fingerprint_dataset(self, dataset: Dataset) -> Optional[str]:
+        """
+        The fingerprint of the features of the dataset regardless of its time range.
+
+        Returns
+        -------
+        Optional[str]:
+            None if the dataset can't be fingerprinted.
+        """
+        handler = getattr(dataset, "handler", None)
+        if not isinstance(handler, DataHandlerLP):
+            return None
+        loader_fp = fingerprint_loader(handler.data_loader)
+        proc_fp = {
+            pname: [fingerprint_obj(proc) for proc in proc_l]
+            for pname, proc_l in handler._get_cache_processors().items()  # pylint: disable=W0212
+        }
+        # the settings of the dataset (e.g. `step_len` and `fetch_kwargs`) except the time ranges
+        ds_fp = fingerprint_obj(
+            {
+                k: v
+                for k, v in vars(dataset).items()
+                if not k.startswith("_") and k not in ("handler", "segments", "cal")
+            }
+        )
+        if loader_fp is None or ds_fp is None or any(None in fp_l for fp_l in proc_fp.values()):
+            return None
+        return hash_args(
+            f"{type(dataset).__module__}.{type(dataset).__qualname__}",
+            f"{type(handler).__module__}.{type(handler).__qualname__}",
+            get_data_version() if self.check_data_version else None,
+            handler.instruments,
+            handler.process_type,
+            loader_fp,
+            proc_fp,
+            ds_fp,
+        )
+
+    def get_key(self, model: BaseModel, dataset: Dataset) -> Optional[str]:
+        """
+        The key of the predictions of the model on the dataset; the model is fingerprinted by its pickled artifact.
+        """
+        model_fp = fingerprint_obj(model)
+        data_fp = self.fingerprint_dataset(dataset)
+        if model_fp is None or data_fp is None:
+            self.logger.warning("The model or the dataset can't be fingerprinted, the prediction cache is skipped")
+            return None
+        return hash_args(model_fp, data_fp)
+
+    @staticmethod
+    def _get_dates(dataset: Dataset, segment: Union[Text, slice]) -> Optional[pd.DatetimeIndex]:
+        """the dates of the segment in the calendar of the data"""
+        seg = dataset.segments[segment] if isinstance(segment, str) else segment
+        start, end = (seg.start, seg.stop) if isinstance(seg, slice) else seg
+        handler = dataset.handler
+        if handler.start_time is not None:
+            start = handler.start_time if start is None else max(pd.Timestamp(start), pd.Timestamp(handler.start_time))
+        if handler.end_time is not None:
+            end = handler.end_time if end is None else min(pd.Timestamp(end), pd.Timestamp(handler.end_time))
+        try:
+            return pd.DatetimeIndex(handler.data_loader.get_calendar(start, end))
+        except NotImplementedError:
+            return None
+
+    def _get_block(self, dates: pd.DatetimeIndex) -> np.ndarray:
+        return dates.to_period(self.freq).astype(str).str.replace("/", "_").values
+
+    def _load_block(self, key: str, block: str) -> Optional[dict]:
+        name = f"{block}.pkl"
+        if self.recorder is not None:
+            try:
+                return self.recorder.load_object(f"{self.ARTIFACT_DIR}/{key}/{name}")
+            except LoadObjectError:
+                return None
+        path = self.cache_dir.joinpath(self.ARTIFACT_DIR, key, name)
+        if not path.exists():
+            return None
+        with path.open("rb") as f:
+            return pickle.load(f)
+
+    def _save_block(self, key: str, block: str, data: dict):
+        name = f"{block}.pkl"
+        if self.recorder is not None:
+            self.recorder.save_objects(artifact_path=f"{self.ARTIFACT_DIR}/{key}", **{name: data})
+            return
+        path = self.cache_dir.joinpath(self.ARTIFACT_DIR, key, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # the block may be updated concurrently, so it is replaced atomically
+        tmp_path = path.with_name(f"{name}.{uuid.uuid4().hex}.tmp")
+        with tmp_path.open("wb") as f:
+            pickle.dump(data, f, protocol=C.dump_protocol_version)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _get_runs(dates: pd.DatetimeIndex, missing: np.ndarray) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """the ranges of the consecutive missing dates in the calendar"""
+        bounds = np.flatnonzero(np.diff(np.concatenate([[False], missing, [False]]).astype(int)))
+        return [(dates[start], dates[stop - 1]) for start, stop in zip(bounds[::2], bounds[1::2])]
+
+    @staticmethod
+    def _get_pred_dates(pred: Union[pd.Series, pd.DataFrame]) -> pd.DatetimeIndex:
+        level = "datetime" if "datetime" in pred.index.names else 0
+        return pd.DatetimeIndex(pred.index.get_level_values(level))
+
+    def predict(
+        self, model: BaseModel, dataset: Dataset, segment: Union[Text, slice] = "test"
+    ) -> Union[pd.Series, pd.DataFrame]:
+        """
+        Get the predictions of the model on the segment of the dataset; only the dates which are not cached are
+        predicted by `model.predict`.
+        """
+        key = self.get_key(model, dataset)
+        dates = self._get_dates(dataset, segment) if key is not None else None
+        if dates is None or len(dates) == 0:
+            return model.predict(dataset, segment=segment)
+
+        blocks = self._get_block(dates)
+        cached = {}
+        missing = np.zeros(len(dates), dtype=bool)
+        for block in pd.unique(blocks):
+            data = self._load_block(key, block)
+            cached[block] = data
+            mask = blocks == block
+            missing[mask] = True if data is None else ~dates[mask].isin(data["dates"])
+
+        if missing.any():
+            runs = self._get_runs(dates, missing)
+            self.logger.info(f"Predict {missing.sum()} of {len(dates)} dates which are not cached in {len(runs)} runs")
+            pred_l = [model.predict(dataset, segment=slice(start, end)) for start, end in runs]
+            new_pred = pd.concat(pred_l) if len(pred_l) > 1 else pred_l[0]
+            new_dates = self._get_pred_dates(new_pred)
+            for block in pd.unique(blocks[missing]):
+                block_dates = dates[(blocks == block) & missing]
+                block_pred = new_pred[new_dates.isin(block_dates)]
+                data = cached[block]
+                if data is None:
+                    data = {"dates": block_dates, "pred": block_pred}
+                else:
+                    data = {
+                        "dates": data["dates"].union(block_dates),
+                        "pred": pd.concat([data["pred"], block_pred]).sort_index(),
+                    }
+                self._save_block(key, block, data)
+                cached[block] = data
+
+        pred = pd.concat([cached[block]["pred"] for block in pd.unique(blocks)])
+        return pred[self._get_pred_dates(pred).isin(dates)].sort_index()
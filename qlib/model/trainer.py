@@ -11,20 +11,32 @@ In ``DelayTrainer``, the first step is only to save some necessary info to model
 ``Qlib`` offer two kinds of Trainer, ``TrainerR`` is the simplest way and ``TrainerRM`` is based on TaskManager to help manager tasks lifecycle automatically.
 """
 
+import concurrent.futures
+import multiprocessing
+import os
+import shutil
 import socket
+import tempfile
+from copy import deepcopy
+from pathlib import Path
 from typing import Callable, List, Optional
 
+import pandas as pd
+
 from tqdm.auto import tqdm
 
 from qlib.config import C
 from qlib.data.dataset import Dataset
+from qlib.data.dataset.handler import DataHandlerLP
 from qlib.data.dataset.weight import Reweighter
-from qlib.log import get_module_logger
+from qlib.log import TimeInspector, get_module_logger
 from qlib.model.base import Model
 from qlib.utils import (
     auto_filter_kwargs,
     fill_placeholder,
     flatten_dict,
+    get_callable_kwargs,
+    hash_args,
     init_instance_by_config,
 )
 from qlib.utils.paral import call_in_subproc
@@ -338,6 +350,184 @@ class DelayTrainerR(TrainerR):
         return models
 
 
+def _get_shared_handler_key(h_conf: dict) -> str:
+    """The tasks whose handlers only differ in the time range could share a full-range handler"""
+    kwargs = {k: v for k, v in h_conf.get("kwargs", {}).items() if k not in ("start_time", "end_time")}
+    return hash_args(h_conf.get("class"), h_conf.get("module_path"), kwargs)
+
+
+def _is_handler_lp(h_conf: dict) -> bool:
+    """Only the processed data of `DataHandlerLP` could be shared by the handler cache"""
+    try:
+        h_cls, _ = get_callable_kwargs(h_conf)
+    except (AttributeError, ImportError, ValueError, KeyError):
+        return False
+    return isinstance(h_cls, type) and issubclass(h_cls, DataHandlerLP)
+
+
+def _get_time_bound(times: list, func: Callable):
+    """The bound of the times. None (i.e. unbounded) if any of them is None"""
+    if any(t is None for t in times):
+        return None
+    return func(pd.Timestamp(t) for t in times)
+
+
+def _get_available_memory() -> Optional[int]:
+    """The available physical memory in bytes. None if it is unknown on the platform"""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _init_worker(qlib_config, handler_cache_path: str, n_threads: int):
+    if qlib_config.registered:
+        C.register_from_C(qlib_config)
+    C["handler_cache_path"] = handler_cache_path
+    # avoid the oversubscription of the threads of the models (e.g. LightGBM) in the workers
+    os.environ.setdefault("OMP_NUM_THREADS", str(n_threads))
+
+
+class ParallelTrainerR(TrainerR):
+    """
+    Trainer based on (R)ecorder, which trains the tasks in a process pool.
+
+    The tasks whose handlers only differ in `start_time` and `end_time` (e.g. the tasks generated by `RollingGen`)
+    share one handler of the full time range. The handler is loaded and processed only once in the main process and
+    saved to a shared directory by `HandlerCache`. The workers memory-map the processed data, so all of them share
+    the same physical memory of the data and the segments of each task are views of it.
+
+    NOTE: the processors of the shared handler are fitted once on the full time range. So the processors to be
+    fitted must have explicit fitting windows (e.g. `fit_start_time` and `fit_end_time`) to get the same results as
+    training the tasks one by one.
+    """
+
+    def __init__(
+        self,
+        experiment_name: Optional[str] = None,
+        train_func: Callable = task_train,
+        n_jobs: int = -1,
+        memory_per_task: Optional[int] = None,
+        shared_dir: Optional[str] = None,
+        default_rec_name: Optional[str] = None,
+    ):
+        """
+        Init ParallelTrainerR.
+
+        Args:
+            experiment_name (str, optional): the default name of experiment.
+            train_func (Callable, optional): default training method. Defaults to `task_train`. It must be picklable.
+            n_jobs (int): the max number of the worker processes. -1 for the number of CPUs.
+            memory_per_task (int, optional): the bytes of the memory required by a task (excluding the shared data).
+                The number of the workers is limited so the running tasks fit into the available memory.
+            shared_dir (str, optional): the directory of the shared handlers; a temporary directory removed after
+                training by default. A memory-backed file system (e.g. `/dev/shm`) keeps the data out of the disk.
+        """
+        super().__init__(experiment_name, train_func, default_rec_name=default_rec_name)
+        self.n_jobs = n_jobs
+        self.memory_per_task = memory_per_task
+        self.shared_dir = shared_dir
+
+    def _get_n_workers(self, n_tasks: int) -> int:
+        n_workers = (os.cpu_count() or 1) if self.n_jobs < 0 else self.n_jobs
+        n_workers = min(n_workers, n_tasks)
+        if self.memory_per_task is not None:
+            available = _get_available_memory()
+            if available is not None:
+                n_workers = min(n_workers, max(available // self.memory_per_task, 1))
+        return max(n_workers, 1)
+
+    def _share_handlers(self, tasks: List[dict], shared_dir: str) -> List[dict]:
+        """
+        Replace the handlers of the tasks with the shared full-range handlers, whose processed data are saved in
+        `shared_dir`.
+        """
+        tasks = [deepcopy(task) for task in tasks]
+        groups = {}
+        logger = get_module_logger("ParallelTrainerR")
+        for task in tasks:
+            h_conf = task.get("dataset", {}).get("kwargs", {}).get("handler")
+            if isinstance(h_conf, dict) and _is_handler_lp(h_conf):
+                groups.setdefault(_get_shared_handler_key(h_conf), []).append(task)
+        cache_path = C.get("handler_cache_path", None)
+        C["handler_cache_path"] = shared_dir
+        try:
+            for task_l in groups.values():
+                kwargs_l = [task["dataset"]["kwargs"]["handler"].get("kwargs", {}) for task in task_l]
+                h_conf = deepcopy(task_l[0]["dataset"]["kwargs"]["handler"])
+                h_conf["kwargs"] = {
+                    **h_conf.get("kwargs", {}),
+                    "start_time": _get_time_bound([kw.get("start_time") for kw in kwargs_l], min),
+                    "end_time": _get_time_bound([kw.get("end_time") for kw in kwargs_l], max),
+                    "enable_cache": True,
+                }
+                n_entries = len(list(Path(shared_dir).iterdir()))
+                with TimeInspector.logt(f"Load & process the shared handler of {len(task_l)} tasks"):
+                    handler = init_instance_by_config(h_conf)
+                if not isinstance(handler, DataHandlerLP) or len(list(Path(shared_dir).iterdir())) == n_entries:
+                    logger.warning("The handler can't be shared, each task will load and process its own data.")
+                    continue
+                del handler
+                for task in task_l:
+                    task["dataset"]["kwargs"]["handler"] = h_conf
+        finally:
+            C["handler_cache_path"] = cache_path
+        return tasks
+
+    def train(
+        self, tasks: list, train_func: Optional[Callable] = None, experiment_name: Optional[str] = None, **kwargs
+    ) -> List[Recorder]:
+        """
+        Given a list of `tasks` and return a list of trained Recorder. The order can be guaranteed.
+
+        Args:
+            tasks (list): a list of definitions based on `task` dict
+            train_func (Callable): the training method which needs at least `tasks` and `experiment_name`. None for the default training method.
+            experiment_name (str): the experiment name, None for use default name.
+            kwargs: the params for train_func.
+
+        Returns:
+            List[Recorder]: a list of Recorders
+        """
+        if isinstance(tasks, dict):
+            tasks = [tasks]
+        if len(tasks) == 0:
+            return []
+        if train_func is None:
+            train_func = self.train_func
+        if experiment_name is None:
+            experiment_name = self.experiment_name
+        shared_dir = self.shared_dir
+        if shared_dir is None:
+            shared_dir = tempfile.mkdtemp(prefix="qlib_shared_handler_")
+        Path(shared_dir).mkdir(parents=True, exist_ok=True)
+        try:
+            tasks = self._share_handlers(tasks, shared_dir)
+            n_workers = self._get_n_workers(len(tasks))
+            n_threads = max((os.cpu_count() or 1) // n_workers, 1)
+            get_module_logger("ParallelTrainerR").info(f"Train {len(tasks)} tasks with {n_workers} workers.")
+            # the workers are spawned, so they never inherit the locks or the thread pools of the main process
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(C, shared_dir, n_threads),
+            ) as executor:
+                futures = [
+                    executor.submit(train_func, task, experiment_name, recorder_name=self.default_rec_name, **kwargs)
+                    for task in tasks
+                ]
+                recs = []
+                for future in tqdm(futures, desc="train tasks"):
+                    rec = future.result()
+                    rec.set_tags(**{self.STATUS_KEY: self.STATUS_BEGIN})
+                    recs.append(rec)
+        finally:
+            if self.shared_dir is None:
+                shutil.rmtree(shared_dir, ignore_errors=True)
+        return recs
+
+
 class TrainerRM(Trainer):
     """
     Trainer based on (R)ecorder and Task(M)anager.
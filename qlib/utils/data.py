@@ -3,6 +3,7 @@
 """
 This module covers some utility functions that operate on data or basic object
 """
+import warnings
 from copy import deepcopy
 from typing import List, Union
 
@@ -35,6 +36,287 @@ def zscore(x: Union[pd.Series, pd.DataFrame]):
     return (x - x.mean()).div(x.std())
 
 
+# The cross sectional functions below work on a 2D array whose rows are sorted by datetime.
+# `seg_starts` is the start row of each datetime (i.e. segment), so no python function is called per datetime.
+# Their results are the same as applying the functions above to `df.groupby("datetime")`.
+
+# max number of elements of the dense [column x segment x position] blocks for the order statistics; the blocks are
+# split by the columns and the segments to fit it. The functions keep a few temporaries of the size of a block (e.g.
+# about 8 float64/int64 ones for `cs_rank_pct`), so the peak memory is about 64 * CS_DENSE_BUFFER_SIZE bytes (256MB).
+# A block holds at least a column of a segment, so a segment longer than the buffer makes a larger block.
+CS_DENSE_BUFFER_SIZE = 2**22
+
+
+def _seg_lengths(seg_starts: np.ndarray, n: int) -> np.ndarray:
+    return np.diff(np.append(seg_starts, n))
+
+
+def _seg_mean(x: np.ndarray, seg_starts: np.ndarray, mask: np.ndarray = None):
+    """mean and count of the non-nan values of each segment"""
+    if mask is None:
+        mask = np.isnan(x)
+    cnt = np.add.reduceat(~mask, seg_starts, axis=0, dtype=np.int64)
+    total = np.add.reduceat(np.where(mask, 0, x), seg_starts, axis=0, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / cnt, cnt
+
+
+def _seg_zscore(x: np.ndarray, seg_starts: np.ndarray) -> np.ndarray:
+    """(x - mean) / std of each segment with ddof=1 like `pd.DataFrame.std`, in float64"""
+    lengths = _seg_lengths(seg_starts, len(x))
+    mask = np.isnan(x)
+    mean, cnt = _seg_mean(x, seg_starts, mask)
+    d = x - np.repeat(mean, lengths, axis=0)
+    ss = np.add.reduceat(np.where(mask, 0, d * d), seg_starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(ss / np.where(cnt > 1, cnt - 1, np.nan))
+        return d / np.repeat(std, lengths, axis=0)
+
+
+def _iter_dense(x: np.ndarray, seg_starts: np.ndarray):
+    """
+    Iterate `x` in dense [column x segment x position] blocks padded with nan, which are split by the columns and the
+    segments to fit `CS_DENSE_BUFFER_SIZE`.
+
+    Yields
+    ------
+    (row slice, column slice, dense block, segment ids of rows in the block, positions of rows)
+    """
+    lengths = _seg_lengths(seg_starts, len(x))
+    bounds = np.append(seg_starts, len(x))
+    seg_step = max(1, CS_DENSE_BUFFER_SIZE // max(lengths.max(), 1))
+    for s in range(0, len(seg_starts), seg_step):
+        s_end = min(s + seg_step, len(seg_starts))
+        rows = slice(bounds[s], bounds[s_end])
+        n_seg, max_len = s_end - s, max(lengths[s:s_end].max(), 1)
+        seg_ids = np.repeat(np.arange(n_seg), lengths[s:s_end])
+        pos = np.arange(rows.start, rows.stop) - np.repeat(seg_starts[s:s_end], lengths[s:s_end])
+        step = max(1, CS_DENSE_BUFFER_SIZE // (n_seg * max_len))
+        for i in range(0, x.shape[1], step):
+            col_slc = slice(i, min(i + step, x.shape[1]))
+            dense = np.full((col_slc.stop - i, n_seg, max_len), np.nan, dtype=x.dtype)
+            dense[:, seg_ids, pos] = x[rows, col_slc].T
+            yield rows, col_slc, dense, seg_ids, pos
+
+
+def cs_zscore(x: np.ndarray, seg_starts: np.ndarray) -> np.ndarray:
+    """cross sectional version of `zscore`"""
+    return _seg_zscore(x, seg_starts).astype(x.dtype, copy=False)
+
+
+def cs_robust_zscore(x: np.ndarray, seg_starts: np.ndarray, zscore=False) -> np.ndarray:
+    """cross sectional version of `robust_zscore`; the medians are computed by partitioning"""
+    res = np.empty(x.shape, dtype=np.float64)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        # all-nan segments
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for rows, col_slc, dense, seg_ids, pos in _iter_dense(x, seg_starts):
+            median = np.nanmedian(dense, axis=-1)
+            dense -= median[..., None]
+            mad = np.nanmedian(np.abs(dense), axis=-1)
+            res[rows, col_slc] = (dense[:, seg_ids, pos] / mad[:, seg_ids]).T / 1.4826
+    np.clip(res, -3, 3, out=res)
+    if zscore:
+        res = _seg_zscore(res, seg_starts)
+    return res.astype(x.dtype, copy=False)
+
+
+def cs_rank_pct(x: np.ndarray, seg_starts: np.ndarray) -> np.ndarray:
+    """
+    cross sectional version of `pd.DataFrame.rank(pct=True)`; ties get the average rank and nan keeps nan.
+    The ranks are computed by argsort in each segment.
+    """
+    res = np.empty(x.shape, dtype=np.float64)
+    for rows, col_slc, dense, seg_ids, pos in _iter_dense(x, seg_starts):
+        # nan is sorted to the end
+        order = np.argsort(dense, axis=-1)
+        sorted_v = np.take_along_axis(dense, order, axis=-1)
+        idx = np.broadcast_to(np.arange(dense.shape[-1]), dense.shape)
+        is_start = np.ones(dense.shape, dtype=bool)
+        is_start[..., 1:] = sorted_v[..., 1:] != sorted_v[..., :-1]
+        is_end = np.ones(dense.shape, dtype=bool)
+        is_end[..., :-1] = is_start[..., 1:]
+        # the first and the last position of the tie group of each value
+        first = np.maximum.accumulate(np.where(is_start, idx, 0), axis=-1)
+        last = np.minimum.accumulate(np.where(is_end, idx, dense.shape[-1])[..., ::-1], axis=-1)[..., ::-1]
+        rank = (first + last) / 2 + 1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rank /= (~np.isnan(dense)).sum(axis=-1, keepdims=True)
+        rank[np.isnan(sorted_v)] = np.nan
+        ranked = np.empty(dense.shape, dtype=np.float64)
+        np.put_along_axis(ranked, order, rank, axis=-1)
+        res[rows, col_slc] = ranked[:, seg_ids, pos].T
+    return res
+
+
+def cs_fillna_mean(x: np.ndarray, seg_starts: np.ndarray) -> np.ndarray:
+    """cross sectional version of `x.fillna(x.mean())`"""
+    mask = np.isnan(x)
+    mean, _ = _seg_mean(x, seg_starts, mask)
+    mean = np.repeat(mean.astype(x.dtype, copy=False), _seg_lengths(seg_starts, len(x)), axis=0)
+    return np.where(mask, mean, x)
+
+
+class RunningStats:
+    """
+    The column-wise count, mean, variance, min and max of the data streamed by chunks of rows.
+
+    The mean and variance are merged by the parallel version of Welford's algorithm, so they are exact (up to the
+    floating point error) and don't depend on the order or the size of the chunks. NaN values are ignored.
+    The stats of the disjoint parts of the data (e.g. computed in parallel) can be combined by `merge`.
+    """
+
+    def __init__(self, n_cols: int):
+        self.count = np.zeros(n_cols, dtype=np.int64)
+        self._mean = np.zeros(n_cols)
+        self._m2 = np.zeros(n_cols)
+        self._min = np.full(n_cols, np.inf)
+        self._max = np.full(n_cols, -np.inf)
+
+    def update(self, x: np.ndarray) -> "RunningStats":
+        """update the stats with a 2D array of rows"""
+        x = np.asarray(x, dtype=np.float64)
+        if x.shape[0] == 0:
+            return self
+        mask = ~np.isnan(x)
+        count = mask.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(mask, x, 0.0).sum(axis=0) / count
+            m2 = np.where(mask, (x - mean) ** 2, 0.0).sum(axis=0)
+        self._merge(count, mean, m2, np.fmin.reduce(x, axis=0), np.fmax.reduce(x, axis=0))
+        return self
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """merge the stats of another part of the data"""
+        self._merge(other.count, other._mean, other._m2, other._min, other._max)
+        return self
+
+    def _merge(self, count, mean, m2, min_val, max_val):
+        upd = count > 0
+        n_a, n_b = self.count[upd], count[upd]
+        total = n_a + n_b
+        delta = mean[upd] - self._mean[upd]
+        self._mean[upd] += delta * n_b / total
+        self._m2[upd] += m2[upd] + delta**2 * n_a * n_b / total
+        self.count[upd] = total
+        self._min = np.fmin(self._min, min_val)
+        self._max = np.fmax(self._max, max_val)
+
+    def _valid(self, x: np.ndarray) -> np.ndarray:
+        return np.where(self.count > 0, x, np.nan)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._valid(self._mean)
+
+    @property
+    def var(self) -> np.ndarray:
+        """the population variance (i.e. `ddof=0`, the same as `np.nanvar`)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._valid(self._m2 / self.count)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.var)
+
+    @property
+    def min(self) -> np.ndarray:
+        return self._valid(self._min)
+
+    @property
+    def max(self) -> np.ndarray:
+        return self._valid(self._max)
+
+
+class QuantileSketch:
+    """
+    A mergeable sketch of the column-wise quantiles of the data streamed by chunks of rows (i.e. DDSketch).
+
+    The values are counted in the buckets of the logarithm of their absolute values, so the memory is bounded by the
+    range of the values instead of the size of the data. The quantile of the rank `q * (count - 1)` is estimated with
+    the relative error `rel_err` if the absolute values of the neighbouring elements are in `[min_value, max_value]`
+    (smaller ones are counted as 0 and larger ones as `max_value`). NaN values are ignored.
+    The min and max values of each bucket are kept as well, so the estimation is exact if the elements around the
+    rank are the same value (e.g. the filled values or the discrete features).
+    The sketches of the disjoint parts of the data can be combined by `merge`.
+
+    Reference:
+        Masson, C., Rim, J. E., & Lee, H. K. (2019). DDSketch: A fast and fully-mergeable quantile sketch with
+        relative-error guarantees.
+    """
+
+    def __init__(self, n_cols: int, rel_err: float = 0.01, min_value: float = 1e-9, max_value: float = 1e12):
+        if not 0 < rel_err < 1:
+            raise ValueError(f"rel_err should be in (0, 1): {rel_err}")
+        self.rel_err = rel_err
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + rel_err) / (1 - rel_err)
+        self._log_gamma = np.log(self.gamma)
+        self._offset = int(np.ceil(np.log(min_value) / self._log_gamma))
+        self.n_bins = int(np.ceil(np.log(max_value) / self._log_gamma)) - self._offset + 1
+        # [negative buckets in descending order of the absolute values, zero bucket, positive buckets]
+        self.counts = np.zeros((n_cols, 2 * self.n_bins + 1), dtype=np.int64)
+        self.bucket_min = np.full(self.counts.shape, np.inf)
+        self.bucket_max = np.full(self.counts.shape, -np.inf)
+
+    def _get_bucket(self, x: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            key = np.ceil(np.log(np.abs(x)) / self._log_gamma) - self._offset
+        key = np.clip(np.nan_to_num(key, nan=0, neginf=0, posinf=0), 0, self.n_bins - 1).astype(np.int64)
+        bucket = np.where(x > 0, self.n_bins + 1 + key, self.n_bins - 1 - key)
+        bucket[np.abs(x) < self.min_value] = self.n_bins
+        return bucket
+
+    def _get_value(self, bucket: np.ndarray) -> np.ndarray:
+        key = np.abs(bucket - self.n_bins) - 1 + self._offset
+        # the value with the minimal relative error to the values in the bucket `(gamma^(key-1), gamma^key]`
+        value = 2 * self.gamma ** key.astype(np.float64) / (self.gamma + 1)
+        return np.where(bucket == self.n_bins, 0.0, np.sign(bucket - self.n_bins) * value)
+
+    def update(self, x: np.ndarray) -> "QuantileSketch":
+        """update the sketch with a 2D array of rows"""
+        x = np.asarray(x, dtype=np.float64)
+        n_cols, width = self.counts.shape
+        mask = ~np.isnan(x)
+        ids = (self._get_bucket(x) + np.arange(n_cols) * width)[mask]
+        x = x[mask]
+        self.counts += np.bincount(ids, minlength=n_cols * width).reshape(n_cols, width)
+        np.minimum.at(self.bucket_min.reshape(-1), ids, x)
+        np.maximum.at(self.bucket_max.reshape(-1), ids, x)
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """merge the sketch of another part of the data"""
+        if self.counts.shape != other.counts.shape or self.gamma != other.gamma or self._offset != other._offset:
+            raise ValueError("Only the sketches with the same parameters can be merged")
+        self.counts += other.counts
+        np.minimum(self.bucket_min, other.bucket_min, out=self.bucket_min)
+        np.maximum(self.bucket_max, other.bucket_max, out=self.bucket_max)
+        return self
+
+    @property
+    def count(self) -> np.ndarray:
+        return self.counts.sum(axis=1)
+
+    def quantile(self, q: float) -> np.ndarray:
+        """
+        the column-wise quantile `q` (the ranks between the elements are interpolated linearly, the same as
+        `np.nanquantile`); NaN for the columns without values
+        """
+        cum = np.cumsum(self.counts, axis=1)
+        total = cum[:, -1]
+        rank = q * (total - 1)
+        rows = np.arange(len(cum))
+
+        def _get_rank_value(r: np.ndarray) -> np.ndarray:
+            bucket = np.minimum((cum <= r[:, None]).sum(axis=1), cum.shape[1] - 1)
+            return np.clip(self._get_value(bucket), self.bucket_min[rows, bucket], self.bucket_max[rows, bucket])
+
+        lo, hi = _get_rank_value(np.floor(rank)), _get_rank_value(np.ceil(rank))
+        return np.where(total > 0, lo + (hi - lo) * (rank - np.floor(rank)), np.nan)
+
+
 def deepcopy_basic_type(obj: object) -> object:
     """
     deepcopy an object without copy the complicated objects.
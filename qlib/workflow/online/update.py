@@ -13,6 +13,7 @@ from qlib.data import D
 from qlib.data.dataset import Dataset, DatasetH, TSDatasetH
 from qlib.data.dataset.handler import DataHandlerLP
 from qlib.model import Model
+from qlib.model.pred_cache import PredCache
 from qlib.utils import get_date_by_shift
 from qlib.workflow.recorder import Recorder
 from qlib.workflow.record_temp import SignalRecord
@@ -272,10 +273,23 @@ class PredUpdater(DSBasedUpdater):
     Update the prediction in the Recorder
     """
 
+    def __init__(self, record: Recorder, to_date=None, use_pred_cache: bool = False, **kwargs):
+        """
+        Args:
+            use_pred_cache : bool
+                whether to cache the predictions as the artifacts of the recorder, so updating the same dates again
+                (e.g. retrying a failed update) doesn't predict the cached dates.
+        """
+        super().__init__(record, to_date=to_date, **kwargs)
+        self.use_pred_cache = use_pred_cache
+
     def get_update_data(self, dataset: Dataset) -> pd.DataFrame:
         # Load model
         model = self.rmdl.get_model()
-        new_pred: pd.Series = model.predict(dataset)
+        if self.use_pred_cache:
+            new_pred: pd.Series = PredCache(recorder=self.record).predict(model, dataset)
+        else:
+            new_pred: pd.Series = model.predict(dataset)
         data = _replace_range(self.old_data, new_pred.to_frame("score"))
         self.logger.info(f"Finish updating new {new_pred.shape[0]} predictions in {self.record.info['id']}.")
         return data
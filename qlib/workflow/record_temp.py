@@ -16,13 +16,13 @@ from ..data.dataset import DatasetH
 from ..data.dataset.handler import DataHandlerLP
 from ..backtest import backtest as normal_backtest
 from ..log import get_module_logger
+from ..model.pred_cache import PredCache
 from ..utils import fill_placeholder, flatten_dict, class_casting, get_date_by_shift
 from ..utils.time import Freq
 from ..utils.data import deepcopy_basic_type
 from ..utils.exceptions import QlibException
 from ..contrib.eva.alpha import calc_ic, calc_long_short_return, calc_long_short_prec
 
-
 logger = get_module_logger("workflow", logging.INFO)
 
 
@@ -164,10 +164,18 @@ class SignalRecord(RecordTemp):
     This is the Signal Record class that generates the signal prediction. This class inherits the ``RecordTemp`` class.
     """
 
-    def __init__(self, model=None, dataset=None, recorder=None):
+    def __init__(self, model=None, dataset=None, recorder=None, use_pred_cache: bool = False):
+        """
+        Parameters
+        ----------
+        use_pred_cache : bool
+            whether to cache the predictions as the artifacts of the recorder (see `qlib.model.pred_cache.PredCache`),
+            so generating the record again (e.g. re-analysing the experiment) doesn't predict the cached dates.
+        """
         super().__init__(recorder=recorder)
         self.model = model
         self.dataset = dataset
+        self.use_pred_cache = use_pred_cache
 
     @staticmethod
     def generate_label(dataset):
@@ -190,7 +198,10 @@ class SignalRecord(RecordTemp):
 
     def generate(self, **kwargs):
         # generate prediction
-        pred = self.model.predict(self.dataset)
+        if self.use_pred_cache:
+            pred = PredCache(recorder=self.recorder).predict(self.model, self.dataset)
+        else:
+            pred = self.model.predict(self.dataset)
         if isinstance(pred, pd.Series):
             pred = pred.to_frame("score")
         self.save(**{"pred.pkl": pred})
@@ -366,6 +377,7 @@ class PortAnaRecord(ACRecordTemp):
 
         - The return report and detailed positions of the backtest, returned by `qlib/contrib/evaluate.py:backtest`
     - port_analysis.pkl : The risk analysis of your portfolio, returned by `qlib/contrib/evaluate.py:risk_analysis`
+    - backtest_profile.pkl : The wall time and the calls of the phases of each level, if `profile` is True
     """
 
     artifact_path = "portfolio_analysis"
@@ -379,6 +391,7 @@ class PortAnaRecord(ACRecordTemp):
         indicator_analysis_freq: Union[List, str] = None,
         indicator_analysis_method=None,
         skip_existing=False,
+        profile=False,
         **kwargs,
     ):
         """
@@ -394,6 +407,8 @@ class PortAnaRecord(ACRecordTemp):
             indicator analysis freq of report
         indicator_analysis_method : str, optional, default by None
             the candidate values include 'mean', 'amount_weighted', 'value_weighted'
+        profile : bool, optional, default by False
+            whether to profile the backtest; the wall time of each level and phase is logged as metrics
         """
         super().__init__(recorder=recorder, skip_existing=skip_existing, **kwargs)
 
@@ -453,6 +468,7 @@ class PortAnaRecord(ACRecordTemp):
             "{0}{1}".format(*Freq.parse(_analysis_freq)) for _analysis_freq in indicator_analysis_freq
         ]
         self.indicator_analysis_method = indicator_analysis_method
+        self.profile = profile
 
     def _get_report_freq(self, executor_config):
         ret_freq = []
@@ -480,9 +496,21 @@ class PortAnaRecord(ACRecordTemp):
 
         artifact_objects = {}
         # custom strategy and get backtest
-        portfolio_metric_dict, indicator_dict = normal_backtest(
-            executor=self.executor_config, strategy=self.strategy_config, **self.backtest_config
-        )
+        if self.profile:
+            portfolio_metric_dict, indicator_dict, profile_df = normal_backtest(
+                executor=self.executor_config, strategy=self.strategy_config, profile=True, **self.backtest_config
+            )
+            artifact_objects.update({"backtest_profile.pkl": profile_df})
+            self.recorder.log_metrics(
+                **{
+                    f"profile.{_freq}.{_phase}.wall_time": _wall_time
+                    for (_, _freq, _phase), _wall_time in profile_df["wall_time"].items()
+                }
+            )
+        else:
+            portfolio_metric_dict, indicator_dict = normal_backtest(
+                executor=self.executor_config, strategy=self.strategy_config, **self.backtest_config
+            )
         for _freq, (report_normal, positions_normal) in portfolio_metric_dict.items():
             artifact_objects.update({f"report_normal_{_freq}.pkl": report_normal})
             artifact_objects.update({f"positions_normal_{_freq}.pkl": positions_normal})
@@ -564,6 +592,8 @@ class PortAnaRecord(ACRecordTemp):
                 list_path.append(f"indicator_analysis_{_analysis_freq}.pkl")
             else:
                 warnings.warn(f"indicator_analysis freq {_analysis_freq} is not found")
+        if self.profile:
+            list_path.append("backtest_profile.pkl")
         return list_path
 
 
@@ -0,0 +1,255 @@
+import copy
+import shutil
+import tempfile
+import unittest
+from collections import defaultdict
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import qlib
+from qlib.backtest import backtest, get_exchange
+from qlib.backtest.exchange import Exchange
+from qlib.backtest.decision import Order, OrderBatch, OrderDir, TradeDecisionWO
+from qlib.backtest.position import ArrayPosition, Position
+from qlib.contrib.strategy.signal_strategy import TopkDropoutStrategy
+
+START_TIME, END_TIME = "2020-01-10", "2020-03-31"
+
+
+class TopkDropoutBatchStrategy(TopkDropoutStrategy):
+    """`TopkDropoutStrategy` whose decisions carry the orders by `OrderBatch`"""
+
+    def generate_trade_decision(self, execute_result=None):
+        decision = super().generate_trade_decision(execute_result)
+        return TradeDecisionWO(OrderBatch.from_orders(decision.get_decision()), self)
+
+
+def _dump_data(data_dir: Path, n_inst: int = 20, n_day: int = 70) -> pd.Index:
+    """dump the random daily quotes with suspension and price limits in the qlib format"""
+    rng = np.random.default_rng(0)
+    calendar = pd.bdate_range("2020-01-01", periods=n_day)
+    data_dir.joinpath("calendars").mkdir(parents=True)
+    data_dir.joinpath("instruments").mkdir()
+    pd.Series(calendar.strftime("%Y-%m-%d")).to_csv(data_dir / "calendars/day.txt", index=False, header=False)
+    instruments = pd.Index([f"SH6000{i:02d}" for i in range(n_inst)])
+    inst_l = []
+    for inst in instruments:
+        ret = rng.normal(0.0, 0.03, n_day)
+        ret[rng.random(n_day) < 0.05] = rng.choice([-0.1, 0.1])
+        close = 10 * rng.uniform(0.5, 2) * np.cumprod(1 + ret)
+        suspended = rng.random(n_day) < 0.05
+        fields = {
+            "close": np.where(suspended, np.nan, close),
+            "open": np.where(suspended, np.nan, close / (1 + ret) * (1 + rng.normal(0, 0.01, n_day))),
+            "volume": np.where(suspended, np.nan, rng.uniform(1e3, 1e5, n_day)),
+            "factor": np.full(n_day, rng.uniform(1, 3)),
+        }
+        fields["change"] = pd.Series(fields["close"]).pct_change(fill_method=None).values
+        feature_dir = data_dir / "features" / inst.lower()
+        feature_dir.mkdir(parents=True)
+        for name, values in fields.items():
+            np.hstack([0, values]).astype("<f").tofile(feature_dir / f"{name}.day.bin")
+        inst_l.append((inst, calendar[0].strftime("%Y-%m-%d"), calendar[-1].strftime("%Y-%m-%d")))
+    pd.DataFrame(inst_l).to_csv(data_dir / "instruments/all.txt", sep="\t", index=False, header=False)
+    return instruments
+
+
+class TestOrderBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.data_dir = Path(tempfile.mkdtemp())
+        cls.instruments = _dump_data(cls.data_dir)
+        qlib.init(provider_uri=str(cls.data_dir), region="cn", kernels=1, expression_cache=None, dataset_cache=None)
+        calendar = pd.DatetimeIndex(qlib.data.D.calendar())
+        index = pd.MultiIndex.from_product([calendar, cls.instruments], names=["datetime", "instrument"])
+        rng = np.random.default_rng(1)
+        cls.score = pd.Series(rng.normal(size=len(index)), index=index)
+        cls.benchmark = pd.Series(rng.normal(0, 0.01, len(calendar)), index=calendar)
+        cls.exchange = get_exchange(
+            start_time=START_TIME,
+            end_time=END_TIME,
+            codes="all",
+            deal_price="open",
+            limit_threshold=0.095,
+            trade_unit=100,
+            volume_threshold={"buy": ("current", "0.02 * $volume"), "sell": ("cum", "0.05 * $volume")},
+            impact_cost=0.1,
+            min_cost=5,
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.data_dir)
+
+    def test_deal_order_batch(self):
+        rng = np.random.default_rng(2)
+        time = pd.Timestamp("2020-02-03")
+        codes = rng.choice(self.instruments, 12, replace=False)
+        directions = [OrderDir.SELL] * 6 + [OrderDir.BUY] * 6
+        init = {code: {"amount": 300.0, "price": 10.0} for code in codes[:6]}
+        # the cash is enough for the first several orders only
+        for cash in (1e3, 3e4, 1e7):
+            for pos_cls in (Position, ArrayPosition):
+                for settle in (False, True):
+                    position = pos_cls(cash=cash, position_dict=init)
+                    if settle:
+                        position.settle_start(Position.ST_CASH)
+                    amounts = rng.uniform(50, 500, len(codes))
+                    orders = [Order(c, a, d, time, time) for c, a, d in zip(codes, amounts, directions)]
+                    order_batch = OrderBatch(codes, amounts, directions, time, time)
+                    exp_position, dealt = copy.deepcopy(position), defaultdict(float, {codes[6]: 100.0, codes[0]: 50.0})
+                    exp = np.array(
+                        [self.exchange.deal_order(o, position=exp_position, dealt_order_amount=dealt) for o in orders]
+                    )
+                    res = self.exchange.deal_order_batch(order_batch, position=position, dealt_order_amount=dealt)
+                    np.testing.assert_allclose(np.stack(res, axis=1), exp, rtol=1e-10)
+                    np.testing.assert_allclose(order_batch.deal_amount, [o.deal_amount for o in orders])
+                    np.testing.assert_array_equal(
+                        order_batch.factor, [np.nan if o.factor is None else o.factor for o in orders]
+                    )
+                    self.assertAlmostEqual(position.get_cash(include_settle=True), exp_position.get_cash(True))
+                    self.assertEqual(position.get_stock_amount_dict(), exp_position.get_stock_amount_dict())
+
+    def test_untradable_in_batch(self):
+        # a day with both suspended stocks and stocks at the limit
+        for time in pd.bdate_range(START_TIME, END_TIME):
+            suspended = [self.exchange.check_stock_suspended(c, time, time) for c in self.instruments]
+            limited = [
+                not s and self.exchange.check_stock_limit(c, time, time, direction=OrderDir.BUY)
+                for c, s in zip(self.instruments, suspended)
+            ]
+            if any(suspended[:-1]) and any(limited[:-1]):
+                break
+        else:
+            self.fail("no suspended or limited stocks in the data")
+        n_orders = len(self.instruments)
+        order_batch = OrderBatch(self.instruments, np.full(n_orders, 200.0), [OrderDir.BUY] * n_orders, time, time)
+        orders = order_batch.to_orders()
+        position, exp_position = Position(cash=1e9), Position(cash=1e9)
+        exp = np.array([self.exchange.deal_order(o, position=exp_position) for o in orders])
+        with mock.patch.object(Exchange, "_update_batch", side_effect=Exchange._update_batch) as update_batch:
+            res = self.exchange.deal_order_batch(order_batch, position=position)
+        # the untradable orders don't stop the rest orders being dealt at once
+        self.assertEqual(update_batch.call_count, 1)
+        np.testing.assert_allclose(np.stack(res, axis=1), exp, rtol=1e-10)
+        self.assertEqual(position.get_stock_amount_dict(), exp_position.get_stock_amount_dict())
+
+    def test_decision(self):
+        orders = [
+            Order("SH600000", 100.0, OrderDir.BUY, None, None),
+            Order("SH600001", 200.0, OrderDir.SELL, pd.Timestamp("2020-01-02"), pd.Timestamp("2020-01-02")),
+        ]
+        order_batch = OrderBatch.from_orders(orders)
+        self.assertEqual(len(order_batch), 2)
+        np.testing.assert_array_equal(order_batch.amount_delta, [100.0, -200.0])
+        order_batch.fill_time(pd.Timestamp("2020-01-03"), pd.Timestamp("2020-01-03 23:59:59"))
+        groups = list(order_batch.groupby_time())
+        self.assertEqual(len(groups), 2)
+        self.assertEqual(groups[0][0], pd.Timestamp("2020-01-02"))
+        res = order_batch[np.array([1, 0])].to_orders()
+        self.assertEqual([o.stock_id for o in res], ["SH600001", "SH600000"])
+        self.assertEqual(res[1].start_time, pd.Timestamp("2020-01-03"))
+        self.assertIsNone(res[0].factor)
+        with self.assertRaises(NotImplementedError):
+            OrderBatch(["SH600000"], [100.0], [2])
+
+    def test_backtest(self):
+        executor = {
+            "class": "SimulatorExecutor",
+            "module_path": "qlib.backtest.executor",
+            "kwargs": {"time_per_step": "day", "generate_portfolio_metrics": True},
+        }
+        for trade_type in ("serial", "parallel"):
+            executor["kwargs"]["trade_type"] = trade_type
+            res = []
+            for cls in ("TopkDropoutStrategy", "TopkDropoutBatchStrategy"):
+                strategy = {
+                    "class": cls,
+                    "module_path": __name__,
+                    "kwargs": {"signal": self.score, "topk": 6, "n_drop": 2},
+                }
+                res.append(
+                    backtest(
+                        start_time=START_TIME,
+                        end_time=END_TIME,
+                        strategy=strategy,
+                        executor=copy.deepcopy(executor),
+                        benchmark=self.benchmark,
+                        account=1e6,
+                        exchange_kwargs={"exchange": self.exchange},
+                    )
+                )
+            (portfolio_dict, indicator_dict), (batch_portfolio_dict, batch_indicator_dict) = res
+            report, positions = portfolio_dict["1day"]
+            batch_report, batch_positions = batch_portfolio_dict["1day"]
+            self.assertGreater(report["turnover"].astype(bool).sum(), len(report) // 2)
+            pd.testing.assert_frame_equal(batch_report, report, rtol=1e-10)
+            for date, pos in positions.items():
+                self.assertEqual(batch_positions[date].get_stock_amount_dict(), pos.get_stock_amount_dict())
+            pd.testing.assert_frame_equal(
+                batch_indicator_dict["1day"][0], indicator_dict["1day"][0], rtol=1e-10, check_dtype=False
+            )
+
+    def test_nested_backtest(self):
+        for inner_strategy in (
+            {"class": "TWAPStrategy", "module_path": "qlib.contrib.strategy.rule_strategy", "kwargs": {}},
+            {
+                "class": "SBBStrategyEMA",
+                "module_path": "qlib.contrib.strategy.rule_strategy",
+                "kwargs": {"instruments": "all"},
+            },
+        ):
+            with self.subTest(inner_strategy=inner_strategy["class"]):
+                res = []
+                for order_batch in (False, True):
+                    inner_strategy["kwargs"]["order_batch"] = order_batch
+                    executor = {
+                        "class": "NestedExecutor",
+                        "module_path": "qlib.backtest.executor",
+                        "kwargs": {
+                            "time_per_step": "week",
+                            "generate_portfolio_metrics": True,
+                            "inner_strategy": copy.deepcopy(inner_strategy),
+                            "inner_executor": {
+                                "class": "SimulatorExecutor",
+                                "module_path": "qlib.backtest.executor",
+                                "kwargs": {"time_per_step": "day", "generate_portfolio_metrics": True},
+                            },
+                        },
+                    }
+                    # the rule strategies create no `Order` for the batches
+                    with mock.patch("qlib.contrib.strategy.rule_strategy.Order", wraps=Order) as order_cls:
+                        res.append(
+                            backtest(
+                                start_time=START_TIME,
+                                end_time=END_TIME,
+                                strategy={
+                                    "class": "TopkDropoutStrategy",
+                                    "module_path": "qlib.contrib.strategy.signal_strategy",
+                                    "kwargs": {"signal": self.score, "topk": 6, "n_drop": 2},
+                                },
+                                executor=executor,
+                                benchmark=self.benchmark,
+                                account=1e6,
+                                exchange_kwargs={"exchange": self.exchange},
+                            )
+                        )
+                    self.assertEqual(order_cls.called, not order_batch)
+                (portfolio_dict, indicator_dict), (batch_portfolio_dict, batch_indicator_dict) = res
+                self.assertGreater(portfolio_dict["1day"][0]["turnover"].astype(bool).sum(), 0)
+                for freq in ("1week", "1day"):
+                    report, positions = portfolio_dict[freq]
+                    batch_report, batch_positions = batch_portfolio_dict[freq]
+                    pd.testing.assert_frame_equal(batch_report, report, rtol=1e-10)
+                    for date, pos in positions.items():
+                        self.assertEqual(batch_positions[date].get_stock_amount_dict(), pos.get_stock_amount_dict())
+                    pd.testing.assert_frame_equal(
+                        batch_indicator_dict[freq][0], indicator_dict[freq][0], rtol=1e-10, check_dtype=False
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import copy
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import qlib
+from qlib.backtest import backtest, get_strategy_executor
+from qlib.backtest.backtest import backtest_loop
+from qlib.backtest.high_performance_ds import NumpyQuote, PanelQuote
+from qlib.backtest.profiler import BacktestProfiler
+
+START_TIME, END_TIME = "2020-01-10", "2020-03-31"
+
+
+def _dump_data(data_dir: Path, n_inst: int = 10, n_day: int = 70) -> pd.Index:
+    """dump the random daily quotes in the qlib format"""
+    rng = np.random.default_rng(0)
+    calendar = pd.bdate_range("2020-01-01", periods=n_day)
+    data_dir.joinpath("calendars").mkdir(parents=True)
+    data_dir.joinpath("instruments").mkdir()
+    pd.Series(calendar.strftime("%Y-%m-%d")).to_csv(data_dir / "calendars/day.txt", index=False, header=False)
+    instruments = pd.Index([f"SH6000{i:02d}" for i in range(n_inst)])
+    inst_l = []
+    for inst in instruments:
+        close = 10 * np.cumprod(1 + rng.normal(0, 0.03, n_day))
+        fields = {
+            "close": close,
+            "open": close * rng.uniform(0.98, 1.02, n_day),
+            "volume": rng.uniform(1e4, 1e6, n_day),
+            "factor": np.ones(n_day),
+            "change": pd.Series(close).pct_change(fill_method=None).values,
+        }
+        feature_dir = data_dir / "features" / inst.lower()
+        feature_dir.mkdir(parents=True)
+        for name, values in fields.items():
+            np.hstack([0, values]).astype("<f").tofile(feature_dir / f"{name}.day.bin")
+        inst_l.append((inst, calendar[0].strftime("%Y-%m-%d"), calendar[-1].strftime("%Y-%m-%d")))
+    pd.DataFrame(inst_l).to_csv(data_dir / "instruments/all.txt", sep="\t", index=False, header=False)
+    return instruments
+
+
+class TestBacktestProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.data_dir = Path(tempfile.mkdtemp())
+        instruments = _dump_data(cls.data_dir)
+        qlib.init(provider_uri=str(cls.data_dir), region="cn", kernels=1, expression_cache=None, dataset_cache=None)
+        calendar = pd.DatetimeIndex(qlib.data.D.calendar())
+        index = pd.MultiIndex.from_product([calendar, instruments], names=["datetime", "instrument"])
+        rng = np.random.default_rng(1)
+        score = pd.Series(rng.normal(size=len(index)), index=index)
+        cls.kwargs = {
+            "start_time": START_TIME,
+            "end_time": END_TIME,
+            "strategy": {
+                "class": "TopkDropoutStrategy",
+                "module_path": "qlib.contrib.strategy.signal_strategy",
+                "kwargs": {"signal": score, "topk": 5, "n_drop": 1},
+            },
+            "executor": {
+                "class": "NestedExecutor",
+                "module_path": "qlib.backtest.executor",
+                "kwargs": {
+                    "time_per_step": "week",
+                    "generate_portfolio_metrics": True,
+                    "inner_strategy": {"class": "TWAPStrategy", "module_path": "qlib.contrib.strategy.rule_strategy"},
+                    "inner_executor": {
+                        "class": "SimulatorExecutor",
+                        "module_path": "qlib.backtest.executor",
+                        "kwargs": {"time_per_step": "day", "generate_portfolio_metrics": True},
+                    },
+                },
+            },
+            "benchmark": pd.Series(rng.normal(0, 0.01, len(calendar)), index=calendar),
+            "account": 1e7,
+            "exchange_kwargs": {
+                "codes": "all",
+                "deal_price": "close",
+                "limit_threshold": 0.095,
+                "quote_cls": NumpyQuote,
+            },
+        }
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.data_dir)
+
+    def test_profile(self):
+        portfolio_dict, indicator_dict, profile_df = backtest(**self.kwargs, profile=True)
+        self.assertEqual(profile_df.index.names, ["level", "freq", "phase"])
+        self.assertEqual(profile_df.index.get_level_values("freq").unique().tolist(), ["1week", "1day"])
+        self.assertEqual(
+            profile_df.loc[0].index.get_level_values("phase").tolist(),
+            ["total", "decision", "settlement", "indicator", "metrics"],
+        )
+        self.assertEqual(
+            profile_df.loc[1].index.get_level_values("phase").tolist(),
+            ["total", "decision", "execution", "settlement", "indicator", "metrics"],
+        )
+        calls = profile_df["calls"].droplevel("freq")
+        self.assertEqual(calls[0, "total"], len(portfolio_dict["1week"][0]))
+        self.assertEqual(calls[1, "total"], len(portfolio_dict["1day"][0]))
+        self.assertEqual(calls[1, "execution"], calls[1, "total"])
+
+        # the total time includes the inner levels
+        wall_time = profile_df["wall_time"].droplevel("freq")
+        self.assertTrue((wall_time > 0).all())
+        self.assertGreater(wall_time[0, "total"], wall_time[1, "total"] + wall_time[1, "decision"])
+        self.assertGreater(wall_time[1, "total"], wall_time[1, "execution"] + wall_time[1, "settlement"])
+        # each order is looked up by the exchange in the execution
+        quote_calls, quote_lookups = profile_df["quote_calls"], profile_df["quote_lookups"]
+        self.assertGreater(quote_calls[1, "1day", "execution"], 0)
+        self.assertTrue((quote_lookups >= quote_calls).all())
+        self.assertGreater(quote_calls[0, "1week", "total"], quote_calls[1, "1day", "total"])
+        # every lookup of NumpyQuote is a hit or a miss of its cache
+        pd.testing.assert_series_equal(
+            profile_df["cache_hits"] + profile_df["cache_misses"], quote_lookups, check_names=False
+        )
+        self.assertGreater(profile_df["cache_hits"].sum(), 0)
+
+        # profiling doesn't change the results
+        exp_portfolio_dict, exp_indicator_dict = backtest(**self.kwargs)
+        for freq, (report, _) in exp_portfolio_dict.items():
+            pd.testing.assert_frame_equal(portfolio_dict[freq][0], report)
+            pd.testing.assert_frame_equal(indicator_dict[freq][0], exp_indicator_dict[freq][0])
+
+    def test_quote_lookups(self):
+        # the lookups of the quotes without caching are counted too, and the batches look up many values at a time
+        exchange_kwargs = {**self.kwargs["exchange_kwargs"], "quote_cls": PanelQuote}
+        executor = copy.deepcopy(self.kwargs["executor"])
+        executor["kwargs"]["inner_strategy"]["kwargs"] = {"order_batch": True}
+        kwargs = {**self.kwargs, "executor": executor, "exchange_kwargs": exchange_kwargs}
+        profile_df = backtest(**kwargs, profile=True)[2]
+        execution = profile_df.loc[(1, "1day", "execution")]
+        self.assertGreater(execution["quote_calls"], 0)
+        self.assertGreater(execution["quote_lookups"], execution["quote_calls"])
+        self.assertTrue((profile_df[["cache_hits", "cache_misses"]] == 0).all(axis=None))
+
+    def test_reuse_executor(self):
+        kwargs = self.kwargs.copy()
+        start_time, end_time = kwargs.pop("start_time"), kwargs.pop("end_time")
+        trade_strategy, trade_executor = get_strategy_executor(start_time, end_time, **kwargs)
+        profile_df = backtest_loop(start_time, end_time, trade_strategy, trade_executor, profile=True)[2]
+        self.assertFalse(profile_df.empty)
+        # the quote is not counted out of the profiled backtest
+        quote = trade_executor.trade_exchange.quote
+        self.assertNotIn("get_data", quote.__dict__)
+        profiler = BacktestProfiler()
+        with profiler.count_quotes([quote, quote]):
+            quote.get_data("SH600000", pd.Timestamp("2020-01-10"), pd.Timestamp("2020-01-10"), "$close")
+        quote.get_data("SH600000", pd.Timestamp("2020-01-10"), pd.Timestamp("2020-01-10"), "$close")
+        self.assertEqual((profiler.quote_calls, profiler.quote_lookups), (1, 1))
+        # the profiler is cleared from the executors by the backtest without profiling
+        self.assertEqual(len(backtest_loop(start_time, end_time, trade_strategy, trade_executor)), 2)
+        for executor in trade_executor.get_all_executors():
+            self.assertIsNone(executor.profiler)
+
+    def test_profiler(self):
+        profiler = BacktestProfiler()
+        profiler.reset(freqs=["1day"])
+        for _ in range(3):
+            with profiler.timeit(0, "execution"):
+                pass
+        with profiler.timeit(0, "total"):
+            pass
+        with self.assertRaises(ValueError):
+            with profiler.timeit(0, "unknown"):
+                pass
+        report = profiler.report()
+        self.assertEqual(report.index.tolist(), [(0, "1day", "total"), (0, "1day", "execution")])
+        self.assertEqual(report["calls"].tolist(), [1, 3])
+        self.assertEqual(report.columns.tolist(), BacktestProfiler.COLUMNS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import qlib
+from qlib.backtest.exchange import Exchange
+from qlib.backtest.high_performance_ds import NumpyQuote, PanelQuote
+from qlib.backtest.quote_cache import QuoteCache
+from qlib.config import C
+
+
+def _dump_data(data_dir: Path, n_inst: int = 5, n_day: int = 30) -> None:
+    """dump the random daily quotes in the qlib format"""
+    rng = np.random.default_rng(0)
+    calendar = pd.bdate_range("2020-01-01", periods=n_day)
+    data_dir.joinpath("calendars").mkdir(parents=True)
+    data_dir.joinpath("instruments").mkdir()
+    pd.Series(calendar.strftime("%Y-%m-%d")).to_csv(data_dir / "calendars/day.txt", index=False, header=False)
+    inst_l = []
+    for i in range(n_inst):
+        inst, start = f"SH60000{i}", i * 3
+        close = 10 * np.cumprod(1 + rng.normal(0, 0.04, n_day))
+        close[rng.random(n_day) < 0.1] = np.nan
+        fields = {
+            "close": close,
+            "open": close * rng.uniform(0.98, 1.02, n_day),
+            "volume": rng.uniform(1e3, 1e5, n_day),
+            "factor": np.full(n_day, 1.0 + i),
+            "change": pd.Series(close).pct_change(fill_method=None).values,
+        }
+        feature_dir = data_dir / "features" / inst.lower()
+        feature_dir.mkdir(parents=True)
+        for name, values in fields.items():
+            np.hstack([start, values[start:]]).astype("<f").tofile(feature_dir / f"{name}.day.bin")
+        inst_l.append((inst, calendar[start].strftime("%Y-%m-%d"), calendar[-1].strftime("%Y-%m-%d")))
+    pd.DataFrame(inst_l).to_csv(data_dir / "instruments/all.txt", sep="\t", index=False, header=False)
+
+
+class TestQuoteCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp_dir = Path(tempfile.mkdtemp())
+        _dump_data(cls.tmp_dir / "data")
+        qlib.init(provider_uri=str(cls.tmp_dir / "data"), region="cn", expression_cache=None, dataset_cache=None)
+        C["quote_cache_path"] = str(cls.tmp_dir / "quote_cache")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.tmp_dir)
+
+    def _get_exchange(self, **kwargs) -> Exchange:
+        kwargs = {"start_time": "2020-01-06", "end_time": "2020-02-07", "limit_threshold": 0.095, **kwargs}
+        return Exchange(deal_price="open", volume_threshold=("current", "0.1 * $volume"), **kwargs)
+
+    def test_exchange(self):
+        exchange = self._get_exchange()
+        cached_exchange = self._get_exchange(quote_cache=True)
+        self.assertEqual(len(list(Path(C["quote_cache_path"]).iterdir())), 1)
+        # attach to the memory-mapped quote
+        attached_exchange = self._get_exchange(quote_cache=True)
+        self.assertIsInstance(attached_exchange.quote.data, np.memmap)
+        self.assertIsNone(attached_exchange._quote_df)
+        self.assertEqual(attached_exchange.trade_w_adj_price, exchange.trade_w_adj_price)
+
+        times = pd.bdate_range("2020-01-06", "2020-02-07")
+        for ex in (cached_exchange, attached_exchange):
+            for stock_id in ["SH600000", "SH600004", "SH600009"]:
+                for time in times:
+                    for field in ["$open", "$close", "limit_buy", "limit_sell", "0.1 * $volume"]:
+                        exp = exchange.quote.get_data(stock_id, time, time, field)
+                        res = ex.quote.get_data(stock_id, time, time, field)
+                        np.testing.assert_equal(res, exp)
+                self.assertEqual(
+                    ex.is_stock_tradable(stock_id, times[0], times[-1]),
+                    exchange.is_stock_tradable(stock_id, times[0], times[-1]),
+                )
+        pd.testing.assert_frame_equal(
+            attached_exchange.quote_df.sort_index(axis=1), exchange.quote_df.sort_index(axis=1)
+        )
+
+        # another quote class is built from the cached quote
+        numpy_exchange = self._get_exchange(quote_cache=True, quote_cls=NumpyQuote)
+        self.assertIsInstance(numpy_exchange.quote, NumpyQuote)
+        # the exchanges of other settings don't share the cache
+        self._get_exchange(quote_cache=True, limit_threshold=0.05)
+        self._get_exchange(quote_cache=True, end_time="2020-02-10")
+        self.assertEqual(len(list(Path(C["quote_cache_path"]).iterdir())), 3)
+
+    def test_dump_load(self):
+        index = pd.MultiIndex.from_product(
+            [["SH600000", "SH600001"], pd.bdate_range("2020-01-01", periods=4)], names=["instrument", "datetime"]
+        )
+        df = pd.DataFrame(
+            {"$close": np.arange(8, dtype=np.float32), "limit_buy": np.arange(8) % 3 == 0}, index=index
+        ).iloc[1:]
+        cache = QuoteCache(self.tmp_dir / "dump_load")
+        self.assertIsNone(cache.load("key", freq="day"))
+        cache.dump("key", PanelQuote(df, "day"), info={"a": 1})
+        self.assertTrue(cache.exists("key"))
+        quote, info = cache.load("key", freq="day")
+        self.assertEqual(info, {"a": 1})
+        pd.testing.assert_frame_equal(quote.to_frame(), df)
+        self.assertEqual(quote.get_data("SH600001", index[5][1], index[5][1], "$close"), 5.0)
+        self.assertIsNone(quote.get_data("SH600000", index[0][1], index[0][1], "$close"))
+
+
+if __name__ == "__main__":
+    unittest.main()
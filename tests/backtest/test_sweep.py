@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import qlib
+from qlib.backtest import analyze_portfolio, backtest, backtest_sweep
+
+START_TIME, END_TIME = "2020-01-10", "2020-03-31"
+
+
+def _dump_data(data_dir: Path, n_inst: int = 20, n_day: int = 70) -> pd.Index:
+    """dump the random daily quotes in the qlib format"""
+    rng = np.random.default_rng(0)
+    calendar = pd.bdate_range("2020-01-01", periods=n_day)
+    data_dir.joinpath("calendars").mkdir(parents=True)
+    data_dir.joinpath("instruments").mkdir()
+    pd.Series(calendar.strftime("%Y-%m-%d")).to_csv(data_dir / "calendars/day.txt", index=False, header=False)
+    instruments = pd.Index([f"SH6000{i:02d}" for i in range(n_inst)])
+    inst_l = []
+    for inst in instruments:
+        close = 10 * np.cumprod(1 + rng.normal(0, 0.03, n_day))
+        fields = {
+            "close": close,
+            "open": close * rng.uniform(0.98, 1.02, n_day),
+            "volume": rng.uniform(1e4, 1e6, n_day),
+            "factor": np.ones(n_day),
+            "change": pd.Series(close).pct_change(fill_method=None).values,
+        }
+        feature_dir = data_dir / "features" / inst.lower()
+        feature_dir.mkdir(parents=True)
+        for name, values in fields.items():
+            np.hstack([0, values]).astype("<f").tofile(feature_dir / f"{name}.day.bin")
+        inst_l.append((inst, calendar[0].strftime("%Y-%m-%d"), calendar[-1].strftime("%Y-%m-%d")))
+    pd.DataFrame(inst_l).to_csv(data_dir / "instruments/all.txt", sep="\t", index=False, header=False)
+    return instruments
+
+
+class TestBacktestSweep(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.data_dir = Path(tempfile.mkdtemp())
+        instruments = _dump_data(cls.data_dir)
+        qlib.init(provider_uri=str(cls.data_dir), region="cn", kernels=1, expression_cache=None, dataset_cache=None)
+        calendar = pd.DatetimeIndex(qlib.data.D.calendar())
+        index = pd.MultiIndex.from_product([calendar, instruments], names=["datetime", "instrument"])
+        rng = np.random.default_rng(1)
+        cls.score = pd.Series(rng.normal(size=len(index)), index=index)
+        cls.benchmark = pd.Series(rng.normal(0, 0.01, len(calendar)), index=calendar)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.data_dir)
+
+    def test_sweep(self):
+        strategy_configs = {
+            f"topk{topk}_drop{n_drop}": {
+                "class": "TopkDropoutStrategy",
+                "module_path": "qlib.contrib.strategy.signal_strategy",
+                "kwargs": {"signal": self.score, "topk": topk, "n_drop": n_drop},
+            }
+            for topk, n_drop in [(5, 1), (5, 2), (8, 3)]
+        }
+        executor_config = {
+            "class": "SimulatorExecutor",
+            "module_path": "qlib.backtest.executor",
+            "kwargs": {"time_per_step": "day", "generate_portfolio_metrics": True},
+        }
+        exchange_kwargs = {"codes": "all", "deal_price": "open", "limit_threshold": 0.095}
+        kwargs = {"start_time": START_TIME, "end_time": END_TIME, "benchmark": self.benchmark, "account": 1e7}
+
+        res = backtest_sweep(strategy_configs, executor_config, exchange_kwargs, n_jobs=2, **kwargs)
+        self.assertEqual(list(res.index), list(strategy_configs))
+        self.assertEqual(
+            res.columns.get_level_values(0).unique().tolist(), ["excess_return_without_cost", "excess_return_with_cost"]
+        )
+        self.assertEqual(res[("excess_return_with_cost", "annualized_return")].nunique(), len(strategy_configs))
+
+        pd.testing.assert_frame_equal(
+            backtest_sweep(strategy_configs, executor_config, exchange_kwargs, n_jobs=1, **kwargs), res
+        )
+        portfolio_dict, _ = backtest(
+            strategy=strategy_configs["topk8_drop3"],
+            executor=executor_config,
+            exchange_kwargs=exchange_kwargs,
+            **kwargs,
+        )
+        pd.testing.assert_series_equal(analyze_portfolio(portfolio_dict), res.loc["topk8_drop3"], check_names=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,252 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+import qlib
+from qlib.backtest import backtest, get_exchange
+from qlib.backtest.vectorized import (
+    MatrixExchange,
+    SoftTopkPolicy,
+    TopkDropoutPolicy,
+    WeightPolicy,
+    backtest_vectorized,
+)
+from qlib.contrib.strategy.cost_control import SoftTopkStrategy
+from qlib.contrib.strategy.order_generator import OrderGenWInteract, OrderGenWOInteract
+from qlib.contrib.strategy.signal_strategy import WeightStrategyBase
+
+START_TIME, END_TIME = "2020-01-10", "2020-04-30"
+
+
+class FixedWeightStrategy(WeightStrategyBase):
+    """Hold the weights given by the signal"""
+
+    def generate_target_weight_position(self, score, current, trade_start_time, trade_end_time):
+        return score.dropna().to_dict()
+
+
+class SoftTopkWeightStrategy(WeightStrategyBase):
+    """`SoftTopkStrategy` with the signal of `WeightStrategyBase`"""
+
+    def __init__(self, *, topk, max_sold_weight=1.0, buy_method="first_fill", **kwargs):
+        super().__init__(**kwargs)
+        self.topk = topk
+        self.max_sold_weight = max_sold_weight
+        self.buy_method = buy_method
+
+    generate_target_weight_position = SoftTopkStrategy.generate_target_weight_position
+
+
+def _dump_data(data_dir: Path, n_inst: int = 30, n_day: int = 90) -> Tuple[pd.Index, pd.Index]:
+    """
+    dump the random quotes in the qlib format and return the instruments and those always listed and not suspended
+    """
+    rng = np.random.default_rng(0)
+    calendar = pd.bdate_range("2020-01-01", periods=n_day)
+    data_dir.joinpath("calendars").mkdir(parents=True)
+    data_dir.joinpath("instruments").mkdir()
+    pd.Series(calendar.strftime("%Y-%m-%d")).to_csv(data_dir / "calendars/day.txt", index=False, header=False)
+
+    instruments = pd.Index([f"SH6000{i:02d}" for i in range(n_inst)])
+    stable = np.arange(n_inst) % 3 != 0
+    inst_l = []
+    for i, inst in enumerate(instruments):
+        start, end, suspended = 0, n_day, np.zeros(n_day, dtype=bool)
+        if not stable[i]:
+            # listed later, delisted earlier or suspended
+            start = int(rng.integers(0, 30))
+            end = int(rng.integers(60, n_day + 1))
+            suspended = rng.random(n_day) < 0.05
+        ret = rng.normal(0.0, 0.03, n_day)
+        # hit the price limits
+        ret[rng.random(n_day) < 0.05] = rng.choice([-0.1, 0.1])
+        close = 10 * rng.uniform(0.5, 2) * np.cumprod(1 + ret)
+        open_ = close / (1 + ret) * (1 + rng.normal(0, 0.01, n_day))
+        vwap = (open_ + close) / 2
+        volume = rng.uniform(1e3, 1e6, n_day)
+        factor = np.full(n_day, rng.uniform(1, 3))
+        fields = {"close": close, "open": open_, "vwap": vwap, "volume": volume, "factor": factor}
+        for name in ("close", "open", "vwap", "volume"):
+            fields[name] = np.where(suspended, np.nan, fields[name])
+        fields["change"] = pd.Series(fields["close"]).pct_change(fill_method=None).values
+        # the prices are adjusted
+        for name in ("close", "open", "vwap"):
+            fields[name] = fields[name] * factor
+
+        feature_dir = data_dir / "features" / inst.lower()
+        feature_dir.mkdir(parents=True)
+        for name, values in fields.items():
+            np.hstack([start, values[start:end]]).astype("<f").tofile(feature_dir / f"{name}.day.bin")
+        inst_l.append((inst, calendar[start].strftime("%Y-%m-%d"), calendar[end - 1].strftime("%Y-%m-%d")))
+    pd.DataFrame(inst_l).to_csv(data_dir / "instruments/all.txt", sep="\t", index=False, header=False)
+    return instruments, instruments[stable]
+
+
+class TestVectorizedBacktest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.data_dir = Path(tempfile.mkdtemp())
+        cls.instruments, stable = _dump_data(cls.data_dir)
+        qlib.init(provider_uri=str(cls.data_dir), region="cn", kernels=1, expression_cache=None, dataset_cache=None)
+        cls.calendar = pd.DatetimeIndex(qlib.data.D.calendar())
+        index = pd.MultiIndex.from_product([cls.calendar, cls.instruments], names=["datetime", "instrument"])
+        rng = np.random.default_rng(1)
+        score = pd.Series(rng.normal(size=len(index)), index=index)
+        # some stocks are missing in the signal
+        cls.score = score[rng.random(len(index)) > 0.1]
+        # the value of the position is NaN with the suspended stocks when the orders are generated interactively
+        cls.stable_score = cls.score[cls.score.index.get_level_values("instrument").isin(stable)]
+        weight = pd.Series(np.where(rng.random(len(index)) < 0.5, rng.random(len(index)), np.nan), index=index)
+        weight = weight[weight.index.get_level_values("instrument").isin(stable)]
+        cls.weight = (weight / weight.groupby(level="datetime").transform("sum")).dropna()
+        cls.benchmark = pd.Series(rng.normal(0, 0.01, len(cls.calendar)), index=cls.calendar)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.data_dir)
+
+    def _get_exchange(self, **kwargs):
+        kwargs = {"deal_price": "open", "limit_threshold": 0.095, "trade_unit": 100, **kwargs}
+        return get_exchange(start_time=START_TIME, end_time=END_TIME, codes="all", **kwargs)
+
+    def _backtest(self, strategy: dict, exchange, pos_type: str = "Position"):
+        executor = {
+            "class": "SimulatorExecutor",
+            "module_path": "qlib.backtest.executor",
+            "kwargs": {"time_per_step": "day", "generate_portfolio_metrics": True},
+        }
+        return backtest(
+            start_time=START_TIME,
+            end_time=END_TIME,
+            strategy=strategy,
+            executor=executor,
+            benchmark=self.benchmark,
+            account=1e7,
+            exchange_kwargs={"exchange": exchange},
+            pos_type=pos_type,
+        )
+
+    def _check_parity(self, strategy: dict, policy, **exchange_kwargs):
+        exchange = self._get_exchange(**exchange_kwargs)
+        portfolio_dict, indicator_dict = self._backtest(strategy, exchange)
+        vec_portfolio_dict, vec_indicator_dict = backtest_vectorized(
+            policy,
+            MatrixExchange.from_exchange(exchange),
+            start_time=START_TIME,
+            end_time=END_TIME,
+            account=1e7,
+            benchmark=self.benchmark,
+        )
+        self.assertEqual(list(vec_portfolio_dict), ["1day"])
+        report, positions = portfolio_dict["1day"]
+        vec_report, vec_positions = vec_portfolio_dict["1day"]
+        # make sure that the strategy trades
+        self.assertGreater(report["turnover"].astype(bool).sum(), len(report) // 2)
+        pd.testing.assert_frame_equal(vec_report, report, rtol=1e-7, check_dtype=False)
+
+        self.assertEqual(list(vec_positions), list(positions))
+        for date, pos in positions.items():
+            vec_pos = vec_positions[date]
+            self.assertEqual(sorted(vec_pos.get_stock_list()), sorted(pos.get_stock_list()), date)
+            self.assertAlmostEqual(vec_pos.get_cash(), pos.get_cash(), delta=1e-4)
+            for stock in pos.get_stock_list():
+                self.assertAlmostEqual(vec_pos.get_stock_amount(stock), pos.get_stock_amount(stock), delta=1e-6)
+                self.assertEqual(vec_pos.get_stock_count(stock, "day"), pos.get_stock_count(stock, "day"))
+                self.assertAlmostEqual(vec_pos.position[stock]["weight"], pos.position[stock]["weight"], delta=1e-9)
+
+        indicator = indicator_dict["1day"][0]
+        vec_indicator = vec_indicator_dict["1day"][0]
+        pd.testing.assert_frame_equal(vec_indicator, indicator, rtol=1e-7, check_dtype=False)
+
+    def test_topk_dropout(self):
+        strategy = {
+            "class": "TopkDropoutStrategy",
+            "module_path": "qlib.contrib.strategy.signal_strategy",
+            "kwargs": {"signal": self.score, "topk": 8, "n_drop": 3},
+        }
+        self._check_parity(strategy, TopkDropoutPolicy(self.score, topk=8, n_drop=3))
+
+    def test_topk_dropout_only_tradable(self):
+        kwargs = {"topk": 6, "n_drop": 2, "hold_thresh": 2, "only_tradable": True, "forbid_all_trade_at_limit": False}
+        strategy = {
+            "class": "TopkDropoutStrategy",
+            "module_path": "qlib.contrib.strategy.signal_strategy",
+            "kwargs": {"signal": self.score, **kwargs},
+        }
+        self._check_parity(
+            strategy,
+            TopkDropoutPolicy(self.score, **kwargs),
+            deal_price="vwap",
+            volume_threshold={"buy": ("current", "0.001 * $volume"), "sell": ("cum", "0.002 * $volume")},
+            impact_cost=0.1,
+            min_cost=100,
+        )
+
+    def test_weight(self):
+        for order_generator, interact in ((OrderGenWOInteract, False), (OrderGenWInteract, True)):
+            strategy = {
+                "class": "FixedWeightStrategy",
+                "module_path": __name__,
+                "kwargs": {
+                    "signal": self.weight,
+                    "order_generator_cls_or_obj": order_generator,
+                },
+            }
+            self._check_parity(strategy, WeightPolicy(self.weight, interact=interact))
+
+    def test_soft_topk(self):
+        strategy = {
+            "class": "SoftTopkWeightStrategy",
+            "module_path": __name__,
+            "kwargs": {
+                "signal": self.stable_score,
+                "topk": 8,
+                "max_sold_weight": 0.05,
+                "buy_method": "average_fill",
+                "order_generator_cls_or_obj": OrderGenWInteract,
+            },
+        }
+        self._check_parity(
+            strategy, SoftTopkPolicy(self.stable_score, topk=8, max_sold_weight=0.05, buy_method="average_fill")
+        )
+
+    def test_array_position(self):
+        # the backtest engine gets the same results with the array-backed position
+        strategy = {
+            "class": "TopkDropoutStrategy",
+            "module_path": "qlib.contrib.strategy.signal_strategy",
+            "kwargs": {"signal": self.score, "topk": 8, "n_drop": 3, "hold_thresh": 2},
+        }
+        exchange = self._get_exchange()
+        report, positions = self._backtest(strategy, exchange)[0]["1day"]
+        array_report, array_positions = self._backtest(strategy, exchange, pos_type="ArrayPosition")[0]["1day"]
+        pd.testing.assert_frame_equal(array_report, report, rtol=1e-9)
+        for date, pos in positions.items():
+            array_pos = array_positions[date]
+            self.assertEqual(sorted(array_pos.get_stock_list()), sorted(pos.get_stock_list()), date)
+            self.assertEqual(array_pos.get_stock_weight_dict().keys(), pos.get_stock_weight_dict().keys())
+            for stock in pos.get_stock_list():
+                self.assertAlmostEqual(array_pos.get_stock_amount(stock), pos.get_stock_amount(stock), delta=1e-6)
+                self.assertEqual(array_pos.get_stock_count(stock, "day"), pos.get_stock_count(stock, "day"))
+
+    def test_matrix_exchange(self):
+        exchange = MatrixExchange.from_exchange(self._get_exchange())
+        # the date before the backtest is included for the signal of the first step
+        self.assertEqual(exchange.dates[0], self.calendar[self.calendar.searchsorted(START_TIME) - 1])
+        self.assertTrue(exchange.suspended[0].all())
+        np.testing.assert_array_equal(exchange.limit_buy, exchange.limit_buy | exchange.suspended)
+        amount = exchange.round_amount_by_trade_unit(np.array([260.0, 99.0]), np.array([2.0, 1.0]))
+        np.testing.assert_allclose(amount, [500 / 2.0, 0.0])
+        # the instruments out of the quote are suspended
+        exchange = exchange.reindex(pd.Index(["SH600000", "SZ000001"]))
+        self.assertTrue(exchange.suspended[:, 1].all())
+        self.assertFalse(exchange.is_tradable(1)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
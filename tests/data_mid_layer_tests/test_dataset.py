@@ -146,6 +146,34 @@ class TestTSDataSampler(unittest.TestCase):
         self.assertEqual(dataset[0][1], dataset[1][0])
         self.assertEqual(dataset[0][2], dataset[1][1])
 
+    def test_TSDataSampler_batch(self):
+        """
+        The vectorized batch sampling should be the same as sampling one by one
+        """
+        datetime_list = pd.date_range("2000-01-01", periods=20)
+        instruments = [f"00000{i}" for i in range(6)]
+        index = pd.MultiIndex.from_product([datetime_list, instruments], names=["datetime", "instrument"])
+        rng = np.random.default_rng(0)
+        test_df = pd.DataFrame(data=rng.normal(size=(len(index), 3)), index=index, columns=["f0", "f1", "f2"])
+        # some instruments are missing on some days
+        test_df = test_df.iloc[rng.random(len(test_df)) > 0.3]
+        flt_data = pd.Series(rng.random(len(test_df)) > 0.2, index=test_df.index)
+        for fillna_type in ("none", "ffill", "ffill+bfill"):
+            for flt in (None, flt_data):
+                dataset = TSDataSampler(
+                    test_df, datetime_list[3], datetime_list[-1], step_len=5, fillna_type=fillna_type, flt_data=flt
+                )
+                with self.subTest(fillna_type=fillna_type, flt=flt is not None):
+                    idx = rng.permutation(len(dataset))
+                    expected = np.stack([dataset[i] for i in idx])
+                    np.testing.assert_array_equal(dataset[idx], expected)
+                    np.testing.assert_array_equal(dataset[idx.tolist()], expected)
+                    out = np.empty_like(expected)
+                    self.assertIs(dataset.get_batch(idx, out=out), out)
+                    np.testing.assert_array_equal(out, expected)
+                    with self.assertRaises(KeyError):
+                        dataset[[0, len(dataset)]]
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=10)
@@ -0,0 +1,105 @@
+import copy
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.backtest.decision import Order, OrderDir
+from qlib.backtest.position import ArrayPosition, Position
+
+
+def _order(stock_id: str, direction: OrderDir) -> Order:
+    return Order(stock_id, 0, direction, pd.Timestamp("2020-01-02"), pd.Timestamp("2020-01-02"))
+
+
+class TestArrayPosition(unittest.TestCase):
+    def _check_same(self, array_pos: ArrayPosition, pos: Position):
+        self.assertEqual(sorted(array_pos.get_stock_list()), sorted(pos.get_stock_list()))
+        self.assertAlmostEqual(array_pos.get_cash(), pos.get_cash())
+        self.assertAlmostEqual(array_pos.get_cash(include_settle=True), pos.get_cash(include_settle=True))
+        self.assertAlmostEqual(array_pos.calculate_value(), pos.calculate_value(), delta=1e-6)
+        for stock in pos.get_stock_list():
+            self.assertTrue(array_pos.check_stock(stock))
+            self.assertAlmostEqual(array_pos.get_stock_amount(stock), pos.get_stock_amount(stock))
+            self.assertAlmostEqual(array_pos.get_stock_price(stock), pos.get_stock_price(stock))
+            # the weight of the initial stocks of `Position` is set at the end of the first bar
+            if "weight" in pos.position[stock]:
+                self.assertAlmostEqual(array_pos.get_stock_weight(stock), pos.get_stock_weight(stock))
+            self.assertEqual(array_pos.get_stock_count(stock, "day"), pos.get_stock_count(stock, "day"))
+        for only_stock in (True, False):
+            exp = pos.get_stock_weight_dict(only_stock=only_stock)
+            res = array_pos.get_stock_weight_dict(only_stock=only_stock)
+            self.assertEqual(res.keys(), exp.keys())
+            np.testing.assert_allclose([res[k] for k in exp], list(exp.values()))
+        self.assertEqual(array_pos.position.keys(), pos.position.keys())
+
+    def test_trading(self):
+        rng = np.random.default_rng(0)
+        stocks = [f"SH6000{i:02d}" for i in range(100)]
+        init = {"SH600000": {"amount": 100.0, "price": 10.0}, "SH600001": 200}
+        pos = Position(cash=1e6, position_dict=init)
+        array_pos = ArrayPosition(cash=1e6, position_dict=init)
+        self.assertNotIn("now_account_value", array_pos.position)
+        array_pos.update_stock_price("SH600001", 5.0)
+        pos.update_stock_price("SH600001", 5.0)
+
+        hist = []
+        for step in range(50):
+            settle = step % 2 == 0
+            if settle:
+                pos.settle_start(Position.ST_CASH)
+                array_pos.settle_start(Position.ST_CASH)
+            for stock in rng.choice(stocks, 10, replace=False):
+                price = rng.uniform(5, 15)
+                if pos.check_stock(stock) and rng.random() < 0.6:
+                    # sell all or a part of the stock
+                    amount = pos.get_stock_amount(stock) * (1.0 if rng.random() < 0.5 else 0.5)
+                    args = (_order(stock, OrderDir.SELL), amount * price, 5.0, price)
+                elif pos.get_cash() > 1e4:
+                    args = (_order(stock, OrderDir.BUY), 1e4 - 5.0, 5.0, price)
+                else:
+                    continue
+                pos.update_order(*args)
+                array_pos.update_order(*args)
+            if settle:
+                self._check_same(array_pos, pos)
+                pos.settle_commit()
+                array_pos.settle_commit()
+            for stock in pos.get_stock_list():
+                price = pos.get_stock_price(stock) * rng.uniform(0.9, 1.1)
+                pos.update_stock_price(stock, price)
+                array_pos.update_stock_price(stock, price)
+            pos.add_count_all("day")
+            array_pos.add_count_all("day")
+            for p in (pos, array_pos):
+                p.update_account_value(p.calculate_value())
+                p.update_weight_all()
+            self._check_same(array_pos, pos)
+            hist.append((array_pos.snapshot(), copy.deepcopy(pos)))
+
+        # the snapshots are compact and not changed by the following trading
+        self.assertLessEqual(len(array_pos.instruments), len(stocks))
+        for array_snap, snap in hist:
+            self.assertEqual(len(array_snap.instruments), len(snap.get_stock_list()))
+            self._check_same(array_snap, snap)
+            self.assertAlmostEqual(array_snap.position["now_account_value"], array_snap.calculate_value(), delta=1e-6)
+
+        # initialize the position from the dict of another position
+        self._check_same(ArrayPosition(cash=pos.get_cash(), position_dict=array_pos.position), pos)
+
+    def test_error(self):
+        pos = ArrayPosition(cash=1e4)
+        pos.update_order(_order("SH600000", OrderDir.BUY), 1000, 0, 10)
+        with self.assertRaises(ValueError):
+            copy.deepcopy(pos).update_order(_order("SH600000", OrderDir.SELL), 2000, 0, 10)
+        pos.update_order(_order("SH600000", OrderDir.SELL), 1000, 0, 10)
+        self.assertFalse(pos.check_stock("SH600000"))
+        self.assertEqual(pos.get_stock_amount("SH600000"), 0)
+        with self.assertRaises(KeyError):
+            pos.get_stock_price("SH600000")
+        with self.assertRaises(KeyError):
+            pos.update_order(_order("SH600001", OrderDir.SELL), 1000, 0, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset.handler import DataHandler, DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+from qlib.data.dataset.storage import DatetimeBlockStorage
+from qlib.data.dataset.utils import fetch_df_by_col, fetch_df_by_index
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", periods=20, freq="B")
+    insts = [f"SH60000{i}" for i in range(6)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("label", "LABEL0"), ("feature", "f1"), ("feature", "f2")])
+    df = pd.DataFrame(rng.normal(size=(len(index), 4)).astype(np.float32), index=index, columns=columns)
+    # missing instruments on some days
+    return df.iloc[rng.permutation(len(df))[: len(df) - 15]]
+
+
+class TestDatetimeBlockStorage(unittest.TestCase):
+    def setUp(self):
+        self.df = _gen_df()
+        self.storage = DatetimeBlockStorage(self.df)
+        # the columns of a group are put together
+        self.assertEqual(self.storage.group_slc, {"feature": slice(0, 3), "label": slice(3, 4)})
+        self.sorted_df = self.df.sort_index().loc[:, self.storage.columns]
+
+    def _expected(self, selector, level="datetime", col_set=DataHandler.CS_ALL):
+        return fetch_df_by_index(fetch_df_by_col(self.sorted_df, col_set), selector, level)
+
+    def test_fetch(self):
+        cases = [
+            (slice(None, None), DataHandler.CS_ALL),
+            (slice("2020-01-06", "2020-01-15"), DataHandler.CS_ALL),
+            (slice("2020-01-04", None), "feature"),
+            (slice(None, "2020-01-10"), "label"),
+            (slice("2020-01-06", "2020-01-15"), DataHandler.CS_RAW),
+            (slice("2020-03-01", None), "feature"),
+            (pd.Timestamp("2020-01-07"), ["label", "feature"]),
+        ]
+        for selector, col_set in cases:
+            with self.subTest(selector=selector, col_set=col_set):
+                res = self.storage.fetch(selector, col_set=col_set)
+                expected = self._expected(selector, col_set=col_set)
+                if isinstance(col_set, list):
+                    expected = expected.loc[:, self.storage._get_col_slc(col_set)[1]]
+                pd.testing.assert_frame_equal(res, expected, check_index_type=False, check_column_type=False)
+
+    def test_fallback(self):
+        res = self.storage.fetch((slice("2020-01-06", "2020-01-15"), "SH600001"), level=None)
+        pd.testing.assert_frame_equal(
+            res,
+            self._expected((slice("2020-01-06", "2020-01-15"), "SH600001"), level=None),
+            check_index_type=False,
+        )
+        res = self.storage.fetch("SH600001", level="instrument", col_set="feature")
+        pd.testing.assert_frame_equal(res, self._expected("SH600001", level="instrument", col_set="feature"))
+        with self.assertRaises(KeyError):
+            self.storage.fetch("2020-01-04")
+
+    def test_zero_copy(self):
+        self.assertEqual(self.storage.block.dtype, np.float32)
+        for col_set in (DataHandler.CS_ALL, "feature", "label"):
+            res = self.storage.fetch(slice("2020-01-06", "2020-01-15"), col_set=col_set)
+            self.assertTrue(np.shares_memory(res.values, self.storage.block))
+        res = self.storage.fetch(slice("2020-01-06", "2020-01-15"), fetch_orig=False)
+        self.assertFalse(np.shares_memory(res.values, self.storage.block))
+
+    def test_handler(self):
+        dh = DataHandlerLP(
+            data_loader=StaticDataLoader(self.df),
+            infer_processors=[{"class": "Fillna", "kwargs": {"fields_group": "feature"}}, "DatetimeBlockFormat"],
+        )
+        self.assertIsInstance(dh._infer, DatetimeBlockStorage)
+        pd.testing.assert_frame_equal(
+            dh.fetch(slice("2020-01-06", "2020-01-15"), col_set="feature"),
+            DataHandlerLP.from_df(self.df).fetch(slice("2020-01-06", "2020-01-15"), col_set="feature"),
+            check_index_type=False,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qlib.cli.cache import CacheCLI
+from qlib.cli.run import load_config
+from qlib.utils import can_use_cache
+
+
+def _dump_data(data_dir: Path, n_day: int, n_inst: int = 3) -> None:
+    """dump the daily quotes of the first `n_day` days in the qlib format"""
+    calendar = pd.bdate_range("2020-01-01", periods=n_day)
+    data_dir.joinpath("calendars").mkdir(parents=True, exist_ok=True)
+    data_dir.joinpath("instruments").mkdir(exist_ok=True)
+    pd.Series(calendar.strftime("%Y-%m-%d")).to_csv(data_dir / "calendars/day.txt", index=False, header=False)
+    inst_l = []
+    for i in range(n_inst):
+        inst = f"SH60000{i}"
+        feature_dir = data_dir / "features" / inst.lower()
+        feature_dir.mkdir(parents=True, exist_ok=True)
+        np.hstack([0, np.arange(n_day) + 10.0 * i]).astype("<f").tofile(feature_dir / "close.day.bin")
+        inst_l.append((inst, calendar[0].strftime("%Y-%m-%d"), "2099-12-31"))
+    pd.DataFrame(inst_l).to_csv(data_dir / "instruments/all.txt", sep="\t", index=False, header=False)
+
+
+class TestLoadConfig(unittest.TestCase):
+    def test_base_config(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            tmp_dir.joinpath("base.yaml").write_text(
+                "qlib_init:\n  region: cn\ntask:\n  model:\n    class: LGBModel\n    kwargs:\n      loss: mse\n"
+            )
+            tmp_dir.joinpath("workflow.yaml").write_text(
+                "BASE_CONFIG_PATH: base.yaml\ntask:\n  model:\n    kwargs:\n      num_leaves: 64\n"
+            )
+            config = load_config(str(tmp_dir / "workflow.yaml"))
+            self.assertEqual(config["qlib_init"], {"region": "cn"})
+            self.assertEqual(config["task"]["model"]["class"], "LGBModel")
+            self.assertEqual(config["task"]["model"]["kwargs"], {"loss": "mse", "num_leaves": 64})
+
+            tmp_dir.joinpath("missing.yaml").write_text("BASE_CONFIG_PATH: not_exist.yaml\n")
+            with self.assertRaises(FileNotFoundError):
+                load_config(str(tmp_dir / "missing.yaml"))
+
+
+class TestWarm(unittest.TestCase):
+    def test_no_handler(self):
+        with self.assertRaises(ValueError):
+            CacheCLI().warm()
+
+    @unittest.skipUnless(can_use_cache(), "the disk caches require redis")
+    def test_warm(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = Path(tmp_dir)
+            _dump_data(data_dir, n_day=20)
+            handler = {
+                "class": "DataHandler",
+                "module_path": "qlib.data.dataset.handler",
+                "kwargs": {
+                    "instruments": "all",
+                    "start_time": "2020-01-01",
+                    "data_loader": {
+                        "class": "QlibDataLoader",
+                        "kwargs": {"config": {"feature": ["$close", "Ref($close, 1)"], "label": ["Ref($close, -1)"]}},
+                    },
+                },
+            }
+            cli = CacheCLI(provider_uri=str(data_dir), qlib_init={"kernels": 1})
+            first_report = report = pd.DataFrame(cli.warm(handler=handler))
+            self.assertEqual(report["group"].tolist(), ["feature", "feature", "label", "label"])
+            self.assertEqual(report["stage"].tolist(), ["expression", "dataset"] * 2)
+            self.assertEqual(report["fields"].tolist(), [2, 2, 1, 1])
+            self.assertTrue((report["bytes"] > 0).all())
+            # only the visiting info of the meta files is written if the caches exist
+            report = pd.DataFrame(cli.warm(handler=handler))
+            self.assertTrue((report["bytes"] < first_report["bytes"] // 2).all())
+
+            # the newly added days are appended to the existing caches
+            _dump_data(data_dir, n_day=30)
+            report = pd.DataFrame(cli.warm(handler=handler, incremental=True)).set_index(["group", "stage"])
+            self.assertEqual(
+                report.loc["feature"].index.tolist(), ["expression_top_up", "expression", "dataset_top_up", "dataset"]
+            )
+            self.assertGreater(report.loc[("feature", "expression_top_up"), "bytes"], 0)
+            self.assertLess(
+                report.loc[("feature", "expression"), "bytes"], report.loc[("feature", "expression_top_up"), "bytes"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset.processor import CSRankNorm, CSZFillna, CSZScoreNorm
+from qlib.utils.data import cs_rank_pct, cs_robust_zscore, robust_zscore, zscore
+
+
+def gen_panel(n_days=30, n_insts=50, n_features=8, dtype=np.float32, seed=0):
+    """synthetic panel with missing instruments, nan, ties and constant cross sections"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=n_days)
+    insts = [f"SH{600000 + i}" for i in range(n_insts)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    values = rng.normal(size=(len(index), n_features))
+    values[:, 1] = np.round(values[:, 1])  # ties
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:n_insts, 2] = 1.0  # constant cross section
+    values[n_insts : 2 * n_insts, 3] = np.nan  # all-nan cross section
+    columns = pd.MultiIndex.from_tuples([("feature", f"f{i}") for i in range(n_features - 1)] + [("label", "LABEL0")])
+    df = pd.DataFrame(values.astype(dtype), index=index, columns=columns)
+    # the cross sections have different sizes
+    return df[rng.random(len(df)) > 0.2]
+
+
+def groupby_zscore(df, cols, func):
+    df[cols] = df[cols].groupby("datetime", group_keys=False).apply(func)
+    return df
+
+
+def groupby_rank(df, cols):
+    t = df[cols].groupby("datetime", group_keys=False).rank(pct=True)
+    t -= 0.5
+    t *= 3.46
+    df[cols] = t
+    return df
+
+
+def groupby_fillna(df, cols):
+    df[cols] = df[cols].groupby("datetime", group_keys=False).apply(lambda x: x.fillna(x.mean()))
+    return df
+
+
+class TestCSProcessor(unittest.TestCase):
+    def assert_df_equal(self, df, expected):
+        self.assertEqual(df.dtypes.tolist(), expected.dtypes.tolist())
+        rtol = 1e-5 if (df.dtypes == np.float32).any() else 1e-10
+        np.testing.assert_allclose(df.values, expected.values, rtol=rtol, atol=rtol)
+
+    def test_parity(self):
+        for dtype in (np.float32, np.float64):
+            df = gen_panel(dtype=dtype)
+            cols = df.columns[df.columns.get_loc("feature")]
+            cases = [
+                (CSZScoreNorm(fields_group="feature"), lambda d: groupby_zscore(d, cols, zscore)),
+                (
+                    CSZScoreNorm(fields_group="feature", method="robust"),
+                    lambda d: groupby_zscore(d, cols, robust_zscore),
+                ),
+                (CSRankNorm(fields_group="feature"), lambda d: groupby_rank(d, cols)),
+                (CSZFillna(fields_group="feature"), lambda d: groupby_fillna(d, cols)),
+            ]
+            for proc, expected_func in cases:
+                with self.subTest(proc=proc.__class__.__name__, dtype=dtype):
+                    self.assert_df_equal(proc(df.copy()), expected_func(df.copy()))
+
+    def test_rank_identical(self):
+        df = gen_panel(dtype=np.float64)
+        cols = df.columns[df.columns.get_loc("feature")]
+        res = CSRankNorm(fields_group="feature")(df.copy())
+        pd.testing.assert_frame_equal(res, groupby_rank(df.copy(), cols))
+
+    def test_dense_blocks(self):
+        # the blocks split by the segments and the columns give the same results as a single block
+        df = gen_panel(dtype=np.float64)
+        x = df.values
+        seg_starts = np.flatnonzero(np.r_[True, np.diff(df.index.codes[0]) != 0])
+        for func in (cs_rank_pct, cs_robust_zscore):
+            expected = func(x, seg_starts)
+            for buffer_size in (100, 1000):
+                with self.subTest(func=func.__name__, buffer_size=buffer_size), mock.patch(
+                    "qlib.utils.data.CS_DENSE_BUFFER_SIZE", buffer_size
+                ):
+                    np.testing.assert_array_equal(func(x, seg_starts), expected)
+
+    def test_unsorted(self):
+        # the data is not sorted by datetime, the processors fall back to groupby
+        df = gen_panel().swaplevel().sort_index()
+        cols = df.columns[df.columns.get_loc("feature")]
+        self.assert_df_equal(CSZScoreNorm(fields_group="feature")(df.copy()), groupby_zscore(df.copy(), cols, zscore))
+
+    def test_benchmark(self):
+        # the vectorized processors are faster than the groupby implementations on a larger panel
+        df = gen_panel(n_days=250, n_insts=300, n_features=21)
+        cols = df.columns[df.columns.get_loc("feature")]
+        cases = [
+            ("CSZScoreNorm", CSZScoreNorm(fields_group="feature"), lambda d: groupby_zscore(d, cols, zscore)),
+            (
+                "CSZScoreNorm(robust)",
+                CSZScoreNorm(fields_group="feature", method="robust"),
+                lambda d: groupby_zscore(d, cols, robust_zscore),
+            ),
+            ("CSRankNorm", CSRankNorm(fields_group="feature"), lambda d: groupby_rank(d, cols)),
+            ("CSZFillna", CSZFillna(fields_group="feature"), lambda d: groupby_fillna(d, cols)),
+        ]
+        for name, proc, groupby_func in cases:
+            with self.subTest(proc=name):
+                cost, res = [], []
+                for func in (proc, groupby_func):
+                    # the best of several runs to be robust to the noise of the machine
+                    best = np.inf
+                    for _ in range(3):
+                        data = df.copy()
+                        start = time.perf_counter()
+                        out = func(data)
+                        best = min(best, time.perf_counter() - start)
+                    cost.append(best)
+                    res.append(out)
+                self.assert_df_equal(*res)
+                self.assertLess(cost[0], cost[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
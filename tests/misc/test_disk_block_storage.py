@@ -0,0 +1,155 @@
+import gc
+import tempfile
+import unittest
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from qlib.contrib.model.gbdt import LGBModel
+from qlib.data.dataset import DatasetH
+from qlib.data.dataset.handler import DataHandler, DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+from qlib.data.dataset.storage import DiskBlockStorage
+from qlib.data.dataset.utils import ChunkedArray
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", "2020-04-30", freq="B")
+    insts = [f"SH60000{i}" for i in range(6)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("feature", "f2"), ("label", "LABEL0")])
+    df = pd.DataFrame(rng.normal(size=(len(index), 4)).astype(np.float32), index=index, columns=columns)
+    return df.iloc[rng.permutation(len(df))[: len(df) - 30]]
+
+
+SEGMENTS = {"train": ("2020-01-01", "2020-03-15"), "test": ("2020-03-16", "2020-04-30")}
+
+
+class TestDiskBlockStorage(unittest.TestCase):
+    def setUp(self):
+        self.df = _gen_df()
+        self.sorted_df = self.df.sort_index()
+        self.storage = DiskBlockStorage.from_df(self.df, freq="M")
+
+    def test_fetch(self):
+        self.assertEqual(len(self.storage.parts), 4)
+        self.assertEqual(len(self.storage), len(self.df))
+        selectors = (
+            slice(None),
+            slice("2020-01-10", "2020-03-05"),
+            slice("2020-02-03", "2020-02-20"),
+            # partial strings select their whole periods
+            slice("2020-01", "2020-02"),
+            "2020",
+            "2020-02",
+            "2020-02-03",
+        )
+        for selector in selectors:
+            with self.subTest(selector=selector):
+                for col_set in (DataHandler.CS_ALL, "feature", ["feature", "label"]):
+                    # the same as `fetch_df_by_index`
+                    expected = self.sorted_df.loc[pd.IndexSlice[selector, :], :]
+                    expected = (
+                        expected.droplevel(axis=1, level=0) if col_set == DataHandler.CS_ALL else expected[col_set]
+                    )
+                    pd.testing.assert_frame_equal(
+                        self.storage.fetch(selector, col_set=col_set), expected, check_index_type=False
+                    )
+                    chunks = self.storage.fetch_chunks(selector, col_set=col_set)
+                    pd.testing.assert_frame_equal(pd.concat(chunks), expected, check_index_type=False)
+        with self.assertRaises(KeyError):
+            self.storage.fetch("2020-01-04")
+        pd.testing.assert_frame_equal(
+            self.storage.fetch("SH600001", level="instrument", col_set="feature"),
+            self.sorted_df.xs("SH600001", level="instrument", drop_level=False)["feature"],
+        )
+
+    def test_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = DiskBlockStorage(tmp, freq="M")
+            storage.append(self.sorted_df.iloc[:0])
+            self.assertEqual(len(storage), 0)
+            for col_set in (DataHandler.CS_ALL, "feature"):
+                df = storage.fetch(slice("2020-01-01", "2020-02-01"), col_set=col_set)
+                self.assertTrue(df.empty)
+                expected = self.sorted_df.columns.droplevel(0) if col_set == DataHandler.CS_ALL else ["f0", "f1", "f2"]
+                self.assertListEqual(list(df.columns), list(expected))
+            with self.assertRaises(KeyError):
+                storage.fetch("2020-01-02")
+
+    def test_lazy_chunks(self):
+        chunks = self.storage.fetch_chunks(slice("2020-01-10", "2020-03-05"), col_set=["feature", "label"])
+        self.assertEqual(len(chunks), 3)
+        for chunk, part in zip(chunks, self.storage.parts):
+            self.assertIsInstance(part.block, np.memmap)
+            self.assertTrue(np.shares_memory(chunk.values, part.block))
+        # copy-on-write
+        chunks[0].iloc[0, 0] = 100.0
+        self.assertNotEqual(self.storage.fetch(col_set="feature").iloc[0, 0], 100.0)
+
+        x = ChunkedArray([chunk.values for chunk in chunks])
+        idx = np.random.default_rng(0).integers(0, len(x), 100)
+        np.testing.assert_array_equal(x[idx], np.concatenate([chunk.values for chunk in chunks])[idx])
+
+    def test_append(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = DiskBlockStorage(tmp, freq="M")
+            for start, end in (("2020-01-01", "2020-02-10"), ("2020-02-11", "2020-04-30")):
+                storage.append(self.sorted_df.loc[start:end])
+            with self.assertRaises(ValueError):
+                storage.append(self.sorted_df.loc["2020-04-01":"2020-04-30"])
+            # the data on disk could be loaded again
+            pd.testing.assert_frame_equal(DiskBlockStorage(tmp).fetch(), self.storage.fetch(), check_index_type=False)
+
+    def test_cleanup(self):
+        path = self.storage.path
+        self.assertTrue(path.exists())
+        del self.storage
+        gc.collect()
+        self.assertFalse(Path(path).exists())
+
+
+class TestOutOfCoreDataset(unittest.TestCase):
+    def _get_dataset(self, df, out_of_core):
+        fmt = [{"class": "DiskBlockFormat", "kwargs": {"freq": "M"}}] if out_of_core else []
+        handler = DataHandlerLP(
+            data_loader=StaticDataLoader(df),
+            infer_processors=[{"class": "Fillna", "kwargs": {"fields_group": "feature"}}] + fmt,
+            learn_processors=["DropnaLabel"] + fmt,
+            process_type=DataHandlerLP.PTYPE_I,
+            drop_raw=True,
+        )
+        return DatasetH(handler, segments=SEGMENTS)
+
+    def test_prepare_chunks(self):
+        df = _gen_df()
+        ds = self._get_dataset(df, out_of_core=True)
+        ds_ref = self._get_dataset(df, out_of_core=False)
+        self.assertIsInstance(ds.handler._learn, DiskBlockStorage)
+        chunks = ds.prepare_chunks("train", col_set="feature", data_key=DataHandlerLP.DK_L)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(len(ds_ref.prepare_chunks("train", col_set="feature", data_key=DataHandlerLP.DK_L)), 1)
+        for seg in SEGMENTS:
+            pd.testing.assert_frame_equal(
+                pd.concat(ds.prepare_chunks(seg, col_set="feature", data_key=DataHandlerLP.DK_L)),
+                ds_ref.prepare(seg, col_set="feature", data_key=DataHandlerLP.DK_L),
+                check_index_type=False,
+            )
+
+    def test_lgb(self):
+        df = _gen_df()
+        preds = []
+        for out_of_core in (True, False):
+            ds = self._get_dataset(df, out_of_core)
+            model = LGBModel(num_leaves=4, min_data_in_leaf=5, seed=0, num_threads=1)
+            dtrain, _ = model._prepare_data(ds)[0]
+            model.model = lgb.train(model.params, dtrain, num_boost_round=10)
+            preds.append(model.predict(ds))
+        pd.testing.assert_series_equal(preds[0], preds[1], check_index_type=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
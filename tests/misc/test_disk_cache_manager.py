@@ -0,0 +1,66 @@
+import pickle
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from qlib.data.cache import DiskCacheManager
+
+
+class TestDiskCacheManager(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _gen_entry(self, name, size, last_visit, visits):
+        cache_path = self.cache_dir.joinpath("sh600000", name)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(b"0" * size)
+        with cache_path.with_suffix(".meta").open("wb") as f:
+            pickle.dump({"info": {}, "meta": {"last_visit": str(last_visit), "visits": visits}}, f)
+        return cache_path
+
+    def test_lru(self):
+        now = time.time()
+        old = self._gen_entry("old", 1000, now - 100, 10)
+        mid = self._gen_entry("mid", 1000, now - 50, 1)
+        new = self._gen_entry("new", 1000, now, 1)
+        manager = DiskCacheManager(self.cache_dir, "test-", size_limit=2500)
+        self.assertEqual(len(manager), 3)
+        self.assertEqual(manager.evict(dry_run=True), [old])
+        self.assertTrue(old.exists())
+
+        self.assertEqual(manager.evict(), [old])
+        self.assertFalse(old.exists() or old.with_suffix(".meta").exists())
+        self.assertTrue(mid.exists() and new.exists())
+        self.assertLessEqual(manager.total_size, 2500)
+
+        # a visit makes the entry the most recent one
+        manager.touch(mid)
+        newest = self._gen_entry("newest", 1000, time.time() + 1, 1)
+        manager.record(newest)
+        self.assertEqual(manager.evict(protect=[newest]), [new])
+
+    def test_lfu(self):
+        now = time.time()
+        popular = self._gen_entry("popular", 1000, now - 100, 10)
+        rare = self._gen_entry("rare", 1000, now, 1)
+        manager = DiskCacheManager(self.cache_dir, "test-", size_limit=1500, policy="lfu")
+        self.assertEqual(manager.evict(), [rare])
+        self.assertTrue(popular.exists())
+        self.assertEqual(manager.stats()["entries"], 1)
+
+    def test_unlimited(self):
+        self._gen_entry("a", 1000, time.time(), 1)
+        manager = DiskCacheManager(self.cache_dir, "test-")
+        self.assertFalse(manager.limited)
+        self.assertEqual(manager.evict(), [])
+        with self.assertRaises(ValueError):
+            DiskCacheManager(self.cache_dir, "test-", policy="fifo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.contrib.model.double_ensemble import DEnsembleModel
+from qlib.data.dataset import DatasetH
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+
+
+def _get_dataset():
+    dates = pd.bdate_range("2020-01-01", "2020-06-30")
+    index = pd.MultiIndex.from_product([dates, [f"SH60000{i}" for i in range(10)]], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(len(index), 6)).astype(np.float32)
+    y = x[:, 0] + x[:, 1] * x[:, 2] + rng.normal(size=len(index))
+    columns = pd.MultiIndex.from_tuples([("feature", f"f{i}") for i in range(6)] + [("label", "LABEL0")])
+    df = pd.DataFrame(np.column_stack([x, y]), index=index, columns=columns)
+    segments = {
+        "train": ("2020-01-01", "2020-04-30"),
+        "valid": ("2020-05-01", "2020-05-31"),
+        "test": ("2020-06-01", "2020-06-30"),
+    }
+    return DatasetH(DataHandlerLP(data_loader=StaticDataLoader(df)), segments=segments)
+
+
+def _get_model(**kwargs):
+    sample_ratios = [0.8, 0.7, 0.6, 0.5, 0.4]
+    return DEnsembleModel(
+        num_models=3, decay=0.5, epochs=20, num_leaves=7, verbosity=-1, seed=0, sample_ratios=sample_ratios, **kwargs
+    )
+
+
+class TestDEnsembleModel(unittest.TestCase):
+    def test_parallel(self):
+        dataset = _get_dataset()
+        res = []
+        for n_workers in (1, 3):
+            np.random.seed(0)
+            model = _get_model(n_workers=n_workers)
+            model.fit(dataset)
+            res.append((model.predict(dataset), [sorted(feat) for feat in model.sub_features]))
+        pd.testing.assert_series_equal(res[0][0], res[1][0])
+        self.assertEqual(res[0][1], res[1][1])
+
+    def test_loss_curve(self):
+        dataset = _get_dataset()
+        model = _get_model()
+        df_train = dataset.prepare("train", col_set=["feature", "label"], data_key=DataHandlerLP.DK_L)
+        features = df_train["feature"].columns
+        weights = pd.Series(np.ones(len(df_train)))
+        booster = model.train_submodel(
+            df_train, dataset.prepare("valid", col_set=["feature", "label"]), weights, features
+        )
+        loss_curve = model.retrieve_loss_curve(booster, df_train, features)
+        # predict the trees one by one
+        x, y = df_train["feature"].values, df_train["label"].values.squeeze()
+        pred_tree = np.zeros(len(x))
+        for i_tree in range(booster.num_trees()):
+            pred_tree += booster.predict(x, start_iteration=i_tree, num_iteration=1)
+            np.testing.assert_allclose(loss_curve.iloc[:, i_tree].values, (y - pred_tree) ** 2)
+
+    def test_sample_reweight(self):
+        rng = np.random.default_rng(0)
+        loss_curve = pd.DataFrame(rng.random((100, 20)))
+        loss_values = pd.Series(rng.random(100))
+        model = _get_model(bins_sr=4)
+        weights = model.sample_reweight(loss_curve, loss_values, 2)
+        # the weight of each sample is determined by the average h-value of its bin
+        l_start = loss_curve.rank(axis=0, pct=True).iloc[:, :2].mean(axis=1)
+        l_end = loss_curve.rank(axis=0, pct=True).iloc[:, -2:].mean(axis=1)
+        h = (-loss_values).rank(pct=True) + (l_end / l_start).rank(pct=True)
+        h_avg = h.groupby(pd.cut(h, 4), observed=False).transform("mean")
+        np.testing.assert_allclose(weights.values, 1.0 / (0.5**2 * h_avg.values + 0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
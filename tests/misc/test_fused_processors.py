@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", periods=30)
+    insts = [f"SH60000{i}" for i in range(8)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    feature = pd.DataFrame(
+        rng.normal(size=(len(index), 4)).astype(np.float32),
+        index=index,
+        columns=pd.MultiIndex.from_product([["feature"], [f"f{i}" for i in range(4)]]),
+    )
+    feature.iloc[::5, 1] = np.nan
+    feature.iloc[:, 3] = 1.0
+    label = pd.DataFrame(
+        rng.normal(size=(len(index), 1)).astype(np.float32),
+        index=index,
+        columns=pd.MultiIndex.from_tuples([("label", "LABEL0")]),
+    )
+    label.iloc[::7] = np.nan
+    # the data is stored in multiple blocks like the output of QlibDataLoader
+    return pd.concat([feature, label], axis=1)
+
+
+FIT = {"fit_start_time": "2020-01-01", "fit_end_time": "2020-01-20"}
+
+
+class TestFusedProcessors(unittest.TestCase):
+    def _get_handler(self, df, **kwargs):
+        return DataHandlerLP(
+            data_loader=StaticDataLoader(df),
+            shared_processors=kwargs.pop("shared_processors", []),
+            infer_processors=[
+                {"class": "RobustZScoreNorm", "kwargs": dict(fields_group="feature", **FIT)},
+                {"class": "Fillna", "kwargs": {"fields_group": "feature"}},
+                {"class": "ZScoreNorm", "kwargs": dict(fields_group="feature", **FIT)},
+                {"class": "MinMaxNorm", "kwargs": dict(fields_group="feature", **FIT)},
+                "TanhProcess",
+            ],
+            learn_processors=[
+                "DropnaLabel",
+                {"class": "CSRankNorm", "kwargs": {"fields_group": "label"}},
+                {"class": "Fillna", "kwargs": {"fields_group": "label", "fill_value": 1}},
+            ],
+            **kwargs,
+        )
+
+    def test_fused_same_result(self):
+        for process_type in (DataHandlerLP.PTYPE_A, DataHandlerLP.PTYPE_I):
+            for shared_processors in ([], [{"class": "Fillna", "kwargs": {"fields_group": "label"}}]):
+                with self.subTest(process_type=process_type, shared_processors=shared_processors):
+                    kwargs = {"process_type": process_type, "shared_processors": shared_processors}
+                    df = _gen_df()
+                    raw = df.copy()
+                    dh = self._get_handler(df, **kwargs)
+                    # the raw data is not modified
+                    pd.testing.assert_frame_equal(dh._data, raw)
+
+                    # processing with pandas only
+                    dh_ref = self._get_handler(_gen_df(), init_data=False, **kwargs)
+                    for proc in dh_ref.get_all_processors():
+                        proc.get_kernel = lambda columns: None
+                    dh_ref.setup_data()
+                    for data_key in (DataHandlerLP.DK_I, DataHandlerLP.DK_L):
+                        pd.testing.assert_frame_equal(dh.fetch(data_key=data_key), dh_ref.fetch(data_key=data_key))
+                    self.assertFalse(np.may_share_memory(dh._infer.values, dh._learn.values))
+                    self.assertFalse(np.may_share_memory(dh._data.values, dh._infer.values))
+
+    def test_kernel_inplace(self):
+        dh = self._get_handler(_gen_df())
+        # consolidated into a single block
+        data = dh._data.copy()
+        values = data.values
+        for proc in dh.infer_processors:
+            proc.get_kernel(data.columns)(values)
+        pd.testing.assert_frame_equal(data, dh._infer)
+
+
+if __name__ == "__main__":
+    unittest.main()
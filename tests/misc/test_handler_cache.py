@@ -0,0 +1,96 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.config import C
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+
+
+class CountingHandler(DataHandlerLP):
+    n_process = 0
+
+    def process_data(self, with_fit: bool = False):
+        CountingHandler.n_process += 1
+        super().process_data(with_fit=with_fit)
+
+
+def _gen_df(seed=0):
+    dates = pd.date_range("2020-01-01", periods=20)
+    insts = [f"SH60000{i}" for i in range(5)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(len(index), 3)).astype(np.float32)
+    values[::7, 0] = np.nan
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("label", "LABEL0")])
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+class TestHandlerCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._cache_path = C.get("handler_cache_path", None)
+        C["handler_cache_path"] = self._tmp.name
+        CountingHandler.n_process = 0
+
+    def tearDown(self):
+        C["handler_cache_path"] = self._cache_path
+        self._tmp.cleanup()
+
+    def _get_handler(self, df, fit_end_time="2020-01-10", **kwargs):
+        return CountingHandler(
+            data_loader=StaticDataLoader(df),
+            infer_processors=[
+                {
+                    "class": "ZScoreNorm",
+                    "kwargs": {"fit_start_time": "2020-01-01", "fit_end_time": fit_end_time, "fields_group": "feature"},
+                },
+                {"class": "Fillna", "kwargs": {"fields_group": "feature"}},
+            ],
+            learn_processors=["DropnaLabel"],
+            enable_cache=True,
+            **kwargs,
+        )
+
+    def test_cache_hit(self):
+        df = _gen_df()
+        dh = self._get_handler(df)
+        self.assertEqual(CountingHandler.n_process, 1)
+
+        dh_cached = self._get_handler(df)
+        self.assertEqual(CountingHandler.n_process, 1)
+        for data_key in (DataHandlerLP.DK_R, DataHandlerLP.DK_I, DataHandlerLP.DK_L):
+            pd.testing.assert_frame_equal(dh.fetch(data_key=data_key), dh_cached.fetch(data_key=data_key))
+        # the fitted parameters are restored with the data
+        np.testing.assert_allclose(dh_cached.infer_processors[0].mean_train, dh.infer_processors[0].mean_train)
+        # the cached data is memory-mapped and copy-on-write
+        base = dh_cached._infer.values
+        while not isinstance(base, np.memmap) and base.base is not None:
+            base = base.base
+        self.assertIsInstance(base, np.memmap)
+        dh_cached._infer.iloc[0, 0] = 100.0
+        dh_again = self._get_handler(df)
+        self.assertNotEqual(dh_again._infer.iloc[0, 0], 100.0)
+        self.assertEqual(CountingHandler.n_process, 1)
+
+    def test_cache_miss(self):
+        df = _gen_df()
+        self._get_handler(df)
+        # different fit parameters
+        self._get_handler(df, fit_end_time="2020-01-15")
+        self.assertEqual(CountingHandler.n_process, 2)
+        # different data
+        self._get_handler(_gen_df(seed=1))
+        self.assertEqual(CountingHandler.n_process, 3)
+        # different time range
+        self._get_handler(df, start_time="2020-01-05")
+        self.assertEqual(CountingHandler.n_process, 4)
+        # the cache is disabled
+        self._get_handler(df).setup_data(enable_cache=False)
+        self.assertEqual(CountingHandler.n_process, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset import DatasetH, TSDatasetH
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+from qlib.data.dataset.processor import Processor, get_group_columns
+
+
+class RollingMean(Processor):
+    """the mean of the recent 3 periods of each instrument"""
+
+    def __init__(self, fields_group=None):
+        self.fields_group = fields_group
+
+    def __call__(self, df):
+        cols = get_group_columns(df, self.fields_group)
+        df[cols] = df[cols].groupby(level="instrument", group_keys=False).rolling(3, min_periods=1).mean().droplevel(0)
+        return df
+
+    def get_lookback(self) -> int:
+        return 2
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", "2020-04-30", freq="B")
+    insts = [f"SH60000{i}" for i in range(5)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("label", "LABEL0")])
+    return pd.DataFrame(rng.normal(size=(len(index), 3)), index=index, columns=columns)
+
+
+class TestInferData(unittest.TestCase):
+    def _get_handler(self, **kwargs):
+        return DataHandlerLP(
+            start_time="2020-01-01",
+            end_time="2020-04-30",
+            data_loader=StaticDataLoader(_gen_df()),
+            infer_processors=[
+                {
+                    "class": "ZScoreNorm",
+                    "kwargs": {"fit_start_time": "2020-01-01", "fit_end_time": "2020-02-28", "fields_group": "feature"},
+                },
+                {"class": "RollingMean", "module_path": __name__, "kwargs": {"fields_group": "feature"}},
+                {"class": "CSZScoreNorm", "kwargs": {"fields_group": "feature"}},
+            ],
+            learn_processors=["DropnaLabel"],
+            **kwargs,
+        )
+
+    @staticmethod
+    def _reload(obj):
+        # the fitted object is saved without data, e.g. in the recorder
+        obj.config(dump_all=False, recursive=True)
+        obj = pickle.loads(pickle.dumps(obj))
+        # the data of `StaticDataLoader` is not pickled
+        handler = obj.handler if isinstance(obj, DatasetH) else obj
+        handler.data_loader = StaticDataLoader(_gen_df())
+        return obj
+
+    def test_handler(self):
+        handler = self._get_handler()
+        infer_handler = self._reload(handler)
+        infer_handler.setup_infer_data("2020-03-02", "2020-03-04")
+        df = infer_handler.fetch(data_key=DataHandlerLP.DK_I)
+        self.assertEqual(
+            df.index.get_level_values("datetime").unique().tolist(), list(pd.bdate_range("2020-03-02", "2020-03-04"))
+        )
+        pd.testing.assert_frame_equal(df, handler.fetch(slice("2020-03-02", "2020-03-04")))
+        # the processors are not fitted again
+        for proc, proc_ref in zip(infer_handler.infer_processors, handler.infer_processors):
+            if hasattr(proc_ref, "mean_train"):
+                np.testing.assert_array_equal(proc.mean_train, proc_ref.mean_train)
+        with self.assertRaises(AttributeError):
+            infer_handler.fetch(data_key=DataHandlerLP.DK_L)
+
+    def test_dataset(self):
+        segments = {"train": ("2020-01-01", "2020-02-28"), "test": ("2020-03-02", "2020-04-30")}
+        for cls, kwargs in (DatasetH, {}), (TSDatasetH, {"step_len": 5}):
+            with self.subTest(cls=cls.__name__):
+                ds = cls(handler=self._get_handler(), segments=segments, **kwargs)
+                infer_ds = self._reload(ds)
+                infer_ds.setup_infer_data("2020-04-30")
+                self.assertEqual(infer_ds.segments["test"], ("2020-04-30", "2020-04-30"))
+                data = infer_ds.prepare("test", col_set="feature", data_key=DataHandlerLP.DK_I)
+                expected = ds.prepare(("2020-04-30", "2020-04-30"), col_set="feature", data_key=DataHandlerLP.DK_I)
+                if cls is TSDatasetH:
+                    self.assertEqual(len(infer_ds.cal), 5)
+                    np.testing.assert_allclose(data[np.arange(len(data))], expected[np.arange(len(expected))])
+                else:
+                    pd.testing.assert_frame_equal(data, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
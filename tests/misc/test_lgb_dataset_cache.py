@@ -0,0 +1,111 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from qlib.contrib.model.gbdt import LGBModel, _get_float_values
+from qlib.data.dataset import DatasetH
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", "2020-06-30", freq="B")
+    insts = [f"SH60000{i}" for i in range(8)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("feature", "f2"), ("label", "LABEL0")])
+    df = pd.DataFrame(rng.normal(size=(len(index), 4)).astype(np.float32), index=index, columns=columns)
+    df[("label", "LABEL0")] += df[("feature", "f0")]
+    return df
+
+
+# the segments of two rolling tasks
+ROLLING_SEGMENTS = [
+    {"train": ("2020-01-01", "2020-03-31"), "valid": ("2020-04-01", "2020-04-30")},
+    {"train": ("2020-02-01", "2020-04-30"), "valid": ("2020-05-01", "2020-05-31")},
+]
+
+
+class TestLGBDatasetCache(unittest.TestCase):
+    def _get_dataset(self, df, segments, out_of_core=False):
+        fmt = [{"class": "DiskBlockFormat", "kwargs": {"freq": "M"}}] if out_of_core else []
+        handler = DataHandlerLP(
+            data_loader=StaticDataLoader(df),
+            infer_processors=fmt,
+            learn_processors=fmt,
+            process_type=DataHandlerLP.PTYPE_I,
+            drop_raw=True,
+        )
+        return DatasetH(handler, segments={**segments, "test": ("2020-06-01", "2020-06-30")})
+
+    def _fit_predict(self, model, dataset):
+        ds_l = model._prepare_data(dataset)
+        ds, names = list(zip(*ds_l))
+        evals_result = {}
+        model.model = lgb.train(
+            model.params,
+            ds[0],
+            num_boost_round=10,
+            valid_sets=ds,
+            valid_names=names,
+            callbacks=[lgb.record_evaluation(evals_result)],
+        )
+        return model.predict(dataset), evals_result
+
+    def test_float_values(self):
+        df = _gen_df()
+        x = _get_float_values(df["feature"])
+        self.assertEqual(x.dtype, np.float32)
+        self.assertTrue(x.flags.c_contiguous)
+        np.testing.assert_array_equal(x, df["feature"].values)
+        self.assertEqual(_get_float_values(df["feature"].astype(np.float64)).dtype, np.float64)
+
+    def test_binary_cache(self):
+        df = _gen_df()
+        kwargs = {"num_leaves": 4, "min_data_in_leaf": 5, "seed": 0, "num_threads": 1}
+        with tempfile.TemporaryDirectory() as tmp:
+            for segments in ROLLING_SEGMENTS:
+                ds = self._get_dataset(df, segments)
+                pred_ref, res_ref = self._fit_predict(LGBModel(**kwargs), ds)
+                pred_l = []
+                for _ in range(2):
+                    # the datasets are constructed and cached at first, then loaded from the binary files
+                    pred, res = self._fit_predict(LGBModel(dataset_cache_dir=tmp, **kwargs), ds)
+                    self.assertEqual(res, res_ref)
+                    pred_l.append(pred)
+                pd.testing.assert_series_equal(pred_l[0], pred_ref)
+                pd.testing.assert_series_equal(pred_l[1], pred_ref)
+            # the train & valid datasets of each task
+            self.assertEqual(len(list(Path(tmp).glob("*.bin"))), 4)
+            # the datasets depend on the parameters of the bins
+            self._fit_predict(LGBModel(dataset_cache_dir=tmp, max_bin=15, **kwargs), ds)
+            self.assertEqual(len(list(Path(tmp).glob("*.bin"))), 6)
+            self.assertEqual(len(list(Path(tmp).glob("*.tmp"))), 0)
+
+    def test_bin_reference(self):
+        df = _gen_df()
+        kwargs = {"num_leaves": 4, "min_data_in_leaf": 5, "seed": 0, "num_threads": 1, "bin_construct_sample_cnt": 300}
+        with tempfile.TemporaryDirectory() as tmp:
+            for segments in ROLLING_SEGMENTS:
+                ds = self._get_dataset(df, segments)
+                model = LGBModel(bin_reference=("2020-01-01", "2020-02-28"), **kwargs)
+                pred_ref, res_ref = self._fit_predict(model, ds)
+                ref = model._bin_ref[1]
+                # the bins are reused by refitting
+                self._fit_predict(model, ds)
+                self.assertIs(model._bin_ref[1], ref)
+                for out_of_core in (False, True):
+                    model = LGBModel(bin_reference=("2020-01-01", "2020-02-28"), dataset_cache_dir=tmp, **kwargs)
+                    pred, res = self._fit_predict(model, self._get_dataset(df, segments, out_of_core))
+                    self.assertEqual(res, res_ref)
+                    pd.testing.assert_series_equal(pred, pred_ref, check_index_type=False)
+            # the reference is shared by the tasks
+            self.assertEqual(len(list(Path(tmp).glob("*.bin"))), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
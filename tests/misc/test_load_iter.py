@@ -0,0 +1,109 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader, get_chunk_ranges
+from qlib.data.dataset.storage import DiskBlockStorage
+
+
+def _gen_df():
+    dates = pd.date_range("2019-11-01", "2020-04-30", freq="B")
+    insts = [f"SH60000{i}" for i in range(5)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(len(index), 3)).astype(np.float32)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("label", "LABEL0")])
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+class TestLoadIter(unittest.TestCase):
+    def test_chunk_ranges(self):
+        self.assertEqual(
+            get_chunk_ranges("2019-03-05", "2021-02-01", "1Y"),
+            [
+                (pd.Timestamp("2019-03-05"), pd.Timestamp("2019-12-31 23:59:59.999999999")),
+                (pd.Timestamp("2020-01-01"), pd.Timestamp("2020-12-31 23:59:59.999999999")),
+                (pd.Timestamp("2021-01-01"), pd.Timestamp("2021-02-01")),
+            ],
+        )
+
+    def test_load_iter(self):
+        df = _gen_df()
+        loader = StaticDataLoader(df)
+        for prefetch in (True, False):
+            chunks = list(
+                loader.load_iter(start_time="2019-12-15", end_time="2020-03-10", chunk="M", prefetch=prefetch)
+            )
+            self.assertEqual(len(chunks), 4)
+            pd.testing.assert_frame_equal(
+                pd.concat(chunks), loader.load(start_time="2019-12-15", end_time="2020-03-10")
+            )
+        # no data in the time range
+        chunks = list(loader.load_iter(start_time="2021-01-01", end_time="2021-03-01", chunk="M"))
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].empty)
+
+    def _get_handler(self, load_chunk=None, fit=False, disk=False, **kwargs):
+        infer_processors = [
+            {"class": "CSZScoreNorm", "kwargs": {"fields_group": "feature"}},
+            {"class": "Fillna", "kwargs": {"fields_group": "feature"}},
+        ]
+        if fit:
+            infer_processors.append(
+                {
+                    "class": "ZScoreNorm",
+                    "kwargs": {"fit_start_time": "2019-11-01", "fit_end_time": "2020-01-31", "fields_group": "feature"},
+                }
+            )
+        learn_processors = ["DropnaLabel", {"class": "CSRankNorm", "kwargs": {"fields_group": "label"}}]
+        if disk:
+            infer_processors.append({"class": "DiskBlockFormat", "kwargs": {"freq": "M"}})
+            learn_processors.append({"class": "DiskBlockFormat", "kwargs": {"freq": "M"}})
+        return DataHandlerLP(
+            start_time="2019-11-01",
+            end_time="2020-04-30",
+            data_loader=StaticDataLoader(_gen_df()),
+            infer_processors=infer_processors,
+            learn_processors=learn_processors,
+            load_chunk=load_chunk,
+            **kwargs,
+        )
+
+    def test_handler(self):
+        for kwargs in (
+            {},
+            {"fit": True},
+            {"drop_raw": True},
+            {"process_type": DataHandlerLP.PTYPE_I, "disk": True, "drop_raw": True},
+        ):
+            with self.subTest(**kwargs):
+                dh = self._get_handler(load_chunk="2M", **kwargs)
+                dh_ref = self._get_handler(**kwargs)
+                data_keys = [DataHandlerLP.DK_I, DataHandlerLP.DK_L]
+                if not kwargs.get("drop_raw", False):
+                    data_keys.append(DataHandlerLP.DK_R)
+                for data_key in data_keys:
+                    pd.testing.assert_frame_equal(
+                        dh.fetch(data_key=data_key), dh_ref.fetch(data_key=data_key), check_index_type=False
+                    )
+                if kwargs.get("disk", False):
+                    self.assertIsInstance(dh._infer, DiskBlockStorage)
+                    self.assertEqual(len(dh._infer.parts), 6)
+
+    def test_shared_chunks(self):
+        # the processed data sharing the same chunks are concatenated only once
+        dh = DataHandlerLP(
+            start_time="2019-11-01",
+            end_time="2020-04-30",
+            data_loader=StaticDataLoader(_gen_df()),
+            infer_processors=[{"class": "DropnaProcessor", "kwargs": {"fields_group": "feature"}}],
+            load_chunk="2M",
+        )
+        self.assertIs(dh._infer, dh._learn)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.backtest.high_performance_ds import NumpyQuote, PanelQuote
+from qlib.utils.index_data import IndexData
+
+
+def _gen_quote_df():
+    rng = np.random.default_rng(0)
+    times = pd.date_range("2020-01-02 09:30", periods=60, freq="1min")
+    index = pd.MultiIndex.from_product([["SH600000", "SH600001", "SZ000001"], times], names=["instrument", "datetime"])
+    df = pd.DataFrame(
+        {
+            "$close": rng.uniform(10, 11, len(index)).astype(np.float32),
+            "$volume": rng.uniform(0, 100, len(index)).astype(np.float32),
+            "limit_buy": rng.random(len(index)) < 0.3,
+        },
+        index=index,
+    )
+    df.loc[rng.random(len(index)) < 0.2, "$close"] = np.nan
+    # some rows are missing
+    return df[rng.random(len(index)) > 0.2]
+
+
+class TestPanelQuote(unittest.TestCase):
+    def test_get_data(self):
+        df = _gen_quote_df()
+        numpy_quote, panel_quote = NumpyQuote(df, "1min"), PanelQuote(df, "1min")
+        self.assertEqual(set(panel_quote.get_all_stock()), set(numpy_quote.get_all_stock()))
+        self.assertIsNone(panel_quote.get_data("SH600002", df.index[0][1], df.index[0][1], "$close"))
+
+        rng = np.random.default_rng(1)
+        times = pd.date_range("2020-01-02 09:25", periods=70, freq="1min")
+        for _ in range(300):
+            start, end = sorted(rng.choice(len(times), 2))
+            start_time, end_time = times[start], times[end] + pd.Timedelta("59s")
+            stock_id = rng.choice(["SH600000", "SH600001", "SZ000001"])
+            for field in ("$close", "$volume", "limit_buy"):
+                for method in (None, "sum", "mean", "last", "all", "ts_data_last"):
+                    exp = numpy_quote.get_data(stock_id, start_time, end_time, field, method)
+                    res = panel_quote.get_data(stock_id, start_time, end_time, field, method)
+                    if exp is None:
+                        self.assertIsNone(res)
+                    elif isinstance(exp, IndexData):
+                        self.assertIsInstance(res, IndexData)
+                        np.testing.assert_array_equal(res.index, exp.index)
+                        np.testing.assert_array_equal(res.data, exp.data.astype(res.data.dtype))
+                    else:
+                        np.testing.assert_allclose(res, exp, rtol=1e-6)
+                        self.assertEqual(isinstance(res, (bool, np.bool_)), isinstance(exp, (bool, np.bool_)))
+
+    def test_batch(self):
+        df = _gen_quote_df()
+        quote = PanelQuote(df, "1min")
+        stock_ids = ["SZ000001", "SH600002", "SH600000"]
+        # the ranges of more than one row, whose values are aggregated by `get_data`
+        start_idx, end_idx = np.array([0, 10, 5, 58, 30]), np.array([60, 20, 5, 60, 33])
+        for method in PanelQuote.AGG_METHODS:
+            for field in ("$close", "limit_buy"):
+                res = quote.agg_data(field, start_idx, end_idx, method, stock_ids=stock_ids)
+                self.assertEqual(res.shape, (len(start_idx), len(stock_ids)))
+                for k, (start, end) in enumerate(zip(start_idx, end_idx)):
+                    if end <= start:
+                        self.assertTrue(np.isnan(res[k]).all())
+                        continue
+                    start_time, end_time = quote.times[start], quote.times[end - 1] + pd.Timedelta("59s")
+                    for i, stock_id in enumerate(stock_ids):
+                        exp = quote.get_data(stock_id, start_time, end_time, field, method)
+                        np.testing.assert_allclose(res[k, i], np.nan if exp is None else exp, rtol=1e-6)
+
+        time = quote.times[3]
+        res = quote.get_batch_data(stock_ids, time, time + pd.Timedelta("59s"), "$close")
+        exp = [quote.get_data(stock_id, time, time, "$close") for stock_id in stock_ids]
+        np.testing.assert_array_equal(res, [np.nan if v is None else v for v in exp])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset import Dataset
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.model.trainer import ParallelTrainerR, TrainerR
+from qlib.utils import init_instance_by_config
+
+
+class FakeRecorder:
+    """The result of a task, which could be tagged like a Recorder"""
+
+    def __init__(self, **info):
+        self.info = info
+        self.tags = {}
+
+    def set_tags(self, **kwargs):
+        self.tags.update(kwargs)
+
+
+def _is_memmap(arr: np.ndarray) -> bool:
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return False
+
+
+def fake_train(task: dict, experiment_name: str, recorder_name: str = None) -> FakeRecorder:
+    dataset: Dataset = init_instance_by_config(task["dataset"], accept_types=Dataset)
+    x_train = dataset.prepare("train", col_set="feature", data_key=DataHandlerLP.DK_L)
+    x_test = dataset.prepare("test", col_set="feature", data_key=DataHandlerLP.DK_I)
+    return FakeRecorder(
+        train=x_train, test=x_test, memmap=_is_memmap(dataset.handler._infer.values), experiment=experiment_name
+    )
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", "2020-06-30", freq="B")
+    insts = [f"SH60000{i}" for i in range(5)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(len(index), 3)).astype(np.float32)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("label", "LABEL0")])
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def _gen_tasks(df) -> list:
+    tasks = []
+    for i in range(3):
+        train = (
+            pd.Timestamp("2020-01-01") + pd.DateOffset(months=i),
+            pd.Timestamp("2020-02-29") + pd.DateOffset(months=i),
+        )
+        test = (train[1] + pd.Timedelta(days=1), train[1] + pd.DateOffset(months=1))
+        handler = {
+            "class": "DataHandlerLP",
+            "module_path": "qlib.data.dataset.handler",
+            "kwargs": {
+                # the handler of each task ends at its test segment like the tasks of `RollingGen`
+                "start_time": "2020-01-01",
+                "end_time": test[1],
+                "data_loader": {"class": "StaticDataLoader", "kwargs": {"config": df}},
+                "infer_processors": [
+                    {
+                        "class": "ZScoreNorm",
+                        "kwargs": {
+                            "fit_start_time": "2020-01-01",
+                            "fit_end_time": "2020-02-29",
+                            "fields_group": "feature",
+                        },
+                    },
+                    {"class": "Fillna", "kwargs": {"fields_group": "feature"}},
+                ],
+                "learn_processors": ["DropnaLabel"],
+            },
+        }
+        tasks.append(
+            {
+                "dataset": {
+                    "class": "DatasetH",
+                    "module_path": "qlib.data.dataset",
+                    "kwargs": {"handler": handler, "segments": {"train": train, "test": test}},
+                }
+            }
+        )
+    return tasks
+
+
+class TestParallelTrainer(unittest.TestCase):
+    def test_train(self):
+        tasks = _gen_tasks(_gen_df())
+        recs_ref = TrainerR(experiment_name="exp", train_func=fake_train).train(tasks)
+        with tempfile.TemporaryDirectory() as tmp:
+            trainer = ParallelTrainerR(experiment_name="exp", train_func=fake_train, n_jobs=2, shared_dir=tmp)
+            recs = trainer.train(tasks)
+            # the tasks share one handler
+            self.assertEqual(len(list(Path(tmp).iterdir())), 1)
+        self.assertEqual(len(recs), len(tasks))
+        for rec, rec_ref in zip(recs, recs_ref):
+            self.assertTrue(rec.info["memmap"])
+            self.assertEqual(rec.info["experiment"], "exp")
+            self.assertEqual(rec.tags, {TrainerR.STATUS_KEY: TrainerR.STATUS_BEGIN})
+            for seg in ("train", "test"):
+                pd.testing.assert_frame_equal(rec.info[seg], rec_ref.info[seg])
+
+    def test_n_workers(self):
+        trainer = ParallelTrainerR(n_jobs=4)
+        self.assertEqual(trainer._get_n_workers(2), 2)
+        self.assertEqual(trainer._get_n_workers(10), 4)
+        trainer = ParallelTrainerR(n_jobs=4, memory_per_task=1 << 60)
+        self.assertEqual(trainer._get_n_workers(10), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
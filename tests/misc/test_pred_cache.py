@@ -0,0 +1,114 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset import DatasetH
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+from qlib.model.base import Model
+from qlib.model.pred_cache import PredCache
+from qlib.utils.exceptions import LoadObjectError
+
+
+class SumModel(Model):
+    """Predict the weighted sum of the features and count the predicted rows"""
+
+    def __init__(self, w=1.0):
+        self.w = w
+        self.n_rows = 0
+
+    def fit(self, dataset):
+        pass
+
+    def __getstate__(self):
+        # the counter is not a part of the model artifact
+        return {"w": self.w}
+
+    def predict(self, dataset, segment="test"):
+        x = dataset.prepare(segment, col_set="feature", data_key=DataHandlerLP.DK_I)
+        self.n_rows += len(x)
+        return x.sum(axis=1) * self.w
+
+
+class FakeRecorder:
+    def __init__(self):
+        self.artifacts = {}
+
+    def save_objects(self, artifact_path=None, **kwargs):
+        for name, obj in kwargs.items():
+            self.artifacts[f"{artifact_path}/{name}"] = obj
+
+    def load_object(self, name):
+        if name not in self.artifacts:
+            raise LoadObjectError(name)
+        return self.artifacts[name]
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", "2020-06-30", freq="B")
+    index = pd.MultiIndex.from_product([dates, ["SH600000", "SH600001"]], names=["datetime", "instrument"])
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("label", "LABEL0")])
+    return pd.DataFrame(np.random.default_rng(0).normal(size=(len(index), 3)), index=index, columns=columns)
+
+
+def _get_dataset(df, test, infer_processors=()):
+    handler = DataHandlerLP(data_loader=StaticDataLoader(df), infer_processors=list(infer_processors))
+    return DatasetH(handler, segments={"test": test})
+
+
+class TestPredCache(unittest.TestCase):
+    def test_predict(self):
+        df = _gen_df()
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PredCache(cache_dir=tmp)
+            model = SumModel()
+            pred = cache.predict(model, _get_dataset(df, ("2020-02-01", "2020-03-31")))
+            pd.testing.assert_series_equal(pred, SumModel().predict(_get_dataset(df, ("2020-02-01", "2020-03-31"))))
+            self.assertEqual(model.n_rows, len(pred))
+            self.assertEqual(len(list(Path(tmp).rglob("*.pkl"))), 2)
+
+            # only the missing dates are predicted
+            ds = _get_dataset(df, ("2020-01-15", "2020-04-15"))
+            pred = cache.predict(model, ds)
+            pd.testing.assert_series_equal(pred, SumModel().predict(ds))
+            n_missing = len(pd.bdate_range("2020-01-15", "2020-01-31")) + len(
+                pd.bdate_range("2020-04-01", "2020-04-15")
+            )
+            self.assertEqual(model.n_rows, len(df.loc["2020-02-01":"2020-03-31"]) + n_missing * 2)
+            self.assertEqual(len(list(Path(tmp).rglob("*.pkl"))), 4)
+            n_rows = model.n_rows
+            cache.predict(model, ds)
+            self.assertEqual(model.n_rows, n_rows)
+
+            # another model or another processing of the data is not cached
+            model = SumModel(w=2.0)
+            pd.testing.assert_series_equal(cache.predict(model, ds), SumModel(w=2.0).predict(ds))
+            self.assertGreater(model.n_rows, 0)
+            model = SumModel()
+            ds = _get_dataset(df, ("2020-01-15", "2020-04-15"), infer_processors=[{"class": "Fillna"}])
+            cache.predict(model, ds)
+            self.assertGreater(model.n_rows, 0)
+
+    def test_recorder(self):
+        df = _gen_df()
+        recorder = FakeRecorder()
+        ds = _get_dataset(df, ("2020-03-01", "2020-05-31"))
+        pred = PredCache(recorder=recorder).predict(SumModel(), ds)
+        self.assertEqual(len(recorder.artifacts), 3)
+        self.assertTrue(all(name.startswith(PredCache.ARTIFACT_DIR) for name in recorder.artifacts))
+        # re-analysing the experiment doesn't predict the cached dates
+        model = SumModel()
+        pd.testing.assert_series_equal(PredCache(recorder=recorder).predict(model, ds), pred)
+        self.assertEqual(model.n_rows, 0)
+
+    def test_runs(self):
+        dates = pd.bdate_range("2020-01-01", periods=6)
+        runs = PredCache._get_runs(dates, np.array([True, True, False, True, False, True]))
+        self.assertEqual(runs, [(dates[0], dates[1]), (dates[3], dates[3]), (dates[5], dates[5])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.cache import SharedExpressionCache
+
+
+def _load(start_index, end_index):
+    return pd.Series(
+        np.arange(start_index, end_index + 1, dtype=np.float32), index=pd.RangeIndex(start_index, end_index + 1)
+    )
+
+
+def _fail_load(start_index, end_index):
+    raise AssertionError("the series should be loaded from the shared cache")
+
+
+def _worker_fetch(name, start_index, end_index):
+    cache = SharedExpressionCache(name=name)
+    try:
+        return cache.fetch(("uri", "day", "sh600000", "$close"), start_index, end_index, _fail_load).tolist()
+    finally:
+        cache.close()
+
+
+class TestSharedExpressionCache(unittest.TestCase):
+    def test_fetch(self):
+        with SharedExpressionCache(n_slots=16) as cache:
+            calls = []
+
+            def loader(s, e):
+                calls.append((s, e))
+                return _load(s, e)
+
+            key = ("uri", "day", "sh600000", "$close")
+            s = cache.fetch(key, 10, 20, loader)
+            self.assertEqual(s.index[0], 10)
+            self.assertEqual(len(s), 11)
+            # covered range
+            s = cache.fetch(key, 12, 15, loader)
+            self.assertEqual(s.tolist(), list(range(12, 16)))
+            self.assertFalse(s.values.flags.writeable)
+            self.assertEqual(calls, [(10, 20)])
+            # not covered: the union range is loaded
+            s = cache.fetch(key, 5, 12, loader)
+            self.assertEqual(s.tolist(), list(range(5, 13)))
+            self.assertEqual(calls[-1], (5, 20))
+            self.assertEqual(cache.fetch(key, 5, 20, loader).tolist(), list(range(5, 21)))
+            self.assertEqual(len(calls), 2)
+
+            # other processes share the blocks
+            ctx = multiprocessing.get_context("spawn")
+            with ctx.Pool(2) as pool:
+                res = pool.starmap(_worker_fetch, [(cache.name, 6, 8), (cache.name, 18, 20)])
+            self.assertEqual(res, [[6, 7, 8], [18, 19, 20]])
+
+    def test_lru(self):
+        nbytes = 10 * 4
+        with SharedExpressionCache(size_limit=nbytes * 2, n_slots=64) as cache:
+            for i in range(3):
+                cache.fetch(("uri", str(i)), 0, 9, _load)
+                if i == 1:
+                    # make the first block the most recent one
+                    cache.fetch(("uri", "0"), 0, 9, _fail_load)
+            self.assertEqual(len(cache), 2)
+            self.assertLessEqual(cache.total_size, nbytes * 2)
+            cache.fetch(("uri", "0"), 0, 9, _fail_load)
+            with self.assertRaises(AssertionError):
+                cache.fetch(("uri", "1"), 0, 9, _fail_load)
+
+    def test_release(self):
+        nbytes = 10 * 4
+        with SharedExpressionCache(size_limit=nbytes * 2, n_slots=64) as cache:
+            other = SharedExpressionCache(name=cache.name)
+            try:
+                cache.fetch(("uri", "0"), 0, 9, _load)
+                self.assertEqual(other.fetch(("uri", "0"), 0, 9, _fail_load).tolist(), list(range(10)))
+                self.assertEqual(len(other._blocks), 1)
+                # the block is replaced and the others are evicted by the owner
+                cache.fetch(("uri", "0"), 0, 19, _load)
+                for i in range(1, 3):
+                    cache.fetch(("uri", str(i)), 0, 9, _load)
+                    self.assertEqual(len(cache._blocks), len(cache))
+                # the other process detaches from the removed blocks at next lookup
+                other.fetch(("uri", "2"), 0, 9, _fail_load)
+                self.assertEqual(list(other._blocks), [int(cache._slots["gen"][cache._slots["key"] > 1].max())])
+                self.assertEqual(other._stale_blocks, [])
+            finally:
+                other.close()
+
+    def test_rehash(self):
+        with SharedExpressionCache(n_slots=8) as cache:
+            for i in range(20):
+                cache.fetch(("uri", str(i)), 0, 4, _load)
+            self.assertLess(len(cache), 8)
+            self.assertEqual(cache.fetch(("uri", "19"), 0, 4, _fail_load).tolist(), list(range(5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+from qlib.data.dataset.processor import MinMaxNorm, RobustZScoreNorm, ZScoreNorm
+from qlib.utils.data import QuantileSketch, RunningStats
+
+
+def _gen_df():
+    dates = pd.date_range("2019-11-01", "2020-04-30", freq="B")
+    insts = [f"SH60000{i}" for i in range(8)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    rng = np.random.default_rng(0)
+    values = np.stack(
+        [
+            rng.normal(3.0, 2.0, size=len(index)),
+            rng.lognormal(size=len(index)),
+            np.full(len(index), 1.5),
+            rng.normal(size=len(index)),
+        ],
+        axis=1,
+    ).astype(np.float32)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("feature", "f2"), ("label", "LABEL0")])
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+class TestStreamingStats(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.normal(1.0, 3.0, size=(5000, 4))
+        self.x[rng.random(self.x.shape) < 0.1] = np.nan
+        self.x[:, 3] = np.nan
+
+    def test_running_stats(self):
+        stats = RunningStats(4)
+        for chunk in np.array_split(self.x, 7):
+            stats.update(chunk)
+        # the stats of the parts of the data are mergeable
+        merged = RunningStats(4).update(self.x[:1000]).merge(RunningStats(4).update(self.x[1000:]))
+        with np.errstate(invalid="ignore"), self.assertWarns(RuntimeWarning):
+            expected = [np.nanmean(self.x, axis=0), np.nanstd(self.x, axis=0), np.nanmin(self.x, axis=0)]
+        for s in stats, merged:
+            np.testing.assert_allclose(s.mean, expected[0])
+            np.testing.assert_allclose(s.std, expected[1])
+            np.testing.assert_array_equal(s.min, expected[2])
+        self.assertEqual(stats.count.tolist(), (~np.isnan(self.x)).sum(axis=0).tolist())
+
+    def test_quantile_sketch(self):
+        sketch = QuantileSketch(4, rel_err=0.01)
+        for chunk in np.array_split(self.x, 7):
+            sketch.update(chunk)
+        merged = QuantileSketch(4, rel_err=0.01).update(self.x[:1000]).merge(QuantileSketch(4).update(self.x[1000:]))
+        np.testing.assert_array_equal(sketch.counts, merged.counts)
+        for q in 0.0, 0.1, 0.5, 0.9, 1.0:
+            with self.assertWarns(RuntimeWarning):
+                expected = np.nanquantile(self.x, q, axis=0)
+            est = sketch.quantile(q)
+            self.assertTrue(np.isnan(est[3]))
+            self.assertTrue((np.abs(est[:3] - expected[:3]) <= 0.01 * np.abs(expected[:3]) + 1e-12).all())
+        with self.assertRaises(ValueError):
+            sketch.merge(QuantileSketch(4, rel_err=0.02))
+
+
+class TestFitChunks(unittest.TestCase):
+    def test_fit_chunks(self):
+        df = _gen_df()
+        dates = df.index.get_level_values("datetime")
+        bounds = pd.to_datetime(["2019-11-01", "2020-01-01", "2020-03-01", "2020-05-01"])
+        chunks = [df[(dates >= start) & (dates < end)] for start, end in zip(bounds[:-1], bounds[1:])]
+        kwargs = {"fit_start_time": "2019-12-01", "fit_end_time": "2020-03-31", "fields_group": "feature"}
+        for cls, attrs in (
+            (ZScoreNorm, ["mean_train", "std_train"]),
+            (MinMaxNorm, ["min_val", "max_val"]),
+            (RobustZScoreNorm, ["mean_train", "std_train"]),
+        ):
+            with self.subTest(cls=cls.__name__):
+                proc, proc_ref = cls(**kwargs), cls(**kwargs)
+                proc.fit_chunks(chunks)
+                proc_ref.fit(df)
+                self.assertTrue(proc.cols.equals(proc_ref.cols))
+                for attr in attrs:
+                    res, expected = getattr(proc, attr), getattr(proc_ref, attr)
+                    self.assertEqual(res.dtype, expected.dtype)
+                    if cls is RobustZScoreNorm:
+                        # bounded by the relative error of the sketches; the constant column is exact
+                        tol = 2 * cls.SKETCH_REL_ERR * (np.abs(proc_ref.mean_train) + proc_ref.std_train)
+                        self.assertTrue((np.abs(res - expected) <= tol).all())
+                        self.assertEqual(res[2], expected[2])
+                    else:
+                        np.testing.assert_allclose(res, expected, rtol=1e-5)
+                # there is no data in the fitting time range
+                for empty_chunks in ([], chunks[:1]):
+                    with self.assertRaises(ValueError):
+                        cls(**{**kwargs, "fit_start_time": "2020-01-01"}).fit_chunks(empty_chunks)
+
+    def _get_handler(self, load_chunk=None, **kwargs):
+        fit_kwargs = {"fit_start_time": "2019-11-01", "fit_end_time": "2020-02-29"}
+        return DataHandlerLP(
+            start_time="2019-11-01",
+            end_time="2020-04-30",
+            data_loader=StaticDataLoader(_gen_df()),
+            shared_processors=[{"class": "MinMaxNorm", "kwargs": {**fit_kwargs, "fields_group": "label"}}],
+            infer_processors=[
+                {"class": "ZScoreNorm", "kwargs": {**fit_kwargs, "fields_group": "feature"}},
+                {"class": "Fillna", "kwargs": {"fields_group": "feature"}},
+            ],
+            learn_processors=[
+                "DropnaLabel",
+                {"class": "RobustZScoreNorm", "kwargs": {**fit_kwargs, "fields_group": "feature"}},
+            ],
+            load_chunk=load_chunk,
+            **kwargs,
+        )
+
+    def test_handler(self):
+        for kwargs in (
+            {},
+            {"process_type": DataHandlerLP.PTYPE_I},
+            {"init_data": False},
+        ):
+            with self.subTest(**kwargs):
+                init_type = DataHandlerLP.IT_FIT_IND if kwargs.pop("init_data", True) is False else None
+                if init_type is None:
+                    dh, dh_ref = self._get_handler("1M", **kwargs), self._get_handler(**kwargs)
+                else:
+                    dh, dh_ref = self._get_handler("1M", init_data=False), self._get_handler(init_data=False)
+                    dh.setup_data(init_type=init_type)
+                    dh_ref.setup_data(init_type=init_type)
+                # the processors before the robust one are fitted exactly (the stats are accumulated in float64)
+                for data_key in DataHandlerLP.DK_I, DataHandlerLP.DK_R:
+                    pd.testing.assert_frame_equal(
+                        dh.fetch(data_key=data_key), dh_ref.fetch(data_key=data_key), check_index_type=False, atol=1e-5
+                    )
+                learn, learn_ref = dh.fetch(data_key=DataHandlerLP.DK_L), dh_ref.fetch(data_key=DataHandlerLP.DK_L)
+                pd.testing.assert_index_equal(learn.index, learn_ref.index, exact=False)
+                np.testing.assert_allclose(learn.values, learn_ref.values, atol=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from qlib.contrib.tuner.pruner import LGBPruningCallback, MedianPruner, get_best_loss, get_valid_curve
+from qlib.model.base import Model
+
+try:
+    from hyperopt import hp
+except ImportError:
+    hp = None
+
+
+class QuadraticModel(Model):
+    """A model whose validation loss is minimized at `a=0.3`"""
+
+    def __init__(self, a=0.0):
+        self.a = a
+
+    def fit(self, dataset, evals_result=None):
+        assert not dataset.prepare("valid", col_set="feature").empty
+        evals_result["valid"] = [(self.a - 0.3) ** 2 + 1.0 / (i + 1) for i in range(20)]
+
+    def predict(self, dataset, segment="test"):
+        raise NotImplementedError
+
+
+def _gen_task():
+    dates = pd.date_range("2020-01-01", "2020-03-31", freq="B")
+    index = pd.MultiIndex.from_product([dates, ["SH600000", "SH600001"]], names=["datetime", "instrument"])
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("label", "LABEL0")])
+    df = pd.DataFrame(np.random.default_rng(0).normal(size=(len(index), 2)), index=index, columns=columns)
+    return {
+        "model": {"class": "QuadraticModel", "module_path": __name__},
+        "dataset": {
+            "class": "DatasetH",
+            "module_path": "qlib.data.dataset",
+            "kwargs": {
+                "handler": {
+                    "class": "DataHandlerLP",
+                    "module_path": "qlib.data.dataset.handler",
+                    "kwargs": {"data_loader": {"class": "StaticDataLoader", "kwargs": {"config": df}}},
+                },
+                "segments": {"train": ("2020-01-01", "2020-02-29"), "valid": ("2020-03-01", "2020-03-31")},
+            },
+        },
+    }
+
+
+class TestPruner(unittest.TestCase):
+    def test_median_pruner(self):
+        pruner = MedianPruner(n_startup_trials=3, n_warmup_steps=2, interval_steps=2)
+        for curve in ([3.0, 2.0, 1.0, 0.5], [4.0, 3.0, 2.0], [5.0, 1.5, np.nan, 1.2, 1.0]):
+            self.assertFalse(pruner.should_prune(2, 100.0))
+            pruner.add_curve(curve)
+        self.assertEqual(len(pruner), 3)
+        # warming up
+        self.assertFalse(pruner.should_prune(1, 100.0))
+        # the medians of the best losses at step 2 and 4 are 1.2 and 1.0
+        self.assertTrue(pruner.should_prune(2, 1.3))
+        self.assertFalse(pruner.should_prune(2, 1.2))
+        self.assertFalse(pruner.should_prune(3, 100.0))
+        self.assertTrue(pruner.should_prune(4, 1.1))
+        self.assertFalse(pruner.should_prune(4, 0.9))
+
+    def test_valid_curve(self):
+        self.assertEqual(get_valid_curve({"valid": {"l2": [3, 2, 2.5], "l1": [1, 1, 1]}}), [3, 2, 2.5])
+        self.assertEqual(get_valid_curve({"valid": [0.1, 0.3]}, higher_is_better=True), [-0.1, -0.3])
+        self.assertEqual(get_best_loss([3, np.nan, 2.5]), 2.5)
+        self.assertIsNone(get_best_loss([]))
+
+    def test_lgb_pruning(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=(2000, 5))
+        y = x[:, 0] + rng.normal(scale=0.1, size=2000)
+        params = {"objective": "mse", "verbosity": -1, "num_threads": 1, "seed": 0}
+
+        def train(learning_rate, callbacks):
+            dtrain = lgb.Dataset(x[:1500], label=y[:1500])
+            dvalid = lgb.Dataset(x[1500:], label=y[1500:], reference=dtrain)
+            evals_result = {}
+            booster = lgb.train(
+                {**params, "learning_rate": learning_rate},
+                dtrain,
+                num_boost_round=50,
+                valid_sets=[dvalid],
+                valid_names=["valid"],
+                callbacks=[lgb.record_evaluation(evals_result)] + callbacks,
+            )
+            return booster, get_valid_curve(evals_result)
+
+        pruner = MedianPruner(n_startup_trials=2, n_warmup_steps=5)
+        for lr in (0.1, 0.2):
+            pruner.add_curve(train(lr, [])[1])
+        # the slow trial is pruned
+        callback = LGBPruningCallback(pruner)
+        booster, curve = train(0.001, [callback])
+        self.assertTrue(callback.pruned)
+        # stopped at the first step after warming up
+        self.assertEqual(booster.current_iteration(), 6)
+        self.assertLess(len(curve), 50)
+        # the good trial is not pruned
+        callback = LGBPruningCallback(pruner)
+        _, curve = train(0.15, [callback])
+        self.assertFalse(callback.pruned)
+        self.assertEqual(len(curve), 50)
+
+    def test_lgb_direction(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=(500, 3))
+        y = (x[:, 0] + rng.normal(scale=0.5, size=500) > 0).astype(float)
+        dtrain = lgb.Dataset(x[:400], label=y[:400])
+        dvalid = lgb.Dataset(x[400:], label=y[400:], reference=dtrain)
+        for metric, higher_is_better in (("auc", True), ("binary_logloss", False)):
+            # only the direction of the metric is recorded without a pruner
+            callback, evals_result = LGBPruningCallback(), {}
+            lgb.train(
+                {"objective": "binary", "metric": metric, "verbosity": -1, "num_threads": 1},
+                dtrain,
+                num_boost_round=5,
+                valid_sets=[dvalid],
+                valid_names=["valid"],
+                callbacks=[lgb.record_evaluation(evals_result), callback],
+            )
+            self.assertEqual(callback.higher_is_better, higher_is_better)
+            self.assertFalse(callback.pruned)
+            curve = get_valid_curve(evals_result, callback.higher_is_better)
+            self.assertEqual(len(curve), 5)
+            self.assertEqual(np.all(np.array(curve) < 0), higher_is_better)
+
+
+@unittest.skipIf(hp is None, "hyperopt is not installed")
+class TestParallelTuner(unittest.TestCase):
+    def test_tune(self):
+        from qlib.contrib.tuner.tuner import ParallelTuner  # pylint: disable=C0415
+
+        space = {"a": hp.uniform("a", 0, 1)}
+        for n_jobs in (1, 2):
+            tuner = ParallelTuner(_gen_task(), space, max_evals=8, n_jobs=n_jobs, pruner=MedianPruner(2, 5))
+            best_params = tuner.tune()
+            self.assertEqual(len(tuner.trials), 8)
+            losses = [t["result"]["loss"] for t in tuner.trials.trials]
+            self.assertAlmostEqual(tuner.best_res, min(losses))
+            self.assertAlmostEqual(tuner.best_res, (best_params["a"] - 0.3) ** 2 + 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
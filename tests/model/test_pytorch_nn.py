@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import qlib
+from qlib.data.dataset import DatasetH
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+from qlib.workflow import R
+
+try:
+    import torch
+    from qlib.contrib.model.pytorch_nn import DNNModelPytorch
+except ImportError:
+    torch = None
+
+
+SEGMENTS = {
+    "train": ("2020-01-01", "2020-03-15"),
+    "valid": ("2020-03-16", "2020-04-15"),
+    "test": ("2020-04-16", "2020-04-30"),
+}
+
+
+def _gen_df():
+    dates = pd.date_range("2020-01-01", "2020-04-30", freq="B")
+    insts = [f"SH60000{i}" for i in range(6)]
+    index = pd.MultiIndex.from_product([dates, insts], names=["datetime", "instrument"])
+    columns = pd.MultiIndex.from_tuples([("feature", "f0"), ("feature", "f1"), ("feature", "f2"), ("label", "LABEL0")])
+    values = np.random.default_rng(0).normal(size=(len(index), 4)).astype(np.float32)
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+@unittest.skipIf(torch is None, "torch is not installed")
+class TestDNNModelPytorch(unittest.TestCase):
+    def _get_dataset(self, df, out_of_core):
+        fmt = [{"class": "DiskBlockFormat", "kwargs": {"freq": "M"}}] if out_of_core else []
+        handler = DataHandlerLP(
+            data_loader=StaticDataLoader(df),
+            infer_processors=fmt,
+            learn_processors=fmt,
+            process_type=DataHandlerLP.PTYPE_I,
+            drop_raw=True,
+        )
+        return DatasetH(handler, segments=SEGMENTS)
+
+    def test_fit_chunks(self):
+        df = _gen_df()
+        datasets = [self._get_dataset(df, out_of_core) for out_of_core in (True, False)]
+        self.assertGreater(len(datasets[0].prepare_chunks("train", col_set=["feature", "label"])), 1)
+        self.assertGreater(len(datasets[0].prepare_chunks("valid", col_set=["feature", "label"])), 1)
+        preds, evals_results = [], []
+        with tempfile.TemporaryDirectory() as tmp:
+            qlib.init(provider_uri=tmp, region="cn", kernels=1, expression_cache=None, dataset_cache=None)
+            for ds in datasets:
+                model = DNNModelPytorch(
+                    max_steps=20,
+                    batch_size=32,
+                    eval_steps=5,
+                    seed=0,
+                    GPU=-1,
+                    pt_model_kwargs={"input_dim": 3, "layers": (8,)},
+                )
+                evals_result = {}
+                with R.start(experiment_name="test_dnn", uri=str(Path(tmp) / "mlruns")):
+                    model.fit(ds, evals_result=evals_result, save_path=str(Path(tmp) / "model.bin"))
+                preds.append(model.predict(ds))
+                evals_results.append(evals_result)
+        # the labels of all the chunks are used for training and validation
+        self.assertEqual(evals_results[0], evals_results[1])
+        pd.testing.assert_series_equal(preds[0], preds[1], check_index_type=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import importlib
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from qlib.data.dataset import DatasetH
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+
+try:
+    import torch
+    from qlib.contrib.model.pytorch_utils import IndexBatchSampler, TensorStore, get_data_loader, get_fit_data_loaders
+except ImportError:
+    torch = None
+
+# the models whose batches are gathered by `get_fit_data_loaders`
+LOADER_MODELS = [
+    ("pytorch_alstm", "ALSTM"),
+    ("pytorch_gru", "GRU"),
+    ("pytorch_krnn", "KRNN"),
+    ("pytorch_lstm", "LSTM"),
+    ("pytorch_sandwich", "Sandwich"),
+    ("pytorch_sfm", "SFM"),
+    ("pytorch_tcn", "TCN"),
+    ("pytorch_transformer", "TransformerModel"),
+    ("pytorch_localformer", "LocalformerModel"),
+]
+
+
+class _StopFit(Exception):
+    pass
+
+
+@unittest.skipIf(torch is None, "torch is not installed")
+class TestDataLoader(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.normal(size=(1000, 6))
+        self.y = rng.normal(size=1000)
+
+    def test_batches(self):
+        for shuffle in False, True:
+            for drop_last in False, True:
+                with self.subTest(shuffle=shuffle, drop_last=drop_last):
+                    np.random.seed(0)
+                    loader = get_data_loader([self.x, self.y], 64, shuffle=shuffle, drop_last=drop_last)
+                    batches = list(loader)
+                    self.assertEqual(len(batches), len(loader))
+                    # the batches are the same as shuffling the indices in NumPy
+                    np.random.seed(0)
+                    indices = np.arange(len(self.x))
+                    if shuffle:
+                        np.random.shuffle(indices)
+                    for i, (feature, label) in enumerate(batches):
+                        idx = indices[i * 64 : (i + 1) * 64]
+                        self.assertEqual(feature.dtype, torch.float32)
+                        np.testing.assert_array_equal(feature.numpy(), self.x[idx].astype(np.float32))
+                        np.testing.assert_array_equal(label.numpy(), self.y[idx].astype(np.float32))
+                    self.assertEqual(sum(len(b[0]) for b in batches), 960 if drop_last else 1000)
+
+    def test_store(self):
+        store = TensorStore(self.x)
+        self.assertEqual(len(store), 1000)
+        # the consecutive samples are views of the store
+        self.assertEqual(store[slice(0, 10)].data_ptr(), store.tensors[0].data_ptr())
+        np.testing.assert_array_equal(store[np.array([3, 1])].numpy(), self.x[[3, 1]].astype(np.float32))
+        self.assertEqual(len(IndexBatchSampler(1000, 64)), 16)
+        with self.assertRaises(ValueError):
+            TensorStore(self.x, self.y[:10])
+
+    def test_workers(self):
+        x, y = pd.DataFrame(self.x), pd.DataFrame(self.y)
+        loaders = get_fit_data_loaders(x, y, x, y, 100, num_workers=2)
+        for loader in loaders:
+            self.assertEqual(len(list(loader)), 10)
+        self.assertTrue(loaders[0].dataset.tensors[0].is_shared())
+        self.assertIs(loaders[0].dataset, loaders[1].dataset)
+
+
+@unittest.skipIf(torch is None, "torch is not installed")
+class TestModelLoaders(unittest.TestCase):
+    def test_num_workers(self):
+        dates = pd.date_range("2020-01-01", "2020-03-31", freq="B")
+        index = pd.MultiIndex.from_product([dates, ["SH600000", "SH600001"]], names=["datetime", "instrument"])
+        columns = pd.MultiIndex.from_tuples([("feature", f"f{i}") for i in range(6)] + [("label", "LABEL0")])
+        df = pd.DataFrame(np.random.default_rng(0).normal(size=(len(index), 7)), index=index, columns=columns)
+        segments = {
+            "train": ("2020-01-01", "2020-02-14"),
+            "valid": ("2020-02-15", "2020-03-10"),
+            "test": ("2020-03-11", "2020-03-31"),
+        }
+        dataset = DatasetH(DataHandlerLP(data_loader=StaticDataLoader(df)), segments=segments)
+        for module_name, cls_name in LOADER_MODELS:
+            with self.subTest(model=cls_name):
+                module = importlib.import_module(f"qlib.contrib.model.{module_name}")
+                model_cls = getattr(module, cls_name)
+                # the batches are gathered in the main process by default, regardless of `n_jobs`
+                self.assertEqual(model_cls(n_jobs=10).num_workers, 0)
+                with mock.patch.object(module, "get_fit_data_loaders", side_effect=_StopFit) as get_loaders:
+                    with self.assertRaises(_StopFit):
+                        model_cls(num_workers=2).fit(dataset)
+                self.assertEqual(get_loaders.call_args.kwargs["num_workers"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()